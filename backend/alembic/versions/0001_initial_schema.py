@@ -0,0 +1,98 @@
+"""Initial schema (as created by Base.metadata.create_all before migrations)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+Databases created by create_all are stamped at this revision on first
+startup instead of running it (see app/core/migrations.py).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'short_urls',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('short_code', sa.String(length=10), nullable=False),
+        sa.Column('long_url', sa.String(length=2048), nullable=False),
+        sa.Column('difficulty', sa.String(length=20), nullable=True),
+        sa.Column('challenge_text', sa.String(length=500), nullable=True),
+        sa.Column('hints', sa.JSON(), nullable=True),
+        sa.Column('correct_answers', sa.JSON(), nullable=True),
+        sa.Column('time_limit_seconds', sa.Integer(), nullable=True),
+        sa.Column('creator_ip', sa.String(length=45), nullable=True),
+        sa.Column('creator_user_agent', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.Column('total_views', sa.Integer(), nullable=True),
+        sa.Column('total_completions', sa.Integer(), nullable=True),
+        sa.Column('total_failures', sa.Integer(), nullable=True),
+        sa.Column('total_timeouts', sa.Integer(), nullable=True),
+        sa.Column('avg_completion_time_seconds', sa.Float(), nullable=True),
+        sa.Column('is_flagged', sa.Boolean(), nullable=True),
+        sa.Column('is_banned', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_short_urls_short_code', 'short_urls', ['short_code'], unique=True)
+    op.create_index('ix_short_urls_created_at', 'short_urls', ['created_at'])
+
+    op.create_table(
+        'url_analytics',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('short_code', sa.String(length=10), nullable=False),
+        sa.Column('session_start', sa.DateTime(), nullable=True),
+        sa.Column('session_end', sa.DateTime(), nullable=True),
+        sa.Column('visitor_ip', sa.String(length=45), nullable=True),
+        sa.Column('visitor_user_agent', sa.String(length=500), nullable=True),
+        sa.Column('visitor_country', sa.String(length=2), nullable=True),
+        sa.Column('referrer', sa.String(length=500), nullable=True),
+        sa.Column('outcome', sa.String(length=20), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('hints_used', sa.Integer(), nullable=True),
+        sa.Column('completion_time_seconds', sa.Float(), nullable=True),
+        sa.Column('score', sa.Integer(), nullable=True),
+        sa.Column('ads_shown', sa.Integer(), nullable=True),
+        sa.Column('ads_clicked', sa.Integer(), nullable=True),
+        sa.Column('estimated_revenue_usd', sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_url_analytics_short_code', 'url_analytics', ['short_code'])
+    op.create_index('ix_url_analytics_session_start', 'url_analytics', ['session_start'])
+    op.create_index('ix_url_analytics_outcome', 'url_analytics', ['outcome'])
+
+    op.create_table(
+        'leaderboard',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('short_code', sa.String(length=10), nullable=False),
+        sa.Column('player_nickname', sa.String(length=50), nullable=True),
+        sa.Column('player_country', sa.String(length=2), nullable=True),
+        sa.Column('completion_time_seconds', sa.Float(), nullable=False),
+        sa.Column('hints_used', sa.Integer(), nullable=True),
+        sa.Column('score', sa.Integer(), nullable=False),
+        sa.Column('difficulty', sa.String(length=20), nullable=True),
+        sa.Column('rank', sa.Integer(), nullable=True),
+        sa.Column('percentile', sa.Float(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_leaderboard_short_code', 'leaderboard', ['short_code'])
+    op.create_index('ix_leaderboard_completion_time_seconds', 'leaderboard', ['completion_time_seconds'])
+    op.create_index('ix_leaderboard_difficulty', 'leaderboard', ['difficulty'])
+    op.create_index('ix_leaderboard_rank', 'leaderboard', ['rank'])
+
+
+def downgrade() -> None:
+    op.drop_table('leaderboard')
+    op.drop_table('url_analytics')
+    op.drop_table('short_urls')
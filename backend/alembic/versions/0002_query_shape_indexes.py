@@ -0,0 +1,63 @@
+"""Composite indexes for the hot leaderboard, analytics and my-urls queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+Each index matches one query's filter + ORDER BY so the database reads
+the first rows in order instead of sorting the whole match:
+
+- get_leaderboard:            short_code = ? ORDER BY score DESC, completion_time_seconds
+                              (id appended so the rank index load is index-only)
+- get_global_leaderboard:     ORDER BY score DESC, completion_time_seconds (all time)
+                              completed_at >= ? (today / week)
+- get_detailed_analytics:     short_code = ? ORDER BY session_start DESC
+- get_my_urls:                creator_ip = ? ORDER BY created_at DESC
+
+Single-column indexes made redundant by a composite (same leading
+column) or never used by a query (leaderboard.rank, which is no longer
+written, and completion_time_seconds on its own) are dropped to cut
+write cost.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_leaderboard_short_code_score', 'leaderboard',
+        ['short_code', sa.text('score DESC'), 'completion_time_seconds', 'id']
+    )
+    op.create_index('ix_leaderboard_score', 'leaderboard', [sa.text('score DESC'), 'completion_time_seconds'])
+    op.create_index('ix_leaderboard_completed_at', 'leaderboard', ['completed_at'])
+    op.drop_index('ix_leaderboard_short_code', table_name='leaderboard')
+    op.drop_index('ix_leaderboard_completion_time_seconds', table_name='leaderboard')
+    op.drop_index('ix_leaderboard_rank', table_name='leaderboard')
+
+    op.create_index('ix_url_analytics_short_code_session_start', 'url_analytics', ['short_code', 'session_start'])
+    op.drop_index('ix_url_analytics_short_code', table_name='url_analytics')
+
+    op.create_index('ix_short_urls_creator_ip_created_at', 'short_urls', ['creator_ip', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_short_urls_creator_ip_created_at', table_name='short_urls')
+
+    op.create_index('ix_url_analytics_short_code', 'url_analytics', ['short_code'])
+    op.drop_index('ix_url_analytics_short_code_session_start', table_name='url_analytics')
+
+    op.create_index('ix_leaderboard_rank', 'leaderboard', ['rank'])
+    op.create_index('ix_leaderboard_completion_time_seconds', 'leaderboard', ['completion_time_seconds'])
+    op.create_index('ix_leaderboard_short_code', 'leaderboard', ['short_code'])
+    op.drop_index('ix_leaderboard_completed_at', table_name='leaderboard')
+    op.drop_index('ix_leaderboard_score', table_name='leaderboard')
+    op.drop_index('ix_leaderboard_short_code_score', table_name='leaderboard')
@@ -0,0 +1,52 @@
+"""Add the id tie-breaker to the listing indexes used by keyset pagination
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+
+Cursor pages order by the listing's sort key plus the primary key, so
+ties never repeat or skip rows between pages. With id as the last index
+column the database seeks straight to the cursor position and reads the
+page in index order, however deep it is.
+
+- global leaderboard:     ORDER BY score DESC, completion_time_seconds, id
+- detailed analytics:     short_code = ? ORDER BY session_start DESC, id DESC
+- my-urls:                creator_ip = ? ORDER BY created_at DESC, id DESC
+
+(ix_leaderboard_short_code_score already ends in id.)
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_leaderboard_score', table_name='leaderboard')
+    op.create_index('ix_leaderboard_score', 'leaderboard', [sa.text('score DESC'), 'completion_time_seconds', 'id'])
+
+    op.drop_index('ix_url_analytics_short_code_session_start', table_name='url_analytics')
+    op.create_index(
+        'ix_url_analytics_short_code_session_start', 'url_analytics', ['short_code', 'session_start', 'id']
+    )
+
+    op.drop_index('ix_short_urls_creator_ip_created_at', table_name='short_urls')
+    op.create_index('ix_short_urls_creator_ip_created_at', 'short_urls', ['creator_ip', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_short_urls_creator_ip_created_at', table_name='short_urls')
+    op.create_index('ix_short_urls_creator_ip_created_at', 'short_urls', ['creator_ip', 'created_at'])
+
+    op.drop_index('ix_url_analytics_short_code_session_start', table_name='url_analytics')
+    op.create_index('ix_url_analytics_short_code_session_start', 'url_analytics', ['short_code', 'session_start'])
+
+    op.drop_index('ix_leaderboard_score', table_name='leaderboard')
+    op.create_index('ix_leaderboard_score', 'leaderboard', [sa.text('score DESC'), 'completion_time_seconds'])
@@ -0,0 +1,45 @@
+"""Hourly and daily analytics rollup buckets
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00
+
+Filled live by the analytics pipeline and in bulk by
+app/jobs/backfill_rollups.py (run it once after upgrading to cover
+sessions recorded before this revision).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'analytics_rollups',
+        sa.Column('short_code', sa.String(length=10), nullable=False),
+        sa.Column('granularity', sa.String(length=4), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('views', sa.Integer(), nullable=False),
+        sa.Column('completions', sa.Integer(), nullable=False),
+        sa.Column('failures', sa.Integer(), nullable=False),
+        sa.Column('timeouts', sa.Integer(), nullable=False),
+        sa.Column('abandonments', sa.Integer(), nullable=False),
+        sa.Column('completion_time_sum', sa.Float(), nullable=False),
+        sa.Column('completion_time_count', sa.Integer(), nullable=False),
+        sa.Column('ads_shown', sa.Integer(), nullable=False),
+        sa.Column('ads_clicked', sa.Integer(), nullable=False),
+        sa.Column('revenue_usd', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('short_code', 'granularity', 'bucket_start')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('analytics_rollups')
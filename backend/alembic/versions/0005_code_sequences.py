@@ -0,0 +1,35 @@
+"""Block-allocated sequence for short codes
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+
+Short codes are derived from a counter (see app/utils/short_code.py)
+instead of random draws checked against short_urls. Existing random
+codes stay valid; the rare new code that matches one is skipped by
+retrying on the unique index.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'code_sequences',
+        sa.Column('name', sa.String(length=32), nullable=False),
+        sa.Column('next_value', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('code_sequences')
@@ -0,0 +1,185 @@
+"""Precomputed URL analysis and hint ladder
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+
+Hints were built from the URL on every hint request; they are now
+computed once when a URL is created (see app/utils/url_analysis.py).
+Existing rows are backfilled here, in keyset-ordered batches so large
+tables are not loaded at once.
+
+The analysis and hint text below are a copy of app/utils/url_analysis.py
+and the hint rules of app/utils/difficulty.py as of this revision, so
+later changes to the app do not change what this migration writes.
+"""
+import re
+from typing import Any, Dict, List, Sequence, Union
+from urllib.parse import unquote, urlparse
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+IGNORED_HOST_LABELS = {'www', 'm'}
+SECOND_LEVEL_LABELS = {'co', 'com', 'org', 'net', 'gov', 'ac', 'edu'}
+IGNORED_PATH_WORDS = {'html', 'htm', 'php', 'asp', 'aspx', 'index', 'www', 'en', 'us'}
+CATEGORY_TLDS = {'edu': 'education', 'gov': 'government', 'mil': 'government'}
+CATEGORY_KEYWORDS = {
+    'developer tools': {'github', 'gitlab', 'bitbucket', 'stackoverflow', 'npmjs', 'pypi', 'docs', 'developer', 'developers', 'api', 'dev', 'readthedocs'},
+    'search engine': {'google', 'bing', 'duckduckgo', 'yahoo', 'baidu', 'yandex'},
+    'video': {'youtube', 'youtu', 'vimeo', 'twitch', 'netflix', 'video', 'videos', 'watch'},
+    'social media': {'facebook', 'twitter', 'x', 'instagram', 'reddit', 'linkedin', 'tiktok', 'pinterest', 'mastodon'},
+    'shopping': {'amazon', 'ebay', 'etsy', 'aliexpress', 'walmart', 'shop', 'store', 'product', 'products', 'cart'},
+    'news': {'news', 'bbc', 'cnn', 'nytimes', 'reuters', 'guardian', 'theguardian', 'apnews', 'article'},
+    'reference': {'wikipedia', 'wiki', 'wiktionary', 'britannica', 'dictionary', 'encyclopedia'},
+    'education': {'coursera', 'khanacademy', 'edx', 'udemy', 'course', 'courses', 'learn', 'tutorial', 'university'},
+    'music': {'spotify', 'soundcloud', 'bandcamp', 'music'},
+    'maps': {'maps', 'openstreetmap'},
+}
+
+# Hints per difficulty; unknown difficulties are treated as medium
+MAX_HINTS = {'simple': 2, 'medium': 3, 'hard': 5, 'expert': 10}
+
+
+def _analyze_url(long_url: str) -> Dict[str, Any]:
+    parsed = urlparse(long_url)
+    host = (parsed.hostname or '').lower()
+    labels = [label for label in host.split('.') if label]
+    tld = labels[-1] if len(labels) > 1 else ''
+
+    host_labels = [label for label in labels if label not in IGNORED_HOST_LABELS]
+    if len(host_labels) > 1:
+        host_labels = host_labels[:-1]
+        if len(host_labels) > 1 and host_labels[-1] in SECOND_LEVEL_LABELS:
+            host_labels = host_labels[:-1]
+    host_words = [word for label in host_labels for word in WORD_PATTERN.findall(label)]
+    path_words = [
+        word for word in WORD_PATTERN.findall(unquote(parsed.path).lower())
+        if word not in IGNORED_PATH_WORDS
+    ]
+    keywords = list(dict.fromkeys(host_words + path_words))
+
+    category = CATEGORY_TLDS.get(tld)
+    if category is None:
+        category = next(
+            (name for name, words in CATEGORY_KEYWORDS.items() if set(keywords) & words), 'unknown'
+        )
+
+    return {
+        'domain': parsed.netloc,
+        'path': parsed.path,
+        'url': long_url,
+        'domain_parts': labels,
+        'tld': tld,
+        'keywords': keywords,
+        'search_operators': [],
+        'category': category
+    }
+
+
+def _hint(difficulty: str, analysis: Dict[str, Any], level: int) -> str:
+    domain, keywords = analysis['domain'], analysis['keywords']
+    path, category, url = analysis['path'], analysis['category'], analysis['url']
+
+    if difficulty == 'simple':
+        if level == 1:
+            return f"The website you're looking for is {domain}"
+        if level == 2:
+            return f"Try searching for: \"{' '.join(keywords)}\""
+        return f"The exact URL is: {url}"
+
+    if difficulty == 'medium':
+        if level == 1:
+            domain_hint = domain.split('.')[0][:3] if '.' in domain else domain[:3]
+            return f"The domain contains: {domain_hint}..."
+        if level == 2:
+            return f"Keywords to search: {', '.join(keywords[:2])}"
+        if level == 3:
+            tld = domain.split('.')[-1] if '.' in domain else ''
+            return f"The top-level domain is: .{tld}"
+        return f"Full domain: {domain}"
+
+    if difficulty == 'hard':
+        if level == 1:
+            return "Think about what type of website this could be..."
+        if level == 2:
+            return f"The website category might be: {category}"
+        if level == 3:
+            return f"The domain has {len(domain)} characters"
+        if level == 4:
+            return f"First letter of domain: {domain[0].upper()}" if domain else "No domain info"
+        if level == 5:
+            return f"The domain is: {domain}"
+        return f"Path: {path}"
+
+    hints_expert = [
+        f"The answer lies within {len(domain.split('.'))} parts...",
+        "It rhymes with... nothing. Google harder.",
+        f"The domain starts with: {domain[0] if domain else '?'}",
+        f"TLD: .{domain.split('.')[-1] if '.' in domain else '???'}",
+        f"Vowels in domain: {sum(1 for c in domain if c in 'aeiou')}",
+        f"Domain length: {len(domain)} characters",
+        f"Contains numbers: {'Yes' if any(c.isdigit() for c in domain) else 'No'}",
+        f"First 3 letters: {domain[:3] if len(domain) >= 3 else domain}",
+        f"Last 3 letters: {domain[-3:] if len(domain) >= 3 else domain}",
+        f"The domain is: {domain}"
+    ]
+    return hints_expert[level - 1] if level <= len(hints_expert) else f"The full URL is: {url}"
+
+
+def _precomputed_fields(long_url: str, difficulty: str) -> Dict[str, Any]:
+    difficulty = difficulty.lower() if difficulty.lower() in MAX_HINTS else 'medium'
+    analysis = _analyze_url(long_url)
+    ladder: List[str] = [_hint(difficulty, analysis, level) for level in range(1, MAX_HINTS[difficulty] + 1)]
+    return {'url_analysis': analysis, 'hint_ladder': ladder}
+
+
+def upgrade() -> None:
+    op.add_column('short_urls', sa.Column('url_analysis', sa.JSON(), nullable=True))
+    op.add_column('short_urls', sa.Column('hint_ladder', sa.JSON(), nullable=True))
+
+    short_urls = sa.table(
+        'short_urls',
+        sa.column('id', sa.String),
+        sa.column('long_url', sa.String),
+        sa.column('difficulty', sa.String),
+        sa.column('url_analysis', sa.JSON),
+        sa.column('hint_ladder', sa.JSON)
+    )
+    update = (
+        short_urls.update()
+        .where(short_urls.c.id == sa.bindparam('row_id'))
+        .values(url_analysis=sa.bindparam('url_analysis'), hint_ladder=sa.bindparam('hint_ladder'))
+    )
+
+    bind = op.get_bind()
+    last_id = ''
+    while True:
+        rows = bind.execute(
+            sa.select(short_urls.c.id, short_urls.c.long_url, short_urls.c.difficulty)
+            .where(short_urls.c.id > last_id)
+            .order_by(short_urls.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(update, [
+            {'row_id': row.id, **_precomputed_fields(row.long_url, row.difficulty or 'medium')}
+            for row in rows
+        ])
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    op.drop_column('short_urls', 'hint_ladder')
+    op.drop_column('short_urls', 'url_analysis')
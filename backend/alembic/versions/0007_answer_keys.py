@@ -0,0 +1,132 @@
+"""Canonical answer keys in correct_answers
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00
+
+Answers are matched on canonical keys (see app/utils/url_canonical.py)
+stored in the existing, until now unused, correct_answers column. Existing
+rows are backfilled in keyset-ordered batches; downgrade leaves the keys,
+which the older code ignores.
+
+The canonicalization below is a copy of app/utils/url_canonical.py as of
+this revision, so later changes to the app do not change what this
+migration writes.
+"""
+import ipaddress
+import re
+from functools import lru_cache
+from typing import List, Optional, Sequence, Union
+from urllib.parse import urlsplit
+
+from alembic import op
+import idna
+from publicsuffixlist import PublicSuffixList
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+SCHEME_PATTERN = re.compile(r'([A-Za-z][A-Za-z0-9+.-]*)://')
+AUTHORITY_END = re.compile(r'[/?#\\]')
+ALIAS_LABELS = {'www', 'm', 'mobile'}
+
+_suffix_list = PublicSuffixList()
+
+
+def _ascii_host(host: str) -> Optional[str]:
+    host = host.rstrip('.')
+    if host.isascii():
+        return host.lower() or None
+    try:
+        return idna.encode(host, uts46=True).decode('ascii')
+    except idna.IDNAError:
+        pass
+    try:
+        return host.encode('idna').decode('ascii').lower()
+    except UnicodeError:
+        return None
+
+
+@lru_cache(maxsize=32768)
+def _canonical_host(host: str) -> Optional[str]:
+    try:
+        address = ipaddress.ip_address(host)
+        return f"[{address.compressed}]" if address.version == 6 else address.compressed
+    except ValueError:
+        pass
+
+    host = _ascii_host(host)
+    if host is None:
+        return None
+
+    labels = host.split('.')
+    registrable = _suffix_list.privatesuffix(host)
+    keep = len(registrable.split('.')) if registrable else len(labels)
+    while len(labels) > keep and labels[0] in ALIAS_LABELS:
+        labels.pop(0)
+    return '.'.join(labels)
+
+
+def _answer_keys(url: str) -> List[str]:
+    """Canonical answer keys of a challenge URL (empty if it has no usable host)"""
+    url = url.strip()
+    match = SCHEME_PATTERN.match(url)
+    if match:
+        scheme, rest = match.group(1).lower(), url[match.end():]
+    else:
+        scheme, rest = 'http', url.lstrip('/')
+
+    try:
+        parts = urlsplit(f"//{AUTHORITY_END.split(rest, 1)[0]}")
+        port = parts.port
+    except ValueError:
+        return []
+    if not parts.hostname:
+        return []
+
+    host = _canonical_host(parts.hostname)
+    if host is None:
+        return []
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        return [f"{host}:{port}"]
+    return [host]
+
+
+def upgrade() -> None:
+    short_urls = sa.table(
+        'short_urls',
+        sa.column('id', sa.String),
+        sa.column('long_url', sa.String),
+        sa.column('correct_answers', sa.JSON)
+    )
+    update = (
+        short_urls.update()
+        .where(short_urls.c.id == sa.bindparam('row_id'))
+        .values(correct_answers=sa.bindparam('answers'))
+    )
+
+    bind = op.get_bind()
+    last_id = ''
+    while True:
+        rows = bind.execute(
+            sa.select(short_urls.c.id, short_urls.c.long_url)
+            .where(short_urls.c.id > last_id)
+            .order_by(short_urls.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(update, [{'row_id': row.id, 'answers': _answer_keys(row.long_url)} for row in rows])
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    pass
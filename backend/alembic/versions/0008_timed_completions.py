@@ -0,0 +1,49 @@
+"""Timed completion count behind the average completion time
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:00
+
+The incremental running mean was weighted by total_completions, which
+also counts completions without a completion time, so it drifted from
+what reconcile_summary_stats computes. The count of completions the
+average covers now has a column of its own, backfilled from url_analytics
+with the same predicate (completed with a positive completion time).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('short_urls', sa.Column('timed_completions', sa.Integer(), nullable=True))
+
+    short_urls = sa.table('short_urls', sa.column('short_code', sa.String), sa.column('timed_completions', sa.Integer))
+    url_analytics = sa.table(
+        'url_analytics',
+        sa.column('short_code', sa.String),
+        sa.column('outcome', sa.String),
+        sa.column('completion_time_seconds', sa.Float)
+    )
+    timed = (
+        sa.select(sa.func.count())
+        .where(
+            url_analytics.c.short_code == short_urls.c.short_code,
+            url_analytics.c.outcome == 'completed',
+            url_analytics.c.completion_time_seconds > 0
+        )
+        .scalar_subquery()
+    )
+    op.get_bind().execute(short_urls.update().values(timed_completions=timed))
+
+
+def downgrade() -> None:
+    op.drop_column('short_urls', 'timed_completions')
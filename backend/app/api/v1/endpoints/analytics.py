@@ -1,12 +1,24 @@
 """
 Analytics API Endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.core.database import get_db
-from app.services.analytics_service import AnalyticsService
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.models.rollup import GLOBAL_ROLLUP, GRANULARITIES
+from app.services.analytics_export import EXPORT_FORMATS, csv_chunks, naive_utc, ndjson_chunks, stream_sessions
+from app.services.analytics_rollups import BUCKET_SIZES, RollupService
+from app.services.analytics_service import AnalyticsService, OUTCOME_EVENTS
+from app.services.analytics_pipeline import analytics_pipeline
+from app.services.counter_folder import counter_folder
+from app.services.global_analytics import GlobalSnapshot, global_analytics
+from app.services.game_sessions import game_sessions
+from app.utils.pagination import NEXT_CURSOR_HEADER, InvalidCursor, decode_cursor, encode_cursor, page_limit
 
 router = APIRouter()
 
@@ -14,7 +26,7 @@ router = APIRouter()
 @router.get("/{short_code}/summary")
 async def get_analytics_summary(
     short_code: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get analytics summary for a short code
@@ -27,7 +39,7 @@ async def get_analytics_summary(
         - avg_completion_time: Average time to complete
         - completion_rate: Percentage of completions
     """
-    summary = AnalyticsService.get_analytics_summary(short_code, db)
+    summary = await AnalyticsService.get_analytics_summary(short_code, db)
 
     if not summary:
         raise HTTPException(status_code=404, detail="URL not found")
@@ -38,19 +50,32 @@ async def get_analytics_summary(
 @router.get("/{short_code}/detailed")
 async def get_detailed_analytics(
     short_code: str,
+    response: Response,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get detailed analytics for a short code
+    Get detailed analytics for a short code, newest first
 
     Args:
-        limit: Number of sessions to return (default 100)
+        limit: Number of sessions to return (default 100, capped at MAX_PAGE_SIZE)
+        cursor: X-Next-Cursor header of the previous page
 
     Returns:
-        List of analytics sessions with full details
+        List of analytics sessions with full details; the X-Next-Cursor
+        header is set when there may be more
     """
-    sessions = AnalyticsService.get_detailed_analytics(short_code, limit, db)
+    limit = page_limit(limit)
+    try:
+        after = decode_cursor(cursor, (datetime.fromisoformat, str))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    sessions = await AnalyticsService.get_detailed_analytics(short_code, limit, db, after)
+
+    if len(sessions) == limit and sessions[-1].session_start is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sessions[-1].session_start, sessions[-1].id)
 
     # Convert to dict for JSON response
     return [
@@ -63,23 +88,188 @@ async def get_detailed_analytics(
             'session_start': s.session_start.isoformat() if s.session_start else None,
             'session_end': s.session_end.isoformat() if s.session_end else None,
             'outcome': s.outcome,
-            'completion_time': s.completion_time,
+            'completion_time': s.completion_time_seconds,
             'hints_used': s.hints_used,
             'attempts': s.attempts,
             'score': s.score,
             'ads_shown': s.ads_shown,
             'ads_clicked': s.ads_clicked,
-            'estimated_revenue': s.estimated_revenue
+            'estimated_revenue': s.estimated_revenue_usd
         }
         for s in sessions
     ]
 
 
+@router.get("/{short_code}/export")
+async def export_sessions(
+    short_code: str,
+    format: str = 'ndjson',
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    outcome: Optional[str] = None
+):
+    """
+    Stream every analytics session for a short code, oldest first
+
+    Rows are read from a server-side cursor and written as they arrive, so
+    exports of any size use the same memory. Prefer this over
+    /detailed for bulk analysis.
+
+    Args:
+        format: 'ndjson' (one JSON object per line) or 'csv'
+        start: Only sessions started at or after this time (ISO 8601, UTC)
+        end: Only sessions started before this time
+        outcome: Only sessions with this outcome ('completed', 'failed', 'timeout', 'abandoned')
+
+    Returns:
+        Streamed NDJSON or CSV with the same fields as /detailed
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid format. Must be 'ndjson' or 'csv'")
+    if outcome is not None and outcome not in OUTCOME_EVENTS:
+        raise HTTPException(status_code=400, detail=f"Invalid outcome. Must be one of: {', '.join(OUTCOME_EVENTS)}")
+
+    rows = stream_sessions(short_code, start, end, outcome)
+    body = csv_chunks(rows) if format == 'csv' else ndjson_chunks(rows)
+
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={'Content-Disposition': f'attachment; filename="{short_code}-sessions.{format}"'}
+    )
+
+
+# Range returned when the caller gives no start
+DEFAULT_TIMESERIES_SPANS = {
+    'hour': timedelta(hours=24),
+    'day': timedelta(days=30),
+}
+
+
+async def _timeseries(
+    short_code: str,
+    granularity: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    db: AsyncSession
+):
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail="Invalid granularity. Must be 'hour' or 'day'")
+
+    step = BUCKET_SIZES[granularity]
+    # Default end: include the current bucket
+    end = naive_utc(end) if end is not None else datetime.utcnow() + step
+    start = naive_utc(start) if start is not None else end - DEFAULT_TIMESERIES_SPANS[granularity]
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start) / step > settings.ROLLUP_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range too large: at most {settings.ROLLUP_MAX_BUCKETS} {granularity} buckets"
+        )
+
+    buckets = await RollupService.get_timeseries(short_code, granularity, start, end, db)
+    return {'short_code': short_code, 'granularity': granularity, 'buckets': buckets}
+
+
+@router.get("/global/timeseries")
+async def get_global_timeseries(
+    granularity: str = 'hour',
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get views, outcomes and ad revenue across all URLs per hour or day
+
+    Same parameters and buckets as /{short_code}/timeseries; short_code is
+    returned as '*'.
+    """
+    return await _timeseries(GLOBAL_ROLLUP, granularity, start, end, db)
+
+
+@router.get("/{short_code}/timeseries")
+async def get_timeseries(
+    short_code: str,
+    granularity: str = 'hour',
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a short code's views, outcomes and ad revenue per hour or day
+
+    Read from the analytics_rollups buckets, so the cost depends on the
+    number of buckets, not the number of sessions. Views and ads are
+    counted when the session started, outcomes when it ended.
+
+    Args:
+        granularity: 'hour' or 'day'
+        start: First bucket (ISO 8601, UTC; default 24 hours or 30 days before end)
+        end: Exclusive end (default: now, including the current bucket)
+
+    Returns:
+        - buckets: One entry per bucket, oldest first, zero-filled, with
+          views, completions, failures, timeouts, abandonments,
+          ads_shown, ads_clicked, revenue_usd, avg_completion_time and
+          completion_rate
+    """
+    return await _timeseries(short_code, granularity, start, end, db)
+
+
+@router.get("/pipeline/stats")
+async def get_pipeline_stats():
+    """
+    Get analytics write-behind pipeline metrics
+
+    Returns:
+        - queue_depth: Events waiting to be written
+        - events_enqueued / events_written / events_dropped: Lifetime counters
+        - flushes / flush_errors: Batch counts
+        - last_flush_ms / max_flush_ms: Batch write latency
+        - shared_counters: Folding of counters buffered in the shared backend
+        - game_sessions: Live server-side game sessions and timeouts recorded
+        - global_snapshot: Global analytics refresh cost, version and staleness
+    """
+    stats = analytics_pipeline.get_stats()
+    stats['shared_counters'] = counter_folder.get_stats()
+    stats['game_sessions'] = game_sessions.get_stats()
+    stats['global_snapshot'] = global_analytics.get_stats()
+    return stats
+
+
+def _not_modified(request: Request, snapshot: GlobalSnapshot) -> bool:
+    """Whether the client's cached copy (If-None-Match / If-Modified-Since) is current"""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or snapshot.etag in tags or f"W/{snapshot.etag}" in tags
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is not None:
+            return snapshot.modified_at.replace(tzinfo=timezone.utc) <= since
+    return False
+
+
 @router.get("/global")
-async def get_global_analytics(db: Session = Depends(get_db)):
+async def get_global_analytics(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Get global analytics across all URLs
 
+    Served from an in-memory snapshot refreshed every
+    GLOBAL_ANALYTICS_REFRESH_SECONDS. The ETag and Last-Modified headers
+    allow conditional requests: a matching If-None-Match (or an
+    If-Modified-Since not older than the snapshot) gets 304 Not Modified.
+
     Returns:
         - total_urls: Total number of shortened URLs
         - total_views: Total views across all URLs
@@ -90,14 +280,26 @@ async def get_global_analytics(db: Session = Depends(get_db)):
         - total_revenue: Total estimated ad revenue
         - completion_rate: Overall completion rate
     """
-    return AnalyticsService.get_global_analytics(db)
+    snapshot = await global_analytics.get(db)
+    if snapshot is None:
+        return {}
+
+    headers = {
+        'ETag': snapshot.etag,
+        'Last-Modified': format_datetime(snapshot.modified_at.replace(tzinfo=timezone.utc), usegmt=True),
+        'Cache-Control': 'no-cache'
+    }
+    if _not_modified(request, snapshot):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return snapshot.data
 
 
 @router.post("/{short_code}/track-abandonment")
 async def track_abandonment(
     short_code: str,
-    session_id: int,
-    db: Session = Depends(get_db)
+    session_id: str
 ):
     """
     Track game abandonment (user left before completing)
@@ -105,7 +307,16 @@ async def track_abandonment(
     Args:
         session_id: Analytics session ID
     """
-    AnalyticsService.track_abandonment(session_id, db)
+    # Ended in the shared copy too, so the worker that owns the game does
+    # not record a timeout over the abandonment
+    session = await game_sessions.load(session_id, short_code)
+    if session is not None:
+        game_sessions.end(session_id)
+        await game_sessions.save(session)
+    elif await game_sessions.exists(session_id):
+        raise HTTPException(status_code=404, detail="Game session not found for this URL")
+
+    await analytics_pipeline.track_outcome(session_id, 'abandoned')
 
     return {"success": True, "message": "Abandonment tracked"}
 
@@ -113,9 +324,8 @@ async def track_abandonment(
 @router.post("/{short_code}/track-ad-impression")
 async def track_ad_impression(
     short_code: str,
-    session_id: int,
-    placement_type: str,
-    db: Session = Depends(get_db)
+    session_id: str,
+    placement_type: str
 ):
     """
     Track ad impression
@@ -124,7 +334,7 @@ async def track_ad_impression(
         session_id: Analytics session ID
         placement_type: Ad placement type (e.g., 'pre-challenge', 'mid-challenge')
     """
-    AnalyticsService.track_ad_impression(session_id, placement_type, db)
+    await analytics_pipeline.track_ad_impression(session_id, placement_type)
 
     return {"success": True, "message": "Ad impression tracked"}
 
@@ -132,10 +342,9 @@ async def track_ad_impression(
 @router.post("/{short_code}/track-ad-click")
 async def track_ad_click(
     short_code: str,
-    session_id: int,
+    session_id: str,
     placement_type: str,
-    estimated_revenue: float = 0.02,
-    db: Session = Depends(get_db)
+    estimated_revenue: float = 0.02
 ):
     """
     Track ad click
@@ -145,6 +354,6 @@ async def track_ad_click(
         placement_type: Ad placement type
         estimated_revenue: Estimated revenue from click (default $0.02)
     """
-    AnalyticsService.track_ad_click(session_id, placement_type, estimated_revenue, db)
+    await analytics_pipeline.track_ad_click(session_id, placement_type, estimated_revenue)
 
     return {"success": True, "message": "Ad click tracked"}
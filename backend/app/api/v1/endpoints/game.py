@@ -4,19 +4,24 @@ Handles game mechanics: initialization, search, hints, answer checking
 Ported from controllers/gameController.js
 """
 from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Optional, List
-import time
+from urllib.parse import quote_plus
 
-from app.core.database import get_db
-from app.models.url import ShortURL
-from app.models.analytics import URLAnalytics
-from app.models.leaderboard import LeaderboardEntry
+from app.core.database import get_async_db
 from app.utils.difficulty import get_difficulty, calculate_score, generate_hint_for_difficulty
-from app.services.hint_service import generate_hint
 from app.services.analytics_service import AnalyticsService
+from app.services.analytics_pipeline import analytics_pipeline
+from app.services.game_sessions import game_sessions
+from app.services.global_leaderboard import global_leaderboard
+from app.services.leaderboard_broadcaster import leaderboard_broadcaster
+from app.services.search_cache import search_cache, search_provider
+from app.services.search_provider import SearchUnavailable
+from app.services.shared_state import new_counter_delta
+from app.services.url_cache import url_cache
 from app.services.websocket_manager import manager
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor, page_limit
 from app.utils.profanity_filter import sanitize_nickname
 from app.utils.roasting_system import (
     get_random_roast,
@@ -24,6 +29,8 @@ from app.utils.roasting_system import (
     get_hint_roast,
     get_difficulty_intro_roast
 )
+from app.utils.url_analysis import analyze_url
+from app.utils.url_canonical import canonical_key
 
 router = APIRouter()
 
@@ -41,8 +48,13 @@ class GameInitResponse(BaseModel):
     roast: str  # Pre-game roast message
 
 
+class StartGameRequest(BaseModel):
+    session_id: str
+
+
 class HintRequest(BaseModel):
     hint_level: int
+    session_id: Optional[str] = None  # Hints are counted server-side when given
 
 
 class HintResponse(BaseModel):
@@ -54,6 +66,7 @@ class HintResponse(BaseModel):
 
 class CheckAnswerRequest(BaseModel):
     submitted_url: str
+    session_id: Optional[str] = None  # Scored against the server-side clock when given
 
 
 class CheckAnswerResponse(BaseModel):
@@ -63,6 +76,9 @@ class CheckAnswerResponse(BaseModel):
     time_elapsed: float
     long_url: Optional[str] = None
     roast: str  # Success/failure roast message
+    # False when no live session was found: scored with flat default
+    # timings and not eligible for the leaderboard
+    session_found: bool = True
 
 
 class SearchRequest(BaseModel):
@@ -90,7 +106,7 @@ class EndGameRequest(BaseModel):
     completion_time: int = 0
     submit_to_leaderboard: bool = False
     nickname: Optional[str] = "Anonymous"
-    session_id: Optional[int] = None
+    session_id: Optional[str] = None
 
 
 # ==================== Game Endpoints ====================
@@ -99,14 +115,14 @@ class EndGameRequest(BaseModel):
 async def initialize_game(
     short_code: str,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Initialize a game session
     Returns game configuration and question
     """
-    # Get URL from database
-    url = db.query(ShortURL).filter(ShortURL.short_code == short_code).first()
+    # Get URL (cached)
+    url = await url_cache.get(short_code, db)
 
     if not url:
         raise HTTPException(status_code=404, detail="Short code not found")
@@ -117,15 +133,18 @@ async def initialize_game(
     # Get difficulty configuration
     difficulty_config = get_difficulty(url.difficulty)
 
-    # Create analytics session using AnalyticsService
-    session_id = AnalyticsService.start_session(
+    # Queue analytics session (written in the next batch)
+    session_id = await analytics_pipeline.start_session(
         short_code=short_code,
         visitor_ip=request.client.host,
         visitor_user_agent=request.headers.get("user-agent", ""),
-        referrer=request.headers.get("referer"),
-        db=db
+        referrer=request.headers.get("referer")
     )
 
+    # Track game state server-side (clock, hints, attempts)
+    session = game_sessions.create(session_id, short_code, url.difficulty, url.time_limit_seconds)
+    await game_sessions.save(session)
+
     # Broadcast new player started (WebSocket)
     import asyncio
     asyncio.create_task(manager.broadcast_game_start(short_code, {
@@ -163,48 +182,69 @@ async def initialize_game(
     )
 
 
+@router.post("/{short_code}/start")
+async def start_game(short_code: str, start_req: StartGameRequest):
+    """
+    Start the game clock for a session
+    Time spent on the intro screen before this call does not count
+    """
+    session = await game_sessions.load(start_req.session_id, short_code)
+
+    if not session:
+        raise HTTPException(status_code=404, detail="Game session not found or expired")
+
+    if game_sessions.restart_clock(session):
+        await game_sessions.save(session)
+
+    return {
+        "session_id": session.session_id,
+        "time_limit": session.time_limit
+    }
+
+
 @router.post("/{short_code}/hint", response_model=HintResponse)
 async def get_hint(
     short_code: str,
     hint_req: HintRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generate a hint for the current game
     Returns hint with time penalty and roast message
     """
-    url = db.query(ShortURL).filter(ShortURL.short_code == short_code).first()
+    url = await url_cache.get(short_code, db)
 
     if not url:
         raise HTTPException(status_code=404, detail="Short code not found")
 
     difficulty_config = get_difficulty(url.difficulty)
 
+    # With a session the server decides which hint comes next
+    session = await game_sessions.load(hint_req.session_id, short_code)
+    hint_level = session.hints_used + 1 if session else hint_req.hint_level
+
     # Check if hint level is valid
-    if hint_req.hint_level > difficulty_config.max_hints:
+    if hint_level > difficulty_config.max_hints:
         raise HTTPException(status_code=400, detail="Maximum hints exceeded")
 
-    # Analyze URL for hint generation
-    from urllib.parse import urlparse
-    parsed = urlparse(url.long_url)
-    analyzed_url = {
-        'domain': parsed.netloc,
-        'path': parsed.path,
-        'url': url.long_url,
-        'keywords': url.long_url.split('/'),
-        'search_operators': [],
-        'category': 'unknown'
-    }
+    if session:
+        session.hints_used = hint_level
+        await game_sessions.save(session)
 
-    # Generate difficulty-appropriate hint
-    hint_text = generate_hint_for_difficulty(url.difficulty, analyzed_url, hint_req.hint_level)
+    # Hints are computed when the URL is created; rows from before the
+    # ladder existed (or levels outside it) are generated on demand
+    ladder = url.hint_ladder or []
+    if 1 <= hint_level <= len(ladder):
+        hint_text = ladder[hint_level - 1]
+    else:
+        hint_text = generate_hint_for_difficulty(url.difficulty, analyze_url(url.long_url), hint_level)
 
     # Get roast message for hint usage
-    roast = get_hint_roast(hint_req.hint_level, difficulty_config.max_hints)
+    roast = get_hint_roast(hint_level, difficulty_config.max_hints)
 
     return HintResponse(
         hint=hint_text,
-        hints_used=hint_req.hint_level,
+        hints_used=hint_level,
         hint_penalty_seconds=difficulty_config.hint_penalty_seconds,
         roast=roast
     )
@@ -214,127 +254,118 @@ async def get_hint(
 async def search_for_answer(
     short_code: str,
     search_req: SearchRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Perform a Google search to help find the answer
+    Search (Google or the local index) to help find the answer
     Returns search results and indicates if correct URL is present
     """
-    url = db.query(ShortURL).filter(ShortURL.short_code == short_code).first()
+    url = await url_cache.get(short_code, db)
 
     if not url:
         raise HTTPException(status_code=404, detail="Short code not found")
 
-    # Check if Google API is configured
-    import os
-    api_key = os.getenv("GOOGLE_SEARCH_API_KEY")
-    cx = os.getenv("GOOGLE_SEARCH_CX")
-
-    if not api_key or not cx:
+    if not search_cache.configured:
         # Fallback mode - return Google search link
-        google_search_url = f"https://www.google.com/search?q={search_req.query}"
-        return SearchResponse(
-            results=[
-                SearchResult(
-                    title="Search on Google (API not configured)",
-                    url=google_search_url,
-                    snippet=f'Click here to search for "{search_req.query}" on Google. Configure GOOGLE_SEARCH_API_KEY and GOOGLE_SEARCH_CX in .env for integrated search.'
-                )
-            ],
-            has_correct_answer=False,
-            fallback_mode=True
+        return fallback_search_response(
+            search_req.query,
+            "Search on Google (API not configured)",
+            f'Click here to search for "{search_req.query}" on Google. Configure GOOGLE_SEARCH_API_KEY and GOOGLE_SEARCH_CX in .env for integrated search.'
         )
 
-    # Perform Google Custom Search
+    # Search through the configured provider (cached, shared with identical queries)
     try:
-        import httpx
-
-        search_url = "https://www.googleapis.com/customsearch/v1"
-        params = {
-            "key": api_key,
-            "cx": cx,
-            "q": search_req.query,
-            "num": 10
-        }
+        items = await search_cache.search(search_req.query)
+    except SearchUnavailable as e:
+        # Upstream failing, circuit open or too busy - return fallback
+        return fallback_search_response(
+            search_req.query,
+            "Search on Google (API error)",
+            f'Search API encountered an error. Click to search manually on Google. Error: {str(e)}'
+        )
+
+    # Check the (possibly cached) results against this challenge's answer
+    has_correct = False
+
+    search_results = []
+    for item in items:
+        link = item["link"]
+
+        # Check if this result matches the correct answer
+        if canonical_key(link) in url.answer_keys:
+            has_correct = True
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(search_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+        search_results.append(SearchResult(
+            title=item["title"],
+            url=link,
+            snippet=item["snippet"]
+        ))
 
-        if "items" not in data:
-            return SearchResponse(
-                results=[],
-                has_correct_answer=False,
-                fallback_mode=False
+    return SearchResponse(
+        results=search_results,
+        has_correct_answer=has_correct,
+        fallback_mode=False
+    )
+
+
+def fallback_search_response(query: str, title: str, snippet: str) -> SearchResponse:
+    """A single link to the same search on google.com"""
+    return SearchResponse(
+        results=[
+            SearchResult(
+                title=title,
+                url=f"https://www.google.com/search?q={quote_plus(query)}",
+                snippet=snippet
             )
+        ],
+        has_correct_answer=False,
+        fallback_mode=True
+    )
 
-        # Parse search results
-        from urllib.parse import urlparse
-        correct_domain = urlparse(url.long_url).netloc.lower()
-        has_correct = False
-
-        search_results = []
-        for item in data["items"]:
-            result_domain = urlparse(item["link"]).netloc.lower()
-
-            # Check if this result matches the correct answer
-            if result_domain == correct_domain or url.long_url.lower() == item["link"].lower():
-                has_correct = True
-
-            search_results.append(SearchResult(
-                title=item.get("title", ""),
-                url=item.get("link", ""),
-                snippet=item.get("snippet", "")
-            ))
-
-        return SearchResponse(
-            results=search_results,
-            has_correct_answer=has_correct,
-            fallback_mode=False
-        )
 
-    except Exception as e:
-        # On error, return fallback
-        google_search_url = f"https://www.google.com/search?q={search_req.query}"
-        return SearchResponse(
-            results=[
-                SearchResult(
-                    title="Search on Google (API error)",
-                    url=google_search_url,
-                    snippet=f'Search API encountered an error. Click to search manually on Google. Error: {str(e)}'
-                )
-            ],
-            has_correct_answer=False,
-            fallback_mode=True
-        )
+@router.get("/search/stats")
+async def get_search_stats():
+    """
+    Get search metrics (provider, cache hit ratio and latency; for Google
+    also pool, timeouts and circuit breaker state)
+    """
+    stats = search_provider.get_stats()
+    stats['cache'] = search_cache.get_stats()
+    return stats
 
 
 @router.post("/{short_code}/check-answer", response_model=CheckAnswerResponse)
 async def check_answer(
     short_code: str,
     answer_req: CheckAnswerRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Check if the submitted URL is correct
     Returns result with score and roast message
     """
-    url = db.query(ShortURL).filter(ShortURL.short_code == short_code).first()
+    url = await url_cache.get(short_code, db)
 
     if not url:
         raise HTTPException(status_code=404, detail="Short code not found")
 
-    # Check if domains match (simple domain comparison)
-    from urllib.parse import urlparse
-    submitted_domain = urlparse(answer_req.submitted_url).netloc
-    correct_domain = urlparse(url.long_url).netloc
-
-    is_correct = submitted_domain.lower() == correct_domain.lower()
-
-    # Calculate score (placeholder - need actual time tracking)
-    time_remaining = 60  # TODO: Track actual time
-    hints_used = 0  # TODO: Track from session
+    # Same site as the answer: www./m. prefixes, default ports, case and
+    # IDNA spelling do not matter
+    is_correct = canonical_key(answer_req.submitted_url) in url.answer_keys
+
+    # Calculate score from the server-side clock and hint count
+    session = await game_sessions.load(answer_req.session_id, short_code)
+    if session:
+        session.attempts += 1
+        time_elapsed = session.elapsed()
+        time_remaining = session.time_remaining(get_difficulty(url.difficulty).hint_penalty_seconds)
+        hints_used = session.hints_used
+    else:
+        # No session id, or an expired one: the old flat values, flagged
+        # in the response (session_found=False)
+        time_elapsed = 60.0
+        time_remaining = 60
+        hints_used = 0
 
     score_breakdown = calculate_score(
         url.difficulty,
@@ -343,6 +374,14 @@ async def check_answer(
         is_correct
     )
 
+    # The first correct answer is the one that counts
+    if session and is_correct and not session.solved:
+        session.solved = True
+        session.score = score_breakdown.total_score
+        session.completion_time = round(time_elapsed, 2)
+    if session:
+        await game_sessions.save(session)
+
     # Get appropriate roast message
     if is_correct:
         # Completion roast based on performance
@@ -355,12 +394,13 @@ async def check_answer(
         # Wrong answer roast
         roast = get_random_roast('wrong_answer')
 
-    # Update stats
-    if is_correct:
-        url.total_completions += 1
-    else:
-        url.total_failures += 1
-    db.commit()
+    # Update stats for clients that do not send a session id; with one,
+    # the game is counted once when it ends (or times out) - an expired
+    # session has its timeout recorded already
+    if answer_req.session_id is None:
+        delta = new_counter_delta()
+        delta['completions' if is_correct else 'failures'] = 1
+        await AnalyticsService.increment_counters({short_code: delta}, db)
 
     return CheckAnswerResponse(
         correct=is_correct,
@@ -371,9 +411,10 @@ async def check_answer(
             "hint_penalty": score_breakdown.hint_penalty,
             "total_score": score_breakdown.total_score,
         },
-        time_elapsed=60.0,  # TODO: Calculate actual time
+        time_elapsed=round(time_elapsed, 2),
         long_url=url.long_url if is_correct else None,
-        roast=roast
+        roast=roast,
+        session_found=session is not None
     )
 
 
@@ -381,140 +422,186 @@ async def check_answer(
 async def end_game(
     short_code: str,
     end_req: EndGameRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     End the game and optionally submit to leaderboard
     """
-    url = db.query(ShortURL).filter(ShortURL.short_code == short_code).first()
+    url = await url_cache.get(short_code, db)
 
     if not url:
         raise HTTPException(status_code=404, detail="Short code not found")
 
-    # Track game outcome in analytics
-    if end_req.session_id:
+    # Scores come from the server-side session; client values are only
+    # used for analytics from clients without one
+    score = end_req.score
+    completion_time = end_req.completion_time
+    hints_used = end_req.hints_used
+    attempts = end_req.attempts
+
+    session = await game_sessions.load(end_req.session_id, short_code)
+    already_ended = session is not None and session.ended
+    if session:
         if end_req.outcome == 'completed':
-            AnalyticsService.track_completion(
-                session_id=end_req.session_id,
-                completion_time=end_req.completion_time,
-                hints_used=end_req.hints_used,
-                attempts=end_req.attempts,
-                score=end_req.score,
-                db=db
-            )
-        elif end_req.outcome == 'failed':
-            AnalyticsService.track_failure(
-                session_id=end_req.session_id,
-                attempts=end_req.attempts,
-                hints_used=end_req.hints_used,
-                score=end_req.score,
-                db=db
-            )
-        elif end_req.outcome == 'timeout':
-            AnalyticsService.track_timeout(
+            if not session.solved:
+                raise HTTPException(status_code=400, detail="No correct answer recorded for this session")
+            score = session.score
+            completion_time = session.completion_time
+        else:
+            score = 0
+        hints_used = session.hints_used
+        attempts = session.attempts
+
+    # Track game outcome in analytics (a retried /end is not counted twice)
+    if end_req.session_id and not already_ended:
+        if end_req.outcome in ('completed', 'failed', 'timeout'):
+            await analytics_pipeline.track_outcome(
                 session_id=end_req.session_id,
-                attempts=end_req.attempts,
-                hints_used=end_req.hints_used,
-                score=end_req.score,
-                db=db
+                outcome=end_req.outcome,
+                completion_time=completion_time if end_req.outcome == 'completed' else None,
+                hints_used=hints_used,
+                attempts=attempts,
+                score=score
             )
         elif end_req.outcome == 'abandoned':
-            AnalyticsService.track_abandonment(
+            await analytics_pipeline.track_outcome(
                 session_id=end_req.session_id,
-                db=db
+                outcome='abandoned'
             )
 
-    # Submit to leaderboard if requested
-    leaderboard_id = None
-    if end_req.submit_to_leaderboard and end_req.outcome == 'completed':
+    # Submit to leaderboard if requested: only scores timed by a live
+    # session count, and a retry gets the entry the first call created
+    leaderboard_id = session.leaderboard_id if session else None
+    if session and end_req.submit_to_leaderboard and end_req.outcome == 'completed' and leaderboard_id is None:
         # Sanitize nickname to remove profanity
         clean_nickname = sanitize_nickname(end_req.nickname)
 
-        leaderboard_id = AnalyticsService.add_to_leaderboard(
+        leaderboard_id = await AnalyticsService.add_to_leaderboard(
             short_code=short_code,
             nickname=clean_nickname,
-            completion_time=end_req.completion_time,
-            hints_used=end_req.hints_used,
-            score=end_req.score,
+            completion_time=completion_time,
+            hints_used=hints_used,
+            score=score,
             difficulty=url.difficulty,
             country=None,  # TODO: Add geo-location
             db=db
         )
-
-        # Broadcast new score to WebSocket clients
-        import asyncio
-        asyncio.create_task(manager.broadcast_new_score(short_code, {
-            'nickname': clean_nickname,
-            'score': end_req.score,
-            'completion_time': end_req.completion_time,
-            'hints_used': end_req.hints_used,
-            'difficulty': url.difficulty,
-            'leaderboard_id': leaderboard_id
-        }))
-
-        # Broadcast updated leaderboard
-        leaderboard_entries = AnalyticsService.get_leaderboard(short_code, 10, db)
-        asyncio.create_task(manager.broadcast_leaderboard_update(short_code, {
-            'entries': leaderboard_entries
-        }))
+        session.leaderboard_id = leaderboard_id
+
+        # Queue the new score; the room gets one new_score and one
+        # leaderboard_update per broadcast window, however many scores land
+        if leaderboard_id:
+            leaderboard_broadcaster.record_score(short_code, {
+                'nickname': clean_nickname,
+                'score': score,
+                'completion_time': completion_time,
+                'hints_used': hints_used,
+                'difficulty': url.difficulty,
+                'leaderboard_id': leaderboard_id
+            })
+
+    if session:
+        game_sessions.end(session.session_id)
+        await game_sessions.save(session)
 
     # Broadcast game completion
     import asyncio
     clean_nickname_for_broadcast = sanitize_nickname(end_req.nickname) if end_req.submit_to_leaderboard else None
     asyncio.create_task(manager.broadcast_game_complete(short_code, {
         'outcome': end_req.outcome,
-        'score': end_req.score,
+        'score': score,
         'nickname': clean_nickname_for_broadcast
     }))
 
     return {
         "message": "Game ended successfully",
         "outcome": end_req.outcome,
-        "final_score": end_req.score,
-        "leaderboard_id": leaderboard_id
-    }
-
-
-@router.get("/{short_code}/leaderboard")
-async def get_leaderboard(
-    short_code: str,
-    limit: int = 100,
-    db: Session = Depends(get_db)
-):
-    """
-    Get leaderboard for a specific URL
-    """
-    entries = AnalyticsService.get_leaderboard(short_code, limit, db)
-
-    return {
-        "short_code": short_code,
-        "entries": entries
+        "final_score": score,
+        "leaderboard_id": leaderboard_id,
+        "session_found": session is not None
     }
 
 
+# Declared before /{short_code}/leaderboard, which would otherwise match "global"
 @router.get("/global/leaderboard")
 async def get_global_leaderboard(
     time_filter: str = 'all',
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get global leaderboard across all URLs
 
     Args:
         time_filter: Filter by time period - 'all', 'week', or 'today'
-        limit: Maximum number of entries to return (default 100)
+        limit: Maximum number of entries to return (default 100, capped at MAX_PAGE_SIZE)
+        cursor: next_cursor of the previous page
 
     Returns:
-        Global leaderboard entries sorted by score
+        Global leaderboard entries sorted by score, and next_cursor
+        (null on the last page)
     """
     if time_filter not in ['all', 'week', 'today']:
         raise HTTPException(status_code=400, detail="Invalid time_filter. Must be 'all', 'week', or 'today'")
 
-    entries = AnalyticsService.get_global_leaderboard(time_filter, limit, db)
+    limit = page_limit(limit)
+    try:
+        after = decode_cursor(cursor, (int, float, str, int))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    entries = await AnalyticsService.get_global_leaderboard(time_filter, limit, db, after)
+
+    next_cursor = None
+    if len(entries) == limit:
+        last = entries[-1]
+        next_cursor = encode_cursor(last['score'], last['completion_time'], last['id'], last['rank'])
 
     return {
         "time_filter": time_filter,
         "entries": entries,
-        "total_count": len(entries)
+        "total_count": len(entries),
+        "next_cursor": next_cursor
+    }
+
+
+@router.get("/global/leaderboard/stats")
+async def get_global_leaderboard_stats():
+    """
+    Get global leaderboard board metrics
+    """
+    return global_leaderboard.get_stats()
+
+
+@router.get("/{short_code}/leaderboard")
+async def get_leaderboard(
+    short_code: str,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get leaderboard for a specific URL
+
+    Pass the previous page's next_cursor as `cursor` for the entries below
+    it; next_cursor is null on the last page.
+    """
+    limit = page_limit(limit)
+    try:
+        after = decode_cursor(cursor, (int, float, str))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    entries = await AnalyticsService.get_leaderboard(short_code, limit, db, after)
+
+    next_cursor = None
+    if len(entries) == limit:
+        last = entries[-1]
+        next_cursor = encode_cursor(last['score'], last['completion_time'], last['id'])
+
+    return {
+        "short_code": short_code,
+        "entries": entries,
+        "next_cursor": next_cursor
     }
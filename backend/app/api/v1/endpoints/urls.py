@@ -1,18 +1,34 @@
 """
 URL Shortening Endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.config import settings
+from app.core.security import BULK_CREATE_SCOPE, require_scope
 from app.models.url import ShortURL
 from app.schemas.url import URLCreateRequest, URLResponse
-from app.utils.short_code import generate_unique_short_code
+from app.services.bulk_urls import (
+    InvalidBulkBody, count_ndjson_rows, create_urls, parse_json_array, parse_ndjson, short_url_for
+)
+from app.services.global_analytics import global_analytics
+from app.services.short_code_allocator import short_code_allocator
+from app.services.url_cache import url_cache
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER, InvalidCursor, decode_cursor, encode_cursor, newest_after, page_limit
+)
 from app.utils.profanity_filter import clean_text, clean_list
+from app.utils.url_analysis import precomputed_fields
 
 router = APIRouter()
 limiter = Limiter(key_func=get_remote_address)
@@ -23,68 +39,173 @@ limiter = Limiter(key_func=get_remote_address)
 async def create_short_url(
     request: Request,
     url_data: URLCreateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new shortened URL with optional challenge configuration
 
     Rate Limited: 3 URLs per hour per IP address
     """
-    # Generate unique short code
-    short_code = generate_unique_short_code(db)
-
     # Clean user-generated content to remove profanity
     clean_challenge_text = clean_text(url_data.challenge_text) if url_data.challenge_text else None
     clean_hints = clean_list(url_data.hints) if url_data.hints else None
+    long_url = str(url_data.long_url)
+    precomputed = precomputed_fields(long_url, url_data.difficulty)
+
+    # Allocated codes are unique; the unique index still guards against
+    # codes created before the allocator (or with another key)
+    for _ in range(settings.SHORT_CODE_MAX_ATTEMPTS):
+        short_code = await short_code_allocator.next_code()
+
+        new_url = ShortURL(
+            short_code=short_code,
+            long_url=long_url,
+            difficulty=url_data.difficulty,
+            challenge_text=clean_challenge_text,
+            hints=clean_hints,
+            time_limit_seconds=url_data.time_limit_seconds,
+            **precomputed,
+            creator_ip=request.client.host,
+            creator_user_agent=request.headers.get("user-agent", "")
+        )
+        db.add(new_url)
+        try:
+            await db.commit()
+            break
+        except IntegrityError:
+            await db.rollback()
+            short_code_allocator.record_collision(short_code)
+    else:
+        raise HTTPException(status_code=503, detail="Could not allocate a short code, please retry")
+
+    await db.refresh(new_url)
+
+    # Replaces any negative entry left by earlier lookups of this code
+    await url_cache.prime(new_url)
+    global_analytics.count_new_url()
 
-    # Create ShortURL entry
-    new_url = ShortURL(
+    return URLResponse(
         short_code=short_code,
         long_url=str(url_data.long_url),
+        short_url=short_url_for(short_code),
         difficulty=url_data.difficulty,
-        challenge_text=clean_challenge_text,
-        hints=clean_hints,
-        time_limit_seconds=url_data.time_limit_seconds,
-        creator_ip=request.client.host,
-        creator_user_agent=request.headers.get("user-agent", "")
+        created_at=new_url.created_at
     )
 
-    db.add(new_url)
-    db.commit()
-    db.refresh(new_url)
 
-    # Build short URL
-    base_url = settings.ALLOWED_ORIGINS[0] if settings.ALLOWED_ORIGINS else "http://localhost:5173"
-    short_url = f"{base_url}/{short_code}"
+NDJSON_TYPES = ('application/x-ndjson', 'application/jsonl', 'application/ndjson')
+
+
+async def _ndjson_lines(results: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    async for result in results:
+        yield json.dumps(result).encode() + b'\n'
 
-    return URLResponse(
-        short_code=short_code,
-        long_url=str(url_data.long_url),
-        short_url=short_url,
-        difficulty=url_data.difficulty,
-        created_at=new_url.created_at
-    )
+
+async def _read_body(request: Request, max_bytes: int) -> bytes:
+    """
+    Read a request body of at most `max_bytes`
+
+    Raises:
+        HTTPException: 413 as soon as the declared Content-Length, or the
+            bytes received so far (chunked bodies), exceed the limit
+    """
+    too_large = HTTPException(status_code=413, detail=f"Request body too large: at most {max_bytes} bytes")
+
+    declared = request.headers.get('content-length')
+    if declared is not None:
+        try:
+            if int(declared) > max_bytes:
+                raise too_large
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Content-Length")
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise too_large
+    return bytes(body)
+
+
+@router.post("/bulk")
+async def bulk_create_urls(
+    request: Request,
+    claims: Dict[str, Any] = Depends(require_scope(BULK_CREATE_SCOPE))
+):
+    """
+    Create many shortened URLs at once (campaign imports)
+
+    Requires a bearer token with the 'urls:bulk' scope (see
+    app/jobs/create_api_token.py); not subject to the per-IP create limit.
+
+    Body: a JSON array of URL objects (same fields as POST /urls/), or
+    NDJSON with one object per line (Content-Type: application/x-ndjson).
+    At most BULK_CREATE_MAX_ROWS rows per request, and at most
+    BULK_CREATE_MAX_ROW_BYTES per row on average: a larger Content-Length
+    is refused before the body is read.
+
+    Returns:
+        NDJSON stream with one line per input row, in input order:
+        {"index", "short_code", "short_url"} or {"index", "error"}.
+        Rows are committed in chunks as the stream is produced.
+    """
+    content_type = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    # The body is read up front: the response streams while rows are written
+    body = await _read_body(request, settings.BULK_CREATE_MAX_ROWS * settings.BULK_CREATE_MAX_ROW_BYTES)
+
+    if content_type in NDJSON_TYPES:
+        row_count = count_ndjson_rows(body)
+        rows = parse_ndjson(body)
+    else:
+        try:
+            rows = parse_json_array(body)
+        except InvalidBulkBody as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        row_count = len(rows)
+
+    if row_count > settings.BULK_CREATE_MAX_ROWS:
+        raise HTTPException(
+            status_code=413, detail=f"Too many rows: at most {settings.BULK_CREATE_MAX_ROWS} per request"
+        )
+
+    creator_ip = request.client.host if request.client else None
+    results = create_urls(rows, creator_ip=creator_ip, creator_user_agent=f"bulk:{claims['sub']}")
+    return StreamingResponse(_ndjson_lines(results), media_type='application/x-ndjson')
 
 
 @router.get("/my-urls")
 async def get_my_urls(
     request: Request,
+    response: Response,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get URLs created by the current user (based on IP address)
 
-    Returns up to `limit` URLs created from the same IP address
+    Returns up to `limit` URLs (capped at MAX_PAGE_SIZE) created from the
+    same IP address. When there may be more, the X-Next-Cursor header holds
+    the `cursor` for the next page.
     """
     creator_ip = request.client.host
 
+    limit = page_limit(limit)
+    try:
+        after = decode_cursor(cursor, (datetime.fromisoformat, str))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Query URLs created by this IP, ordered by most recent first
-    urls = db.query(ShortURL).filter(
-        ShortURL.creator_ip == creator_ip
-    ).order_by(
-        ShortURL.created_at.desc()
-    ).limit(limit).all()
+    query = select(ShortURL).where(ShortURL.creator_ip == creator_ip)
+    if after is not None:
+        query = query.where(newest_after(ShortURL.created_at, ShortURL.id, after))
+    urls = list(await db.scalars(
+        query.order_by(ShortURL.created_at.desc(), ShortURL.id.desc()).limit(limit)
+    ))
+
+    if len(urls) == limit and urls[-1].created_at is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(urls[-1].created_at, urls[-1].id)
 
     # Format response
     return [
@@ -102,14 +223,30 @@ async def get_my_urls(
     ]
 
 
+@router.get("/cache/stats")
+async def get_url_cache_stats():
+    """
+    Get short URL cache statistics, plus short code allocation under short_codes
+    """
+    stats = url_cache.get_stats()
+    stats['short_codes'] = short_code_allocator.get_stats()
+    return stats
+
+
 @router.get("/{short_code}")
-async def get_url(short_code: str, db: Session = Depends(get_db)):
+async def get_url(short_code: str, db: AsyncSession = Depends(get_async_db)):
     """
     Get URL details by short code
     """
-    url = db.query(ShortURL).filter(ShortURL.short_code == short_code).first()
+    # Counters change constantly, so only the "does not exist" answer is cached
+    if url_cache.peek(short_code) is None:
+        raise HTTPException(status_code=404, detail="URL not found")
+
+    url = await db.scalar(select(ShortURL).where(ShortURL.short_code == short_code))
 
     if not url:
+        await url_cache.mark_missing(short_code)
         raise HTTPException(status_code=404, detail="URL not found")
 
+    await url_cache.prime(url)
     return url
@@ -8,6 +8,8 @@ from typing import Optional
 
 from app.core.database import get_db
 from app.services.websocket_manager import manager
+from app.services.leaderboard_broadcaster import leaderboard_broadcaster
+from app.services.leaderboard_stream import leaderboard_stream
 from app.services.analytics_service import AnalyticsService
 
 router = APIRouter()
@@ -23,7 +25,7 @@ async def websocket_endpoint(
     WebSocket endpoint for real-time updates
 
     Clients connect to this endpoint to receive:
-    - Leaderboard updates
+    - Leaderboard updates (full lists, or deltas after a leaderboard_ack)
     - Active player counts
     - New score notifications
     - Game completion notifications
@@ -57,6 +59,10 @@ async def websocket_endpoint(
                     'message': 'Use REST API for leaderboard data. WebSocket is for live updates only.'
                 }, websocket)
 
+            elif message_type == 'leaderboard_ack':
+                # Opt into leaderboard deltas; version null asks for a snapshot
+                await leaderboard_stream.handle_ack(websocket, short_code, data.get('version'))
+
             elif message_type == 'game_started':
                 # Broadcast that a new player started
                 await manager.broadcast_game_start(short_code, {
@@ -67,10 +73,7 @@ async def websocket_endpoint(
     except WebSocketDisconnect:
         manager.disconnect(websocket)
         # Broadcast updated player count
-        await manager.broadcast_to_room(short_code, {
-            'type': 'player_count',
-            'count': manager.get_active_players(short_code)
-        })
+        manager.broadcast_player_count(short_code)
     except Exception as e:
         print(f"[WEBSOCKET] Error: {str(e)}")
         manager.disconnect(websocket)
@@ -83,16 +86,20 @@ async def get_websocket_stats():
 
     Returns:
         - active_rooms: List of short codes with active connections
-        - total_connections: Total number of active WebSocket connections
-        - room_details: Details about each active room
+        - total_connections: Total number of WebSocket connections to this worker
+        - room_details: Details about each active room (players across all workers and on this one)
+        - broadcast: Outbound queue, slow-consumer and backplane metrics
+        - leaderboard_broadcasts: Leaderboard debounce window and coalescing ratio
+        - leaderboard_stream: Delta/snapshot counts and average payload sizes
     """
     rooms = manager.get_all_rooms()
-    total_connections = sum(manager.get_active_players(room) for room in rooms)
+    total_connections = sum(manager.get_local_players(room) for room in rooms)
 
     room_details = [
         {
             'short_code': room,
-            'active_players': manager.get_active_players(room)
+            'active_players': manager.get_active_players(room),
+            'local_players': manager.get_local_players(room)
         }
         for room in rooms
     ]
@@ -100,5 +107,8 @@ async def get_websocket_stats():
     return {
         'active_rooms': len(rooms),
         'total_connections': total_connections,
-        'room_details': room_details
+        'room_details': room_details,
+        'broadcast': manager.get_stats(),
+        'leaderboard_broadcasts': leaderboard_broadcaster.get_stats(),
+        'leaderboard_stream': leaderboard_stream.get_stats()
     }
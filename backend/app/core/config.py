@@ -13,12 +13,30 @@ class Settings(BaseSettings):
 
     # Database (SQLite for development, PostgreSQL for production)
     DATABASE_URL: str = "sqlite:///./jfgi_dev.db"  # Use SQLite for local dev
+    # Async driver URL; derived from DATABASE_URL when empty
+    # (sqlite -> sqlite+aiosqlite, postgresql -> postgresql+asyncpg)
+    ASYNC_DATABASE_URL: str = ""
+    # Apply Alembic migrations when the app starts; turn off when a deploy
+    # step runs `alembic upgrade head` instead
+    RUN_MIGRATIONS_ON_STARTUP: bool = True
 
     # Security
     SECRET_KEY: str = "change-this-to-a-secure-random-string-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
 
+    # Short codes: sequence numbers mapped through a keyed permutation.
+    # Derived from SECRET_KEY when empty; changing it later only risks
+    # rare collisions, which are retried
+    SHORT_CODE_KEY: str = ""
+    SHORT_CODE_BLOCK_SIZE: int = 1000  # Sequence numbers each worker reserves per database round trip
+    SHORT_CODE_MAX_ATTEMPTS: int = 5  # Codes tried when the unique index rejects one
+
+    # Bulk URL creation (POST /urls/bulk)
+    BULK_CREATE_MAX_ROWS: int = 50000  # Larger imports must be split
+    BULK_CREATE_CHUNK_SIZE: int = 1000  # Rows allocated, filtered and committed together
+    BULK_CREATE_MAX_ROW_BYTES: int = 4096  # Body size allowed per row (a long_url alone may be 2048)
+
     # CORS
     ALLOWED_ORIGINS: List[str] = [
         "http://localhost:5173",  # Vite dev server
@@ -32,13 +50,63 @@ class Settings(BaseSettings):
     RATE_LIMIT_URLS_PER_HOUR: int = 100
     RATE_LIMIT_GAMES_PER_HOUR: int = 1000
 
+    # Listing endpoints (leaderboards, detailed analytics, my-urls)
+    MAX_PAGE_SIZE: int = 200  # Larger `limit` values are clamped; page on with the cursor
+
+    # Analytics write-behind pipeline
+    ANALYTICS_BATCH_SIZE: int = 500  # Flush after this many events...
+    ANALYTICS_FLUSH_INTERVAL_MS: int = 250  # ...or this long after the first queued event
+    ANALYTICS_QUEUE_MAX_SIZE: int = 10000  # Bounded queue (memory cap)
+    ANALYTICS_ENQUEUE_TIMEOUT_MS: int = 100  # Backpressure wait before an event is dropped
+    ANALYTICS_EXPORT_CHUNK_SIZE: int = 1000  # Rows per server-side cursor fetch in session exports
+    ROLLUP_MAX_BUCKETS: int = 1000  # Most hourly/daily buckets one time-series request may return
+    GLOBAL_ANALYTICS_REFRESH_SECONDS: int = 30  # How often the /analytics/global snapshot is recomputed
+    GLOBAL_ANALYTICS_INCREMENTAL: bool = True  # Fold analytics batches into the snapshot between refreshes
+
+    # Short URL lookup cache
+    URL_CACHE_MAX_SIZE: int = 10000
+    URL_CACHE_TTL_SECONDS: int = 300
+    URL_CACHE_NEGATIVE_TTL_SECONDS: int = 30  # Unknown short codes
+
+    # Server-side game sessions
+    GAME_SESSION_MAX: int = 100000  # Live sessions held in memory
+    GAME_SESSION_GRACE_SECONDS: int = 30  # Kept this long past the time limit
+    GAME_SESSION_SWEEP_INTERVAL_SECONDS: int = 5  # Expired sessions become timeout events
+
+    # WebSocket broadcasts
+    WS_SEND_QUEUE_SIZE: int = 64  # Queued messages per connection before it is dropped
+    WS_SEND_TIMEOUT_SECONDS: float = 5.0  # A single send taking longer drops the connection
+    LEADERBOARD_BROADCAST_WINDOW_MS: int = 250  # Leaderboard changes within this window share one broadcast
+    LEADERBOARD_DELTA_HISTORY: int = 16  # Deltas kept per room for clients catching up
+    LEADERBOARD_MAX_UNACKED_VERSIONS: int = 8  # Deltas sent past a client's last ack before pausing it
+    WS_BACKPLANE: str = "memory"  # memory (single worker), unix (workers on one host) or redis
+    WS_BACKPLANE_SOCKET_DIR: str = "/tmp/jfgi-ws"  # Datagram sockets for the unix backplane
+    WS_BACKPLANE_PRESENCE_SECONDS: float = 5.0  # Player count heartbeat; silent workers expire after 3
+
     # External APIs
+    SEARCH_PROVIDER: str = "auto"  # google, local, none, or auto (google when the API key and CX are set, else local)
+    SEARCH_CORPUS_PATH: str = ""  # JSONL pages for the local index; empty uses app/data/search_corpus.jsonl
     GOOGLE_SEARCH_API_KEY: str = ""
     GOOGLE_SEARCH_CX: str = ""
+    SEARCH_MAX_CONCURRENCY: int = 20  # Google searches in flight at once (also the connection pool size)
+    SEARCH_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    SEARCH_READ_TIMEOUT_SECONDS: float = 5.0
+    SEARCH_POOL_TIMEOUT_SECONDS: float = 2.0  # Wait for a free slot before falling back
+    SEARCH_KEEPALIVE_SECONDS: float = 60.0  # Idle pooled connections are closed after this
+    SEARCH_CIRCUIT_FAILURES: int = 5  # Consecutive failures that open the circuit
+    SEARCH_CIRCUIT_RESET_SECONDS: float = 30.0  # Open circuit serves fallback results this long
+    SEARCH_CACHE_MAX_SIZE: int = 5000  # Distinct normalized queries kept
+    SEARCH_CACHE_TTL_SECONDS: int = 900  # Cached results are re-fetched after this
 
     # Redis (Optional - for caching)
     REDIS_URL: str = "redis://localhost:6379"
 
+    # Shared cache/counter backend: "memory" (per process) or "redis" (shared by all workers)
+    CACHE_BACKEND: str = "memory"
+    COUNTER_FOLD_INTERVAL_SECONDS: int = 5  # How often Redis counters are folded into short_urls
+    LEADERBOARD_CACHE_TTL_SECONDS: int = 86400  # Idle hot leaderboards expire from Redis
+    GLOBAL_LEADERBOARD_SIZE: int = 100  # Entries kept per global leaderboard window; larger limits query the DB
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -2,12 +2,32 @@
 Database connection and session management
 """
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
-# Create SQLAlchemy engine
+
+def get_async_database_url(url: str) -> str:
+    """
+    Map a sync DATABASE_URL onto its async driver
+
+    sqlite:// -> sqlite+aiosqlite://, postgresql:// -> postgresql+asyncpg://
+    URLs that already name a driver other than the sync defaults are left alone.
+    """
+    scheme, sep, rest = url.partition("://")
+    async_schemes = {
+        "sqlite": "sqlite+aiosqlite",
+        "sqlite+pysqlite": "sqlite+aiosqlite",
+        "postgres": "postgresql+asyncpg",
+        "postgresql": "postgresql+asyncpg",
+        "postgresql+psycopg2": "postgresql+asyncpg",
+    }
+    return f"{async_schemes.get(scheme, scheme)}{sep}{rest}"
+
+
+# Create SQLAlchemy engine (sync - used for schema setup and offline jobs)
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,  # Enable connection health checks
@@ -17,6 +37,23 @@ engine = create_engine(
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create async engine (used by request handlers and background tasks)
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    echo=settings.ENVIRONMENT == "development"
+)
+
+# Create AsyncSessionLocal class
+# expire_on_commit=False so ORM objects can still be read after commit
+# without an implicit (blocking) refresh
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -28,3 +65,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency to get async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
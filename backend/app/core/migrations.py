@@ -0,0 +1,65 @@
+"""
+Database migrations
+Brings the schema to the latest Alembic revision on startup (replaces
+Base.metadata.create_all)
+"""
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.core.database import engine as default_engine
+from app.models import Base
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Revision matching the schema create_all used to build
+BASELINE_REVISION = "0001"
+
+# Arbitrary key for the Postgres advisory lock that serializes workers
+MIGRATION_LOCK_ID = 0x6A666769
+
+
+def alembic_config() -> Config:
+    """Alembic config pointing at backend/alembic regardless of the working directory"""
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    # Keep the app's logging setup; alembic.ini would replace it
+    config.attributes['configure_logger'] = False
+    return config
+
+
+def run_migrations(engine: Optional[Engine] = None) -> None:
+    """
+    Upgrade the database to the latest revision
+
+    Databases created by create_all have the tables but no alembic_version.
+    They are stamped at head if they already match the models, otherwise at
+    the baseline (create_all before migrations existed), so only the later
+    revisions run. On Postgres an advisory lock makes
+    concurrent workers take turns; SQLite serializes writers itself.
+
+    Args:
+        engine: Sync engine to migrate (defaults to the app engine)
+    """
+    engine = engine or default_engine
+    config = alembic_config()
+
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+
+        config.attributes['connection'] = connection
+        tables = set(inspect(connection).get_table_names())
+        if "short_urls" in tables and "alembic_version" not in tables:
+            up_to_date = not compare_metadata(MigrationContext.configure(connection), Base.metadata)
+            revision = "head" if up_to_date else BASELINE_REVISION
+            print(f"[DATABASE] Existing schema without migrations, stamping revision {revision}")
+            command.stamp(config, revision)
+
+        command.upgrade(config, "head")
@@ -0,0 +1,79 @@
+"""
+API token authentication
+Bearer JWTs signed with SECRET_KEY that carry the scopes a client may use
+"""
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+
+from app.core.config import settings
+
+# Scope needed by POST /urls/bulk
+BULK_CREATE_SCOPE = "urls:bulk"
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def create_access_token(
+    subject: str,
+    scopes: List[str],
+    expires_minutes: int = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+) -> str:
+    """
+    Create a signed API token
+
+    Args:
+        subject: Who the token is for (e.g. a campaign or partner name)
+        scopes: Scopes granted, e.g. [BULK_CREATE_SCOPE]
+        expires_minutes: Lifetime of the token
+
+    Returns:
+        str: Encoded JWT
+    """
+    claims = {
+        'sub': subject,
+        'scopes': list(scopes),
+        'exp': datetime.utcnow() + timedelta(minutes=expires_minutes)
+    }
+    return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Verify a token's signature and expiry
+
+    Raises:
+        JWTError: If the token is invalid or expired
+    """
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
+def require_scope(scope: str) -> Callable:
+    """
+    Dependency that requires a bearer token granting `scope`
+
+    Returns:
+        Dependency returning the token claims; responds 401 without a
+        valid token and 403 when the scope is missing
+    """
+    async def dependency(
+        credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+    ) -> Dict[str, Any]:
+        if credentials is None:
+            raise HTTPException(
+                status_code=401, detail="Missing bearer token", headers={'WWW-Authenticate': 'Bearer'}
+            )
+        try:
+            claims = decode_access_token(credentials.credentials)
+        except JWTError:
+            raise HTTPException(
+                status_code=401, detail="Invalid or expired token", headers={'WWW-Authenticate': 'Bearer'}
+            )
+        if scope not in claims.get('scopes', []):
+            raise HTTPException(status_code=403, detail=f"Token lacks the '{scope}' scope")
+        return claims
+
+    return dependency
@@ -0,0 +1,31 @@
+"""
+Backfill analytics rollups
+Rebuilds the hourly/daily analytics_rollups buckets from url_analytics,
+e.g. after deploying the table or to repair drift. Whole UTC days are
+replaced; without dates every bucket is rebuilt.
+
+Run with: python -m app.jobs.backfill_rollups [start_date [end_date]]
+(dates as YYYY-MM-DD, end inclusive)
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.services.analytics_rollups import RollupService
+
+
+async def main(start: datetime = None, end: datetime = None) -> None:
+    async with AsyncSessionLocal() as db:
+        began = time.perf_counter()
+        written = await RollupService.backfill(db, start, end)
+        elapsed = time.perf_counter() - began
+        print(f"Wrote {written} rollup buckets in {elapsed:.2f}s")
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    dates = [datetime.fromisoformat(arg) for arg in sys.argv[1:3]]
+    asyncio.run(main(*dates))
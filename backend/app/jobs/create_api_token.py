@@ -0,0 +1,25 @@
+"""
+Create an API token
+Prints a bearer token for the authenticated endpoints (by default with
+the scope of POST /urls/bulk)
+
+Run with: python -m app.jobs.create_api_token <subject> [scope ...]
+"""
+import sys
+
+from app.core.config import settings
+from app.core.security import BULK_CREATE_SCOPE, create_access_token
+
+
+def main(subject: str, scopes=None) -> None:
+    scopes = scopes or [BULK_CREATE_SCOPE]
+    token = create_access_token(subject, scopes)
+    print(f"Token for {subject} ({', '.join(scopes)}), valid {settings.ACCESS_TOKEN_EXPIRE_MINUTES} minutes:")
+    print(token)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.jobs.create_api_token <subject> [scope ...]")
+        sys.exit(1)
+    main(sys.argv[1], sys.argv[2:])
@@ -0,0 +1,34 @@
+"""
+Rebuild the global leaderboard boards
+Reloads the all-time, today and week top-K boards from the leaderboard
+table, e.g. after rows were imported or deleted outside the API
+
+Run with: python -m app.jobs.rebuild_global_leaderboard
+(only useful with CACHE_BACKEND=redis; memory boards live in each worker
+and are rebuilt when it restarts)
+"""
+import asyncio
+import time
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.services.global_leaderboard import global_leaderboard
+from app.services.shared_state import state_backend
+
+
+async def main() -> None:
+    if not state_backend.shared:
+        print("CACHE_BACKEND is memory: boards are per worker, nothing shared to rebuild")
+
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        loaded = await global_leaderboard.rebuild(db)
+        elapsed = time.perf_counter() - start
+        windows = ", ".join(f"{name}={count}" for name, count in loaded.items())
+        print(f"Rebuilt global leaderboard ({windows}) in {elapsed:.2f}s")
+
+    await state_backend.close()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
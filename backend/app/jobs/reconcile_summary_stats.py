@@ -0,0 +1,27 @@
+"""
+Reconcile ShortURL summary counters
+Recomputes views/completions/failures/timeouts and the average completion
+time from url_analytics in one bulk pass
+
+Run with: python -m app.jobs.reconcile_summary_stats [short_code]
+"""
+import asyncio
+import sys
+import time
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.services.analytics_service import AnalyticsService
+
+
+async def main(short_code: str = None) -> None:
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        updated = await AnalyticsService.reconcile_summary_stats(db, short_code)
+        elapsed = time.perf_counter() - start
+        print(f"Reconciled {updated} URLs in {elapsed:.2f}s")
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else None))
@@ -2,6 +2,9 @@
 JFGI FastAPI Backend
 Main application entry point
 """
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
@@ -9,12 +12,41 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
 from app.core.config import settings
-from app.core.database import engine
-from app.models import Base
+from app.core.migrations import run_migrations
 from app.api.v1.api import api_router
+from app.services.analytics_pipeline import analytics_pipeline
+from app.services.counter_folder import counter_folder
+from app.services.global_analytics import global_analytics
+from app.services.game_sessions import game_sessions
+from app.services.leaderboard_broadcaster import leaderboard_broadcaster
+from app.services.search_cache import search_provider
+from app.services.shared_state import state_backend
+from app.services.ws_backplane import backplane
+from app.utils.pagination import NEXT_CURSOR_HEADER
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    if settings.RUN_MIGRATIONS_ON_STARTUP:
+        await asyncio.to_thread(run_migrations)
+    await backplane.start()
+    await analytics_pipeline.start()
+    await counter_folder.start()
+    await game_sessions.start()
+    await global_analytics.start()
+    await search_provider.start()
+    yield
+    # Shutdown - flush queued analytics, then fold the counters they produced
+    await search_provider.stop()
+    await global_analytics.stop()
+    await game_sessions.stop()
+    await leaderboard_broadcaster.stop()
+    await backplane.stop()
+    await analytics_pipeline.stop()
+    await counter_folder.stop()
+    await state_backend.close()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -23,6 +55,7 @@ app = FastAPI(
     description="URL shortening game backend with challenge mechanics",
     docs_url="/docs" if settings.ENVIRONMENT != "production" else None,
     redoc_url="/redoc" if settings.ENVIRONMENT != "production" else None,
+    lifespan=lifespan,
 )
 
 # CORS Configuration
@@ -32,6 +65,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Rate Limiting Setup
@@ -3,5 +3,7 @@ from app.core.database import Base
 from app.models.url import ShortURL
 from app.models.analytics import URLAnalytics
 from app.models.leaderboard import LeaderboardEntry
+from app.models.rollup import AnalyticsRollup
+from app.models.sequence import CodeSequence
 
-__all__ = ["Base", "ShortURL", "URLAnalytics", "LeaderboardEntry"]
+__all__ = ["Base", "ShortURL", "URLAnalytics", "LeaderboardEntry", "AnalyticsRollup", "CodeSequence"]
@@ -1,7 +1,7 @@
 """
 URLAnalytics Model - Tracks user sessions and game outcomes
 """
-from sqlalchemy import Column, String, Integer, Float, DateTime
+from sqlalchemy import Column, String, Integer, Float, DateTime, Index
 from datetime import datetime
 import uuid
 
@@ -12,7 +12,7 @@ class URLAnalytics(Base):
     __tablename__ = "url_analytics"
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    short_code = Column(String(10), nullable=False, index=True)
+    short_code = Column(String(10), nullable=False)
 
     # Session tracking
     session_start = Column(DateTime, default=datetime.utcnow, index=True)
@@ -38,3 +38,10 @@ class URLAnalytics(Base):
 
     def __repr__(self):
         return f"<URLAnalytics {self.short_code} - {self.outcome}>"
+
+
+# Latest sessions per URL and its keyset pages (alembic revisions 0002, 0003)
+Index(
+    'ix_url_analytics_short_code_session_start',
+    URLAnalytics.short_code, URLAnalytics.session_start, URLAnalytics.id
+)
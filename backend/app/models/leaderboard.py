@@ -1,7 +1,7 @@
 """
 LeaderboardEntry Model - Stores top scores for each URL
 """
-from sqlalchemy import Column, String, Integer, Float, DateTime
+from sqlalchemy import Column, String, Integer, Float, DateTime, Index
 from datetime import datetime
 import uuid
 
@@ -12,23 +12,40 @@ class LeaderboardEntry(Base):
     __tablename__ = "leaderboard"
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    short_code = Column(String(10), nullable=False, index=True)
+    short_code = Column(String(10), nullable=False)
 
     # Player information (anonymous)
     player_nickname = Column(String(50), default='Anonymous')
     player_country = Column(String(2), nullable=True)
 
     # Performance metrics
-    completion_time_seconds = Column(Float, nullable=False, index=True)
+    completion_time_seconds = Column(Float, nullable=False)
     hints_used = Column(Integer, default=0)
     score = Column(Integer, nullable=False)
     difficulty = Column(String(20), nullable=True, index=True)
 
-    # Ranking (calculated periodically)
-    rank = Column(Integer, nullable=True, index=True)
+    # Ranking (no longer maintained - ranks are computed on read from the
+    # in-memory rank index, see services/leaderboard_ranking.py)
+    rank = Column(Integer, nullable=True)
     percentile = Column(Float, nullable=True)
 
     completed_at = Column(DateTime, default=datetime.utcnow)
 
     def __repr__(self):
         return f"<LeaderboardEntry {self.player_nickname} - {self.score}>"
+
+
+# Indexes matching the hot query shapes (alembic revision 0002)
+# Per-URL top-N and rank index load (index-only thanks to the trailing id)
+Index(
+    'ix_leaderboard_short_code_score',
+    LeaderboardEntry.short_code, LeaderboardEntry.score.desc(),
+    LeaderboardEntry.completion_time_seconds, LeaderboardEntry.id
+)
+# Global all-time top-N and its keyset pages (id added in revision 0003)
+Index(
+    'ix_leaderboard_score',
+    LeaderboardEntry.score.desc(), LeaderboardEntry.completion_time_seconds, LeaderboardEntry.id
+)
+# Global today / week window
+Index('ix_leaderboard_completed_at', LeaderboardEntry.completed_at)
@@ -0,0 +1,40 @@
+"""
+AnalyticsRollup Model - Hourly and daily analytics buckets per short code
+"""
+from sqlalchemy import Column, String, Integer, Float, DateTime
+
+from app.core.database import Base
+
+# short_code of the buckets summed over every URL
+GLOBAL_ROLLUP = '*'
+
+GRANULARITIES = ('hour', 'day')
+
+
+class AnalyticsRollup(Base):
+    __tablename__ = "analytics_rollups"
+
+    # One row per (URL, granularity, bucket); GLOBAL_ROLLUP rows cover all
+    # URLs. The primary key doubles as the index for time-range reads.
+    short_code = Column(String(10), primary_key=True)
+    granularity = Column(String(4), primary_key=True)  # hour, day
+    bucket_start = Column(DateTime, primary_key=True)  # UTC, truncated to the granularity
+
+    # Sessions started in the bucket
+    views = Column(Integer, nullable=False, default=0)
+
+    # Sessions whose final outcome was recorded in the bucket (session_end)
+    completions = Column(Integer, nullable=False, default=0)
+    failures = Column(Integer, nullable=False, default=0)
+    timeouts = Column(Integer, nullable=False, default=0)
+    abandonments = Column(Integer, nullable=False, default=0)
+    completion_time_sum = Column(Float, nullable=False, default=0.0)
+    completion_time_count = Column(Integer, nullable=False, default=0)
+
+    # Ads, attributed to the bucket the session started in
+    ads_shown = Column(Integer, nullable=False, default=0)
+    ads_clicked = Column(Integer, nullable=False, default=0)
+    revenue_usd = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<AnalyticsRollup {self.short_code} {self.granularity} {self.bucket_start}>"
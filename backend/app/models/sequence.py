@@ -0,0 +1,17 @@
+"""
+CodeSequence Model - Counters handed out to workers in blocks
+"""
+from sqlalchemy import Column, String, BigInteger
+
+from app.core.database import Base
+
+
+class CodeSequence(Base):
+    __tablename__ = "code_sequences"
+
+    name = Column(String(32), primary_key=True)  # e.g. short_urls
+    # First number not yet handed out to any worker
+    next_value = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CodeSequence {self.name} at {self.next_value}>"
@@ -1,7 +1,7 @@
 """
 ShortURL Model - Stores shortened URLs and challenge configuration
 """
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, JSON
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, JSON, Index
 from datetime import datetime
 import uuid
 
@@ -20,9 +20,13 @@ class ShortURL(Base):
     difficulty = Column(String(20), default='medium')  # simple, medium, hard, expert
     challenge_text = Column(String(500), nullable=True)
     hints = Column(JSON, nullable=True)  # Array of hint strings
-    correct_answers = Column(JSON, nullable=True)  # Array of acceptable answers
+    correct_answers = Column(JSON, nullable=True)  # Canonical answer keys (app/utils/url_canonical.py)
     time_limit_seconds = Column(Integer, default=180)
 
+    # Precomputed at creation (app/utils/url_analysis.py)
+    url_analysis = Column(JSON, nullable=True)  # Domain parts, keywords, TLD, category
+    hint_ladder = Column(JSON, nullable=True)  # Hint text per level (index 0 is level 1)
+
     # Creator Info
     creator_ip = Column(String(45), nullable=True)
     creator_user_agent = Column(String(500), nullable=True)
@@ -35,6 +39,7 @@ class ShortURL(Base):
     total_failures = Column(Integer, default=0)
     total_timeouts = Column(Integer, default=0)
     avg_completion_time_seconds = Column(Float, nullable=True)
+    timed_completions = Column(Integer, default=0)  # Completions averaged into avg_completion_time_seconds
 
     # Moderation
     is_flagged = Column(Boolean, default=False)
@@ -42,3 +47,7 @@ class ShortURL(Base):
 
     def __repr__(self):
         return f"<ShortURL {self.short_code} -> {self.long_url[:50]}...>"
+
+
+# My URLs: latest links per creator IP and its keyset pages (alembic revisions 0002, 0003)
+Index('ix_short_urls_creator_ip_created_at', ShortURL.creator_ip, ShortURL.created_at, ShortURL.id)
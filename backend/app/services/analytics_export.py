@@ -0,0 +1,122 @@
+"""
+Analytics Export
+Streams URLAnalytics sessions as NDJSON or CSV straight from a
+server-side cursor, so memory stays flat however many rows are exported
+"""
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.analytics import URLAnalytics
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Same field names as GET /analytics/{short_code}/detailed
+EXPORT_COLUMNS = [
+    URLAnalytics.id,
+    URLAnalytics.short_code,
+    URLAnalytics.visitor_ip,
+    URLAnalytics.visitor_user_agent,
+    URLAnalytics.referrer,
+    URLAnalytics.session_start,
+    URLAnalytics.session_end,
+    URLAnalytics.outcome,
+    URLAnalytics.completion_time_seconds.label('completion_time'),
+    URLAnalytics.hints_used,
+    URLAnalytics.attempts,
+    URLAnalytics.score,
+    URLAnalytics.ads_shown,
+    URLAnalytics.ads_clicked,
+    URLAnalytics.estimated_revenue_usd.label('estimated_revenue'),
+]
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Convert an aware datetime to the naive UTC the columns store"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def stream_sessions(
+    short_code: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    outcome: Optional[str] = None,
+    chunk_size: int = settings.ANALYTICS_EXPORT_CHUNK_SIZE,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+) -> AsyncIterator[Sequence[Any]]:
+    """
+    Yield a URL's sessions in chunks of rows, oldest first
+
+    Rows are read with yield_per, so at most one chunk is held in memory.
+    The generator opens its own session: a StreamingResponse keeps
+    iterating after the request's dependencies have been closed.
+
+    Args:
+        short_code: Short URL code
+        start: Only sessions started at or after this time
+        end: Only sessions started before this time
+        outcome: Only sessions with this outcome
+        chunk_size: Rows fetched per round trip
+        session_factory: Creates the database session
+
+    Yields:
+        Lists of rows with the EXPORT_FIELDS columns
+    """
+    query = select(*EXPORT_COLUMNS).where(URLAnalytics.short_code == short_code)
+    if start is not None:
+        query = query.where(URLAnalytics.session_start >= naive_utc(start))
+    if end is not None:
+        query = query.where(URLAnalytics.session_start < naive_utc(end))
+    if outcome is not None:
+        query = query.where(URLAnalytics.outcome == outcome)
+    query = query.order_by(URLAnalytics.session_start, URLAnalytics.id).execution_options(yield_per=chunk_size)
+
+    async with session_factory() as db:
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            yield rows
+
+
+def _value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def ndjson_chunks(rows: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    """Encode row chunks as newline-delimited JSON, one bytes chunk per row chunk"""
+    async for chunk in rows:
+        lines: List[str] = [
+            json.dumps({field: _value(value) for field, value in zip(EXPORT_FIELDS, row)})
+            for row in chunk
+        ]
+        lines.append('')
+        yield '\n'.join(lines).encode()
+
+
+async def csv_chunks(rows: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    """Encode row chunks as CSV with a header row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+
+    async for chunk in rows:
+        writer.writerows([_value(value) for value in row] for row in chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        # Header only: nothing matched
+        yield buffer.getvalue().encode()
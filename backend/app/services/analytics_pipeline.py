@@ -0,0 +1,325 @@
+"""
+Analytics Write-Behind Pipeline
+Queues analytics events in memory and writes them to the database in
+batches, off the request path
+"""
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.analytics_service import AnalyticsEvent, AnalyticsService, new_session_id
+
+
+class AnalyticsPipeline:
+    """
+    Bounded asyncio queue with a background flusher
+
+    Events are flushed every `batch_size` events or `flush_interval_ms`
+    after the first queued event, whichever comes first, so each batch
+    costs one transaction instead of one per event. When the queue is
+    full, producers wait up to `enqueue_timeout_ms` before the event is
+    dropped. Before start() (scripts, tests) events are written
+    immediately.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.ANALYTICS_BATCH_SIZE,
+        flush_interval_ms: int = settings.ANALYTICS_FLUSH_INTERVAL_MS,
+        max_queue_size: int = settings.ANALYTICS_QUEUE_MAX_SIZE,
+        enqueue_timeout_ms: int = settings.ANALYTICS_ENQUEUE_TIMEOUT_MS,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_queue_size = max_queue_size
+        self.enqueue_timeout = enqueue_timeout_ms / 1000
+        self.session_factory = session_factory
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed: Optional[asyncio.Future] = None
+
+        # Metrics
+        self.events_enqueued = 0
+        self.events_written = 0
+        self.events_dropped = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.flush_retries = 0
+        self.batches_split = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.last_batch_size = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start the background flusher (called from the app lifespan)"""
+        if self.running:
+            return
+
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._closed = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run())
+        print("[ANALYTICS] Write-behind pipeline started")
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out everything still queued"""
+        if self._task is None:
+            return
+
+        # The flusher drains the queue and exits on its own; nothing is
+        # cancelled mid-batch
+        backlog = self._queue.qsize()
+        self._closed.set_result(True)
+        await self._task
+        self._task = None
+
+        print(f"[ANALYTICS] Write-behind pipeline stopped ({backlog} queued events flushed on shutdown)")
+
+    async def enqueue(self, event: AnalyticsEvent) -> bool:
+        """
+        Queue an event for the next batch
+
+        Args:
+            event: Event to record
+
+        Returns:
+            True if the event was accepted, False if it was dropped
+        """
+        if not self.running:
+            await self._flush([event])
+            return True
+
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Backpressure: give the flusher a moment to make room
+            try:
+                await asyncio.wait_for(self._queue.put(event), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.events_dropped += 1
+                return False
+
+        self.events_enqueued += 1
+        return True
+
+    async def enqueue_many(self, events: List[AnalyticsEvent]) -> int:
+        """
+        Queue several events at once (e.g. a sweep of expired sessions)
+
+        Args:
+            events: Events to record
+
+        Returns:
+            Number of events accepted
+        """
+        if not self.running:
+            await self._flush(list(events))
+            return len(events)
+
+        accepted = 0
+        for event in events:
+            if await self.enqueue(event):
+                accepted += 1
+        return accepted
+
+    # ==================== Event helpers ====================
+
+    async def start_session(
+        self,
+        short_code: str,
+        visitor_ip: str,
+        visitor_user_agent: str,
+        referrer: Optional[str]
+    ) -> str:
+        """
+        Queue a new analytics session
+
+        Returns:
+            Session ID (valid immediately; the row is written with the next batch)
+        """
+        session_id = new_session_id()
+        await self.enqueue(AnalyticsEvent(
+            kind='session_start',
+            session_id=session_id,
+            short_code=short_code,
+            visitor_ip=visitor_ip,
+            visitor_user_agent=visitor_user_agent,
+            referrer=referrer
+        ))
+        return session_id
+
+    async def track_outcome(
+        self,
+        session_id: str,
+        outcome: str,
+        completion_time: Optional[float] = None,
+        hints_used: int = 0,
+        attempts: int = 0,
+        score: int = 0
+    ) -> bool:
+        """Queue a game outcome: completed, failed, timeout or abandoned"""
+        return await self.enqueue(AnalyticsEvent(
+            kind=outcome,
+            session_id=session_id,
+            completion_time=completion_time,
+            hints_used=hints_used,
+            attempts=attempts,
+            score=score
+        ))
+
+    async def track_ad_impression(self, session_id: str, placement_type: str) -> bool:
+        """Queue an ad impression"""
+        return await self.enqueue(AnalyticsEvent(
+            kind='ad_impression',
+            session_id=session_id,
+            placement_type=placement_type
+        ))
+
+    async def track_ad_click(self, session_id: str, placement_type: str, estimated_revenue: float) -> bool:
+        """Queue an ad click"""
+        return await self.enqueue(AnalyticsEvent(
+            kind='ad_click',
+            session_id=session_id,
+            placement_type=placement_type,
+            estimated_revenue=estimated_revenue
+        ))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pipeline metrics
+
+        Returns:
+            Queue depth, throughput counters and flush latency
+        """
+        return {
+            'running': self.running,
+            'queue_depth': self._queue.qsize() if self._queue else 0,
+            'queue_capacity': self.max_queue_size,
+            'events_enqueued': self.events_enqueued,
+            'events_written': self.events_written,
+            'events_dropped': self.events_dropped,
+            'flushes': self.flushes,
+            'flush_errors': self.flush_errors,
+            'flush_retries': self.flush_retries,
+            'batches_split': self.batches_split,
+            'last_batch_size': self.last_batch_size,
+            'last_flush_ms': round(self.last_flush_ms, 2),
+            'max_flush_ms': round(self.max_flush_ms, 2)
+        }
+
+    # ==================== Internals ====================
+
+    async def _run(self) -> None:
+        """Collect events into batches and flush them until closed and drained"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            event = await self._next_event(None)
+            if event is None:
+                return
+
+            batch = [event]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                event = await self._next_event(timeout)
+                if event is None:
+                    break
+                batch.append(event)
+
+            await self._flush(batch)
+
+    async def _next_event(self, timeout: Optional[float]) -> Optional[AnalyticsEvent]:
+        """
+        Get the next queued event
+
+        Returns:
+            The event, or None on timeout or once closed with an empty queue
+        """
+        try:
+            return self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            if self._closed.done():
+                return None
+
+        getter = asyncio.ensure_future(self._queue.get())
+        await asyncio.wait({getter, self._closed}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+        if getter.done():
+            return getter.result()
+
+        getter.cancel()
+        return None
+
+    async def _flush(self, batch: List[AnalyticsEvent]) -> None:
+        """
+        Write a batch in one transaction
+
+        A failed batch is retried once (locked database, dropped
+        connection). If it fails again it is split in halves, in order,
+        until the events that cannot be written are isolated; only those
+        are dropped.
+        """
+        if not batch:
+            return
+
+        start = time.perf_counter()
+        ok = await self._write(batch)
+        if not ok:
+            self.flush_retries += 1
+            ok = await self._write(batch)
+
+        written = len(batch)
+        if not ok:
+            self.flush_errors += 1
+            written = await self._write_halves(batch)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.flushes += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.last_batch_size = len(batch)
+        self.events_written += written
+        self.events_dropped += len(batch) - written
+
+    async def _write(self, events: List[AnalyticsEvent]) -> bool:
+        async with self.session_factory() as db:
+            return await AnalyticsService.record_events(events, db)
+
+    async def _write_halves(self, events: List[AnalyticsEvent]) -> int:
+        """
+        Write a failed batch in halves, splitting the halves that fail again
+
+        Returns:
+            Number of events written
+        """
+        if len(events) == 1:
+            event = events[0]
+            print(f"[ANALYTICS] Dropped {event.kind} event for session {event.session_id}")
+            return 0
+
+        self.batches_split += 1
+        middle = len(events) // 2
+        written = 0
+        for half in (events[:middle], events[middle:]):
+            if await self._write(half):
+                written += len(half)
+            else:
+                written += await self._write_halves(half)
+        return written
+
+
+# Global analytics pipeline instance
+analytics_pipeline = AnalyticsPipeline()
@@ -0,0 +1,288 @@
+"""
+Analytics Rollups
+Hourly and daily buckets per short code (and summed over all URLs), kept
+current by the analytics pipeline and rebuilt in bulk from url_analytics,
+so time series are read from O(buckets) rows instead of every session
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.analytics import URLAnalytics
+from app.models.rollup import GLOBAL_ROLLUP, GRANULARITIES, AnalyticsRollup
+
+ROLLUP_FIELDS = (
+    'views', 'completions', 'failures', 'timeouts', 'abandonments',
+    'completion_time_sum', 'completion_time_count', 'ads_shown', 'ads_clicked', 'revenue_usd'
+)
+
+# Final outcome -> rollup counter
+OUTCOME_FIELDS = {
+    'completed': 'completions',
+    'failed': 'failures',
+    'timeout': 'timeouts',
+    'abandoned': 'abandonments',
+}
+
+BUCKET_SIZES = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+
+# (short_code, hour bucket) -> rollup field deltas
+RollupDeltas = Dict[Tuple[str, datetime], Dict[str, float]]
+
+
+def new_rollup_delta() -> Dict[str, float]:
+    """Zeroed delta for one bucket"""
+    return {name: 0 for name in ROLLUP_FIELDS}
+
+
+def new_rollup_deltas() -> RollupDeltas:
+    return defaultdict(new_rollup_delta)
+
+
+def bucket_start(timestamp: datetime, granularity: str = 'hour') -> datetime:
+    """Truncate a UTC timestamp to the start of its hour or day"""
+    if granularity == 'day':
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def add_view(rollups: RollupDeltas, short_code: str, session_start: Optional[datetime]) -> None:
+    """Count a session in the hour it started"""
+    if short_code and session_start:
+        rollups[(short_code, bucket_start(session_start))]['views'] += 1
+
+
+def add_outcome(
+    rollups: RollupDeltas,
+    short_code: str,
+    outcome: Optional[str],
+    ended: Optional[datetime],
+    completion_time: Optional[float],
+    sign: int = 1
+) -> None:
+    """
+    Count (sign=1) or uncount (sign=-1) a session's final outcome in the
+    hour it ended
+    """
+    field = OUTCOME_FIELDS.get(outcome)
+    if not short_code or field is None or ended is None:
+        return
+
+    delta = rollups[(short_code, bucket_start(ended))]
+    delta[field] += sign
+    if outcome == 'completed' and completion_time and completion_time > 0:
+        delta['completion_time_count'] += sign
+        delta['completion_time_sum'] += sign * float(completion_time)
+
+
+def add_ads(
+    rollups: RollupDeltas,
+    short_code: str,
+    session_start: Optional[datetime],
+    shown: int,
+    clicked: int,
+    revenue: float
+) -> None:
+    """Count ad impressions, clicks and revenue in the hour the session started"""
+    if not short_code or session_start is None:
+        return
+
+    delta = rollups[(short_code, bucket_start(session_start))]
+    delta['ads_shown'] += shown or 0
+    delta['ads_clicked'] += clicked or 0
+    delta['revenue_usd'] += revenue or 0.0
+
+
+def expand_rollups(rollups: RollupDeltas) -> List[Dict[str, Any]]:
+    """
+    Turn hourly per-URL deltas into rows for every bucket they touch
+
+    Each delta lands in its URL's hour and day buckets and in the
+    GLOBAL_ROLLUP hour and day buckets.
+    """
+    rows: Dict[Tuple[str, str, datetime], Dict[str, Any]] = {}
+    for (short_code, hour), delta in rollups.items():
+        if not any(delta.values()):
+            continue
+        for code in (short_code, GLOBAL_ROLLUP):
+            for granularity in GRANULARITIES:
+                key = (code, granularity, bucket_start(hour, granularity))
+                row = rows.get(key)
+                if row is None:
+                    row = rows[key] = {
+                        'short_code': code, 'granularity': granularity, 'bucket_start': key[2],
+                        **new_rollup_delta()
+                    }
+                for name in ROLLUP_FIELDS:
+                    row[name] += delta[name]
+    return list(rows.values())
+
+
+def _upsert(db: AsyncSession):
+    """Dialect INSERT that supports ON CONFLICT DO UPDATE"""
+    if db.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(AnalyticsRollup.__table__)
+
+
+class RollupService:
+    """Writes and reads the analytics_rollups buckets"""
+
+    @staticmethod
+    async def apply_deltas(rollups: RollupDeltas, db: AsyncSession) -> None:
+        """
+        Add rollup deltas with one executemany upsert (no commit)
+
+        Args:
+            rollups: Hourly per-URL deltas
+            db: Database session
+        """
+        rows = expand_rollups(rollups)
+        if not rows:
+            return
+
+        table = AnalyticsRollup.__table__
+        stmt = _upsert(db)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.short_code, table.c.granularity, table.c.bucket_start],
+            set_={name: table.c[name] + stmt.excluded[name] for name in ROLLUP_FIELDS}
+        )
+        await db.execute(stmt, rows)
+
+    @staticmethod
+    async def backfill(
+        db: AsyncSession,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        chunk_size: int = settings.ANALYTICS_EXPORT_CHUNK_SIZE
+    ) -> int:
+        """
+        Rebuild the buckets of a time range from url_analytics
+
+        The range is widened to whole UTC days. Sessions are streamed and
+        aggregated in memory (one entry per bucket), then the range's
+        buckets are replaced in a single transaction. Events that land in
+        the range while it runs may be missed; run it off-peak or rerun it.
+
+        Args:
+            db: Database session
+            start: First day to rebuild (default: everything)
+            end: Rebuild up to this time (default: everything)
+            chunk_size: Sessions fetched per round trip
+
+        Returns:
+            Number of bucket rows written
+        """
+        start = bucket_start(start, 'day') if start else None
+        end = bucket_start(end, 'day') + BUCKET_SIZES['day'] if end else None
+
+        def in_range(timestamp: Optional[datetime]) -> bool:
+            return timestamp is not None and (start is None or timestamp >= start) and (end is None or timestamp < end)
+
+        try:
+            query = select(
+                URLAnalytics.short_code, URLAnalytics.session_start, URLAnalytics.session_end,
+                URLAnalytics.outcome, URLAnalytics.completion_time_seconds,
+                URLAnalytics.ads_shown, URLAnalytics.ads_clicked, URLAnalytics.estimated_revenue_usd
+            )
+            if start is not None or end is not None:
+                bounds = []
+                for column in (URLAnalytics.session_start, URLAnalytics.session_end):
+                    condition = column.isnot(None)
+                    if start is not None:
+                        condition = condition & (column >= start)
+                    if end is not None:
+                        condition = condition & (column < end)
+                    bounds.append(condition)
+                query = query.where(or_(*bounds))
+
+            rollups = new_rollup_deltas()
+            result = await db.stream(query.execution_options(yield_per=chunk_size))
+            async for row in result:
+                if in_range(row.session_start):
+                    add_view(rollups, row.short_code, row.session_start)
+                    add_ads(
+                        rollups, row.short_code, row.session_start,
+                        row.ads_shown, row.ads_clicked, row.estimated_revenue_usd
+                    )
+                if in_range(row.session_end):
+                    add_outcome(rollups, row.short_code, row.outcome, row.session_end, row.completion_time_seconds)
+
+            stale = delete(AnalyticsRollup)
+            if start is not None:
+                stale = stale.where(AnalyticsRollup.bucket_start >= start)
+            if end is not None:
+                stale = stale.where(AnalyticsRollup.bucket_start < end)
+            await db.execute(stale)
+
+            rows = expand_rollups(rollups)
+            if rows:
+                await db.execute(AnalyticsRollup.__table__.insert(), rows)
+            await db.commit()
+
+            print(f"[ANALYTICS] Rollups rebuilt: {len(rows)} buckets")
+            return len(rows)
+
+        except Exception as e:
+            print(f"[ANALYTICS] Error backfilling rollups: {str(e)}")
+            await db.rollback()
+            return 0
+
+    @staticmethod
+    async def get_timeseries(
+        short_code: str,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+        db: AsyncSession
+    ) -> List[Dict[str, Any]]:
+        """
+        Read a dense time series from the buckets
+
+        Args:
+            short_code: Short URL code, or GLOBAL_ROLLUP for all URLs
+            granularity: 'hour' or 'day'
+            start: First bucket (truncated to the granularity)
+            end: Exclusive end of the series
+            db: Database session
+
+        Returns:
+            One entry per bucket in [start, end), zero-filled where nothing happened
+        """
+        first = bucket_start(start, granularity)
+        rows = await db.scalars(
+            select(AnalyticsRollup)
+            .where(
+                AnalyticsRollup.short_code == short_code,
+                AnalyticsRollup.granularity == granularity,
+                AnalyticsRollup.bucket_start >= first,
+                AnalyticsRollup.bucket_start < end
+            )
+            .order_by(AnalyticsRollup.bucket_start)
+        )
+        found = {row.bucket_start: row for row in rows}
+
+        series = []
+        step = BUCKET_SIZES[granularity]
+        bucket = first
+        while bucket < end:
+            row = found.get(bucket)
+            values = {name: getattr(row, name) if row else 0 for name in ROLLUP_FIELDS}
+            views, timed = values['views'], values['completion_time_count']
+            series.append({
+                'bucket_start': bucket.isoformat(),
+                **values,
+                'avg_completion_time': values['completion_time_sum'] / timed if timed else None,
+                'completion_rate': values['completions'] / views * 100 if views else 0
+            })
+            bucket += step
+        return series
@@ -2,30 +2,95 @@
 Analytics Tracking Service
 Tracks all user interactions with URLs and games
 """
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple
+from collections import defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, case
+import uuid
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, desc, case, and_, bindparam, insert, update, Integer, Float
 
 from app.models.analytics import URLAnalytics
 from app.models.url import ShortURL
 from app.models.leaderboard import LeaderboardEntry
+from app.services.analytics_rollups import (
+    RollupDeltas, RollupService, add_ads, add_outcome, add_view, new_rollup_deltas
+)
+from app.services.global_analytics import global_analytics
+from app.services.global_leaderboard import global_leaderboard
+from app.services.shared_state import CounterDeltas, new_counter_delta, state_backend
+from app.utils.pagination import leaderboard_after, newest_after
+
+# Outcome -> ShortURL counter it feeds (total_<counter>)
+OUTCOME_COUNTERS = {
+    'completed': 'completions',
+    'failed': 'failures',
+    'timeout': 'timeouts',
+}
+
+OUTCOME_EVENTS = ('completed', 'failed', 'timeout', 'abandoned')
+AD_EVENTS = ('ad_impression', 'ad_click')
+
+# Rows per multi-row INSERT statement (keeps SQLite under its bind limit)
+INSERT_CHUNK_SIZE = 500
+
+
+def is_timed_completion(outcome: Optional[str], completion_time: Optional[float]) -> bool:
+    """True if a session counts towards a URL's average completion time"""
+    return outcome == 'completed' and completion_time is not None and completion_time > 0
+
+
+def timed_completion_clause():
+    """is_timed_completion() as a SQL condition on url_analytics rows (NULL times compare false)"""
+    return and_(URLAnalytics.outcome == 'completed', URLAnalytics.completion_time_seconds > 0)
+
+
+@dataclass
+class AnalyticsEvent:
+    """A single analytics event, applied to the database in batches"""
+    kind: str  # session_start, completed, failed, timeout, abandoned, ad_impression, ad_click
+    session_id: str
+    timestamp: datetime = field(default_factory=datetime.utcnow)
+
+    # session_start
+    short_code: Optional[str] = None
+    visitor_ip: Optional[str] = None
+    visitor_user_agent: Optional[str] = None
+    referrer: Optional[str] = None
+
+    # Outcomes
+    completion_time: Optional[float] = None
+    hints_used: int = 0
+    attempts: int = 0
+    score: int = 0
+
+    # Ads
+    placement_type: Optional[str] = None
+    estimated_revenue: float = 0.0
+
+
+def new_session_id() -> str:
+    """Generate an analytics session ID up front so it can be returned before the row is written"""
+    return str(uuid.uuid4())
 
 
 class AnalyticsService:
     """Service for tracking and retrieving analytics data"""
 
     @staticmethod
-    def start_session(
+    async def start_session(
         short_code: str,
         visitor_ip: str,
         visitor_user_agent: str,
         referrer: Optional[str],
-        db: Session
-    ) -> Optional[int]:
+        db: AsyncSession
+    ) -> Optional[str]:
         """
         Start a new analytics session when URL is accessed
 
+        Writes immediately. Request handlers should go through
+        analytics_pipeline, which batches the write.
+
         Args:
             short_code: Short URL code
             visitor_ip: Visitor's IP address
@@ -36,41 +101,29 @@ class AnalyticsService:
         Returns:
             Session ID if successful, None otherwise
         """
-        try:
-            # Increment view count on URL
-            url = db.query(ShortURL).filter(ShortURL.short_code == short_code).first()
-            if url:
-                url.total_views += 1
-
-            # Create analytics session
-            session = URLAnalytics(
-                short_code=short_code,
-                visitor_ip=visitor_ip,
-                visitor_user_agent=visitor_user_agent,
-                referrer=referrer,
-                session_start=datetime.utcnow()
-            )
-
-            db.add(session)
-            db.commit()
-            db.refresh(session)
-
-            print(f"[ANALYTICS] Session started: {session.id} for {short_code}")
-            return session.id
-
-        except Exception as e:
-            print(f"[ANALYTICS] Error starting session: {str(e)}")
-            db.rollback()
+        event = AnalyticsEvent(
+            kind='session_start',
+            session_id=new_session_id(),
+            short_code=short_code,
+            visitor_ip=visitor_ip,
+            visitor_user_agent=visitor_user_agent,
+            referrer=referrer
+        )
+
+        if not await AnalyticsService.record_events([event], db):
             return None
 
+        print(f"[ANALYTICS] Session started: {event.session_id} for {short_code}")
+        return event.session_id
+
     @staticmethod
-    def track_completion(
-        session_id: int,
+    async def track_completion(
+        session_id: str,
         completion_time: int,
         hints_used: int,
         attempts: int,
         score: int,
-        db: Session
+        db: AsyncSession
     ) -> None:
         """
         Track game completion
@@ -83,35 +136,22 @@ class AnalyticsService:
             score: Final score
             db: Database session
         """
-        try:
-            session = db.query(URLAnalytics).filter(URLAnalytics.id == session_id).first()
-
-            if session:
-                session.outcome = 'completed'
-                session.session_end = datetime.utcnow()
-                session.completion_time = completion_time
-                session.hints_used = hints_used
-                session.attempts = attempts
-                session.score = score
-
-                db.commit()
-
-                print(f"[ANALYTICS] Completion tracked for session {session_id}")
-
-                # Update summary statistics
-                AnalyticsService._update_summary_stats(session.short_code, db)
-
-        except Exception as e:
-            print(f"[ANALYTICS] Error tracking completion: {str(e)}")
-            db.rollback()
+        await AnalyticsService.record_events([AnalyticsEvent(
+            kind='completed',
+            session_id=session_id,
+            completion_time=completion_time,
+            hints_used=hints_used,
+            attempts=attempts,
+            score=score
+        )], db)
 
     @staticmethod
-    def track_failure(
-        session_id: int,
+    async def track_failure(
+        session_id: str,
         attempts: int,
         hints_used: int,
         score: int,
-        db: Session
+        db: AsyncSession
     ) -> None:
         """
         Track game failure (wrong answer)
@@ -123,34 +163,21 @@ class AnalyticsService:
             score: Final score
             db: Database session
         """
-        try:
-            session = db.query(URLAnalytics).filter(URLAnalytics.id == session_id).first()
-
-            if session:
-                session.outcome = 'failed'
-                session.session_end = datetime.utcnow()
-                session.attempts = attempts
-                session.hints_used = hints_used
-                session.score = score
-
-                db.commit()
-
-                print(f"[ANALYTICS] Failure tracked for session {session_id}")
-
-                # Update summary
-                AnalyticsService._update_summary_stats(session.short_code, db)
-
-        except Exception as e:
-            print(f"[ANALYTICS] Error tracking failure: {str(e)}")
-            db.rollback()
+        await AnalyticsService.record_events([AnalyticsEvent(
+            kind='failed',
+            session_id=session_id,
+            hints_used=hints_used,
+            attempts=attempts,
+            score=score
+        )], db)
 
     @staticmethod
-    def track_timeout(
-        session_id: int,
+    async def track_timeout(
+        session_id: str,
         attempts: int,
         hints_used: int,
         score: int,
-        db: Session
+        db: AsyncSession
     ) -> None:
         """
         Track game timeout
@@ -162,29 +189,16 @@ class AnalyticsService:
             score: Final score
             db: Database session
         """
-        try:
-            session = db.query(URLAnalytics).filter(URLAnalytics.id == session_id).first()
-
-            if session:
-                session.outcome = 'timeout'
-                session.session_end = datetime.utcnow()
-                session.attempts = attempts
-                session.hints_used = hints_used
-                session.score = score
-
-                db.commit()
-
-                print(f"[ANALYTICS] Timeout tracked for session {session_id}")
-
-                # Update summary
-                AnalyticsService._update_summary_stats(session.short_code, db)
-
-        except Exception as e:
-            print(f"[ANALYTICS] Error tracking timeout: {str(e)}")
-            db.rollback()
+        await AnalyticsService.record_events([AnalyticsEvent(
+            kind='timeout',
+            session_id=session_id,
+            hints_used=hints_used,
+            attempts=attempts,
+            score=score
+        )], db)
 
     @staticmethod
-    def track_abandonment(session_id: int, db: Session) -> None:
+    async def track_abandonment(session_id: str, db: AsyncSession) -> None:
         """
         Track game abandonment (user left before completing)
 
@@ -192,26 +206,10 @@ class AnalyticsService:
             session_id: Analytics session ID
             db: Database session
         """
-        try:
-            session = db.query(URLAnalytics).filter(
-                URLAnalytics.id == session_id,
-                URLAnalytics.outcome == None
-            ).first()
-
-            if session:
-                session.outcome = 'abandoned'
-                session.session_end = datetime.utcnow()
-
-                db.commit()
-
-                print(f"[ANALYTICS] Abandonment tracked for session {session_id}")
-
-        except Exception as e:
-            print(f"[ANALYTICS] Error tracking abandonment: {str(e)}")
-            db.rollback()
+        await AnalyticsService.record_events([AnalyticsEvent(kind='abandoned', session_id=session_id)], db)
 
     @staticmethod
-    def track_ad_impression(session_id: int, placement_type: str, db: Session) -> None:
+    async def track_ad_impression(session_id: str, placement_type: str, db: AsyncSession) -> None:
         """
         Track ad impression
 
@@ -220,25 +218,18 @@ class AnalyticsService:
             placement_type: Ad placement type
             db: Database session
         """
-        try:
-            session = db.query(URLAnalytics).filter(URLAnalytics.id == session_id).first()
-
-            if session:
-                session.ads_shown = (session.ads_shown or 0) + 1
-                db.commit()
-
-                print(f"[ANALYTICS] Ad impression: {placement_type} for session {session_id}")
-
-        except Exception as e:
-            print(f"[ANALYTICS] Error tracking ad impression: {str(e)}")
-            db.rollback()
+        await AnalyticsService.record_events([AnalyticsEvent(
+            kind='ad_impression',
+            session_id=session_id,
+            placement_type=placement_type
+        )], db)
 
     @staticmethod
-    def track_ad_click(
-        session_id: int,
+    async def track_ad_click(
+        session_id: str,
         placement_type: str,
         estimated_revenue: float,
-        db: Session
+        db: AsyncSession
     ) -> None:
         """
         Track ad click
@@ -249,22 +240,125 @@ class AnalyticsService:
             estimated_revenue: Estimated revenue from click
             db: Database session
         """
+        await AnalyticsService.record_events([AnalyticsEvent(
+            kind='ad_click',
+            session_id=session_id,
+            placement_type=placement_type,
+            estimated_revenue=estimated_revenue
+        )], db)
+
+    @staticmethod
+    async def record_events(events: List[AnalyticsEvent], db: AsyncSession) -> bool:
+        """
+        Apply a batch of analytics events in one transaction
+
+        Session starts become multi-row INSERTs; outcomes, ad events and
+        URL counter changes become one executemany UPDATE per statement
+        shape, and the hourly/daily rollup buckets one executemany upsert.
+        The whole batch shares a single commit.
+
+        Args:
+            events: Events in the order they happened
+            db: Database session
+
+        Returns:
+            True if the batch was committed, False otherwise
+        """
+        if not events:
+            return True
+
+        try:
+            # short_code -> counter deltas for ShortURL
+            deltas: CounterDeltas = defaultdict(new_counter_delta)
+            # (short_code, hour) -> rollup bucket deltas
+            rollups = new_rollup_deltas()
+
+            await AnalyticsService._insert_sessions(
+                [e for e in events if e.kind == 'session_start'], deltas, rollups, db
+            )
+            await AnalyticsService._update_outcomes(
+                [e for e in events if e.kind in OUTCOME_EVENTS], deltas, rollups, db
+            )
+            await AnalyticsService._update_ads(
+                [e for e in events if e.kind in AD_EVENTS], rollups, db
+            )
+            await RollupService.apply_deltas(rollups, db)
+            if not state_backend.shared:
+                await AnalyticsService._apply_counter_deltas(deltas, db)
+
+            await db.commit()
+
+        except Exception as e:
+            print(f"[ANALYTICS] Error recording {len(events)} events: {str(e)}")
+            await db.rollback()
+            return False
+
+        global_analytics.apply_deltas(
+            deltas, sum(e.estimated_revenue or 0.0 for e in events if e.kind == 'ad_click')
+        )
+        if state_backend.shared:
+            # Counted in the shared backend and folded into short_urls
+            # periodically, so workers do not contend on hot URL rows
+            await AnalyticsService.increment_counters(deltas, db)
+        return True
+
+    @staticmethod
+    async def increment_counters(deltas: CounterDeltas, db: AsyncSession) -> None:
+        """
+        Add ShortURL counter deltas outside an analytics batch
+
+        With a shared backend the deltas are buffered there (see
+        fold_shared_counters); otherwise, or if the backend is unreachable,
+        they are applied to the database directly.
+
+        Args:
+            deltas: short_code -> counter deltas
+            db: Database session
+        """
+        if state_backend.shared:
+            try:
+                await state_backend.incr_counters(deltas)
+                return
+            except Exception as e:
+                print(f"[ANALYTICS] Shared counters unavailable, writing to database: {str(e)}")
+
         try:
-            session = db.query(URLAnalytics).filter(URLAnalytics.id == session_id).first()
+            await AnalyticsService._apply_counter_deltas(deltas, db)
+            await db.commit()
+        except Exception as e:
+            print(f"[ANALYTICS] Error incrementing counters: {str(e)}")
+            await db.rollback()
+
+    @staticmethod
+    async def fold_shared_counters(db: AsyncSession) -> int:
+        """
+        Move buffered counter deltas from the shared backend into short_urls
 
-            if session:
-                session.ads_clicked = (session.ads_clicked or 0) + 1
-                session.estimated_revenue = (session.estimated_revenue or 0) + estimated_revenue
-                db.commit()
+        Deltas are put back if the database write fails, so nothing is lost
+        between folds.
 
-                print(f"[ANALYTICS] Ad click: {placement_type} (${estimated_revenue}) for session {session_id}")
+        Args:
+            db: Database session
+
+        Returns:
+            Number of URLs updated
+        """
+        deltas = await state_backend.drain_counters()
+        if not deltas:
+            return 0
 
+        try:
+            await AnalyticsService._apply_counter_deltas(deltas, db)
+            await db.commit()
+            return len(deltas)
         except Exception as e:
-            print(f"[ANALYTICS] Error tracking ad click: {str(e)}")
-            db.rollback()
+            print(f"[ANALYTICS] Error folding counters for {len(deltas)} URLs: {str(e)}")
+            await db.rollback()
+            await state_backend.incr_counters(deltas)
+            return 0
 
     @staticmethod
-    def get_analytics_summary(short_code: str, db: Session) -> Dict[str, Any]:
+    async def get_analytics_summary(short_code: str, db: AsyncSession) -> Dict[str, Any]:
         """
         Get analytics summary for a short code
 
@@ -276,22 +370,22 @@ class AnalyticsService:
             Analytics summary dictionary
         """
         try:
-            url = db.query(ShortURL).filter(ShortURL.short_code == short_code).first()
+            url = await db.scalar(select(ShortURL).where(ShortURL.short_code == short_code))
 
             if not url:
                 return {}
 
             # Calculate completion rate
             completion_rate = 0
-            if url.total_views > 0:
-                completion_rate = (url.total_completions / url.total_views) * 100
+            if url.total_views:
+                completion_rate = ((url.total_completions or 0) / url.total_views) * 100
 
             return {
                 'total_views': url.total_views,
                 'total_completions': url.total_completions,
                 'total_failures': url.total_failures,
                 'total_timeouts': url.total_timeouts,
-                'avg_completion_time': url.avg_completion_time,
+                'avg_completion_time': url.avg_completion_time_seconds,
                 'completion_rate': completion_rate
             }
 
@@ -300,33 +394,48 @@ class AnalyticsService:
             return {}
 
     @staticmethod
-    def get_detailed_analytics(short_code: str, limit: int, db: Session) -> List[URLAnalytics]:
+    async def get_detailed_analytics(
+        short_code: str,
+        limit: int,
+        db: AsyncSession,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[URLAnalytics]:
         """
-        Get detailed analytics for a short code
+        Get detailed analytics for a short code, newest first
 
         Args:
             short_code: Short URL code
             limit: Number of sessions to return
             db: Database session
+            after: (session_start, id) of the last session on the previous page
 
         Returns:
             List of analytics sessions
         """
         try:
-            sessions = db.query(URLAnalytics)\
-                .filter(URLAnalytics.short_code == short_code)\
-                .order_by(desc(URLAnalytics.session_start))\
-                .limit(limit)\
-                .all()
+            query = select(URLAnalytics).where(URLAnalytics.short_code == short_code)
+            if after is not None:
+                query = query.where(newest_after(URLAnalytics.session_start, URLAnalytics.id, after))
+
+            result = await db.scalars(
+                query
+                .order_by(desc(URLAnalytics.session_start), desc(URLAnalytics.id))
+                .limit(limit)
+            )
 
-            return sessions
+            return list(result)
 
         except Exception as e:
             print(f"[ANALYTICS] Error getting detailed analytics: {str(e)}")
             return []
 
     @staticmethod
-    def get_leaderboard(short_code: str, limit: int, db: Session) -> List[Dict[str, Any]]:
+    async def get_leaderboard(
+        short_code: str,
+        limit: int,
+        db: AsyncSession,
+        after: Optional[Tuple[int, float, str]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Get leaderboard for a short code
 
@@ -334,47 +443,64 @@ class AnalyticsService:
             short_code: Short URL code
             limit: Number of entries to return
             db: Database session
+            after: (score, completion_time, id) of the last entry on the previous page
 
         Returns:
             List of leaderboard entries
         """
         try:
-            entries = db.query(LeaderboardEntry)\
-                .filter(LeaderboardEntry.short_code == short_code)\
-                .order_by(desc(LeaderboardEntry.score), LeaderboardEntry.completion_time)\
-                .limit(limit)\
-                .all()
-
-            return [
-                {
+            query = select(LeaderboardEntry).where(LeaderboardEntry.short_code == short_code)
+            if after is not None:
+                query = query.where(leaderboard_after(after))
+
+            entries = await db.scalars(
+                query
+                .order_by(
+                    desc(LeaderboardEntry.score),
+                    LeaderboardEntry.completion_time_seconds,
+                    LeaderboardEntry.id
+                )
+                .limit(limit)
+            )
+
+            entries = list(entries)
+            await AnalyticsService._ensure_rank_index(short_code, db)
+            ranks = await state_backend.board_ranks(short_code, [
+                (entry.score, entry.completion_time_seconds, entry.id) for entry in entries
+            ])
+            total = await state_backend.board_size(short_code)
+
+            results = []
+            for entry, rank in zip(entries, ranks):
+                results.append({
                     'id': entry.id,
                     'player_nickname': entry.player_nickname,
                     'player_country': entry.player_country,
-                    'completion_time': entry.completion_time,
+                    'completion_time': entry.completion_time_seconds,
                     'hints_used': entry.hints_used,
                     'score': entry.score,
                     'difficulty': entry.difficulty,
-                    'rank': entry.rank,
-                    'percentile': entry.percentile,
-                    'created_at': entry.created_at.isoformat() if entry.created_at else None
-                }
-                for entry in entries
-            ]
+                    'rank': rank,
+                    'percentile': (rank / total) * 100 if rank and total else None,
+                    'created_at': entry.completed_at.isoformat() if entry.completed_at else None
+                })
+
+            return results
 
         except Exception as e:
             print(f"[ANALYTICS] Error getting leaderboard: {str(e)}")
             return []
 
     @staticmethod
-    def add_to_leaderboard(
+    async def add_to_leaderboard(
         short_code: str,
         nickname: str,
-        completion_time: int,
+        completion_time: float,
         hints_used: int,
         score: int,
         difficulty: str,
         country: Optional[str],
-        db: Session
+        db: AsyncSession
     ) -> Optional[int]:
         """
         Add entry to leaderboard
@@ -397,18 +523,24 @@ class AnalyticsService:
                 short_code=short_code,
                 player_nickname=nickname or 'Anonymous',
                 player_country=country,
-                completion_time=completion_time,
+                completion_time_seconds=completion_time,
                 hints_used=hints_used,
                 score=score,
                 difficulty=difficulty
             )
 
             db.add(entry)
-            db.commit()
-            db.refresh(entry)
+            await db.commit()
+            await db.refresh(entry)
 
-            # Calculate ranks
-            AnalyticsService.calculate_leaderboard_ranks(short_code, db)
+            # Index the new score in O(log n); an unloaded board is built
+            # from the database and already includes the committed row
+            if await state_backend.board_loaded(short_code):
+                await state_backend.board_insert(short_code, entry.score, entry.completion_time_seconds, entry.id)
+            else:
+                await AnalyticsService._ensure_rank_index(short_code, db)
+
+            await global_leaderboard.record(entry)
 
             print(f"[ANALYTICS] Added to leaderboard: {entry.id}")
 
@@ -416,42 +548,54 @@ class AnalyticsService:
 
         except Exception as e:
             print(f"[ANALYTICS] Error adding to leaderboard: {str(e)}")
-            db.rollback()
+            await db.rollback()
             return None
 
     @staticmethod
-    def calculate_leaderboard_ranks(short_code: str, db: Session) -> None:
+    async def calculate_leaderboard_ranks(short_code: str, db: AsyncSession) -> None:
         """
-        Calculate and update leaderboard ranks
+        Rebuild the rank index for a short code from the database
+
+        Ranks and percentiles are computed on read from the index, so this
+        no longer rewrites any rows. Use it after bulk changes made outside
+        add_to_leaderboard.
 
         Args:
             short_code: Short URL code
             db: Database session
         """
         try:
-            # Get all entries for this short code ordered by score
-            entries = db.query(LeaderboardEntry)\
-                .filter(LeaderboardEntry.short_code == short_code)\
-                .order_by(desc(LeaderboardEntry.score), LeaderboardEntry.completion_time)\
-                .all()
-
-            total_count = len(entries)
-
-            # Update rank and percentile for each entry
-            for rank, entry in enumerate(entries, start=1):
-                entry.rank = rank
-                entry.percentile = (rank / total_count) * 100 if total_count > 0 else 0
+            result = await db.execute(
+                select(
+                    LeaderboardEntry.score,
+                    LeaderboardEntry.completion_time_seconds,
+                    LeaderboardEntry.id
+                ).where(LeaderboardEntry.short_code == short_code)
+            )
+            rows = result.all()
 
-            db.commit()
+            await state_backend.board_load(short_code, rows)
 
-            print(f"[ANALYTICS] Leaderboard ranks updated for {short_code}")
+            print(f"[ANALYTICS] Leaderboard rank index rebuilt for {short_code} ({len(rows)} entries)")
 
         except Exception as e:
             print(f"[ANALYTICS] Error calculating ranks: {str(e)}")
-            db.rollback()
+            await state_backend.board_invalidate(short_code)
 
     @staticmethod
-    def get_global_analytics(db: Session) -> Dict[str, Any]:
+    async def _ensure_rank_index(short_code: str, db: AsyncSession) -> None:
+        """
+        Load the rank index for a short code if it is not loaded yet
+
+        Args:
+            short_code: Short URL code
+            db: Database session
+        """
+        if not await state_backend.board_loaded(short_code):
+            await AnalyticsService.calculate_leaderboard_ranks(short_code, db)
+
+    @staticmethod
+    async def get_global_analytics(db: AsyncSession) -> Dict[str, Any]:
         """
         Get global analytics (all URLs)
 
@@ -462,45 +606,20 @@ class AnalyticsService:
             Global statistics dictionary
         """
         try:
-            # Get URL statistics
-            url_stats = db.query(
-                func.count(ShortURL.id).label('total_urls'),
-                func.sum(ShortURL.total_views).label('total_views'),
-                func.sum(ShortURL.total_completions).label('total_completions'),
-                func.avg(ShortURL.avg_completion_time).label('avg_completion_time'),
-                func.sum(ShortURL.total_failures).label('total_failures'),
-                func.sum(ShortURL.total_timeouts).label('total_timeouts')
-            ).first()
-
-            # Get revenue statistics
-            revenue = db.query(
-                func.sum(URLAnalytics.estimated_revenue).label('total_revenue')
-            ).first()
-
-            total_views = url_stats.total_views or 0
-            total_completions = url_stats.total_completions or 0
-            completion_rate = (total_completions / total_views * 100) if total_views > 0 else 0
-
-            return {
-                'total_urls': url_stats.total_urls or 0,
-                'total_views': total_views,
-                'total_completions': total_completions,
-                'avg_completion_time': url_stats.avg_completion_time or 0,
-                'total_failures': url_stats.total_failures or 0,
-                'total_timeouts': url_stats.total_timeouts or 0,
-                'total_revenue': revenue.total_revenue or 0,
-                'completion_rate': completion_rate
-            }
+            # Served from the periodically refreshed snapshot
+            snapshot = await global_analytics.get(db)
+            return dict(snapshot.data) if snapshot else {}
 
         except Exception as e:
             print(f"[ANALYTICS] Error getting global analytics: {str(e)}")
             return {}
 
     @staticmethod
-    def get_global_leaderboard(
+    async def get_global_leaderboard(
         time_filter: str = 'all',
         limit: int = 100,
-        db: Session = None
+        db: AsyncSession = None,
+        after: Optional[Tuple[int, float, str, int]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get global leaderboard across all URLs
@@ -509,83 +628,303 @@ class AnalyticsService:
             time_filter: 'all', 'week', or 'today'
             limit: Number of entries to return
             db: Database session
+            after: (score, completion_time, id, rank) of the last entry on the previous page
 
         Returns:
             List of leaderboard entries
         """
         try:
-            from datetime import datetime, timedelta
-
-            query = db.query(LeaderboardEntry)
-
-            # Apply time filter
-            if time_filter == 'today':
-                start_of_day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-                query = query.filter(LeaderboardEntry.completed_at >= start_of_day)
-            elif time_filter == 'week':
-                start_of_week = datetime.utcnow() - timedelta(days=7)
-                query = query.filter(LeaderboardEntry.completed_at >= start_of_week)
-
-            # Order by score (highest first), then by completion time (fastest first)
-            entries = query.order_by(
-                desc(LeaderboardEntry.score),
-                LeaderboardEntry.completion_time_seconds
-            ).limit(limit).all()
-
-            # Format entries with rank
-            return [
-                {
-                    'id': entry.id,
-                    'rank': idx + 1,
-                    'player_nickname': entry.player_nickname,
-                    'player_country': entry.player_country,
-                    'completion_time': entry.completion_time_seconds,
-                    'hints_used': entry.hints_used,
-                    'score': entry.score,
-                    'difficulty': entry.difficulty,
-                    'short_code': entry.short_code,
-                    'completed_at': entry.completed_at.isoformat() if entry.completed_at else None
-                }
-                for idx, entry in enumerate(entries)
-            ]
+            # Served from the per-window top-K boards, loaded on first use
+            return await global_leaderboard.get(time_filter, limit, db, after=after)
 
         except Exception as e:
             print(f"[ANALYTICS] Error getting global leaderboard: {str(e)}")
             return []
 
     @staticmethod
-    def _update_summary_stats(short_code: str, db: Session) -> None:
+    async def _insert_sessions(
+        events: List[AnalyticsEvent],
+        deltas: CounterDeltas,
+        rollups: RollupDeltas,
+        db: AsyncSession
+    ) -> None:
+        """Insert new sessions with multi-row INSERTs and count their views"""
+        rows = []
+        for e in events:
+            rows.append({
+                'id': e.session_id,
+                'short_code': e.short_code,
+                'session_start': e.timestamp,
+                'visitor_ip': e.visitor_ip,
+                'visitor_user_agent': e.visitor_user_agent,
+                'referrer': e.referrer,
+                'attempts': 0,
+                'hints_used': 0,
+                'ads_shown': 0,
+                'ads_clicked': 0,
+                'estimated_revenue_usd': 0.0
+            })
+            deltas[e.short_code]['views'] += 1
+            add_view(rollups, e.short_code, e.timestamp)
+
+        table = URLAnalytics.__table__
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            await db.execute(insert(table).values(rows[start:start + INSERT_CHUNK_SIZE]))
+
+    @staticmethod
+    async def _update_outcomes(
+        events: List[AnalyticsEvent],
+        deltas: CounterDeltas,
+        rollups: RollupDeltas,
+        db: AsyncSession
+    ) -> None:
         """
-        Update summary statistics for a URL
+        Write session outcomes and accumulate counter and rollup deltas
+
+        Only the last outcome per session is written, but every transition
+        is applied to the counters so a session moving from one outcome to
+        another is counted once. Rollups count the outcome in the hour the
+        session ended, so a transition moves it out of the previous
+        outcome's bucket. Abandonment only applies to sessions that have no
+        outcome yet.
+        """
+        if not events:
+            return
+
+        session_ids = {e.session_id for e in events}
+        result = await db.execute(
+            select(
+                URLAnalytics.id, URLAnalytics.short_code, URLAnalytics.outcome,
+                URLAnalytics.session_end, URLAnalytics.completion_time_seconds
+            )
+            .where(URLAnalytics.id.in_(session_ids))
+        )
+        current = {
+            row.id: [row.short_code, row.outcome, row.session_end, row.completion_time_seconds]
+            for row in result
+        }
+
+        final: Dict[str, AnalyticsEvent] = {}
+        for e in events:
+            state = current.get(e.session_id)
+            if state is None:
+                continue
+
+            short_code, previous, ended, elapsed = state
+            if e.kind == 'abandoned' and previous is not None:
+                continue
+
+            delta = deltas[short_code]
+            if previous != e.kind:
+                if previous in OUTCOME_COUNTERS:
+                    delta[OUTCOME_COUNTERS[previous]] -= 1
+                if e.kind in OUTCOME_COUNTERS:
+                    delta[OUTCOME_COUNTERS[e.kind]] += 1
+
+            # The average follows the row's final completion time, as in
+            # reconcile_summary_stats: the old time leaves it, the new one joins
+            if is_timed_completion(previous, elapsed):
+                delta['timed'] -= 1
+                delta['time_sum'] -= float(elapsed)
+            if is_timed_completion(e.kind, e.completion_time):
+                delta['timed'] += 1
+                delta['time_sum'] += float(e.completion_time)
+
+            # The row's end time (and completion time) is overwritten, so
+            # the rollups move even when the outcome repeats
+            add_outcome(rollups, short_code, previous, ended, elapsed, sign=-1)
+            if e.kind == 'completed':
+                elapsed = e.completion_time
+            add_outcome(rollups, short_code, e.kind, e.timestamp, elapsed)
+
+            state[1:] = [e.kind, e.timestamp, elapsed]
+            final[e.session_id] = e
+
+        by_kind: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for e in final.values():
+            by_kind[e.kind].append({
+                'sid': e.session_id,
+                'ended': e.timestamp,
+                'elapsed': e.completion_time,
+                'hints': e.hints_used,
+                'tries': e.attempts,
+                'points': e.score
+            })
+
+        table = URLAnalytics.__table__
+        for kind, params in by_kind.items():
+            values = {'outcome': kind, 'session_end': bindparam('ended')}
+            if kind == 'completed':
+                values['completion_time_seconds'] = bindparam('elapsed')
+            if kind != 'abandoned':
+                values.update(
+                    hints_used=bindparam('hints'),
+                    attempts=bindparam('tries'),
+                    score=bindparam('points')
+                )
+            await db.execute(update(table).where(table.c.id == bindparam('sid')).values(**values), params)
+
+    @staticmethod
+    async def _update_ads(events: List[AnalyticsEvent], rollups: RollupDeltas, db: AsyncSession) -> None:
+        """Fold ad impressions and clicks into one increment per session"""
+        if not events:
+            return
+
+        per_session: Dict[str, Dict[str, Any]] = {}
+        for e in events:
+            params = per_session.setdefault(e.session_id, {'sid': e.session_id, 'shown': 0, 'clicked': 0, 'revenue': 0.0})
+            if e.kind == 'ad_impression':
+                params['shown'] += 1
+            else:
+                params['clicked'] += 1
+                params['revenue'] += e.estimated_revenue or 0.0
+
+        result = await db.execute(
+            select(URLAnalytics.id, URLAnalytics.short_code, URLAnalytics.session_start)
+            .where(URLAnalytics.id.in_(per_session.keys()))
+        )
+        for row in result:
+            params = per_session[row.id]
+            add_ads(rollups, row.short_code, row.session_start, params['shown'], params['clicked'], params['revenue'])
+
+        table = URLAnalytics.__table__
+        await db.execute(
+            update(table)
+            .where(table.c.id == bindparam('sid'))
+            .values(
+                ads_shown=func.coalesce(table.c.ads_shown, 0) + bindparam('shown'),
+                ads_clicked=func.coalesce(table.c.ads_clicked, 0) + bindparam('clicked'),
+                estimated_revenue_usd=func.coalesce(table.c.estimated_revenue_usd, 0) + bindparam('revenue')
+            ),
+            list(per_session.values())
+        )
+
+    @staticmethod
+    async def _apply_counter_deltas(deltas: CounterDeltas, db: AsyncSession) -> None:
+        """
+        Apply accumulated counter deltas to ShortURL in one executemany UPDATE
+
+        Counters are incremented in SQL rather than recomputed from every
+        session, so the cost does not grow with session history. Drift
+        (e.g. from dropped events) is corrected by reconcile_summary_stats.
+        """
+        params = [
+            dict(delta, code=short_code)
+            for short_code, delta in deltas.items()
+            if short_code and any(delta.values())
+        ]
+        if not params:
+            return
+
+        table = ShortURL.__table__
+        average = table.c.avg_completion_time_seconds
+        timed_before = func.coalesce(table.c.timed_completions, 0)
+        timed = bindparam('timed', type_=Integer)
+        time_sum = bindparam('time_sum', type_=Float)
+
+        await db.execute(
+            update(table)
+            .where(table.c.short_code == bindparam('code'))
+            .values(
+                total_views=func.coalesce(table.c.total_views, 0) + bindparam('views', type_=Integer),
+                total_completions=func.coalesce(table.c.total_completions, 0) + bindparam('completions', type_=Integer),
+                total_failures=func.coalesce(table.c.total_failures, 0) + bindparam('failures', type_=Integer),
+                total_timeouts=func.coalesce(table.c.total_timeouts, 0) + bindparam('timeouts', type_=Integer),
+                timed_completions=timed_before + timed,
+                # Running mean weighted by the timed completions it covers;
+                # the SET clause sees the pre-update row values
+                avg_completion_time_seconds=case(
+                    (and_(timed == 0, time_sum == 0), average),
+                    (timed_before + timed <= 0, None),
+                    else_=(func.coalesce(average, 0) * timed_before + time_sum) / (timed_before + timed)
+                )
+            ),
+            params
+        )
+
+    @staticmethod
+    async def reconcile_summary_stats(db: AsyncSession, short_code: Optional[str] = None) -> int:
+        """
+        Recompute URL summary counters from url_analytics in bulk
+
+        Runs a single GROUP BY aggregate and writes the results back with
+        one executemany UPDATE. Meant for offline use (see
+        app/jobs/reconcile_summary_stats.py), not the request path.
 
         Args:
-            short_code: Short URL code
             db: Database session
+            short_code: Limit reconciliation to one URL (optional)
+
+        Returns:
+            Number of URLs updated
         """
         try:
-            # Get all sessions for this short code
-            sessions = db.query(URLAnalytics)\
-                .filter(URLAnalytics.short_code == short_code)\
-                .all()
-
-            # Calculate statistics
-            total_completions = sum(1 for s in sessions if s.outcome == 'completed')
-            total_failures = sum(1 for s in sessions if s.outcome == 'failed')
-            total_timeouts = sum(1 for s in sessions if s.outcome == 'timeout')
-
-            completion_times = [s.completion_time for s in sessions if s.completion_time]
-            avg_completion_time = sum(completion_times) / len(completion_times) if completion_times else 0
+            completed = URLAnalytics.outcome == 'completed'
+            timed = timed_completion_clause()
+            query = select(
+                URLAnalytics.short_code,
+                func.count(URLAnalytics.id).label('total_views'),
+                func.sum(case((completed, 1), else_=0)).label('total_completions'),
+                func.sum(case((URLAnalytics.outcome == 'failed', 1), else_=0)).label('total_failures'),
+                func.sum(case((URLAnalytics.outcome == 'timeout', 1), else_=0)).label('total_timeouts'),
+                func.sum(case((timed, 1), else_=0)).label('timed_completions'),
+                func.avg(case((timed, URLAnalytics.completion_time_seconds))).label('avg_completion_time_seconds')
+            ).group_by(URLAnalytics.short_code)
+
+            if short_code:
+                query = query.where(URLAnalytics.short_code == short_code)
+
+            stats = {
+                row.short_code: {
+                    'code': row.short_code,
+                    'total_views': row.total_views,
+                    'total_completions': row.total_completions or 0,
+                    'total_failures': row.total_failures or 0,
+                    'total_timeouts': row.total_timeouts or 0,
+                    'timed_completions': row.timed_completions or 0,
+                    'avg_completion_time_seconds': row.avg_completion_time_seconds
+                }
+                for row in await db.execute(query)
+            }
 
-            # Update URL record
-            url = db.query(ShortURL).filter(ShortURL.short_code == short_code).first()
-            if url:
-                url.total_completions = total_completions
-                url.total_failures = total_failures
-                url.total_timeouts = total_timeouts
-                url.avg_completion_time = avg_completion_time
+            # URLs without any sessions are reset to zero
+            codes = select(ShortURL.short_code)
+            if short_code:
+                codes = codes.where(ShortURL.short_code == short_code)
+            params = [
+                stats.get(code, {
+                    'code': code,
+                    'total_views': 0,
+                    'total_completions': 0,
+                    'total_failures': 0,
+                    'total_timeouts': 0,
+                    'timed_completions': 0,
+                    'avg_completion_time_seconds': None
+                })
+                for code in await db.scalars(codes)
+            ]
 
-                db.commit()
+            if params:
+                table = ShortURL.__table__
+                await db.execute(
+                    update(table)
+                    .where(table.c.short_code == bindparam('code'))
+                    .values(
+                        total_views=bindparam('total_views'),
+                        total_completions=bindparam('total_completions'),
+                        total_failures=bindparam('total_failures'),
+                        total_timeouts=bindparam('total_timeouts'),
+                        timed_completions=bindparam('timed_completions'),
+                        avg_completion_time_seconds=bindparam('avg_completion_time_seconds')
+                    ),
+                    params
+                )
+            await db.commit()
+
+            print(f"[ANALYTICS] Summary stats reconciled for {len(params)} URLs")
+            return len(params)
 
         except Exception as e:
-            print(f"[ANALYTICS] Error updating summary stats: {str(e)}")
-            db.rollback()
+            print(f"[ANALYTICS] Error reconciling summary stats: {str(e)}")
+            await db.rollback()
+            return 0
@@ -0,0 +1,221 @@
+"""
+Bulk URL Creation
+Creates short URLs for campaign imports in chunks: codes are allocated
+per chunk, challenge texts and hints are filtered in one pass, and rows
+are written with one executemany INSERT and one commit per chunk
+"""
+import json
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.url import ShortURL
+from app.schemas.url import URLCreateRequest
+from app.services.global_analytics import global_analytics
+from app.services.short_code_allocator import ShortCodeAllocator, short_code_allocator
+from app.utils.profanity_filter import clean_batch
+from app.utils.url_analysis import precomputed_fields
+
+# (position in the input, parsed row or the reason it could not be parsed)
+InputRow = Tuple[int, Any]
+
+
+class InvalidBulkBody(ValueError):
+    """The request body is not a JSON array or NDJSON"""
+
+
+def short_url_for(short_code: str) -> str:
+    """Public URL of a short code"""
+    base_url = settings.ALLOWED_ORIGINS[0] if settings.ALLOWED_ORIGINS else "http://localhost:5173"
+    return f"{base_url}/{short_code}"
+
+
+def parse_json_array(body: bytes) -> List[InputRow]:
+    """
+    Split a JSON array body into rows
+
+    Raises:
+        InvalidBulkBody: If the body is not a JSON array
+    """
+    try:
+        items = json.loads(body)
+    except ValueError as e:
+        raise InvalidBulkBody(f"Invalid JSON: {e}")
+    if not isinstance(items, list):
+        raise InvalidBulkBody("Expected a JSON array of URLs")
+    return list(enumerate(items))
+
+
+def parse_ndjson(body: bytes) -> Iterator[InputRow]:
+    """
+    Split an NDJSON body into rows, one per non-empty line
+
+    A line that is not valid JSON becomes a per-row error instead of
+    failing the whole import.
+    """
+    index = 0
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            yield index, json.loads(line)
+        except ValueError as e:
+            yield index, InvalidBulkBody(f"Invalid JSON: {e}")
+        index += 1
+
+
+def count_ndjson_rows(body: bytes) -> int:
+    return sum(1 for line in body.splitlines() if line.strip())
+
+
+def _error(index: int, error: Any) -> Dict[str, Any]:
+    if isinstance(error, ValidationError):
+        detail = '; '.join(
+            f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()
+        )
+    else:
+        detail = str(error)
+    return {'index': index, 'error': detail}
+
+
+async def create_urls(
+    rows: Iterable[InputRow],
+    creator_ip: Optional[str],
+    creator_user_agent: str,
+    chunk_size: int = settings.BULK_CREATE_CHUNK_SIZE,
+    allocator: ShortCodeAllocator = short_code_allocator,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Create short URLs and yield one result per input row, in input order
+
+    Each chunk is committed on its own, so results stream out while later
+    chunks are written and a failing chunk does not undo earlier ones.
+
+    Args:
+        rows: (index, row) pairs from parse_json_array / parse_ndjson
+        creator_ip: Recorded as the creator of every URL
+        creator_user_agent: Recorded as the creator user agent
+        chunk_size: Rows validated, allocated and committed together
+        allocator: Source of short codes
+        session_factory: Creates the database session
+
+    Yields:
+        {'index', 'short_code', 'short_url'} or {'index', 'error'}
+    """
+    # Texts already filtered in this import
+    cleaned: Dict[str, str] = {}
+
+    async with session_factory() as db:
+        chunk: List[InputRow] = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                for result in await _create_chunk(chunk, creator_ip, creator_user_agent, allocator, cleaned, db):
+                    yield result
+                chunk = []
+        if chunk:
+            for result in await _create_chunk(chunk, creator_ip, creator_user_agent, allocator, cleaned, db):
+                yield result
+
+
+async def _create_chunk(
+    chunk: List[InputRow],
+    creator_ip: Optional[str],
+    creator_user_agent: str,
+    allocator: ShortCodeAllocator,
+    cleaned: Dict[str, str],
+    db: AsyncSession
+) -> List[Dict[str, Any]]:
+    results: Dict[int, Dict[str, Any]] = {}
+    valid: List[Tuple[int, URLCreateRequest]] = []
+    for index, raw in chunk:
+        if isinstance(raw, Exception):
+            results[index] = _error(index, raw)
+            continue
+        try:
+            valid.append((index, URLCreateRequest.model_validate(raw)))
+        except ValidationError as e:
+            results[index] = _error(index, e)
+
+    if valid:
+        # One filtering pass over every challenge text and hint in the chunk
+        texts = [data.challenge_text for _, data in valid]
+        hints = [hint for _, data in valid for hint in (data.hints or [])]
+        filtered = clean_batch(texts + hints, cleaned=cleaned)
+        cleaned_texts, cleaned_hints = filtered[:len(texts)], iter(filtered[len(texts):])
+
+        now = datetime.utcnow()
+        codes = await allocator.next_codes(len(valid))
+        url_rows = []
+        for (index, data), code, text in zip(valid, codes, cleaned_texts):
+            long_url = str(data.long_url)
+            url_rows.append({
+                'id': str(uuid.uuid4()),
+                'short_code': code,
+                'long_url': long_url,
+                'difficulty': data.difficulty,
+                'challenge_text': text,
+                'hints': [next(cleaned_hints) for _ in data.hints] if data.hints else None,
+                'time_limit_seconds': data.time_limit_seconds,
+                **precomputed_fields(long_url, data.difficulty),
+                'creator_ip': creator_ip,
+                'creator_user_agent': creator_user_agent,
+                'created_at': now,
+                'total_views': 0,
+                'total_completions': 0,
+                'total_failures': 0,
+                'total_timeouts': 0,
+                'timed_completions': 0,
+                'is_flagged': False,
+                'is_banned': False
+            })
+
+        try:
+            await _insert_rows(url_rows, allocator, db)
+            for (index, _), row in zip(valid, url_rows):
+                results[index] = {'index': index, 'short_code': row['short_code'], 'short_url': short_url_for(row['short_code'])}
+            global_analytics.count_new_url(len(url_rows))
+        except Exception as e:
+            print(f"[URLS] Error creating {len(url_rows)} URLs in bulk: {str(e)}")
+            for index, _ in valid:
+                results[index] = {'index': index, 'error': "Could not create URL, please retry"}
+
+    return [results[index] for index, _ in chunk]
+
+
+async def _insert_rows(url_rows: List[Dict[str, Any]], allocator: ShortCodeAllocator, db: AsyncSession) -> None:
+    """
+    Insert and commit the rows, replacing codes the unique index rejects
+
+    Allocated codes only clash with codes created before the allocator,
+    so a retry replaces just the codes found to be taken.
+    """
+    table = ShortURL.__table__
+    for _ in range(settings.SHORT_CODE_MAX_ATTEMPTS):
+        try:
+            # One executemany of a single cached statement: without RETURNING
+            # the driver runs it directly, which beats compiling multi-row
+            # VALUES statements per chunk
+            await db.execute(insert(table), url_rows)
+            await db.commit()
+            return
+        except IntegrityError:
+            await db.rollback()
+
+        taken = set(await db.scalars(
+            select(ShortURL.short_code).where(ShortURL.short_code.in_([row['short_code'] for row in url_rows]))
+        ))
+        clashing = [row for row in url_rows if row['short_code'] in taken]
+        for row, code in zip(clashing, await allocator.next_codes(len(clashing))):
+            allocator.record_collision(row['short_code'])
+            row['short_code'] = code
+
+    raise RuntimeError(f"Could not allocate free short codes after {settings.SHORT_CODE_MAX_ATTEMPTS} attempts")
@@ -0,0 +1,112 @@
+"""
+Shared Counter Folder
+Periodically moves URL counters buffered in the shared backend into the
+short_urls table
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.analytics_service import AnalyticsService
+from app.services.shared_state import state_backend
+
+
+class CounterFolder:
+    """
+    Background task that folds shared counters every `interval_seconds`
+
+    Only needed when the backend is shared; with the in-memory backend
+    counters are written with each analytics batch. A final fold runs on
+    stop so buffered counts are not left behind on shutdown.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = settings.COUNTER_FOLD_INTERVAL_SECONDS,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+    ):
+        self.interval = interval_seconds
+        self.session_factory = session_factory
+
+        self._task: Optional[asyncio.Task] = None
+        self._closed: Optional[asyncio.Future] = None
+
+        # Metrics
+        self.folds = 0
+        self.fold_errors = 0
+        self.urls_folded = 0
+        self.last_fold_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start folding (called from the app lifespan)"""
+        if self.running or not state_backend.shared:
+            return
+
+        self._closed = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run())
+        print(f"[CACHE] Folding shared counters every {self.interval}s")
+
+    async def stop(self) -> None:
+        """Stop the task after one last fold"""
+        if self._task is None:
+            return
+
+        self._closed.set_result(True)
+        await self._task
+        self._task = None
+
+    async def fold(self) -> int:
+        """
+        Fold pending counters once
+
+        Returns:
+            Number of URLs updated
+        """
+        start = time.perf_counter()
+        try:
+            async with self.session_factory() as db:
+                updated = await AnalyticsService.fold_shared_counters(db)
+        except Exception as e:
+            # Backend unreachable; counters stay buffered until the next fold
+            self.fold_errors += 1
+            print(f"[CACHE] Counter fold failed: {str(e)}")
+            return 0
+
+        self.folds += 1
+        self.urls_folded += updated
+        self.last_fold_ms = (time.perf_counter() - start) * 1000
+        return updated
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get folder metrics
+
+        Returns:
+            Running flag, fold counts and last fold duration
+        """
+        return {
+            'backend': type(state_backend).__name__,
+            'running': self.running,
+            'interval_seconds': self.interval,
+            'folds': self.folds,
+            'fold_errors': self.fold_errors,
+            'urls_folded': self.urls_folded,
+            'last_fold_ms': round(self.last_fold_ms, 2)
+        }
+
+    async def _run(self) -> None:
+        while not self._closed.done():
+            await asyncio.wait({self._closed}, timeout=self.interval)
+            await self.fold()
+
+
+# Global counter folder instance
+counter_folder = CounterFolder()
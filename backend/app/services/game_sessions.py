@@ -0,0 +1,403 @@
+"""
+Game Session Store
+Server-side state for games in progress: start time, hints and attempts,
+so scores are computed on the server instead of trusted from the client
+"""
+import asyncio
+import heapq
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.analytics_pipeline import analytics_pipeline
+from app.services.analytics_service import AnalyticsEvent
+from app.services.shared_state import SharedStateBackend, state_backend
+
+SESSION_KEY_PREFIX = 'game_session:'
+
+
+class GameSession:
+    """One game in progress (slots keep 100k live sessions to a few tens of MB)"""
+
+    __slots__ = (
+        'session_id', 'short_code', 'difficulty', 'time_limit',
+        'started_at', 'expires_at', 'hints_used', 'attempts',
+        'solved', 'score', 'completion_time', 'ended', 'leaderboard_id', 'owned'
+    )
+
+    def __init__(self, session_id: str, short_code: str, difficulty: str, time_limit: int, now: float, ttl: float):
+        self.session_id = session_id
+        self.short_code = short_code
+        self.difficulty = difficulty
+        self.time_limit = time_limit
+        self.started_at = now
+        self.expires_at = now + ttl
+        self.hints_used = 0
+        self.attempts = 0
+        self.solved = False
+        self.score = 0
+        self.completion_time: Optional[float] = None
+        self.ended = False
+        self.leaderboard_id: Optional[str] = None
+        # Created by this worker (only the owner records a timeout)
+        self.owned = True
+
+    def elapsed(self, now: Optional[float] = None) -> float:
+        """Seconds since the game clock started"""
+        return (now if now is not None else time.monotonic()) - self.started_at
+
+    def time_remaining(self, hint_penalty_seconds: int, now: Optional[float] = None) -> int:
+        """Seconds left on the clock after hint penalties (never negative)"""
+        left = self.time_limit - self.elapsed(now) - self.hints_used * hint_penalty_seconds
+        return max(0, int(left))
+
+    def to_json(self) -> str:
+        """Serialize for the shared backend (monotonic clocks become wall-clock times)"""
+        offset = time.time() - time.monotonic()
+        return json.dumps({
+            'short_code': self.short_code,
+            'difficulty': self.difficulty,
+            'time_limit': self.time_limit,
+            'started_at': self.started_at + offset,
+            'expires_at': self.expires_at + offset,
+            'hints_used': self.hints_used,
+            'attempts': self.attempts,
+            'solved': self.solved,
+            'score': self.score,
+            'completion_time': self.completion_time,
+            'ended': self.ended,
+            'leaderboard_id': self.leaderboard_id
+        })
+
+    def update_from(self, data: Dict[str, Any]) -> None:
+        """Take over state saved by another worker (see to_json)"""
+        offset = time.time() - time.monotonic()
+        self.started_at = data['started_at'] - offset
+        self.expires_at = data['expires_at'] - offset
+        self.hints_used = data['hints_used']
+        self.attempts = data['attempts']
+        self.solved = data['solved']
+        self.score = data['score']
+        self.completion_time = data['completion_time']
+        self.ended = data['ended']
+        self.leaderboard_id = data['leaderboard_id']
+
+
+class GameSessionStore:
+    """
+    In-memory session store keyed by the analytics session id
+
+    Sessions expire `time_limit + grace_seconds` after their clock starts.
+    Expiry is tracked in a min-heap (stale entries are skipped lazily), so
+    the sweeper only touches sessions that are actually due. At capacity the
+    session closest to expiry is evicted early. Expired sessions that never
+    reported an outcome are recorded as timeouts (or completions, if solved)
+    in one bulk enqueue.
+
+    With a shared backend (Redis) every change is written through with the
+    session's remaining lifetime as TTL, so any worker can load a game
+    another worker started. Only the worker that created a session records
+    its timeout, after re-reading the shared copy.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = settings.GAME_SESSION_MAX,
+        grace_seconds: float = settings.GAME_SESSION_GRACE_SECONDS,
+        sweep_interval_seconds: float = settings.GAME_SESSION_SWEEP_INTERVAL_SECONDS,
+        backend: SharedStateBackend = state_backend
+    ):
+        self.max_sessions = max_sessions
+        self.grace_seconds = grace_seconds
+        self.sweep_interval = sweep_interval_seconds
+        self.backend = backend
+
+        self._sessions: Dict[str, GameSession] = {}
+        self._expiry: List[Tuple[float, str]] = []
+        self._pending_timeouts: List[GameSession] = []
+
+        self._task: Optional[asyncio.Task] = None
+        self._closed: Optional[asyncio.Future] = None
+
+        # Metrics
+        self.sessions_created = 0
+        self.sessions_expired = 0
+        self.sessions_evicted = 0
+        self.timeouts_recorded = 0
+        self.shared_loads = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    # ==================== Sessions ====================
+
+    def create(self, session_id: str, short_code: str, difficulty: str, time_limit: int) -> GameSession:
+        """
+        Register a new game
+
+        Args:
+            session_id: Analytics session ID from initialize_game
+            short_code: Short URL code
+            difficulty: Difficulty level
+            time_limit: Time limit in seconds
+
+        Returns:
+            The new session
+        """
+        now = time.monotonic()
+        if len(self._sessions) >= self.max_sessions:
+            self._evict(now)
+
+        session = GameSession(session_id, short_code, difficulty, time_limit, now, time_limit + self.grace_seconds)
+        self._sessions[session_id] = session
+        heapq.heappush(self._expiry, (session.expires_at, session_id))
+        self.sessions_created += 1
+        return session
+
+    def get(self, session_id: Optional[str], short_code: str) -> Optional[GameSession]:
+        """
+        Look up a live session for a short code
+
+        Returns:
+            The session, or None if unknown, expired or for another URL
+        """
+        if not session_id:
+            return None
+
+        session = self._sessions.get(session_id)
+        if session is None or session.short_code != short_code:
+            return None
+        if session.expires_at <= time.monotonic():
+            return None
+        return session
+
+    async def load(self, session_id: Optional[str], short_code: str) -> Optional[GameSession]:
+        """
+        Look up a live session, from the shared backend when there is one
+
+        The shared copy is authoritative: the game may have moved on through
+        another worker since this one last saw it.
+
+        Returns:
+            The session, or None if unknown, expired or for another URL
+        """
+        if not session_id or not self.backend.shared:
+            return self.get(session_id, short_code)
+
+        raw = await self.backend.cache_get(SESSION_KEY_PREFIX + session_id)
+        if raw is None:
+            return self.get(session_id, short_code)
+
+        data = json.loads(raw)
+        if data['short_code'] != short_code:
+            return None
+
+        session = self._sessions.get(session_id)
+        if session is None:
+            # Started on another worker: kept here until it expires, but
+            # its owner records the outcome
+            session = GameSession(session_id, short_code, data['difficulty'], data['time_limit'], 0, 0)
+            session.owned = False
+            self._sessions[session_id] = session
+            self.shared_loads += 1
+        expires_at = session.expires_at
+        session.update_from(data)
+        if session.expires_at != expires_at:
+            heapq.heappush(self._expiry, (session.expires_at, session_id))
+
+        if session.expires_at <= time.monotonic():
+            return None
+        return session
+
+    async def exists(self, session_id: str) -> bool:
+        """True if a session is known here or to the shared backend, whatever its short code"""
+        if session_id in self._sessions:
+            return True
+        if not self.backend.shared:
+            return False
+        return await self.backend.cache_get(SESSION_KEY_PREFIX + session_id) is not None
+
+    async def save(self, session: GameSession) -> None:
+        """Write a changed session through to the shared backend (no-op per process)"""
+        if not self.backend.shared:
+            return
+
+        # Outlives the local copy by a grace period so the owner's sweeper
+        # can still see whether another worker ended the game
+        ttl = session.expires_at - time.monotonic() + self.grace_seconds
+        if ttl > 0:
+            await self.backend.cache_set(SESSION_KEY_PREFIX + session.session_id, session.to_json(), ttl)
+
+    def restart_clock(self, session: GameSession) -> bool:
+        """
+        Start the game clock now (the player may sit on the intro screen)
+
+        Only allowed before the first hint or answer.
+
+        Returns:
+            True if the clock was restarted
+        """
+        if session.hints_used or session.attempts or session.ended:
+            return False
+
+        now = time.monotonic()
+        session.started_at = now
+        session.expires_at = now + session.time_limit + self.grace_seconds
+        heapq.heappush(self._expiry, (session.expires_at, session.session_id))
+        return True
+
+    def end(self, session_id: str) -> None:
+        """Mark a session as finished so the sweeper does not record a timeout"""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.ended = True
+
+    # ==================== Sweeper ====================
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start the expiry sweeper (called from the app lifespan)"""
+        if self.running:
+            return
+
+        self._closed = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the sweeper; sessions still in progress are left unrecorded"""
+        if self._task is None:
+            return
+
+        self._closed.set_result(True)
+        await self._task
+        self._task = None
+
+    def collect_expired(self, now: Optional[float] = None) -> List[GameSession]:
+        """
+        Remove every expired session
+
+        Returns:
+            Expired or evicted sessions that never reported an outcome
+        """
+        self._expire(time.monotonic() if now is None else now)
+        unfinished, self._pending_timeouts = self._pending_timeouts, []
+        return unfinished
+
+    async def sweep(self) -> int:
+        """
+        Expire due sessions and record the outcome of unfinished ones
+
+        Returns:
+            Number of timeout events queued
+        """
+        unfinished = self.collect_expired()
+        if self.backend.shared:
+            unfinished = [session for session in unfinished if await self._refresh_expired(session)]
+        if not unfinished:
+            return 0
+
+        # A player who solved it but never called /end still completed it
+        recorded = await analytics_pipeline.enqueue_many([
+            AnalyticsEvent(
+                kind='completed' if session.solved else 'timeout',
+                session_id=session.session_id,
+                completion_time=session.completion_time,
+                hints_used=session.hints_used,
+                attempts=session.attempts,
+                score=session.score
+            )
+            for session in unfinished
+        ])
+        self.timeouts_recorded += recorded
+        return recorded
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get store metrics
+
+        Returns:
+            Live session count, capacity and lifetime counters
+        """
+        return {
+            'live_sessions': len(self._sessions),
+            'max_sessions': self.max_sessions,
+            'sessions_created': self.sessions_created,
+            'sessions_expired': self.sessions_expired,
+            'sessions_evicted': self.sessions_evicted,
+            'timeouts_recorded': self.timeouts_recorded,
+            'shared_loads': self.shared_loads
+        }
+
+    # ==================== Internals ====================
+
+    async def _refresh_expired(self, session: GameSession) -> bool:
+        """
+        Bring an expired session up to date from the shared copy
+
+        Returns:
+            True if its outcome is still to be recorded (False if another
+            worker ended it, or restarted its clock so it is live again)
+        """
+        try:
+            raw = await self.backend.cache_get(SESSION_KEY_PREFIX + session.session_id)
+        except Exception as e:
+            print(f"[GAME] Could not read shared session: {str(e)}")
+            return True
+        if raw is None:
+            return True
+
+        session.update_from(json.loads(raw))
+        if session.ended:
+            return False
+        if session.expires_at > time.monotonic():
+            self._sessions[session.session_id] = session
+            heapq.heappush(self._expiry, (session.expires_at, session.session_id))
+            return False
+        return True
+
+    def _expire(self, now: float) -> int:
+        """Remove sessions due by `now`, queueing unfinished ones for the next sweep"""
+        removed = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, session_id = heapq.heappop(self._expiry)
+            session = self._sessions.get(session_id)
+            if session is None or session.expires_at != expires_at:
+                continue  # Stale heap entry (clock restarted or already removed)
+
+            del self._sessions[session_id]
+            self.sessions_expired += 1
+            removed += 1
+            if session.owned and not session.ended:
+                self._pending_timeouts.append(session)
+        return removed
+
+    def _evict(self, now: float) -> None:
+        """Make room: drop expired sessions, else the one closest to expiry"""
+        if self._expire(now):
+            return
+
+        while self._expiry:
+            expires_at, session_id = heapq.heappop(self._expiry)
+            session = self._sessions.get(session_id)
+            if session is not None and session.expires_at == expires_at:
+                del self._sessions[session_id]
+                self.sessions_evicted += 1
+                if session.owned and not session.ended:
+                    self._pending_timeouts.append(session)
+                return
+
+    async def _run(self) -> None:
+        while not self._closed.done():
+            await asyncio.wait({self._closed}, timeout=self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"[GAME] Session sweep failed: {str(e)}")
+
+
+# Global game session store instance
+game_sessions = GameSessionStore()
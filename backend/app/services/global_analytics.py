@@ -0,0 +1,267 @@
+"""
+Global Analytics Snapshot
+Computes the site-wide analytics totals on an interval and serves them
+from memory, so GET /analytics/global costs no database work per hit
+"""
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.analytics import URLAnalytics
+from app.models.url import ShortURL
+from app.services.shared_state import CounterDeltas
+
+
+async def compute_global_analytics(db: AsyncSession) -> Dict[str, Any]:
+    """
+    Aggregate the global totals from short_urls and url_analytics
+
+    Args:
+        db: Database session
+
+    Returns:
+        Global statistics dictionary
+    """
+    url_stats = (await db.execute(select(
+        func.count(ShortURL.id).label('total_urls'),
+        func.sum(ShortURL.total_views).label('total_views'),
+        func.sum(ShortURL.total_completions).label('total_completions'),
+        func.avg(ShortURL.avg_completion_time_seconds).label('avg_completion_time'),
+        func.sum(ShortURL.total_failures).label('total_failures'),
+        func.sum(ShortURL.total_timeouts).label('total_timeouts')
+    ))).first()
+
+    revenue = (await db.execute(select(
+        func.sum(URLAnalytics.estimated_revenue_usd).label('total_revenue')
+    ))).first()
+
+    total_views = url_stats.total_views or 0
+    total_completions = url_stats.total_completions or 0
+
+    return {
+        'total_urls': url_stats.total_urls or 0,
+        'total_views': total_views,
+        'total_completions': total_completions,
+        'avg_completion_time': url_stats.avg_completion_time or 0,
+        'total_failures': url_stats.total_failures or 0,
+        'total_timeouts': url_stats.total_timeouts or 0,
+        'total_revenue': revenue.total_revenue or 0,
+        'completion_rate': completion_rate(total_views, total_completions)
+    }
+
+
+def completion_rate(views: int, completions: int) -> float:
+    return (completions / views * 100) if views > 0 else 0
+
+
+@dataclass
+class GlobalSnapshot:
+    """One version of the global totals"""
+    data: Dict[str, Any]
+    version: int
+    modified_at: datetime  # UTC, last time the data changed
+    etag: str
+
+
+def snapshot_etag(data: Dict[str, Any]) -> str:
+    """Strong ETag of the data, identical on every worker holding the same totals"""
+    digest = hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+class GlobalAnalytics:
+    """
+    Background refresher holding the latest global snapshot
+
+    The totals are recomputed every `interval_seconds`. Between refreshes,
+    committed analytics batches can be folded in with apply_deltas so
+    views and outcomes move without waiting for the next scan; each
+    refresh replaces those estimates with the database values. Before
+    start() (scripts, tests) the snapshot is computed on demand and
+    reused for `interval_seconds`.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = settings.GLOBAL_ANALYTICS_REFRESH_SECONDS,
+        incremental: bool = settings.GLOBAL_ANALYTICS_INCREMENTAL,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+    ):
+        self.interval = interval_seconds
+        self.incremental = incremental
+        self.session_factory = session_factory
+
+        self._snapshot: Optional[GlobalSnapshot] = None
+        self._refreshed_at: Optional[float] = None  # monotonic
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closed: Optional[asyncio.Future] = None
+
+        # Metrics
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_refresh_ms = 0.0
+        self.max_refresh_ms = 0.0
+        self.incremental_updates = 0
+        self.served = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Compute the first snapshot and start refreshing (called from the app lifespan)"""
+        if self.running:
+            return
+
+        self._closed = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run())
+        print(f"[ANALYTICS] Refreshing global analytics every {self.interval}s")
+
+    async def stop(self) -> None:
+        """Stop refreshing; the last snapshot stays available"""
+        if self._task is None:
+            return
+
+        self._closed.set_result(True)
+        await self._task
+        self._task = None
+
+    async def get(self, db: Optional[AsyncSession] = None) -> Optional[GlobalSnapshot]:
+        """
+        Get the current snapshot
+
+        Args:
+            db: Session used when a snapshot has to be computed on demand
+
+        Returns:
+            The snapshot, or None if none could be computed yet
+        """
+        if self._snapshot is None or (not self.running and self.age_seconds >= self.interval):
+            async with self._lock:
+                # Another request may have computed it while we waited
+                if self._snapshot is None or (not self.running and self.age_seconds >= self.interval):
+                    await self.refresh(db)
+
+        self.served += 1
+        return self._snapshot
+
+    async def refresh(self, db: Optional[AsyncSession] = None) -> bool:
+        """
+        Recompute the snapshot from the database
+
+        Args:
+            db: Session to use (default: a new one)
+
+        Returns:
+            True if the snapshot was refreshed
+        """
+        start = time.perf_counter()
+        try:
+            if db is not None:
+                data = await compute_global_analytics(db)
+            else:
+                async with self.session_factory() as session:
+                    data = await compute_global_analytics(session)
+        except Exception as e:
+            # Keep serving the previous snapshot
+            self.refresh_errors += 1
+            print(f"[ANALYTICS] Error refreshing global analytics: {str(e)}")
+            return False
+
+        self._replace(data)
+        self._refreshed_at = time.monotonic()
+        self.refreshes += 1
+        self.last_refresh_ms = (time.perf_counter() - start) * 1000
+        self.max_refresh_ms = max(self.max_refresh_ms, self.last_refresh_ms)
+        return True
+
+    def apply_deltas(self, deltas: CounterDeltas, revenue: float = 0.0) -> None:
+        """
+        Fold a committed analytics batch into the snapshot
+
+        Only this worker's batches are seen; the average completion time
+        is left to the next refresh.
+
+        Args:
+            deltas: short_code -> counter deltas of the batch
+            revenue: Ad revenue recorded by the batch
+        """
+        if not self.incremental or self._snapshot is None:
+            return
+
+        data = dict(self._snapshot.data)
+        for delta in deltas.values():
+            data['total_views'] += delta['views']
+            data['total_completions'] += delta['completions']
+            data['total_failures'] += delta['failures']
+            data['total_timeouts'] += delta['timeouts']
+        data['total_revenue'] += revenue
+        data['completion_rate'] = completion_rate(data['total_views'], data['total_completions'])
+
+        self._replace(data)
+        self.incremental_updates += 1
+
+    def count_new_url(self, count: int = 1) -> None:
+        """Count URLs created by this worker until the next refresh"""
+        if not self.incremental or self._snapshot is None:
+            return
+
+        self._replace(dict(self._snapshot.data, total_urls=self._snapshot.data['total_urls'] + count))
+        self.incremental_updates += 1
+
+    @property
+    def age_seconds(self) -> float:
+        """Seconds since the last database refresh (inf before the first)"""
+        if self._refreshed_at is None:
+            return float('inf')
+        return time.monotonic() - self._refreshed_at
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get refresher metrics
+
+        Returns:
+            Running flag, snapshot version and age, refresh counts and durations
+        """
+        age = self.age_seconds
+        return {
+            'running': self.running,
+            'interval_seconds': self.interval,
+            'incremental': self.incremental,
+            'version': self._snapshot.version if self._snapshot else 0,
+            'age_seconds': round(age, 2) if age != float('inf') else None,
+            'refreshes': self.refreshes,
+            'refresh_errors': self.refresh_errors,
+            'last_refresh_ms': round(self.last_refresh_ms, 2),
+            'max_refresh_ms': round(self.max_refresh_ms, 2),
+            'incremental_updates': self.incremental_updates,
+            'served': self.served
+        }
+
+    def _replace(self, data: Dict[str, Any]) -> None:
+        etag = snapshot_etag(data)
+        if self._snapshot is not None and self._snapshot.etag == etag:
+            return
+        version = self._snapshot.version + 1 if self._snapshot else 1
+        # Whole seconds, as Last-Modified cannot express more
+        modified_at = datetime.utcnow().replace(microsecond=0)
+        self._snapshot = GlobalSnapshot(data, version, modified_at, etag)
+
+    async def _run(self) -> None:
+        while not self._closed.done():
+            await self.refresh()
+            await asyncio.wait({self._closed}, timeout=self.interval)
+
+
+# Global snapshot instance
+global_analytics = GlobalAnalytics()
@@ -0,0 +1,273 @@
+"""
+Global Leaderboard
+Keeps the best entries of each global leaderboard window (all time, the
+current UTC day, the last 7 days) as top-K boards in the shared state
+backend, so reads cost O(K) instead of a scan and sort of the leaderboard
+table
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.leaderboard import LeaderboardEntry
+from app.services.leaderboard_ranking import completed_since, rank_key
+from app.services.shared_state import SharedStateBackend, state_backend
+from app.services.ws_backplane import Backplane, backplane as global_backplane
+from app.utils.pagination import leaderboard_after
+
+TIME_FILTERS = ('all', 'week', 'today')
+
+WEEK = timedelta(days=7)
+
+# A day's board outlives the day so late reads around midnight still hit it
+TODAY_TTL_SECONDS = 2 * 86400
+
+# (score, completion_time, id, rank) of the last entry on a page
+GlobalCursor = Tuple[int, float, str, int]
+
+
+def entry_payload(entry: LeaderboardEntry) -> Dict[str, Any]:
+    """Global leaderboard fields of an entry (everything but the rank)"""
+    return {
+        'id': entry.id,
+        'player_nickname': entry.player_nickname,
+        'player_country': entry.player_country,
+        'completion_time': entry.completion_time_seconds,
+        'hints_used': entry.hints_used,
+        'score': entry.score,
+        'difficulty': entry.difficulty,
+        'short_code': entry.short_code,
+        'completed_at': entry.completed_at.isoformat() if entry.completed_at else None
+    }
+
+
+def window_start(time_filter: str, now: datetime) -> Optional[datetime]:
+    """Earliest completed_at inside a window (None for all time)"""
+    if time_filter == 'today':
+        return now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if time_filter == 'week':
+        return now - WEEK
+    return None
+
+
+def board_name(time_filter: str, now: datetime) -> str:
+    """
+    Top-K board holding a window
+
+    The day is part of the 'today' board's name, so the window rolls over
+    at UTC midnight by moving to a new board; the old one just expires.
+    """
+    if time_filter == 'today':
+        return f"global:today:{now.date().isoformat()}"
+    return f"global:{time_filter}"
+
+
+async def query_window(
+    time_filter: str,
+    limit: int,
+    db: AsyncSession,
+    now: Optional[datetime] = None,
+    after: Optional[Tuple[int, float, str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Read the best entries of a window from the database
+
+    Args:
+        time_filter: 'all', 'week', or 'today'
+        limit: Number of entries to return
+        db: Database session
+        now: Reference time (defaults to the current UTC time)
+        after: (score, completion_time, id) to continue after, for deeper pages
+
+    Returns:
+        Entry payloads in rank order
+    """
+    query = select(LeaderboardEntry)
+
+    start = window_start(time_filter, now or datetime.utcnow())
+    if start is not None:
+        query = query.where(LeaderboardEntry.completed_at >= start)
+    if after is not None:
+        query = query.where(leaderboard_after(after))
+
+    # Order by score (highest first), then by completion time (fastest
+    # first); the id keeps ties in a stable order across pages
+    entries = await db.scalars(query.order_by(
+        desc(LeaderboardEntry.score),
+        LeaderboardEntry.completion_time_seconds,
+        LeaderboardEntry.id
+    ).limit(limit))
+
+    return [entry_payload(entry) for entry in entries]
+
+
+class GlobalLeaderboard:
+    """
+    Incrementally maintained top-K per global leaderboard window
+
+    A board is loaded from the database on first read (or by rebuild())
+    and from then on every new entry is offered to it; only entries that
+    make the top `capacity` are kept. The 'week' window slides: entries
+    older than 7 days are dropped on read, and a full board that loses
+    entries is reloaded because it cannot tell which entries move up.
+
+    Boards live in the shared state backend. With the per-process memory
+    backend, new entries are relayed over the backplane so every worker
+    keeps its own boards current.
+    """
+
+    def __init__(
+        self,
+        capacity: int = settings.GLOBAL_LEADERBOARD_SIZE,
+        backend: SharedStateBackend = state_backend,
+        backplane: Optional[Backplane] = None
+    ):
+        self.capacity = capacity
+        self.backend = backend
+
+        self.backplane = backplane
+        if backplane is not None:
+            backplane.subscribe('global_score', self._on_remote_entry)
+        self._tasks: set = set()
+
+        # Metrics
+        self.reads = 0
+        self.board_hits = 0
+        self.board_loads = 0
+        self.db_fallbacks = 0
+        self.entries_offered = 0
+
+    async def get(
+        self,
+        time_filter: str,
+        limit: int,
+        db: AsyncSession,
+        now: Optional[datetime] = None,
+        after: Optional[GlobalCursor] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a page of a window's entries with their ranks
+
+        Args:
+            time_filter: 'all', 'week', or 'today'
+            limit: Number of entries to return
+            db: Database session
+            now: Reference time (defaults to the current UTC time)
+            after: Last entry of the previous page (None for the top)
+
+        Returns:
+            List of leaderboard entries
+        """
+        now = now or datetime.utcnow()
+        self.reads += 1
+        start_rank = after[3] if after else 0
+
+        if limit <= self.capacity:
+            name = board_name(time_filter, now)
+            if time_filter == 'week':
+                await self.backend.topk_expire(name, window_start('week', now), self.capacity)
+
+            entries = await self.backend.topk_get(name)
+            if entries is None:
+                entries = await self._load(time_filter, db, now)
+            else:
+                self.board_hits += 1
+
+            # A board that is not full holds the whole window
+            complete = len(entries) < self.capacity
+            if after is not None:
+                last = rank_key(*after[:3])
+                entries = [e for e in entries if rank_key(e['score'], e['completion_time'], e['id']) > last]
+
+            if complete or len(entries) >= limit:
+                return self._ranked(entries[:limit], start_rank)
+
+        # Pages past the end of the board come straight from the database
+        self.db_fallbacks += 1
+        entries = await query_window(time_filter, limit, db, now, after[:3] if after else None)
+        return self._ranked(entries, start_rank)
+
+    async def record(self, entry: LeaderboardEntry, relay: bool = True) -> None:
+        """
+        Offer a newly committed entry to every window it falls in
+
+        Args:
+            entry: Leaderboard row, after commit and refresh
+            relay: Also offer it on the other workers (memory backend only)
+        """
+        payload = entry_payload(entry)
+        try:
+            await self._offer(payload)
+        except Exception as e:
+            print(f"[ANALYTICS] Error updating global leaderboard: {str(e)}")
+
+        if relay and self.backplane is not None and not self.backend.shared:
+            self.backplane.publish('global_score', e=payload)
+
+    async def rebuild(self, db: AsyncSession, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Reload every window from the database
+
+        Use after bulk changes made outside add_to_leaderboard.
+
+        Args:
+            db: Database session
+            now: Reference time (defaults to the current UTC time)
+
+        Returns:
+            Number of entries loaded per window
+        """
+        now = now or datetime.utcnow()
+        return {
+            time_filter: len(await self._load(time_filter, db, now))
+            for time_filter in TIME_FILTERS
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get global leaderboard metrics"""
+        return {
+            'capacity': self.capacity,
+            'shared': self.backend.shared,
+            'reads': self.reads,
+            'board_hits': self.board_hits,
+            'board_loads': self.board_loads,
+            'db_fallbacks': self.db_fallbacks,
+            'entries_offered': self.entries_offered,
+        }
+
+    async def _load(self, time_filter: str, db: AsyncSession, now: datetime) -> List[Dict[str, Any]]:
+        """Build a window's board from the database"""
+        entries = await query_window(time_filter, self.capacity, db, now)
+        ttl = TODAY_TTL_SECONDS if time_filter == 'today' else None
+        await self.backend.topk_load(board_name(time_filter, now), entries, self.capacity, ttl)
+        self.board_loads += 1
+        return entries
+
+    async def _offer(self, payload: Dict[str, Any]) -> None:
+        """Add an entry payload to the boards of the windows it falls in"""
+        now = datetime.utcnow()
+        self.entries_offered += 1
+
+        for time_filter in TIME_FILTERS:
+            start = window_start(time_filter, now)
+            if start is not None and not completed_since(payload, start):
+                continue
+            ttl = TODAY_TTL_SECONDS if time_filter == 'today' else None
+            await self.backend.topk_offer(board_name(time_filter, now), payload, self.capacity, ttl)
+
+    def _on_remote_entry(self, envelope: Dict[str, Any]) -> None:
+        task = asyncio.get_running_loop().create_task(self._offer(envelope['e']))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    def _ranked(entries: List[Dict[str, Any]], start_rank: int = 0) -> List[Dict[str, Any]]:
+        return [{'rank': start_rank + idx + 1, **entry} for idx, entry in enumerate(entries)]
+
+
+# Global leaderboard instance
+global_leaderboard = GlobalLeaderboard(backplane=global_backplane)
@@ -0,0 +1,164 @@
+"""
+Leaderboard Broadcast Scheduler
+Merges leaderboard changes per room over a short window so a burst of
+submissions costs one top-N query and one broadcast instead of one each
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.analytics_service import AnalyticsService
+from app.services.leaderboard_stream import leaderboard_stream
+from app.services.shared_state import state_backend
+from app.services.websocket_manager import manager
+from app.services.ws_backplane import Backplane, backplane as global_backplane
+
+
+class LeaderboardBroadcaster:
+    """
+    Per-room debounce for leaderboard_update / new_score broadcasts
+
+    The first change in a room opens a window of `window_ms`; every change
+    that lands inside it joins the same flush. A flush reads the top-N once
+    and sends one new_score (the latest entry, with the window's count) and
+    hands the new top-N to the leaderboard stream, which sends deltas or
+    full leaderboard_update messages depending on the client. Rooms with no
+    connected sockets on this worker are skipped without touching the
+    database. With a backplane, each new score is relayed so every worker
+    runs its own flush for the sockets it holds.
+    """
+
+    def __init__(
+        self,
+        window_ms: int = settings.LEADERBOARD_BROADCAST_WINDOW_MS,
+        top_n: int = 10,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        backplane: Optional[Backplane] = None
+    ):
+        self.window = window_ms / 1000
+        self.top_n = top_n
+        self.session_factory = session_factory
+
+        # New scores are relayed so every worker refreshes its own sockets
+        self.backplane = backplane
+        if backplane is not None:
+            backplane.subscribe('score', self._on_remote_score)
+
+        # short_code -> new scores waiting for the next flush
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._flushing: set = set()
+
+        # Metrics
+        self.changes_received = 0
+        self.flushes = 0
+        self.broadcasts_sent = 0
+        self.db_reads = 0
+        self.rooms_skipped = 0
+        self.last_flush_ms = 0.0
+
+    def record_score(self, short_code: str, score_entry: Dict[str, Any], relay: bool = True) -> None:
+        """
+        Queue a new leaderboard entry for the room's next broadcast
+
+        Args:
+            short_code: URL short code
+            score_entry: Entry as broadcast in new_score messages
+            relay: Also queue it on the other workers
+        """
+        if relay and self.backplane is not None:
+            self.backplane.publish('score', r=short_code, e=score_entry)
+
+        self.changes_received += 1
+        self._pending.setdefault(short_code, []).append(score_entry)
+
+        if short_code not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[short_code] = loop.call_later(self.window, self._schedule_flush, short_code)
+
+    async def flush_all(self) -> None:
+        """Flush every pending room now (shutdown, tests)"""
+        for short_code in list(self._timers):
+            self._timers.pop(short_code).cancel()
+            await self._flush(short_code)
+
+    async def stop(self) -> None:
+        """Send what is pending and stop scheduling"""
+        await self.flush_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get scheduler metrics
+
+        Returns:
+            Window, change/broadcast counts and the coalescing ratio
+            (changes received per flush)
+        """
+        return {
+            'window_ms': int(self.window * 1000),
+            'pending_rooms': len(self._pending),
+            'changes_received': self.changes_received,
+            'flushes': self.flushes,
+            'broadcasts_sent': self.broadcasts_sent,
+            'db_reads': self.db_reads,
+            'rooms_skipped': self.rooms_skipped,
+            'coalescing_ratio': round(self.changes_received / self.flushes, 2) if self.flushes else 0.0,
+            'last_flush_ms': round(self.last_flush_ms, 2)
+        }
+
+    # ==================== Internals ====================
+
+    def _on_remote_score(self, envelope: Dict[str, Any]) -> None:
+        self.record_score(envelope['r'], envelope['e'], relay=False)
+
+    def _schedule_flush(self, short_code: str) -> None:
+        self._timers.pop(short_code, None)
+        asyncio.create_task(self._flush(short_code))
+
+    async def _flush(self, short_code: str) -> None:
+        """Read the top-N once and broadcast the window's changes"""
+        if short_code in self._flushing:
+            # A slow flush is still running; pick these changes up afterwards
+            if short_code not in self._timers:
+                loop = asyncio.get_running_loop()
+                self._timers[short_code] = loop.call_later(self.window, self._schedule_flush, short_code)
+            return
+
+        scores = self._pending.pop(short_code, None)
+        if not scores:
+            return
+
+        self.flushes += 1
+        if manager.get_local_players(short_code) == 0:
+            # Nobody here to tell, but the next joiner must not get the
+            # top-N from before these scores
+            leaderboard_stream.invalidate(short_code)
+            self.rooms_skipped += 1
+            return
+
+        start = time.perf_counter()
+        self._flushing.add(short_code)
+        try:
+            await manager.broadcast_new_score(short_code, dict(scores[-1], count=len(scores)), relay=False)
+
+            async with self.session_factory() as db:
+                entries = await AnalyticsService.get_leaderboard(short_code, self.top_n, db)
+            self.db_reads += 1
+            total = await state_backend.board_size(short_code)
+
+            await leaderboard_stream.publish(short_code, entries, total)
+            self.broadcasts_sent += 2
+        except Exception as e:
+            leaderboard_stream.invalidate(short_code)
+            print(f"[WEBSOCKET] Error broadcasting leaderboard for {short_code}: {str(e)}")
+        finally:
+            self._flushing.discard(short_code)
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+
+# Global leaderboard broadcaster instance
+leaderboard_broadcaster = LeaderboardBroadcaster(backplane=global_backplane)
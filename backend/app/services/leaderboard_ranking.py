@@ -0,0 +1,206 @@
+"""
+Leaderboard Rank Index
+Keeps an in-memory order-statistic index per short code so ranks and
+percentiles are computed on read instead of being rewritten on every row,
+and bounded top-K boards for the global leaderboards
+"""
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.sorted_rank_list import SortedRankList
+
+# (score, completion_time_seconds, entry_id)
+RankRow = Tuple[int, float, str]
+
+
+def rank_key(score: int, completion_time: float, entry_id: str) -> Tuple[int, float, str]:
+    """
+    Build the sort key for a leaderboard entry
+
+    Highest score first, then fastest completion time. The entry id breaks
+    exact ties so every key is unique.
+    """
+    return (-score, completion_time, entry_id)
+
+
+class LeaderboardRankIndex:
+    """Per-short-code rank index, rebuilt from the database on demand"""
+
+    def __init__(self, max_boards: int = 1000):
+        # Least recently used boards are dropped first; they are rebuilt
+        # from the database the next time they are needed
+        self.max_boards = max_boards
+        self._boards: "OrderedDict[str, SortedRankList]" = OrderedDict()
+
+    def is_loaded(self, short_code: str) -> bool:
+        """Check whether a board is currently held in memory"""
+        return short_code in self._boards
+
+    def load(self, short_code: str, rows: Iterable[RankRow]) -> None:
+        """
+        (Re)build the index for a short code
+
+        Args:
+            short_code: Short URL code
+            rows: (score, completion_time, entry_id) for every entry
+        """
+        self._boards[short_code] = SortedRankList(rank_key(*row) for row in rows)
+        self._boards.move_to_end(short_code)
+
+        while len(self._boards) > self.max_boards:
+            self._boards.popitem(last=False)
+
+    def insert(self, short_code: str, score: int, completion_time: float, entry_id: str) -> None:
+        """
+        Add a new entry to a loaded board in O(log n)
+
+        Boards that are not loaded are left alone; they pick the entry up
+        from the database when they are next rebuilt.
+        """
+        board = self._boards.get(short_code)
+        if board is None:
+            return
+
+        key = rank_key(score, completion_time, entry_id)
+        if key not in board:
+            board.add(key)
+        self._boards.move_to_end(short_code)
+
+    def rank(self, short_code: str, score: int, completion_time: float, entry_id: str) -> Optional[int]:
+        """
+        Get the 1-based rank of an entry
+
+        Returns:
+            Rank, or None if the board is not loaded
+        """
+        board = self._boards.get(short_code)
+        if board is None:
+            return None
+
+        self._boards.move_to_end(short_code)
+        return board.rank(rank_key(score, completion_time, entry_id))
+
+    def total(self, short_code: str) -> int:
+        """Get the number of entries on a loaded board"""
+        board = self._boards.get(short_code)
+        return len(board) if board is not None else 0
+
+    def percentile(self, short_code: str, rank: int) -> float:
+        """
+        Convert a rank into a percentile (lower is better)
+
+        Args:
+            short_code: Short URL code
+            rank: 1-based rank
+
+        Returns:
+            Percentile in the range (0, 100]
+        """
+        total = self.total(short_code)
+        return (rank / total) * 100 if total > 0 else 0
+
+    def invalidate(self, short_code: str) -> None:
+        """Drop a board so it is rebuilt on next access"""
+        self._boards.pop(short_code, None)
+
+
+# Global rank index instance
+rank_index = LeaderboardRankIndex()
+
+
+def completed_since(entry: Dict[str, Any], start: datetime) -> bool:
+    """Check whether a top-K entry falls inside a window starting at `start`"""
+    completed_at = entry.get('completed_at')
+    return completed_at is not None and datetime.fromisoformat(completed_at) >= start
+
+
+class TopKBoards:
+    """
+    Bounded boards holding only the best entries of a window
+
+    Used for the global leaderboards. Each board is a sorted list of at
+    most `capacity` entry dicts (id, score, completion_time, completed_at,
+    ...). While a board holds fewer than `capacity` entries it holds every
+    entry of its window; once full it holds the top `capacity`.
+    """
+
+    def __init__(self, max_boards: int = 16):
+        # Old per-day boards fall out as new days are loaded
+        self.max_boards = max_boards
+        self._boards: "OrderedDict[str, List[Tuple[Tuple[int, float, str], Dict[str, Any]]]]" = OrderedDict()
+
+    @staticmethod
+    def _key(entry: Dict[str, Any]) -> Tuple[int, float, str]:
+        return rank_key(entry['score'], entry['completion_time'], entry['id'])
+
+    def get(self, name: str) -> Optional[List[Dict[str, Any]]]:
+        """Entries of a board in rank order, or None if it is not loaded"""
+        board = self._boards.get(name)
+        if board is None:
+            return None
+        self._boards.move_to_end(name)
+        return [entry for _, entry in board]
+
+    def load(self, name: str, entries: Iterable[Dict[str, Any]], capacity: int) -> None:
+        """(Re)build a board from its window's best entries"""
+        self._boards[name] = sorted(((self._key(entry), entry) for entry in entries), key=itemgetter(0))[:capacity]
+        self._boards.move_to_end(name)
+
+        while len(self._boards) > self.max_boards:
+            self._boards.popitem(last=False)
+
+    def offer(self, name: str, entry: Dict[str, Any], capacity: int) -> bool:
+        """
+        Add an entry to a loaded board if it makes the top `capacity`
+
+        Returns:
+            True if the entry is now on the board
+        """
+        board = self._boards.get(name)
+        if board is None:
+            return False
+
+        key = self._key(entry)
+        if len(board) >= capacity and key >= board[-1][0]:
+            return False
+
+        pos = bisect_left(board, key, key=itemgetter(0))
+        if pos < len(board) and board[pos][0] == key:
+            return True
+        board.insert(pos, (key, entry))
+        del board[capacity:]
+        return True
+
+    def expire(self, name: str, before: datetime, capacity: int) -> int:
+        """
+        Remove entries completed before `before` from a loaded board
+
+        A full board that loses entries no longer knows which entries
+        should move up into the freed places, so it is dropped and gets
+        rebuilt on next access.
+
+        Returns:
+            Number of entries removed
+        """
+        board = self._boards.get(name)
+        if board is None:
+            return 0
+
+        kept = [item for item in board if completed_since(item[1], before)]
+        removed = len(board) - len(kept)
+        if removed and len(board) >= capacity:
+            del self._boards[name]
+        elif removed:
+            self._boards[name] = kept
+        return removed
+
+    def invalidate(self, name: str) -> None:
+        """Drop a board so it is rebuilt on next access"""
+        self._boards.pop(name, None)
+
+
+# Global top-K boards instance (global leaderboards)
+top_boards = TopKBoards()
@@ -0,0 +1,280 @@
+"""
+Leaderboard Stream
+Versioned top-N leaderboard per room. Clients that acknowledge versions get
+small deltas; everyone else keeps getting full leaderboard_update messages.
+"""
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.analytics_service import AnalyticsService
+from app.services.shared_state import state_backend
+from app.services.websocket_manager import ClientConnection, encode_message, manager
+
+# Derived on the client from position and total, so deltas leave them out
+DERIVED_FIELDS = ('rank', 'percentile')
+
+
+def compute_delta(old_entries: List[Dict[str, Any]], new_entries: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Diff two top-N lists by entry id
+
+    Entries never change once written, so a top-N change is only ever
+    entries entering or leaving; rank shifts follow from the new order.
+
+    Returns:
+        (added entries without derived fields, removed entry ids)
+    """
+    old_ids = {entry['id'] for entry in old_entries}
+    new_ids = {entry['id'] for entry in new_entries}
+
+    added = [
+        {key: value for key, value in entry.items() if key not in DERIVED_FIELDS}
+        for entry in new_entries if entry['id'] not in old_ids
+    ]
+    removed = [entry['id'] for entry in old_entries if entry['id'] not in new_ids]
+    return added, removed
+
+
+class RoomBoard:
+    """Current top-N of one room plus its recent deltas"""
+
+    __slots__ = ('version', 'entries', 'total', 'history', 'snapshot_text', 'stale')
+
+    def __init__(self, history_size: int):
+        # Versions start from the clock so a reloaded room never reuses
+        # numbers a client may still hold
+        self.version = int(time.time() * 1000)
+        self.entries: List[Dict[str, Any]] = []
+        self.total = 0
+        self.history: Deque[Tuple[int, str]] = deque(maxlen=history_size)
+        self.snapshot_text: Optional[str] = None
+        # Scores landed without a publish (no local players); reload on join
+        self.stale = False
+
+
+class LeaderboardStream:
+    """
+    Sends leaderboard changes as versioned deltas
+
+    Protocol (client -> server):
+        {"type": "leaderboard_ack", "version": null}  join or resync; answered with a snapshot
+        {"type": "leaderboard_ack", "version": N}     version N applied
+
+    Protocol (server -> client):
+        leaderboard_snapshot  {version, total, entries}
+        leaderboard_delta     {version, base, total, added, removed}
+
+    Clients are sent every delta after the version they hold. A client more
+    than `max_unacked` versions ahead of its last ack is paused and catches
+    up from its acknowledged version when the ack arrives: with deltas from
+    the history if they reach back far enough, otherwise with a snapshot.
+    """
+
+    def __init__(
+        self,
+        top_n: int = 10,
+        history_size: int = settings.LEADERBOARD_DELTA_HISTORY,
+        max_unacked: int = settings.LEADERBOARD_MAX_UNACKED_VERSIONS,
+        max_rooms: int = 10000,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+    ):
+        self.top_n = top_n
+        self.history_size = history_size
+        self.max_unacked = max_unacked
+        self.max_rooms = max_rooms
+        self.session_factory = session_factory
+
+        self._rooms: "OrderedDict[str, RoomBoard]" = OrderedDict()
+
+        # Metrics
+        self.publishes = 0
+        self.legacy_sent = 0
+        self.deltas_sent = 0
+        self.snapshots_sent = 0
+        self.clients_paused = 0
+        self.legacy_bytes = 0
+        self.delta_bytes = 0
+        self.snapshot_bytes = 0
+
+    async def publish(self, short_code: str, entries: List[Dict[str, Any]], total: int) -> None:
+        """
+        Publish a new top-N for a room
+
+        Args:
+            short_code: URL short code
+            entries: Formatted entries as returned by AnalyticsService.get_leaderboard
+            total: Number of entries on the full board (for percentiles)
+        """
+        room = self._get_room(short_code)
+        if not self._advance(room, entries, total):
+            return
+
+        legacy_text = None
+        for client in manager.get_room_clients(short_code):
+            if client.lb_version is None:
+                if legacy_text is None:
+                    legacy_text = encode_message({'type': 'leaderboard_update', 'data': {'entries': entries}})
+                manager.send_encoded(client, 'leaderboard_update', legacy_text)
+                self.legacy_sent += 1
+                self.legacy_bytes += len(legacy_text)
+            else:
+                self._catch_up(client, room)
+
+    def invalidate(self, short_code: str) -> None:
+        """
+        Mark a room's top-N as out of date
+
+        Called when scores land but nothing is published (the room had no
+        local players); the next client to join reloads it first.
+        """
+        room = self._rooms.get(short_code)
+        if room is not None:
+            room.stale = True
+
+    async def handle_ack(self, websocket: WebSocket, short_code: str, version: Optional[int]) -> None:
+        """
+        Handle a leaderboard_ack from a client
+
+        Args:
+            websocket: Client socket
+            short_code: Room the socket is connected to
+            version: Version the client holds, or None to request a snapshot
+        """
+        client = manager.get_client(websocket)
+        if client is None or client.short_code != short_code:
+            return
+
+        room = await self._ensure_room(short_code)
+
+        if version is None or client.lb_version is None or version > client.lb_version:
+            self._send_snapshot(client, room)
+            return
+
+        client.lb_acked = max(client.lb_acked, version)
+        self._catch_up(client, room)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get stream metrics
+
+        Returns:
+            Message counts and average payload size per message kind
+        """
+        def average(total_bytes: int, count: int) -> int:
+            return total_bytes // count if count else 0
+
+        return {
+            'rooms': len(self._rooms),
+            'publishes': self.publishes,
+            'legacy_sent': self.legacy_sent,
+            'deltas_sent': self.deltas_sent,
+            'snapshots_sent': self.snapshots_sent,
+            'clients_paused': self.clients_paused,
+            'avg_legacy_bytes': average(self.legacy_bytes, self.legacy_sent),
+            'avg_delta_bytes': average(self.delta_bytes, self.deltas_sent),
+            'avg_snapshot_bytes': average(self.snapshot_bytes, self.snapshots_sent)
+        }
+
+    # ==================== Internals ====================
+
+    def _get_room(self, short_code: str) -> RoomBoard:
+        room = self._rooms.get(short_code)
+        if room is None:
+            room = self._rooms[short_code] = RoomBoard(self.history_size)
+            while len(self._rooms) > self.max_rooms:
+                self._rooms.popitem(last=False)
+        self._rooms.move_to_end(short_code)
+        return room
+
+    async def _ensure_room(self, short_code: str) -> RoomBoard:
+        """Get a room's board, loading the top-N if nothing was published yet or it is stale"""
+        room = self._rooms.get(short_code)
+        if room is not None and room.history and not room.stale:
+            return room
+
+        version = None
+        if room is not None:
+            version = room.version
+            room.stale = False  # Invalidated again while loading: stays stale
+
+        async with self.session_factory() as db:
+            entries = await AnalyticsService.get_leaderboard(short_code, self.top_n, db)
+        total = await state_backend.board_size(short_code)
+
+        # A publish may have landed while loading; it is at least as fresh.
+        # A reload is a new version with a delta from the old top-N, so
+        # clients already in the room are caught up by the next publish.
+        room = self._get_room(short_code)
+        if not room.history or room.version == version:
+            self._advance(room, entries, total)
+        return room
+
+    def _advance(self, room: RoomBoard, entries: List[Dict[str, Any]], total: int) -> bool:
+        """Record a new version of the room's top-N; False if nothing changed"""
+        added, removed = compute_delta(room.entries, entries)
+        if room.history and not added and not removed and total == room.total:
+            return False
+
+        room.version += 1
+        room.history.append((room.version, encode_message({
+            'type': 'leaderboard_delta',
+            'version': room.version,
+            'base': room.version - 1,
+            'total': total,
+            'added': added,
+            'removed': removed
+        })))
+        room.entries = entries
+        room.total = total
+        room.snapshot_text = None
+        room.stale = False
+        self.publishes += 1
+        return True
+
+    def _catch_up(self, client: ClientConnection, room: RoomBoard) -> None:
+        """Bring a delta client to the room's current version"""
+        if client.lb_version == room.version:
+            return
+
+        if client.lb_version - client.lb_acked >= self.max_unacked:
+            # Too far ahead of its acks; resume when the client catches up
+            self.clients_paused += 1
+            return
+
+        oldest = room.history[0][0] if room.history else None
+        if oldest is None or client.lb_version < oldest - 1 or client.lb_version > room.version:
+            self._send_snapshot(client, room)
+            return
+
+        for version, text in room.history:
+            if version > client.lb_version:
+                manager.send_encoded(client, 'leaderboard_delta', text)
+                self.deltas_sent += 1
+                self.delta_bytes += len(text)
+        client.lb_version = room.version
+
+    def _send_snapshot(self, client: ClientConnection, room: RoomBoard) -> None:
+        if room.snapshot_text is None:
+            room.snapshot_text = encode_message({
+                'type': 'leaderboard_snapshot',
+                'version': room.version,
+                'total': room.total,
+                'entries': room.entries
+            })
+        manager.send_encoded(client, 'leaderboard_snapshot', room.snapshot_text)
+        self.snapshots_sent += 1
+        self.snapshot_bytes += len(room.snapshot_text)
+
+        # A snapshot is self-contained, so it does not count against the
+        # unacknowledged window
+        client.lb_version = client.lb_acked = room.version
+
+
+# Global leaderboard stream instance
+leaderboard_stream = LeaderboardStream()
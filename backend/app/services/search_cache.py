@@ -0,0 +1,165 @@
+"""
+Search Cache
+LRU + TTL cache of search results keyed by normalized query text, with
+single-flight coalescing so concurrent identical queries share one
+upstream call, in front of the configured search provider
+"""
+import asyncio
+import time
+import unicodedata
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.services.search_client import search_client
+from app.services.search_provider import LocalSearchIndex, SearchItem, SearchProvider, SearchUnavailable
+from app.utils.ttl_cache import MISSING, TTLCache
+
+# How a search was answered, for latency metrics
+SOURCES = ('hit', 'coalesced', 'upstream')
+
+
+def normalize_query(query: str) -> str:
+    """Cache key of a query: NFKC, case-folded, whitespace collapsed"""
+    return ' '.join(unicodedata.normalize('NFKC', query).casefold().split())
+
+
+def create_search_provider(name: str = settings.SEARCH_PROVIDER) -> SearchProvider:
+    """
+    Build the provider named by the SEARCH_PROVIDER setting
+
+    Args:
+        name: "google", "local", "none", or "auto" (Google when an API key
+            and CX are configured, otherwise the local index)
+
+    Returns:
+        Provider instance
+    """
+    if name == "auto":
+        name = "google" if search_client.configured else "local"
+    if name == "google":
+        return search_client
+    if name == "local":
+        return LocalSearchIndex()
+    if name != "none":
+        print(f"[SEARCH] Unknown SEARCH_PROVIDER '{name}', search disabled")
+    return SearchProvider()
+
+
+# Global search provider instance
+search_provider = create_search_provider()
+
+
+class SearchCache:
+    """
+    Read-through cache in front of the search provider
+
+    Only the result items are cached; whether they contain a challenge's
+    answer is checked per request, so players on different challenges
+    typing the same query share an entry. The upstream call runs in a task
+    of its own that every caller (the first one included) awaits through
+    asyncio.shield, so a caller going away cancels neither the call nor
+    the others waiting on it. Failed searches are not cached, and every
+    caller waiting on one gets the error.
+    """
+
+    def __init__(
+        self,
+        provider: SearchProvider = search_provider,
+        max_size: int = settings.SEARCH_CACHE_MAX_SIZE,
+        ttl_seconds: float = settings.SEARCH_CACHE_TTL_SECONDS
+    ):
+        self.provider = provider
+        self._cache = TTLCache(max_size, ttl_seconds)
+        self._pending: Dict[str, asyncio.Task] = {}
+
+        # Metrics
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+        self._latency_count = {source: 0 for source in SOURCES}
+        self._latency_total_ms = {source: 0.0 for source in SOURCES}
+
+    @property
+    def configured(self) -> bool:
+        return self.provider.configured
+
+    async def search(self, query: str) -> List[SearchItem]:
+        """
+        Get the results for a query, from the cache when possible
+
+        Args:
+            query: Search terms as typed
+
+        Returns:
+            Result items ({'title', 'link', 'snippet'}), shared between
+            callers - do not modify
+
+        Raises:
+            SearchUnavailable: The upstream search failed
+        """
+        start = time.perf_counter()
+        key = normalize_query(query)
+
+        items = self._cache.get(key)
+        if items is not MISSING:
+            self._record('hit', start)
+            return items
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            source = 'coalesced'
+        else:
+            pending = self._pending[key] = asyncio.create_task(self._fetch(key))
+            pending.add_done_callback(_retrieve_exception)
+            self.upstream_calls += 1
+            source = 'upstream'
+
+        try:
+            return await asyncio.shield(pending)
+        finally:
+            self._record(source, start)
+
+    async def _fetch(self, key: str) -> List[SearchItem]:
+        """The shared upstream call for a normalized query"""
+        try:
+            items = await self.provider.search(key)
+            self._cache.set(key, items)
+            return items
+        except BaseException:
+            self.upstream_errors += 1
+            raise
+        finally:
+            del self._pending[key]
+
+    def _record(self, source: str, start: float) -> None:
+        self._latency_count[source] += 1
+        self._latency_total_ms[source] += (time.perf_counter() - start) * 1000
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self._cache.get_stats()
+        stats.update({
+            'coalesced': self.coalesced,
+            'upstream_calls': self.upstream_calls,
+            'upstream_errors': self.upstream_errors,
+            'saved_upstream_calls': self._cache.hits + self.coalesced,
+            'avg_latency_ms': {
+                source: round(self._latency_total_ms[source] / count, 3) if count else 0.0
+                for source, count in self._latency_count.items()
+            },
+            'in_flight': len(self._pending)
+        })
+        return stats
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    """Mark a failed search as seen (one that every caller left would log "never retrieved")"""
+    if not task.cancelled():
+        task.exception()
+
+
+# Global instance
+search_cache = SearchCache()
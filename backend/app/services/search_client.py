@@ -0,0 +1,250 @@
+"""
+Search Client
+Application-scoped HTTP client for the Google Custom Search API: pooled
+HTTP/2 keep-alive connections, bounded concurrency, explicit timeouts and
+a circuit breaker so a failing upstream is not waited on by every player
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.search_provider import SearchItem, SearchProvider, SearchUnavailable
+
+GOOGLE_SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    closed: calls go through. After `failure_threshold` failures in a row
+    the circuit opens and calls are refused for `reset_seconds`; then one
+    trial call is let through (half-open) and its outcome closes or
+    re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+        # Metrics
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    @property
+    def trial_in_flight(self) -> bool:
+        return self._trial_in_flight
+
+    def allow(self) -> bool:
+        """True if a call may go out now"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def cancel_trial(self) -> None:
+        """The half-open trial ended without an outcome (cancelled); the next call may try again"""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                self.times_opened += 1
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'times_opened': self.times_opened,
+            'rejected': self.rejected
+        }
+
+
+class SearchClient(SearchProvider):
+    """
+    Shared client for Google Custom Search (the "google" search provider)
+
+    start() opens one httpx.AsyncClient for the process (called from the
+    app lifespan) so searches reuse warm connections instead of paying a
+    TCP + TLS handshake each. At most `max_concurrency` searches are in
+    flight; callers waiting longer than the pool timeout for a slot, and
+    calls while the circuit is open, fail fast with SearchUnavailable.
+    """
+
+    name = "google"
+
+    def __init__(
+        self,
+        api_key: str = settings.GOOGLE_SEARCH_API_KEY,
+        cx: str = settings.GOOGLE_SEARCH_CX,
+        max_concurrency: int = settings.SEARCH_MAX_CONCURRENCY,
+        connect_timeout: float = settings.SEARCH_CONNECT_TIMEOUT_SECONDS,
+        read_timeout: float = settings.SEARCH_READ_TIMEOUT_SECONDS,
+        pool_timeout: float = settings.SEARCH_POOL_TIMEOUT_SECONDS,
+        failure_threshold: int = settings.SEARCH_CIRCUIT_FAILURES,
+        reset_seconds: float = settings.SEARCH_CIRCUIT_RESET_SECONDS,
+        http2: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.api_key = api_key
+        self.cx = cx
+        self.max_concurrency = max_concurrency
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout, read=read_timeout, write=connect_timeout, pool=pool_timeout
+        )
+        self.http2 = http2
+        self.transport = transport
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+        # Metrics
+        self.requests = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.slot_timeouts = 0
+        self.in_flight = 0
+        self.last_latency_ms = 0.0
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key and self.cx)
+
+    async def start(self) -> None:
+        """Open the shared client (called from the app lifespan)"""
+        if self._client is not None:
+            return
+
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+                keepalive_expiry=settings.SEARCH_KEEPALIVE_SECONDS
+            ),
+            transport=self.transport
+        )
+        if self.configured:
+            print(f"[SEARCH] Google search client ready ({self.max_concurrency} concurrent requests)")
+
+    async def stop(self) -> None:
+        """Close pooled connections"""
+        if self._client is None:
+            return
+
+        await self._client.aclose()
+        self._client = None
+
+    async def search(self, query: str, limit: int = 10) -> List[SearchItem]:
+        """
+        Run one Custom Search query
+
+        Args:
+            query: Search terms
+            limit: Number of results (Google allows at most 10)
+
+        Returns:
+            Result items ({'title', 'link', 'snippet'})
+
+        Raises:
+            SearchUnavailable: Not configured, circuit open, no free slot in
+                time, or the request failed
+        """
+        if not self.configured:
+            raise SearchUnavailable("Search API not configured")
+        if not self.breaker.allow():
+            raise SearchUnavailable("Search API temporarily unavailable")
+
+        # Read before any await: True only if this call is the half-open trial
+        trial = self.breaker.trial_in_flight
+        try:
+            return await self._request(query, limit)
+        except asyncio.CancelledError:
+            # A cancelled call says nothing about the upstream; without this
+            # a cancelled trial would keep the circuit shut for good
+            if trial:
+                self.breaker.cancel_trial()
+            raise
+
+    async def _request(self, query: str, limit: int) -> List[SearchItem]:
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout.pool)
+        except asyncio.TimeoutError:
+            self.slot_timeouts += 1
+            self.breaker.record_failure()
+            raise SearchUnavailable("Search API busy")
+
+        await self.start()
+        self.requests += 1
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            response = await self._client.get(
+                GOOGLE_SEARCH_URL, params={'key': self.api_key, 'cx': self.cx, 'q': query, 'num': min(limit, 10)}
+            )
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            self.failures += 1
+            if isinstance(e, httpx.TimeoutException):
+                self.timeouts += 1
+            self.breaker.record_failure()
+            print(f"[SEARCH] Search request failed: {type(e).__name__}: {str(e)}")
+            raise SearchUnavailable(f"Search API error: {type(e).__name__}") from e
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+            self.last_latency_ms = (time.perf_counter() - start) * 1000
+
+        self.breaker.record_success()
+        return [
+            {'title': item.get('title', ''), 'link': item.get('link', ''), 'snippet': item.get('snippet', '')}
+            for item in data.get('items', [])
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats.update({
+            'requests': self.requests,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+            'slot_timeouts': self.slot_timeouts,
+            'in_flight': self.in_flight,
+            'max_concurrency': self.max_concurrency,
+            'last_latency_ms': round(self.last_latency_ms, 2),
+            'circuit': self.breaker.get_stats()
+        })
+        return stats
+
+
+# Global instance
+search_client = SearchClient()
@@ -0,0 +1,207 @@
+"""
+Search Providers
+Pluggable backends for the answer search: Google Custom Search, or a
+local full-text index that serves ranked results without any API key
+"""
+import asyncio
+import heapq
+import json
+import math
+import os
+import re
+import time
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+# One search result
+SearchItem = Dict[str, str]
+
+DEFAULT_CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'search_corpus.jsonl')
+
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+# Host parts too common to say anything about a page
+IGNORED_HOST_PARTS = {'www', 'com', 'org', 'net'}
+
+# Title words count this many times
+TITLE_WEIGHT = 2
+
+
+class SearchUnavailable(Exception):
+    """The search provider is not configured, the circuit is open or the call failed"""
+
+
+class SearchProvider:
+    """
+    Interface for search backends
+
+    `configured` is False when the provider cannot serve searches; the
+    endpoint then links to the same search on google.com instead.
+    """
+
+    name = "none"
+
+    @property
+    def configured(self) -> bool:
+        return False
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def search(self, query: str, limit: int = 10) -> List[SearchItem]:
+        """
+        Run one search
+
+        Args:
+            query: Search terms
+            limit: Maximum number of results
+
+        Returns:
+            Result items ({'title', 'link', 'snippet'}), best first
+
+        Raises:
+            SearchUnavailable: The search could not be served
+        """
+        raise SearchUnavailable("Search API not configured")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'provider': self.name, 'configured': self.configured}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens (NFKC, case-folded, split on non-alphanumerics)"""
+    return TOKEN_PATTERN.findall(unicodedata.normalize('NFKC', text).casefold())
+
+
+def link_tokens(link: str) -> List[str]:
+    """Words of a link's host and path, without the scheme and www/com noise"""
+    parsed = urlparse(link)
+    host = [part for part in tokenize(parsed.netloc) if part not in IGNORED_HOST_PARTS]
+    return host + tokenize(parsed.path)
+
+
+def load_corpus(path: str) -> List[SearchItem]:
+    """Read a JSONL corpus of {'title', 'link', 'snippet'} pages"""
+    documents = []
+    with open(path, encoding='utf-8') as corpus:
+        for line in corpus:
+            if line.strip():
+                page = json.loads(line)
+                documents.append({
+                    'title': page.get('title', ''),
+                    'link': page['link'],
+                    'snippet': page.get('snippet', '')
+                })
+    return documents
+
+
+class LocalSearchIndex(SearchProvider):
+    """
+    In-memory BM25 full-text index over a corpus of pages
+
+    Titles, link host/path words and snippets are indexed, titles counting
+    twice. A search only walks the posting lists of its own terms, so it
+    costs in proportion to the matching documents, not the corpus; results
+    are deterministic, which also makes this the backend for load tests.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        corpus_path: str = settings.SEARCH_CORPUS_PATH or DEFAULT_CORPUS_PATH,
+        k1: float = 1.2,
+        b: float = 0.75
+    ):
+        self.corpus_path = corpus_path
+        self.k1 = k1
+        self.b = b
+
+        self.documents: List[SearchItem] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._idf: Dict[str, float] = {}
+        # Per-document BM25 length normalization: k1 * (1 - b + b * length / average)
+        self._norms: List[float] = []
+        self.loaded = False
+
+        # Metrics
+        self.searches = 0
+        self._latency_total_ms = 0.0
+
+    @property
+    def configured(self) -> bool:
+        return True
+
+    async def start(self) -> None:
+        """Load and index the corpus (called from the app lifespan)"""
+        if self.loaded:
+            return
+
+        documents = await asyncio.to_thread(load_corpus, self.corpus_path)
+        self.build(documents)
+        print(f"[SEARCH] Local index ready ({len(self.documents)} pages, {len(self._postings)} terms)")
+
+    def build(self, documents: Iterable[SearchItem]) -> None:
+        """Replace the index with these documents"""
+        self.documents = list(documents)
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = []
+        for doc_id, document in enumerate(self.documents):
+            terms = (
+                tokenize(document['title']) * TITLE_WEIGHT
+                + link_tokens(document['link'])
+                + tokenize(document['snippet'])
+            )
+            lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                postings.setdefault(term, []).append((doc_id, frequency))
+
+        count = len(self.documents)
+        average = (sum(lengths) / count) if count else 1.0
+        self._postings = postings
+        self._idf = {
+            term: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in postings.items()
+        }
+        self._norms = [self.k1 * (1 - self.b + self.b * length / average) for length in lengths]
+        self.loaded = True
+
+    async def search(self, query: str, limit: int = 10) -> List[SearchItem]:
+        if not self.loaded:
+            await self.start()
+        return self.lookup(query, limit)
+
+    def lookup(self, query: str, limit: int = 10) -> List[SearchItem]:
+        """BM25-ranked documents for the query (ties in corpus order)"""
+        start = time.perf_counter()
+        scores: Dict[int, float] = {}
+        k1 = self.k1
+        norms = self._norms
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, frequency in self._postings[term]:
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (k1 + 1) / (frequency + norms[doc_id])
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        self.searches += 1
+        self._latency_total_ms += (time.perf_counter() - start) * 1000
+        return [self.documents[doc_id] for doc_id, _ in best]
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats.update({
+            'documents': len(self.documents),
+            'terms': len(self._postings),
+            'searches': self.searches,
+            'avg_latency_ms': round(self._latency_total_ms / self.searches, 4) if self.searches else 0.0
+        })
+        return stats
@@ -0,0 +1,460 @@
+"""
+Shared State Backend
+Pluggable cache, counter and hot-leaderboard storage. The in-memory backend
+keeps everything per process; the Redis backend shares it between workers.
+"""
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.leaderboard_ranking import (
+    LeaderboardRankIndex, RankRow, TopKBoards, completed_since, rank_index, rank_key, top_boards
+)
+from app.utils.ttl_cache import MISSING, TTLCache
+
+# ShortURL counter deltas: views, completions, failures, timeouts, timed, time_sum
+CounterDeltas = Dict[str, Dict[str, float]]
+
+# Integer counter fields (time_sum is a float)
+INT_COUNTERS = ('views', 'completions', 'failures', 'timeouts', 'timed')
+
+
+def new_counter_delta() -> Dict[str, float]:
+    """Zeroed delta for one short code"""
+    return {'views': 0, 'completions': 0, 'failures': 0, 'timeouts': 0, 'timed': 0, 'time_sum': 0.0}
+
+
+def leaderboard_member_score(score: int, completion_time: float) -> float:
+    """
+    Encode (score desc, completion time asc) into a single ZSET score
+
+    Completion time is stored in milliseconds below the score, so higher
+    values rank first under ZREVRANK. Times are capped just under 10**7 ms
+    so they never spill into the score digits.
+
+    Exact ties are not encoded: Redis orders equal scores by member, which
+    ZREVRANK reverses, so readers break them by entry id themselves to
+    match the database (score DESC, completion_time, id).
+    """
+    time_ms = min(int((completion_time or 0) * 1000), 10**7 - 1)
+    return score * 10**7 - time_ms
+
+
+class SharedStateBackend:
+    """
+    Interface for cache, counter and leaderboard storage
+
+    `shared` is True when state is visible to every worker process. Callers
+    use it to decide whether a second cache layer or buffered counters are
+    worth a network round trip.
+    """
+
+    shared = False
+
+    # ==================== Key/value cache ====================
+
+    async def cache_get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def cache_set(self, key: str, value: str, ttl_seconds: float) -> None:
+        raise NotImplementedError
+
+    async def cache_delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    # ==================== Counters ====================
+
+    async def incr_counters(self, deltas: CounterDeltas) -> None:
+        """Add counter deltas per short code"""
+        raise NotImplementedError
+
+    async def drain_counters(self) -> CounterDeltas:
+        """Atomically take and reset every pending counter delta"""
+        raise NotImplementedError
+
+    # ==================== Hot leaderboards ====================
+
+    async def board_loaded(self, board: str) -> bool:
+        raise NotImplementedError
+
+    async def board_load(self, board: str, rows: Iterable[RankRow]) -> None:
+        """(Re)build a board from (score, completion_time, entry_id) rows"""
+        raise NotImplementedError
+
+    async def board_insert(self, board: str, score: int, completion_time: float, entry_id: str) -> None:
+        """Add an entry to a loaded board (unloaded boards are left alone)"""
+        raise NotImplementedError
+
+    async def board_ranks(self, board: str, rows: List[RankRow]) -> List[Optional[int]]:
+        """1-based ranks for entries, None where unknown"""
+        raise NotImplementedError
+
+    async def board_size(self, board: str) -> int:
+        raise NotImplementedError
+
+    async def board_invalidate(self, board: str) -> None:
+        raise NotImplementedError
+
+    # ==================== Top-K boards ====================
+
+    async def topk_get(self, name: str) -> Optional[List[Dict[str, Any]]]:
+        """Entries of a top-K board in rank order, None if not loaded"""
+        raise NotImplementedError
+
+    async def topk_load(
+        self, name: str, entries: List[Dict[str, Any]], capacity: int, ttl_seconds: Optional[int] = None
+    ) -> None:
+        """(Re)build a top-K board from its window's best entries"""
+        raise NotImplementedError
+
+    async def topk_offer(
+        self, name: str, entry: Dict[str, Any], capacity: int, ttl_seconds: Optional[int] = None
+    ) -> None:
+        """Add an entry to a loaded top-K board, keeping the best `capacity`"""
+        raise NotImplementedError
+
+    async def topk_expire(self, name: str, before: datetime, capacity: int) -> int:
+        """Drop entries completed before `before`; a full board that loses any is unloaded"""
+        raise NotImplementedError
+
+    async def topk_invalidate(self, name: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryBackend(SharedStateBackend):
+    """Per-process backend (the default, and what a single worker needs)"""
+
+    shared = False
+
+    def __init__(
+        self,
+        max_cache_entries: int = 10000,
+        boards: Optional[LeaderboardRankIndex] = None,
+        top: Optional[TopKBoards] = None
+    ):
+        self._cache = TTLCache(max_cache_entries, ttl_seconds=60)
+        self._counters: CounterDeltas = defaultdict(new_counter_delta)
+        self._boards = boards if boards is not None else rank_index
+        self._top = top if top is not None else top_boards
+
+    async def cache_get(self, key: str) -> Optional[str]:
+        value = self._cache.get(key)
+        return None if value is MISSING else value
+
+    async def cache_set(self, key: str, value: str, ttl_seconds: float) -> None:
+        self._cache.set(key, value, ttl_seconds=ttl_seconds)
+
+    async def cache_delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    async def incr_counters(self, deltas: CounterDeltas) -> None:
+        for short_code, delta in deltas.items():
+            pending = self._counters[short_code]
+            for name, value in delta.items():
+                pending[name] += value
+
+    async def drain_counters(self) -> CounterDeltas:
+        drained, self._counters = dict(self._counters), defaultdict(new_counter_delta)
+        return drained
+
+    async def board_loaded(self, board: str) -> bool:
+        return self._boards.is_loaded(board)
+
+    async def board_load(self, board: str, rows: Iterable[RankRow]) -> None:
+        self._boards.load(board, rows)
+
+    async def board_insert(self, board: str, score: int, completion_time: float, entry_id: str) -> None:
+        self._boards.insert(board, score, completion_time, entry_id)
+
+    async def board_ranks(self, board: str, rows: List[RankRow]) -> List[Optional[int]]:
+        return [self._boards.rank(board, *row) for row in rows]
+
+    async def board_size(self, board: str) -> int:
+        return self._boards.total(board)
+
+    async def board_invalidate(self, board: str) -> None:
+        self._boards.invalidate(board)
+
+    async def topk_get(self, name: str) -> Optional[List[Dict[str, Any]]]:
+        return self._top.get(name)
+
+    async def topk_load(
+        self, name: str, entries: List[Dict[str, Any]], capacity: int, ttl_seconds: Optional[int] = None
+    ) -> None:
+        self._top.load(name, entries, capacity)
+
+    async def topk_offer(
+        self, name: str, entry: Dict[str, Any], capacity: int, ttl_seconds: Optional[int] = None
+    ) -> None:
+        self._top.offer(name, entry, capacity)
+
+    async def topk_expire(self, name: str, before: datetime, capacity: int) -> int:
+        return self._top.expire(name, before, capacity)
+
+    async def topk_invalidate(self, name: str) -> None:
+        self._top.invalidate(name)
+
+
+class RedisBackend(SharedStateBackend):
+    """
+    Redis backend shared by all workers
+
+    Counters are hashes incremented with HINCRBY and drained with
+    MULTI/HGETALL/DEL; a set tracks which short codes have pending deltas.
+    Leaderboards are ZSETs scored by leaderboard_member_score(); top-K
+    boards add a hash of entry id -> JSON entry next to their ZSET.
+    """
+
+    shared = True
+
+    def __init__(
+        self,
+        url: str = settings.REDIS_URL,
+        client: Any = None,
+        prefix: str = "jfgi:",
+        board_ttl_seconds: int = settings.LEADERBOARD_CACHE_TTL_SECONDS
+    ):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url, decode_responses=True)
+
+        self.redis = client
+        self.prefix = prefix
+        self.board_ttl_seconds = board_ttl_seconds
+        self._dirty_key = f"{prefix}counters:dirty"
+
+    def _counter_key(self, short_code: str) -> str:
+        return f"{self.prefix}counters:{short_code}"
+
+    def _board_keys(self, board: str) -> Tuple[str, str]:
+        """(ZSET key, loaded-marker key); the marker lets empty boards count as loaded"""
+        return f"{self.prefix}lb:{board}", f"{self.prefix}lb:{board}:loaded"
+
+    def _topk_keys(self, name: str) -> Tuple[str, str, str]:
+        """(ZSET key, entry hash key, loaded-marker key)"""
+        base = f"{self.prefix}top:{name}"
+        return base, f"{base}:data", f"{base}:loaded"
+
+    # ==================== Key/value cache ====================
+
+    async def cache_get(self, key: str) -> Optional[str]:
+        return await self.redis.get(self.prefix + key)
+
+    async def cache_set(self, key: str, value: str, ttl_seconds: float) -> None:
+        await self.redis.set(self.prefix + key, value, px=max(int(ttl_seconds * 1000), 1))
+
+    async def cache_delete(self, key: str) -> None:
+        await self.redis.delete(self.prefix + key)
+
+    # ==================== Counters ====================
+
+    async def incr_counters(self, deltas: CounterDeltas) -> None:
+        pipe = self.redis.pipeline(transaction=False)
+        queued = False
+        for short_code, delta in deltas.items():
+            if not short_code or not any(delta.values()):
+                continue
+            key = self._counter_key(short_code)
+            for name in INT_COUNTERS:
+                if delta.get(name):
+                    pipe.hincrby(key, name, int(delta[name]))
+            if delta.get('time_sum'):
+                pipe.hincrbyfloat(key, 'time_sum', float(delta['time_sum']))
+            pipe.sadd(self._dirty_key, short_code)
+            queued = True
+
+        if queued:
+            await pipe.execute()
+
+    async def drain_counters(self, batch_size: int = 1000) -> CounterDeltas:
+        drained: CounterDeltas = {}
+        while True:
+            codes = await self.redis.spop(self._dirty_key, batch_size)
+            if not codes:
+                return drained
+
+            # HGETALL + DEL per hash inside MULTI, so no increment is lost
+            # between reading and resetting a counter
+            pipe = self.redis.pipeline(transaction=True)
+            for short_code in codes:
+                key = self._counter_key(short_code)
+                pipe.hgetall(key)
+                pipe.delete(key)
+            results = await pipe.execute()
+
+            for short_code, values in zip(codes, results[::2]):
+                if not values:
+                    continue
+                delta = drained.setdefault(short_code, new_counter_delta())
+                for name, value in values.items():
+                    delta[name] += float(value) if name == 'time_sum' else int(value)
+
+    # ==================== Hot leaderboards ====================
+
+    async def board_loaded(self, board: str) -> bool:
+        _, marker = self._board_keys(board)
+        return bool(await self.redis.exists(marker))
+
+    async def board_load(self, board: str, rows: Iterable[RankRow], chunk_size: int = 5000) -> None:
+        key, marker = self._board_keys(board)
+        members = {
+            entry_id: leaderboard_member_score(score, completion_time)
+            for score, completion_time, entry_id in rows
+        }
+
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(key)
+        items = list(members.items())
+        for start in range(0, len(items), chunk_size):
+            pipe.zadd(key, dict(items[start:start + chunk_size]))
+        pipe.expire(key, self.board_ttl_seconds)
+        pipe.set(marker, 1, ex=self.board_ttl_seconds)
+        await pipe.execute()
+
+    async def board_insert(self, board: str, score: int, completion_time: float, entry_id: str) -> None:
+        if not await self.board_loaded(board):
+            return
+        key, marker = self._board_keys(board)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zadd(key, {entry_id: leaderboard_member_score(score, completion_time)})
+        pipe.expire(key, self.board_ttl_seconds)
+        pipe.expire(marker, self.board_ttl_seconds)
+        await pipe.execute()
+
+    async def board_ranks(self, board: str, rows: List[RankRow]) -> List[Optional[int]]:
+        if not rows:
+            return []
+        key, _ = self._board_keys(board)
+        pipe = self.redis.pipeline(transaction=False)
+        for score, completion_time, entry_id in rows:
+            # Entries strictly ahead, plus the exact ties with a lower id
+            member_score = leaderboard_member_score(score, completion_time)
+            pipe.zscore(key, entry_id)
+            pipe.zcount(key, f"({member_score}", "+inf")
+            pipe.zrangebyscore(key, member_score, member_score)
+        results = await pipe.execute()
+
+        ranks = []
+        for index, (_, _, entry_id) in enumerate(rows):
+            stored, ahead, tied = results[3 * index:3 * index + 3]
+            if stored is None:
+                ranks.append(None)
+            else:
+                ranks.append(ahead + sum(1 for member in tied if member < entry_id) + 1)
+        return ranks
+
+    async def board_size(self, board: str) -> int:
+        key, _ = self._board_keys(board)
+        return await self.redis.zcard(key)
+
+    async def board_invalidate(self, board: str) -> None:
+        await self.redis.delete(*self._board_keys(board))
+
+    # ==================== Top-K boards ====================
+
+    async def topk_get(self, name: str) -> Optional[List[Dict[str, Any]]]:
+        key, data, marker = self._topk_keys(name)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.exists(marker)
+        pipe.zrevrange(key, 0, -1)
+        pipe.hgetall(data)
+        loaded, ids, entries = await pipe.execute()
+        if not loaded:
+            return None
+        # ZREVRANGE puts exact ties in reverse id order; the database has them by id
+        board = [json.loads(entries[entry_id]) for entry_id in ids if entry_id in entries]
+        return sorted(board, key=lambda entry: rank_key(entry['score'], entry['completion_time'], entry['id']))
+
+    async def topk_load(
+        self, name: str, entries: List[Dict[str, Any]], capacity: int, ttl_seconds: Optional[int] = None
+    ) -> None:
+        key, data, marker = self._topk_keys(name)
+        ttl = ttl_seconds or self.board_ttl_seconds
+        entries = entries[:capacity]
+
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(key, data)
+        if entries:
+            pipe.zadd(key, {
+                entry['id']: leaderboard_member_score(entry['score'], entry['completion_time'])
+                for entry in entries
+            })
+            pipe.hset(data, mapping={entry['id']: json.dumps(entry) for entry in entries})
+            pipe.expire(key, ttl)
+            pipe.expire(data, ttl)
+        pipe.set(marker, 1, ex=ttl)
+        await pipe.execute()
+
+    async def topk_offer(
+        self, name: str, entry: Dict[str, Any], capacity: int, ttl_seconds: Optional[int] = None
+    ) -> None:
+        key, data, marker = self._topk_keys(name)
+        if not await self.redis.exists(marker):
+            return
+        ttl = ttl_seconds or self.board_ttl_seconds
+
+        # Add, then cut the ZSET back to `capacity` and drop the cut entries' JSON
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zadd(key, {entry['id']: leaderboard_member_score(entry['score'], entry['completion_time'])})
+        pipe.hset(data, entry['id'], json.dumps(entry))
+        pipe.zrange(key, 0, -capacity - 1)
+        pipe.zremrangebyrank(key, 0, -capacity - 1)
+        pipe.expire(key, ttl)
+        pipe.expire(data, ttl)
+        pipe.expire(marker, ttl)
+        results = await pipe.execute()
+
+        trimmed = results[2]
+        if trimmed:
+            await self.redis.hdel(data, *trimmed)
+
+    async def topk_expire(self, name: str, before: datetime, capacity: int) -> int:
+        key, data, marker = self._topk_keys(name)
+        entries = await self.redis.hgetall(data)
+        expired = [
+            entry_id for entry_id, entry in entries.items()
+            if not completed_since(json.loads(entry), before)
+        ]
+        if not expired:
+            return 0
+
+        if len(entries) >= capacity:
+            await self.topk_invalidate(name)
+        else:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.zrem(key, *expired)
+            pipe.hdel(data, *expired)
+            await pipe.execute()
+        return len(expired)
+
+    async def topk_invalidate(self, name: str) -> None:
+        await self.redis.delete(*self._topk_keys(name))
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def create_state_backend(name: str = settings.CACHE_BACKEND) -> SharedStateBackend:
+    """
+    Build the backend named by the CACHE_BACKEND setting
+
+    Args:
+        name: "memory" or "redis"
+
+    Returns:
+        Backend instance
+    """
+    if name == "redis":
+        return RedisBackend()
+    if name != "memory":
+        print(f"[CACHE] Unknown CACHE_BACKEND '{name}', using memory")
+    return MemoryBackend()
+
+
+# Global shared state backend instance
+state_backend = create_state_backend()
@@ -0,0 +1,152 @@
+"""
+Short Code Allocator
+Hands out short codes from blocks of a database counter, so creating a
+URL needs no existence check and concurrent creators never draw the
+same code
+"""
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.sequence import CodeSequence
+from app.utils.short_code import PERMUTATION_KEY, code_for_index
+
+SHORT_URL_SEQUENCE = 'short_urls'
+
+
+class ShortCodeAllocator:
+    """
+    Per-worker cache of a block of sequence numbers
+
+    Each worker reserves `block_size` numbers at a time with one atomic
+    UPDATE of code_sequences, then maps them to codes locally through the
+    keyed permutation in app.utils.short_code. Blocks never overlap, so
+    codes are unique across workers; numbers left in a block when a
+    worker stops are simply never used.
+    """
+
+    def __init__(
+        self,
+        block_size: int = settings.SHORT_CODE_BLOCK_SIZE,
+        sequence: str = SHORT_URL_SEQUENCE,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        key: bytes = PERMUTATION_KEY
+    ):
+        self.block_size = block_size
+        self.sequence = sequence
+        self.session_factory = session_factory
+        self.key = key
+
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+
+        # Metrics
+        self.codes_issued = 0
+        self.blocks_allocated = 0
+        self.collisions = 0
+
+    async def next_code(self) -> str:
+        """
+        Take the next short code
+
+        Returns:
+            str: A code no other call (in any worker) has returned
+        """
+        while self._next >= self._end:
+            async with self._lock:
+                # Another caller may have refilled the block while we waited
+                if self._next >= self._end:
+                    start = await self._allocate_block(self.block_size)
+                    self._next, self._end = start, start + self.block_size
+
+        index = self._next
+        self._next += 1
+        self.codes_issued += 1
+        return code_for_index(index, self.key)
+
+    async def next_codes(self, count: int) -> List[str]:
+        """
+        Take `count` short codes with at most one extra round trip
+
+        What is left of the current block is used first; the rest is
+        reserved in one range, rounded up to whole blocks.
+
+        Args:
+            count: Number of codes
+
+        Returns:
+            List of codes no other call (in any worker) has returned
+        """
+        indexes: List[int] = []
+        while len(indexes) < count:
+            if self._next >= self._end:
+                async with self._lock:
+                    if self._next >= self._end:
+                        missing = count - len(indexes)
+                        size = -(-missing // self.block_size) * self.block_size
+                        start = await self._allocate_block(size)
+                        self._next, self._end = start, start + size
+
+            take = min(count - len(indexes), self._end - self._next)
+            indexes.extend(range(self._next, self._next + take))
+            self._next += take
+
+        self.codes_issued += count
+        return [code_for_index(index, self.key) for index in indexes]
+
+    def record_collision(self, code: str) -> None:
+        """Note a code rejected by the unique index (e.g. an older random code)"""
+        self.collisions += 1
+        print(f"[URLS] Short code {code} already taken, using the next one")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get allocator metrics
+
+        Returns:
+            Block size, numbers left in the current block and issue counts
+        """
+        return {
+            'block_size': self.block_size,
+            'remaining_in_block': self._end - self._next,
+            'codes_issued': self.codes_issued,
+            'blocks_allocated': self.blocks_allocated,
+            'collisions': self.collisions
+        }
+
+    async def _allocate_block(self, size: int) -> int:
+        """Reserve the next `size` sequence numbers; returns the first one"""
+        table = CodeSequence.__table__
+        while True:
+            async with self.session_factory() as db:
+                end: Optional[int] = await db.scalar(
+                    update(table)
+                    .where(table.c.name == self.sequence)
+                    .values(next_value=table.c.next_value + size)
+                    .returning(table.c.next_value)
+                )
+                if end is not None:
+                    await db.commit()
+                    self.blocks_allocated += 1
+                    return end - size
+
+                # First block ever; if another worker creates the row
+                # first, the insert fails and the UPDATE is retried
+                db.add(CodeSequence(name=self.sequence, next_value=size))
+                try:
+                    await db.commit()
+                except IntegrityError:
+                    await db.rollback()
+                    continue
+                self.blocks_allocated += 1
+                return 0
+
+
+# Global allocator instance
+short_code_allocator = ShortCodeAllocator()
@@ -0,0 +1,236 @@
+"""
+Short URL Cache
+Read-through cache of the immutable challenge fields of a ShortURL, keyed
+by short code
+"""
+import asyncio
+import json
+from dataclasses import asdict, dataclass
+from functools import cached_property
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.url import ShortURL
+from app.services.shared_state import SharedStateBackend, state_backend
+from app.utils.ttl_cache import MISSING, TTLCache
+from app.utils.url_canonical import answer_keys_for
+
+# Cached in place of a value for short codes that do not exist
+NOT_FOUND = object()
+
+
+@dataclass(frozen=True)
+class CachedURL:
+    """Challenge fields that never change after a URL is created (except is_banned)"""
+    short_code: str
+    long_url: str
+    difficulty: str
+    challenge_text: Optional[str]
+    hints: Optional[List[str]]
+    time_limit_seconds: int
+    is_banned: bool
+    # Defaults keep entries cached before these columns existed loadable
+    hint_ladder: Optional[List[str]] = None
+    correct_answers: Optional[List[str]] = None
+
+    @cached_property
+    def answer_keys(self) -> FrozenSet[str]:
+        """Canonical keys a correct answer matches (see app/utils/url_canonical.py)"""
+        return frozenset(self.correct_answers or answer_keys_for(self.long_url))
+
+
+# Columns loaded on a cache miss (the row's counters are never read)
+_CACHED_COLUMNS = (
+    ShortURL.short_code,
+    ShortURL.long_url,
+    ShortURL.difficulty,
+    ShortURL.challenge_text,
+    ShortURL.hints,
+    ShortURL.time_limit_seconds,
+    ShortURL.is_banned,
+    ShortURL.hint_ladder,
+    ShortURL.correct_answers,
+)
+
+
+class URLCache:
+    """
+    LRU + TTL cache in front of ShortURL lookups
+
+    Unknown short codes are cached too (for a shorter TTL) so enumeration
+    scans do not each cost a query. With a shared backend (Redis) a second
+    layer sits between the in-process cache and the database, so a URL
+    loaded by one worker is a cache hit for the others.
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.URL_CACHE_MAX_SIZE,
+        ttl_seconds: float = settings.URL_CACHE_TTL_SECONDS,
+        negative_ttl_seconds: float = settings.URL_CACHE_NEGATIVE_TTL_SECONDS,
+        backend: SharedStateBackend = state_backend
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.backend = backend
+        self._cache = TTLCache(max_size, ttl_seconds)
+
+        # Metrics
+        self.negative_hits = 0
+        self.shared_hits = 0
+        self.db_loads = 0
+        self.invalidations = 0
+
+    async def get(self, short_code: str, db: AsyncSession) -> Optional[CachedURL]:
+        """
+        Get the challenge fields for a short code
+
+        Args:
+            short_code: Short URL code
+            db: Database session (only used on a miss)
+
+        Returns:
+            CachedURL, or None if the short code does not exist
+        """
+        value = self.peek(short_code)
+        if value is not MISSING:
+            return value
+
+        if self.backend.shared:
+            value = await self._get_shared(short_code)
+            if value is not MISSING:
+                return value
+
+        self.db_loads += 1
+        row = (await db.execute(
+            select(*_CACHED_COLUMNS).where(ShortURL.short_code == short_code)
+        )).first()
+
+        if row is None:
+            await self.mark_missing(short_code)
+            return None
+
+        cached = CachedURL(**row._asdict())
+        await self._store(cached)
+        return cached
+
+    def peek(self, short_code: str) -> Any:
+        """
+        Check the cache without touching the database
+
+        Returns:
+            CachedURL, None for a known-missing code, or MISSING if not cached
+        """
+        value = self._cache.get(short_code)
+        if value is NOT_FOUND:
+            self.negative_hits += 1
+            return None
+        return value
+
+    async def prime(self, url: ShortURL) -> None:
+        """Store a freshly loaded or created row (replaces any negative entry)"""
+        await self._store(CachedURL(
+            short_code=url.short_code,
+            long_url=url.long_url,
+            difficulty=url.difficulty,
+            challenge_text=url.challenge_text,
+            hints=url.hints,
+            time_limit_seconds=url.time_limit_seconds,
+            is_banned=bool(url.is_banned),
+            hint_ladder=url.hint_ladder,
+            correct_answers=url.correct_answers
+        ))
+
+    async def mark_missing(self, short_code: str) -> None:
+        """Remember that a short code does not exist"""
+        self._cache.set(short_code, NOT_FOUND, ttl_seconds=self.negative_ttl_seconds)
+        await self._set_shared(short_code, None, self.negative_ttl_seconds)
+
+    def invalidate(self, short_code: str) -> None:
+        """
+        Drop a short code so the next lookup reloads it
+
+        The shared copy is deleted in the background; other workers' local
+        copies expire with their TTL.
+        """
+        self._cache.delete(short_code)
+        self.invalidations += 1
+
+        if self.backend.shared:
+            try:
+                asyncio.get_running_loop().create_task(self.backend.cache_delete(self._shared_key(short_code)))
+            except RuntimeError:
+                pass  # No event loop (scripts); the shared copy expires with its TTL
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    # ==================== Shared layer ====================
+
+    @staticmethod
+    def _shared_key(short_code: str) -> str:
+        return f"url:{short_code}"
+
+    async def _store(self, cached: CachedURL) -> None:
+        self._cache.set(cached.short_code, cached)
+        await self._set_shared(cached.short_code, asdict(cached), self.ttl_seconds)
+
+    async def _get_shared(self, short_code: str) -> Any:
+        """Look up the shared layer and copy a hit into the local cache"""
+        try:
+            raw = await self.backend.cache_get(self._shared_key(short_code))
+        except Exception as e:
+            print(f"[CACHE] Shared URL cache unavailable: {str(e)}")
+            return MISSING
+
+        if raw is None:
+            return MISSING
+
+        self.shared_hits += 1
+        data = json.loads(raw)
+        if data is None:
+            self._cache.set(short_code, NOT_FOUND, ttl_seconds=self.negative_ttl_seconds)
+            return None
+
+        cached = CachedURL(**data)
+        self._cache.set(short_code, cached)
+        return cached
+
+    async def _set_shared(self, short_code: str, data: Optional[Dict[str, Any]], ttl_seconds: float) -> None:
+        if not self.backend.shared:
+            return
+        try:
+            await self.backend.cache_set(self._shared_key(short_code), json.dumps(data), ttl_seconds)
+        except Exception as e:
+            print(f"[CACHE] Shared URL cache unavailable: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache metrics
+
+        Returns:
+            Size, hit/miss counters, negative hits and DB loads
+        """
+        stats = self._cache.get_stats()
+        stats.update({
+            'negative_ttl_seconds': self.negative_ttl_seconds,
+            'negative_hits': self.negative_hits,
+            'shared_hits': self.shared_hits,
+            'db_loads': self.db_loads,
+            'invalidations': self.invalidations
+        })
+        return stats
+
+
+# Global URL cache instance
+url_cache = URLCache()
+
+
+@event.listens_for(ShortURL, "after_update")
+def _invalidate_on_moderation(mapper, connection, target: ShortURL) -> None:
+    """Drop a cached URL as soon as it is banned (or unbanned) through the ORM"""
+    if inspect(target).attrs.is_banned.history.has_changes():
+        url_cache.invalidate(target.short_code)
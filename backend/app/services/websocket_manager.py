@@ -2,20 +2,99 @@
 WebSocket Connection Manager
 Manages WebSocket connections for real-time updates
 """
-from typing import Dict, List, Set
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
 from fastapi import WebSocket
 import json
 import asyncio
+import time
+
+from app.core.config import settings
+from app.services.ws_backplane import Backplane, backplane as global_backplane
+
+# Snapshot messages: a newer one replaces an unsent older one of the same
+# type instead of queueing behind it
+COALESCED_TYPES = {'player_count', 'leaderboard_update'}
+
+# Close code sent to clients that cannot keep up ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+def encode_message(message: dict) -> str:
+    """Serialize a message once for every recipient (same format as send_json)"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class ClientConnection:
+    """
+    One connected socket and its bounded outbound queue
+
+    Messages are queued without awaiting the socket; a writer task exists
+    only while there is something to send. Queue entries are [type, text]
+    lists so a coalesced snapshot can be replaced in place.
+    """
+
+    __slots__ = (
+        'websocket', 'short_code', 'user_id', 'connected_at', 'outbox', 'latest', 'writer', 'closed',
+        'lb_version', 'lb_acked'
+    )
+
+    def __init__(self, websocket: WebSocket, short_code: str, user_id: Optional[str]):
+        self.websocket = websocket
+        self.short_code = short_code
+        self.user_id = user_id
+        self.connected_at = time.monotonic()
+        self.outbox: Deque[List[Any]] = deque()
+        self.latest: Dict[str, List[Any]] = {}
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+
+        # Leaderboard stream position: last version sent / acknowledged.
+        # None until the client opts into deltas (see leaderboard_stream)
+        self.lb_version: Optional[int] = None
+        self.lb_acked: Optional[int] = None
 
 
 class ConnectionManager:
-    """Manages WebSocket connections for real-time updates"""
+    """
+    Manages WebSocket connections for real-time updates
+
+    Broadcasts serialize the message once and push the text onto each
+    connection's outbound queue, so a slow client never delays the rest of
+    the room. A client whose queue overflows, or whose send takes longer
+    than the send timeout, is disconnected.
+
+    With a backplane, room broadcasts are also relayed to the other worker
+    processes and player counts include their connections.
+    """
+
+    def __init__(
+        self,
+        send_queue_size: int = settings.WS_SEND_QUEUE_SIZE,
+        send_timeout_seconds: float = settings.WS_SEND_TIMEOUT_SECONDS,
+        backplane: Optional[Backplane] = None
+    ):
+        self.send_queue_size = send_queue_size
+        self.send_timeout = send_timeout_seconds
+
+        self.backplane = backplane
+        if backplane is not None:
+            backplane.subscribe('room', self._on_remote_broadcast)
+            backplane.on_presence(self._on_remote_presence)
 
-    def __init__(self):
         # Store connections by short_code
-        self.active_connections: Dict[str, Set[WebSocket]] = {}
-        # Store connection metadata
-        self.connection_metadata: Dict[WebSocket, Dict] = {}
+        self.active_connections: Dict[str, Dict[WebSocket, ClientConnection]] = {}
+        # All connections by socket
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+
+        # Metrics
+        self.broadcasts = 0
+        self.messages_queued = 0
+        self.messages_sent = 0
+        self.messages_coalesced = 0
+        self.send_timeouts = 0
+        self.slow_consumers_dropped = 0
+        self.last_broadcast_ms = 0.0
 
     async def connect(self, websocket: WebSocket, short_code: str, user_id: str = None):
         """
@@ -28,33 +107,23 @@ class ConnectionManager:
         """
         await websocket.accept()
 
-        # Add to connections for this short_code
-        if short_code not in self.active_connections:
-            self.active_connections[short_code] = set()
-
-        self.active_connections[short_code].add(websocket)
-
-        # Store metadata
-        self.connection_metadata[websocket] = {
-            'short_code': short_code,
-            'user_id': user_id,
-            'connected_at': asyncio.get_event_loop().time()
-        }
+        client = ClientConnection(websocket, short_code, user_id)
+        self.clients[websocket] = client
+        room = self.active_connections.setdefault(short_code, {})
+        room[websocket] = client
 
-        print(f"[WEBSOCKET] New connection for {short_code}. Total: {len(self.active_connections[short_code])}")
+        print(f"[WEBSOCKET] New connection for {short_code}. Total: {len(room)}")
+        self._report_players(short_code)
 
         # Send welcome message
         await self.send_personal_message({
             'type': 'connected',
             'message': f'Connected to {short_code} updates',
-            'active_players': len(self.active_connections[short_code])
+            'active_players': self.get_active_players(short_code)
         }, websocket)
 
         # Broadcast updated player count
-        await self.broadcast_to_room(short_code, {
-            'type': 'player_count',
-            'count': len(self.active_connections[short_code])
-        })
+        self.broadcast_player_count(short_code)
 
     def disconnect(self, websocket: WebSocket):
         """
@@ -63,24 +132,30 @@ class ConnectionManager:
         Args:
             websocket: FastAPI WebSocket instance
         """
-        if websocket not in self.connection_metadata:
+        client = self.clients.pop(websocket, None)
+        if client is None:
             return
 
-        metadata = self.connection_metadata[websocket]
-        short_code = metadata['short_code']
+        client.closed = True
+        client.outbox.clear()
+        client.latest.clear()
+        if client.writer is not None and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+        client.writer = None
+
+        short_code = client.short_code
 
         # Remove from connections
-        if short_code in self.active_connections:
-            self.active_connections[short_code].discard(websocket)
+        room = self.active_connections.get(short_code)
+        if room is not None:
+            room.pop(websocket, None)
 
-            # Clean up empty sets
-            if not self.active_connections[short_code]:
+            # Clean up empty rooms
+            if not room:
                 del self.active_connections[short_code]
+            self._report_players(short_code)
 
-        # Remove metadata
-        del self.connection_metadata[websocket]
-
-        print(f"[WEBSOCKET] Disconnected from {short_code}. Remaining: {len(self.active_connections.get(short_code, []))}")
+        print(f"[WEBSOCKET] Disconnected from {short_code}. Remaining: {len(self.active_connections.get(short_code, {}))}")
 
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """
@@ -90,33 +165,75 @@ class ConnectionManager:
             message: Message dictionary
             websocket: Target WebSocket
         """
-        try:
-            await websocket.send_json(message)
-        except Exception as e:
-            print(f"[WEBSOCKET] Error sending personal message: {str(e)}")
-            self.disconnect(websocket)
+        client = self.clients.get(websocket)
+        if client is not None:
+            self._push(client, message.get('type'), encode_message(message))
+
+    def get_client(self, websocket: WebSocket) -> Optional[ClientConnection]:
+        """Get the connection record for a socket"""
+        return self.clients.get(websocket)
 
-    async def broadcast_to_room(self, short_code: str, message: dict):
+    def get_room_clients(self, short_code: str) -> List[ClientConnection]:
+        """Get a snapshot of the connections in a room"""
+        return list(self.active_connections.get(short_code, {}).values())
+
+    def send_encoded(self, client: ClientConnection, message_type: str, text: str) -> None:
+        """
+        Queue an already-serialized message for one connection
+
+        Lets callers that send the same payload to many (but not all)
+        clients serialize it once.
+        """
+        self._push(client, message_type, text)
+
+    async def broadcast_to_room(self, short_code: str, message: dict, relay: bool = True):
         """
         Broadcast a message to all connections in a room
 
+        Returns once the message is queued for every connection; delivery
+        happens in the background.
+
         Args:
             short_code: Room identifier (URL short code)
             message: Message dictionary to broadcast
+            relay: Also send it to the room's connections on other workers
         """
-        if short_code not in self.active_connections:
+        relay = relay and self.backplane is not None
+        if not relay and short_code not in self.active_connections:
             return
 
-        # Create a copy to avoid modification during iteration
-        connections = list(self.active_connections[short_code])
+        message_type = message.get('type')
+        text = encode_message(message)
+        if relay:
+            self.backplane.publish('room', r=short_code, t=message_type, m=text)
+        self._deliver(short_code, message_type, text)
 
-        # Send to all connections
-        for connection in connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                print(f"[WEBSOCKET] Error broadcasting to connection: {str(e)}")
-                self.disconnect(connection)
+    def broadcast_player_count(self, short_code: str) -> None:
+        """
+        Send the room's cluster-wide player count to local connections
+
+        Not relayed: other workers learn about count changes from the
+        backplane's presence updates and send their own.
+
+        Args:
+            short_code: Room identifier
+        """
+        if short_code in self.active_connections:
+            self._deliver(short_code, 'player_count', encode_message({
+                'type': 'player_count',
+                'count': self.get_active_players(short_code)
+            }))
+
+    async def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait until every queued message has been sent (tests, shutdown)
+
+        Args:
+            timeout: Give up after this many seconds
+        """
+        writers = [c.writer for c in self.clients.values() if c.writer is not None]
+        if writers:
+            await asyncio.wait(writers, timeout=timeout)
 
     async def broadcast_leaderboard_update(self, short_code: str, leaderboard_data: dict):
         """
@@ -131,18 +248,19 @@ class ConnectionManager:
             'data': leaderboard_data
         })
 
-    async def broadcast_new_score(self, short_code: str, score_entry: dict):
+    async def broadcast_new_score(self, short_code: str, score_entry: dict, relay: bool = True):
         """
         Broadcast a new score submission
 
         Args:
             short_code: URL short code
             score_entry: New leaderboard entry
+            relay: Also send it to other workers
         """
         await self.broadcast_to_room(short_code, {
             'type': 'new_score',
             'data': score_entry
-        })
+        }, relay=relay)
 
     async def broadcast_game_start(self, short_code: str, player_info: dict):
         """
@@ -178,9 +296,24 @@ class ConnectionManager:
             short_code: URL short code
 
         Returns:
-            Number of active connections
+            Number of active connections across all workers
+        """
+        count = self.get_local_players(short_code)
+        if self.backplane is not None:
+            count += self.backplane.remote_players(short_code)
+        return count
+
+    def get_local_players(self, short_code: str) -> int:
+        """
+        Get number of connections to this worker for a URL
+
+        Args:
+            short_code: URL short code
+
+        Returns:
+            Number of local connections
         """
-        return len(self.active_connections.get(short_code, set()))
+        return len(self.active_connections.get(short_code, {}))
 
     def get_all_rooms(self) -> List[str]:
         """
@@ -191,6 +324,121 @@ class ConnectionManager:
         """
         return list(self.active_connections.keys())
 
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get broadcast metrics
+
+        Returns:
+            Queue sizes, message counters and slow-consumer drops
+        """
+        return {
+            'send_queue_size': self.send_queue_size,
+            'send_timeout_seconds': self.send_timeout,
+            'queued_messages': sum(len(c.outbox) for c in self.clients.values()),
+            'broadcasts': self.broadcasts,
+            'messages_queued': self.messages_queued,
+            'messages_sent': self.messages_sent,
+            'messages_coalesced': self.messages_coalesced,
+            'send_timeouts': self.send_timeouts,
+            'slow_consumers_dropped': self.slow_consumers_dropped,
+            'last_broadcast_ms': round(self.last_broadcast_ms, 3),
+            'backplane': self.backplane.get_stats() if self.backplane is not None else None
+        }
+
+    # ==================== Internals ====================
+
+    def _deliver(self, short_code: str, message_type: Optional[str], text: str) -> None:
+        """Queue encoded text for every local connection in a room"""
+        room = self.active_connections.get(short_code)
+        if not room:
+            return
+
+        start = time.perf_counter()
+        # Copy: dropping a slow consumer modifies the room
+        for client in list(room.values()):
+            self._push(client, message_type, text)
+
+        self.broadcasts += 1
+        self.last_broadcast_ms = (time.perf_counter() - start) * 1000
+
+    def _report_players(self, short_code: str) -> None:
+        if self.backplane is not None:
+            self.backplane.report_players(short_code, self.get_local_players(short_code))
+
+    def _on_remote_broadcast(self, envelope: Dict[str, Any]) -> None:
+        """A room broadcast from another worker"""
+        self._deliver(envelope['r'], envelope.get('t'), envelope['m'])
+
+    def _on_remote_presence(self, short_codes: Set[str]) -> None:
+        """Player counts changed on another worker"""
+        for short_code in short_codes:
+            self.broadcast_player_count(short_code)
+
+    def _push(self, client: ClientConnection, message_type: Optional[str], text: str) -> None:
+        """Queue text for one connection, coalescing snapshots and dropping overflow"""
+        if client.closed:
+            return
+
+        if message_type in COALESCED_TYPES:
+            pending = client.latest.get(message_type)
+            if pending is not None:
+                pending[1] = text
+                self.messages_coalesced += 1
+                return
+
+        if len(client.outbox) >= self.send_queue_size:
+            self._drop_slow_consumer(client, "send queue full")
+            return
+
+        entry = [message_type, text]
+        client.outbox.append(entry)
+        if message_type in COALESCED_TYPES:
+            client.latest[message_type] = entry
+        self.messages_queued += 1
+
+        if client.writer is None:
+            client.writer = asyncio.create_task(self._write(client))
+
+    async def _write(self, client: ClientConnection) -> None:
+        """Send queued messages in order until the queue is empty"""
+        websocket = client.websocket
+        try:
+            while client.outbox:
+                message_type, text = entry = client.outbox.popleft()
+                if client.latest.get(message_type) is entry:
+                    del client.latest[message_type]
+
+                try:
+                    # asyncio.timeout (not wait_for) avoids a task per send
+                    async with asyncio.timeout(self.send_timeout):
+                        await websocket.send_text(text)
+                except TimeoutError:
+                    self.send_timeouts += 1
+                    self._drop_slow_consumer(client, f"send timed out after {self.send_timeout}s")
+                    return
+                except Exception as e:
+                    print(f"[WEBSOCKET] Error sending to connection: {str(e)}")
+                    self.disconnect(websocket)
+                    return
+
+                self.messages_sent += 1
+        finally:
+            if client.writer is asyncio.current_task():
+                client.writer = None
+
+    def _drop_slow_consumer(self, client: ClientConnection, reason: str) -> None:
+        """Disconnect a client that cannot keep up and close its socket in the background"""
+        self.slow_consumers_dropped += 1
+        print(f"[WEBSOCKET] Dropping slow consumer on {client.short_code}: {reason}")
+        self.disconnect(client.websocket)
+        asyncio.get_running_loop().create_task(self._close_quietly(client.websocket))
+
+    async def _close_quietly(self, websocket: WebSocket) -> None:
+        try:
+            await asyncio.wait_for(websocket.close(code=SLOW_CONSUMER_CLOSE_CODE), timeout=self.send_timeout)
+        except Exception:
+            pass
+
 
 # Global connection manager instance
-manager = ConnectionManager()
+manager = ConnectionManager(backplane=global_backplane)
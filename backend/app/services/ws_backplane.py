@@ -0,0 +1,507 @@
+"""
+WebSocket Backplane
+Relays room broadcasts, new scores and player counts between worker
+processes, so a score submitted on one worker reaches sockets held by
+another and player counts are cluster-wide
+"""
+import asyncio
+import glob
+import json
+import os
+import socket
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.core.config import settings
+
+# kind -> handler(envelope). Handlers run on the event loop and must not block.
+EnvelopeHandler = Callable[[Dict[str, Any]], None]
+
+# Largest envelope the Unix datagram backplane will send
+MAX_DATAGRAM_BYTES = 200_000
+
+
+class Backplane:
+    """
+    Base class for cross-process fan-out
+
+    Every node publishes JSON envelopes `{"n": node_id, "k": kind, ...}` and
+    dispatches the ones it receives from other nodes to the handler
+    registered for that kind. Publishing never blocks: envelopes go through
+    a bounded outbox drained by a sender task, and are dropped (and counted)
+    if it is full.
+
+    Player counts are tracked here: each node announces its local count for
+    a room when it changes, plus a full heartbeat of all its rooms every
+    `presence_interval_seconds`. A node that misses three heartbeats is
+    forgotten, so a crashed worker stops inflating counts.
+
+    Subclasses implement `_open`, `_send`, `_receive_loop` and `_close`.
+    """
+
+    name = "memory"
+
+    def __init__(
+        self,
+        node_id: Optional[str] = None,
+        presence_interval_seconds: float = settings.WS_BACKPLANE_PRESENCE_SECONDS,
+        outbox_size: int = 10000
+    ):
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.presence_interval = presence_interval_seconds
+        self.outbox_size = outbox_size
+
+        self._handlers: Dict[str, EnvelopeHandler] = {}
+        self._presence_handler: Optional[Callable[[Set[str]], None]] = None
+
+        # Player counts: ours, and each remote node's with when we last heard from it
+        self._local_counts: Dict[str, int] = {}
+        self._remote_counts: Dict[str, Dict[str, int]] = {}
+        self._remote_seen: Dict[str, float] = {}
+
+        self._outbox: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._closed: Optional[asyncio.Future] = None
+
+        # Metrics
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+        self.send_errors = 0
+
+    # ==================== Wiring ====================
+
+    def subscribe(self, kind: str, handler: EnvelopeHandler) -> None:
+        """
+        Register the handler for envelopes of one kind from other nodes
+
+        Args:
+            kind: Envelope kind ("room", "score", ...)
+            handler: Called with the decoded envelope
+        """
+        self._handlers[kind] = handler
+
+    def on_presence(self, handler: Callable[[Set[str]], None]) -> None:
+        """Register a callback for rooms whose remote player count changed"""
+        self._presence_handler = handler
+
+    # ==================== Lifecycle ====================
+
+    @property
+    def running(self) -> bool:
+        return self._closed is not None and not self._closed.done()
+
+    async def start(self) -> None:
+        """Connect and start the sender, receiver and heartbeat tasks (app lifespan)"""
+        if self.running:
+            return
+
+        await self._open()
+        self._closed = asyncio.get_running_loop().create_future()
+        self._outbox = asyncio.Queue(self.outbox_size)
+        self._tasks = [
+            asyncio.create_task(self._send_loop()),
+            asyncio.create_task(self._receive_loop()),
+            asyncio.create_task(self._heartbeat_loop())
+        ]
+        # Ask the other nodes for their counts instead of waiting a heartbeat
+        self._publish_presence(full=True, hello=True)
+        print(f"[WEBSOCKET] Backplane '{self.name}' started as {self.node_id}")
+
+    async def stop(self) -> None:
+        """Say goodbye to the other nodes, send what is queued and disconnect"""
+        if not self.running:
+            return
+
+        # An empty full heartbeat makes the other nodes forget us right away
+        self._local_counts.clear()
+        self._publish_presence(full=True)
+        try:
+            await asyncio.wait_for(self._outbox.join(), timeout=self.presence_interval)
+        except TimeoutError:
+            print(f"[WEBSOCKET] Backplane stopped with {self._outbox.qsize()} envelopes unsent")
+
+        self._closed.set_result(True)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._close()
+
+    # ==================== Publishing ====================
+
+    def publish(self, kind: str, **fields: Any) -> None:
+        """
+        Send an envelope to every other node (non-blocking)
+
+        Args:
+            kind: Envelope kind
+            **fields: Envelope body
+        """
+        if not self.running or not self._has_peers():
+            return
+
+        envelope = {'n': self.node_id, 'k': kind, **fields}
+        try:
+            self._outbox.put_nowait(json.dumps(envelope, separators=(",", ":"), default=str).encode())
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return
+        self.published += 1
+
+    def report_players(self, short_code: str, count: int) -> None:
+        """
+        Announce this node's player count for a room
+
+        Args:
+            short_code: Room identifier
+            count: Local connections in the room
+        """
+        if count:
+            self._local_counts[short_code] = count
+        else:
+            self._local_counts.pop(short_code, None)
+        self.publish('presence', c={short_code: count})
+
+    def remote_players(self, short_code: str) -> int:
+        """
+        Players connected to other nodes
+
+        Args:
+            short_code: Room identifier
+
+        Returns:
+            Sum of the last counts reported by live remote nodes
+        """
+        return sum(counts.get(short_code, 0) for counts in self._remote_counts.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get backplane metrics
+
+        Returns:
+            Backend name, node id, known peers and envelope counters
+        """
+        return {
+            'backend': self.name,
+            'node_id': self.node_id,
+            'running': self.running,
+            'remote_nodes': len(self._remote_counts),
+            'remote_players': sum(sum(counts.values()) for counts in self._remote_counts.values()),
+            'published': self.published,
+            'received': self.received,
+            'dropped': self.dropped,
+            'send_errors': self.send_errors
+        }
+
+    # ==================== Transport (subclasses) ====================
+
+    async def _open(self) -> None:
+        pass
+
+    def _has_peers(self) -> bool:
+        """False when there is certainly nobody to send to"""
+        return True
+
+    async def _send(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    async def _receive_loop(self) -> None:
+        await self._closed
+
+    async def _close(self) -> None:
+        pass
+
+    def _peer_joined(self, node: str) -> None:
+        """A node announced itself (transports that cache peers refresh here)"""
+
+    # ==================== Internals ====================
+
+    def _dispatch(self, data: bytes) -> None:
+        """Decode an envelope from the transport and hand it to its handler"""
+        try:
+            envelope = json.loads(data)
+        except (ValueError, UnicodeDecodeError):
+            return
+
+        if envelope.get('n') == self.node_id:
+            return  # Our own message echoed back (Redis pub/sub)
+
+        self.received += 1
+        kind = envelope.get('k')
+        if kind == 'presence':
+            self._apply_presence(envelope)
+            return
+
+        handler = self._handlers.get(kind)
+        if handler is None:
+            return
+        try:
+            handler(envelope)
+        except Exception as e:
+            print(f"[WEBSOCKET] Backplane handler for '{kind}' failed: {str(e)}")
+
+    def _publish_presence(self, full: bool, hello: bool = False) -> None:
+        if hello:
+            self.publish('presence', c=dict(self._local_counts), full=full, hello=True)
+        else:
+            self.publish('presence', c=dict(self._local_counts), full=full)
+
+    def _apply_presence(self, envelope: Dict[str, Any]) -> None:
+        node = envelope['n']
+        counts = envelope.get('c') or {}
+        known = self._remote_counts.get(node, {})
+        changed: Set[str] = set()
+
+        if envelope.get('full'):
+            changed = {code for code in set(known) | set(counts) if known.get(code, 0) != counts.get(code, 0)}
+            known = {code: count for code, count in counts.items() if count}
+        else:
+            known = dict(known)
+            for code, count in counts.items():
+                if known.get(code, 0) != count:
+                    changed.add(code)
+                if count:
+                    known[code] = count
+                else:
+                    known.pop(code, None)
+
+        if known or not envelope.get('full'):
+            self._remote_counts[node] = known
+            self._remote_seen[node] = time.monotonic()
+        else:
+            self._forget(node)
+
+        if envelope.get('hello'):
+            self._peer_joined(node)
+            self._publish_presence(full=True)
+
+        if changed and self._presence_handler is not None:
+            self._presence_handler(changed)
+
+    def _forget(self, node: str) -> Set[str]:
+        """Drop a node's counts; returns the rooms it had players in"""
+        self._remote_seen.pop(node, None)
+        return set(self._remote_counts.pop(node, {}))
+
+    def _expire_nodes(self, now: float) -> None:
+        """Forget nodes that missed three heartbeats"""
+        deadline = now - self.presence_interval * 3
+        changed: Set[str] = set()
+        for node, seen in list(self._remote_seen.items()):
+            if seen < deadline:
+                print(f"[WEBSOCKET] Backplane node {node} went silent, dropping its player counts")
+                changed |= self._forget(node)
+
+        if changed and self._presence_handler is not None:
+            self._presence_handler(changed)
+
+    async def _send_loop(self) -> None:
+        while True:
+            data = await self._outbox.get()
+            try:
+                await self._send(data)
+            except Exception as e:
+                self.send_errors += 1
+                print(f"[WEBSOCKET] Backplane send failed: {str(e)}")
+            finally:
+                self._outbox.task_done()
+
+    async def _heartbeat_loop(self) -> None:
+        while not self._closed.done():
+            await asyncio.wait({self._closed}, timeout=self.presence_interval)
+            if self._closed.done():
+                return
+            self._publish_presence(full=True)
+            self._expire_nodes(time.monotonic())
+
+
+class MemoryBackplane(Backplane):
+    """
+    Backplane between nodes in the same process
+
+    Nodes sharing a `hub` list see each other's envelopes. The default is a
+    private hub, which makes a single worker behave as before; tests pass a
+    shared hub to simulate several workers in one event loop.
+    """
+
+    name = "memory"
+
+    def __init__(self, hub: Optional[List["MemoryBackplane"]] = None, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.hub = hub if hub is not None else []
+
+    async def _open(self) -> None:
+        self.hub.append(self)
+
+    def _has_peers(self) -> bool:
+        # A lone node (the single-worker default) skips encoding entirely
+        return len(self.hub) > 1
+
+    async def _send(self, data: bytes) -> None:
+        for node in self.hub:
+            if node is not self and node.running:
+                node._dispatch(data)
+
+    async def _close(self) -> None:
+        if self in self.hub:
+            self.hub.remove(self)
+
+
+class UnixSocketBackplane(Backplane):
+    """
+    Backplane between worker processes on one host
+
+    Each node binds a Unix datagram socket `<node_id>.sock` in a shared
+    directory and sends every envelope to all other sockets found there.
+    Sockets left behind by dead workers are removed on the first failed send.
+    Suited to `uvicorn --workers N`; use the Redis backplane across hosts.
+    """
+
+    name = "unix"
+
+    def __init__(self, directory: str = settings.WS_BACKPLANE_SOCKET_DIR, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.directory = directory
+        self.path = os.path.join(directory, f"{self.node_id}.sock")
+        self._socket: Optional[socket.socket] = None
+        self._peers: List[str] = []
+        self._peers_listed_at = float('-inf')
+
+    async def _open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        sock.bind(self.path)
+        self._socket = sock
+
+    async def _send(self, data: bytes) -> None:
+        if len(data) > MAX_DATAGRAM_BYTES:
+            self.dropped += 1
+            return
+
+        for path in self._list_peers():
+            try:
+                self._socket.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker is gone; clean up its socket file
+                self._remove_peer(path)
+            except BlockingIOError:
+                # Peer's receive buffer is full; it misses this envelope
+                self.send_errors += 1
+
+    async def _receive_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            data = await loop.sock_recv(self._socket, MAX_DATAGRAM_BYTES)
+            self._dispatch(data)
+
+    async def _close(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _peer_joined(self, node: str) -> None:
+        # Re-list before replying so the new node gets our counts
+        self._peers_listed_at = float('-inf')
+
+    def _list_peers(self) -> List[str]:
+        """Other nodes' sockets, re-listed at most once a second or when a node joins"""
+        now = time.monotonic()
+        if now - self._peers_listed_at > 1.0:
+            self._peers = [
+                path for path in glob.glob(os.path.join(self.directory, "*.sock"))
+                if path != self.path
+            ]
+            self._peers_listed_at = now
+        return self._peers
+
+    def _remove_peer(self, path: str) -> None:
+        if path in self._peers:
+            self._peers.remove(path)
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+class RedisBackplane(Backplane):
+    """
+    Backplane over Redis pub/sub, for workers on several hosts
+
+    All nodes publish to and subscribe on one channel; a node ignores its
+    own envelopes. Pub/sub is fire-and-forget, so a node that is briefly
+    disconnected misses envelopes sent meanwhile (counts heal with the next
+    heartbeat).
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        url: str = settings.REDIS_URL,
+        client: Any = None,
+        channel: str = "jfgi:ws",
+        **kwargs: Any
+    ):
+        super().__init__(**kwargs)
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url)
+
+        self.redis = client
+        self.channel = channel
+        self._pubsub = None
+
+    async def _open(self) -> None:
+        self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.channel)
+
+    async def _send(self, data: bytes) -> None:
+        await self.redis.publish(self.channel, data)
+
+    async def _receive_loop(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except Exception as e:
+                print(f"[WEBSOCKET] Backplane receive failed: {str(e)}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is not None and message.get('type') == 'message':
+                self._dispatch(message['data'])
+
+    async def _close(self) -> None:
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self.channel)
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+
+def create_backplane(name: str = settings.WS_BACKPLANE) -> Backplane:
+    """
+    Build the backplane named by the WS_BACKPLANE setting
+
+    Args:
+        name: "memory", "unix" or "redis"
+
+    Returns:
+        Backplane instance
+    """
+    if name == "redis":
+        return RedisBackplane()
+    if name == "unix":
+        return UnixSocketBackplane()
+    if name != "memory":
+        print(f"[WEBSOCKET] Unknown WS_BACKPLANE '{name}', using memory")
+    return MemoryBackplane()
+
+
+# Global backplane instance
+backplane = create_backplane()
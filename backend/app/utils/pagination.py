@@ -0,0 +1,101 @@
+"""
+Keyset Pagination
+Opaque cursors for listing endpoints and the page size cap
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_
+
+from app.core.config import settings
+from app.models.leaderboard import LeaderboardEntry
+
+# Response header carrying the next cursor on endpoints that return a bare list
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that cannot be decoded for the requested listing"""
+
+
+def page_limit(limit: int) -> int:
+    """Clamp a requested page size to 1..MAX_PAGE_SIZE"""
+    return max(1, min(limit, settings.MAX_PAGE_SIZE))
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last row on a page
+
+    Args:
+        values: Sort key values (datetimes are stored as ISO strings)
+
+    Returns:
+        URL-safe opaque cursor
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor: Optional[str], converters: Sequence[Callable[[Any], Any]]) -> Optional[Tuple]:
+    """
+    Decode a cursor made by encode_cursor
+
+    Args:
+        cursor: Cursor from the client (None for the first page)
+        converters: One callable per key value, e.g. (int, float, str)
+
+    Returns:
+        Tuple of converted key values, or None for the first page
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or has the wrong shape
+    """
+    if not cursor:
+        return None
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(converters):
+            raise InvalidCursor("Cursor does not match this listing")
+        return tuple(convert(value) for convert, value in zip(converters, values))
+    except InvalidCursor:
+        raise
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursor(f"Malformed cursor: {str(e)}")
+
+
+def leaderboard_after(after: Tuple[int, float, str]):
+    """
+    Filter for leaderboard rows ranked below (score, completion_time, id)
+
+    Matches ORDER BY score DESC, completion_time_seconds, id. The leading
+    `score <= ?` lets the database seek on the score index.
+    """
+    score, completion_time, entry_id = after
+    return and_(
+        LeaderboardEntry.score <= score,
+        or_(
+            LeaderboardEntry.score < score,
+            LeaderboardEntry.completion_time_seconds > completion_time,
+            and_(LeaderboardEntry.completion_time_seconds == completion_time, LeaderboardEntry.id > entry_id)
+        )
+    )
+
+
+def newest_after(column, id_column, after: Tuple[datetime, str]):
+    """
+    Filter for rows after (value, id) in ORDER BY column DESC, id DESC order
+
+    Args:
+        column: Timestamp column the listing is sorted by
+        id_column: Primary key column (tie-breaker)
+        after: Sort key of the last row on the previous page
+    """
+    value, row_id = after
+    return and_(column <= value, or_(column < value, and_(column == value, id_column < row_id)))
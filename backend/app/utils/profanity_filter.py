@@ -2,19 +2,17 @@
 Profanity filtering utility
 Cleans user-generated content (nicknames, challenge text, hints)
 """
-from better_profanity import profanity
-from typing import Optional, List
+from typing import Dict, Optional, List
 
-# Initialize profanity filter
-profanity.load_censor_words()
+from app.utils.profanity_matcher import ProfanityMatcher
 
 # Add custom words if needed (gaming/internet slang)
 CUSTOM_BAD_WORDS = [
     # Add any additional words specific to your context
 ]
 
-if CUSTOM_BAD_WORDS:
-    profanity.add_censor_words(CUSTOM_BAD_WORDS)
+# Wordlist and leetspeak variants compiled once, at import
+matcher = ProfanityMatcher.default(CUSTOM_BAD_WORDS)
 
 
 def clean_text(text: Optional[str], censor_char: str = "*") -> Optional[str]:
@@ -32,7 +30,7 @@ def clean_text(text: Optional[str], censor_char: str = "*") -> Optional[str]:
         return text
 
     try:
-        return profanity.censor(text, censor_char)
+        return matcher.censor(text, censor_char)
     except Exception as e:
         print(f"Error filtering profanity: {e}")
         return text
@@ -52,7 +50,7 @@ def is_profane(text: Optional[str]) -> bool:
         return False
 
     try:
-        return profanity.contains_profanity(text)
+        return matcher.contains_profanity(text)
     except Exception as e:
         print(f"Error checking profanity: {e}")
         return False
@@ -75,6 +73,45 @@ def clean_list(text_list: Optional[List[str]], censor_char: str = "*") -> Option
     return [clean_text(item, censor_char) if isinstance(item, str) else item for item in text_list]
 
 
+def is_profane_batch(texts: List[Optional[str]]) -> List[bool]:
+    """
+    Check many strings for profanity
+
+    Args:
+        texts: Strings to check (None and non-strings count as clean)
+
+    Returns:
+        One flag per string, in the same order
+    """
+    return [is_profane(text) for text in texts]
+
+
+def clean_batch(
+    texts: List[Optional[str]],
+    censor_char: str = "*",
+    cleaned: Optional[Dict[str, str]] = None
+) -> List[Optional[str]]:
+    """
+    Clean many strings in one pass, filtering each distinct string once
+
+    Bulk imports repeat the same hints and challenge texts across rows,
+    so duplicates are looked up instead of filtered again.
+
+    Args:
+        texts: Strings to clean (None and non-strings are passed through)
+        censor_char: Character to use for censoring (default: '*')
+        cleaned: Original -> cleaned text, shared across calls to reuse results
+
+    Returns:
+        Cleaned strings, in the same order
+    """
+    cleaned = {} if cleaned is None else cleaned
+    for text in texts:
+        if isinstance(text, str) and text not in cleaned:
+            cleaned[text] = clean_text(text, censor_char)
+    return [cleaned.get(text, text) if isinstance(text, str) else text for text in texts]
+
+
 def sanitize_nickname(nickname: Optional[str]) -> str:
     """
     Sanitize a nickname by removing profanity and limiting length
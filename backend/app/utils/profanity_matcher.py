@@ -0,0 +1,232 @@
+"""
+Profanity Matcher
+Compiles the better_profanity wordlist and its leetspeak variants into a
+deterministic automaton once, then censors text in one pass over its words
+"""
+import importlib.util
+import json
+import os
+import re
+import string
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Characters a wordlist character may be written as (better_profanity's mapping)
+LEET_VARIANTS = {
+    'a': 'a@*4',
+    'i': 'i*l1',
+    'o': 'o*0@',
+    'u': 'u*v',
+    'v': 'v*u',
+    'l': 'l1',
+    'e': 'e*3',
+    's': 's$5',
+    't': 't7',
+}
+
+# A matched word or phrase is replaced by this many censor characters
+CENSOR_LENGTH = 4
+
+BMP_MAX = '\uffff'
+
+
+def _package_file(filename: str) -> str:
+    """Path of a better_profanity data file, without importing the package
+    (its import builds a ~5MB wordset we do not use)"""
+    spec = importlib.util.find_spec('better_profanity')
+    if spec is None or not spec.submodule_search_locations:
+        raise ImportError("better_profanity is required for the profanity wordlist")
+    return os.path.join(list(spec.submodule_search_locations)[0], filename)
+
+
+def load_wordlist() -> List[str]:
+    """Words of better_profanity's default wordlist"""
+    with open(_package_file('profanity_wordlist.txt'), encoding='utf-8') as wordlist:
+        return [row.strip() for row in wordlist if row.strip()]
+
+
+def load_word_characters() -> Set[str]:
+    """Characters that make up words: letters, digits, @ $ * " ' and unicode letters"""
+    characters = set(string.ascii_letters + string.digits + '@$*"\'')
+    with open(_package_file('alphabetic_unicode.json'), encoding='utf-8') as alphabetic:
+        characters.update(json.load(alphabetic))
+    return characters
+
+
+def _character_class(characters: Set[str]) -> str:
+    """Regex class of the characters, as code point ranges (a class of
+    thousands of single characters is scanned item by item)"""
+    ranges: List[List[int]] = []
+    for code in sorted(ord(char) for char in characters if len(char) == 1):
+        if ranges and code == ranges[-1][1] + 1:
+            ranges[-1][1] = code
+        else:
+            ranges.append([code, code])
+    return '[' + ''.join(
+        re.escape(chr(low)) if low == high else f"{re.escape(chr(low))}-{re.escape(chr(high))}"
+        for low, high in ranges
+    ) + ']'
+
+
+class ProfanityMatcher:
+    """
+    Whole-word profanity matcher with better_profanity's semantics
+
+    Words are runs of word characters; a word, or a phrase of up to
+    max_phrase_words following words joined with or without their
+    separators ("hand job", "handjob"), is censored when it equals a
+    wordlist entry with any of its characters written as a leetspeak
+    variant. Matches are replaced by four censor characters.
+
+    The wordlist is compiled into a DFA over text characters, so checking
+    a word is one dict lookup per character whatever the wordlist size.
+    """
+
+    def __init__(self, words: Iterable[str], word_characters: Optional[Set[str]] = None):
+        word_characters = word_characters if word_characters is not None else load_word_characters()
+        words = {word.lower() for word in words}
+
+        self._word_pattern = re.compile(_character_class(word_characters) + '+')
+        # re only uses its fast bitmap classes for characters below U+10000,
+        # so text without astral characters is split with a BMP-only class
+        self._bmp_word_pattern = re.compile(
+            _character_class({char for char in word_characters if char <= BMP_MAX}) + '+'
+        )
+        # A wordlist entry with N separators spans up to N following words
+        self.max_phrase_words = max(
+            [sum(char not in word_characters for char in word) for word in words] + [1]
+        )
+        self.word_count = len(words)
+        self._transitions, self._accepting = self._compile(words)
+
+    @classmethod
+    def default(cls, extra_words: Iterable[str] = ()) -> "ProfanityMatcher":
+        """Matcher for better_profanity's default wordlist plus extra words"""
+        return cls(load_wordlist() + list(extra_words))
+
+    @staticmethod
+    def _compile(words: Set[str]) -> Tuple[List[Dict[str, int]], Set[int]]:
+        """
+        Build a trie of the words, then determinize it over the characters
+        each word character may be written as (subset construction)
+
+        Returns:
+            (transitions per state, accepting states); state 0 is the start
+        """
+        trie: List[Dict[str, int]] = [{}]
+        word_ends = set()
+        for word in words:
+            node = 0
+            for char in word:
+                child = trie[node].get(char)
+                if child is None:
+                    child = len(trie)
+                    trie.append({})
+                    trie[node][char] = child
+                node = child
+            word_ends.add(node)
+
+        start = frozenset([0])
+        state_ids = {start: 0}
+        subsets = [start]
+        transitions: List[Dict[str, int]] = []
+        accepting = set()
+        for state, subset in enumerate(subsets):
+            moves: Dict[str, Set[int]] = {}
+            for node in subset:
+                for char, child in trie[node].items():
+                    for written_as in LEET_VARIANTS.get(char, char):
+                        moves.setdefault(written_as, set()).add(child)
+
+            row = {}
+            for char, children in moves.items():
+                target = frozenset(children)
+                if target not in state_ids:
+                    state_ids[target] = len(subsets)
+                    subsets.append(target)
+                row[char] = state_ids[target]
+            transitions.append(row)
+            if subset & word_ends:
+                accepting.add(state)
+
+        return transitions, accepting
+
+    @property
+    def state_count(self) -> int:
+        return len(self._transitions)
+
+    def _feed(self, state: Optional[int], chars: str) -> Optional[int]:
+        """Advance the automaton over chars; None once no entry can match"""
+        transitions = self._transitions
+        for char in chars:
+            if state is None:
+                return None
+            state = transitions[state].get(char)
+        return state
+
+    def _matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        Spans of text to censor, left to right
+
+        Mirrors better_profanity's scan, including its edge cases: text
+        whose first word starts on the last character is left alone, and
+        a word starting on the last character never ends a phrase.
+        """
+        pattern = self._bmp_word_pattern if text.isascii() or max(text) <= BMP_MAX else self._word_pattern
+        words = [match.span() for match in pattern.finditer(text)]
+        last = len(text) - 1
+        if not words or words[0][0] >= last:
+            return
+
+        phrase_limit = len(words) - 1 if words[-1][0] >= last else len(words)
+        accepting = self._accepting
+        index = 0
+        while index < len(words):
+            start, end = words[index]
+            state = self._feed(0, text[start:end].lower())
+            match_end = end if state in accepting else None
+
+            # Longer phrases starting here take precedence over the word alone
+            raw = joined = state
+            for following in range(index + 1, min(index + 1 + self.max_phrase_words, phrase_limit)):
+                if raw is None and joined is None:
+                    break
+                next_start, next_end = words[following]
+                word = text[next_start:next_end].lower()
+                raw = self._feed(self._feed(raw, text[words[following - 1][1]:next_start].lower()), word)
+                joined = self._feed(joined, word)
+                if raw in accepting or joined in accepting:
+                    match_end = next_end
+                    index = following
+                    break
+
+            if match_end is not None:
+                yield start, match_end
+            index += 1
+
+    def censor(self, text: str, censor_char: str = "*") -> str:
+        """
+        Replace every profane word or phrase with censor characters
+
+        Args:
+            text: The text to censor
+            censor_char: Character to use for censoring (default: '*')
+
+        Returns:
+            Censored text (the same object when nothing matched)
+        """
+        replacement = censor_char * CENSOR_LENGTH
+        parts = []
+        position = 0
+        for start, end in self._matches(text):
+            parts.append(text[position:start])
+            parts.append(replacement)
+            position = end
+        if not parts:
+            return text
+        parts.append(text[position:])
+        return ''.join(parts)
+
+    def contains_profanity(self, text: str) -> bool:
+        """True if censoring would change the text; stops at the first match"""
+        replacement = '*' * CENSOR_LENGTH
+        return any(text[start:end] != replacement for start, end in self._matches(text))
@@ -1,49 +1,98 @@
 """
 Short Code Generator
-Generates unique short codes for URLs
+Maps sequence numbers to short codes through a keyed permutation, so
+every number gives a different code and no existence check is needed
 """
-import random
+import hashlib
 import string
-from sqlalchemy.orm import Session
-from app.models.url import ShortURL
+from typing import Tuple
 
+from app.core.config import settings
 
-def generate_short_code(length: int = 6) -> str:
+ALPHABET = string.ascii_letters + string.digits
+BASE = len(ALPHABET)
+
+# Codes start at this length and grow by one character once every code
+# of the current length has been handed out
+MIN_LENGTH = 6
+
+FEISTEL_ROUNDS = 4
+
+
+def _permutation_key() -> bytes:
+    key = settings.SHORT_CODE_KEY or settings.SECRET_KEY
+    return hashlib.sha256(f"short-code:{key}".encode()).digest()
+
+
+PERMUTATION_KEY = _permutation_key()
+
+
+def _round(value: int, round_index: int, bits: int, key: bytes) -> int:
+    digest = hashlib.blake2b(
+        value.to_bytes(8, 'big') + bytes([round_index]), digest_size=8, key=key
+    ).digest()
+    return int.from_bytes(digest, 'big') & ((1 << bits) - 1)
+
+
+def permute(value: int, domain: int, key: bytes = PERMUTATION_KEY) -> int:
     """
-    Generate a random short code
+    Keyed bijection of [0, domain) onto itself
+
+    A balanced Feistel network over the smallest even number of bits that
+    covers the domain; results outside the domain are encrypted again
+    (cycle walking), which keeps the mapping a bijection on the domain.
 
     Args:
-        length: Length of the short code (default 6)
+        value: Number in [0, domain)
+        domain: Size of the domain
+        key: Permutation key
 
     Returns:
-        str: Random alphanumeric short code
+        The permuted number, also in [0, domain)
     """
-    characters = string.ascii_letters + string.digits
-    return ''.join(random.choice(characters) for _ in range(length))
+    half = ((domain - 1).bit_length() + 1) // 2
+    mask = (1 << half) - 1
+    while True:
+        left, right = value >> half, value & mask
+        for round_index in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ _round(right, round_index, half, key)
+        value = (left << half) | right
+        if value < domain:
+            return value
 
 
-def generate_unique_short_code(db: Session, max_attempts: int = 10) -> str:
-    """
-    Generate a unique short code that doesn't exist in database
+def encode_base62(value: int, length: int) -> str:
+    """Fixed-width base62 encoding"""
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, BASE)
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
 
-    Args:
-        db: Database session
-        max_attempts: Maximum attempts to generate unique code
 
-    Returns:
-        str: Unique short code
+def _length_and_offset(index: int) -> Tuple[int, int]:
+    """Code length for a sequence number and its position among codes of that length"""
+    length = MIN_LENGTH
+    while index >= BASE ** length:
+        index -= BASE ** length
+        length += 1
+    return length, index
 
-    Raises:
-        Exception: If unable to generate unique code after max_attempts
+
+def code_for_index(index: int, key: bytes = PERMUTATION_KEY) -> str:
     """
-    for _ in range(max_attempts):
-        code = generate_short_code()
+    Short code of a sequence number
 
-        # Check if code already exists
-        existing = db.query(ShortURL).filter(ShortURL.short_code == code).first()
+    Distinct numbers always give distinct codes: the first 62^6 numbers
+    are spread over every 6-character code in a key-dependent order, the
+    next 62^7 over 7-character codes, and so on.
 
-        if not existing:
-            return code
+    Args:
+        index: Sequence number (0-based)
+        key: Permutation key (default: derived from SHORT_CODE_KEY)
 
-    # If we get here, we've failed to generate a unique code
-    raise Exception(f"Failed to generate unique short code after {max_attempts} attempts")
+    Returns:
+        str: Alphanumeric short code
+    """
+    length, offset = _length_and_offset(index)
+    return encode_base62(permute(offset, BASE ** length, key), length)
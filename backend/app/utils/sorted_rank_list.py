@@ -0,0 +1,149 @@
+"""
+Sorted Rank List
+Order-statistic container used for incremental leaderboard ranking
+"""
+from bisect import bisect_left, insort
+from typing import Any, Iterable, List
+
+
+class SortedRankList:
+    """
+    Sorted list of comparable keys with O(log n) insert, removal and rank lookup
+
+    Keys are kept in sorted buckets of roughly `load` elements. A Fenwick
+    tree over the bucket lengths turns "how many keys sort before this one"
+    into a prefix sum, so neither inserts nor rank lookups touch the whole
+    list once it grows large.
+    """
+
+    def __init__(self, keys: Iterable[Any] = (), load: int = 1000):
+        self._load = load
+        self._lists: List[List[Any]] = []
+        self._maxes: List[Any] = []
+        self._tree: List[int] = []
+        self._len = 0
+
+        ordered = sorted(keys)
+        for start in range(0, len(ordered), load):
+            bucket = ordered[start:start + load]
+            self._lists.append(bucket)
+            self._maxes.append(bucket[-1])
+        self._len = len(ordered)
+        self._rebuild_tree()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, key: Any) -> None:
+        """
+        Insert a key, keeping the list sorted
+
+        Args:
+            key: Comparable key to insert
+        """
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            self._rebuild_tree()
+            return
+
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._lists[pos].append(key)
+            self._maxes[pos] = key
+        else:
+            insort(self._lists[pos], key)
+
+        self._len += 1
+
+        if len(self._lists[pos]) > 2 * self._load:
+            self._split(pos)
+        else:
+            self._tree_add(pos, 1)
+
+    def remove(self, key: Any) -> None:
+        """
+        Remove a key
+
+        Args:
+            key: Key to remove
+
+        Raises:
+            ValueError: The key is not in the list
+        """
+        pos = bisect_left(self._maxes, key)
+        bucket = self._lists[pos] if pos < len(self._lists) else []
+        idx = bisect_left(bucket, key)
+        if idx == len(bucket) or bucket[idx] != key:
+            raise ValueError(f"{key!r} not in list")
+
+        del bucket[idx]
+        self._len -= 1
+
+        if not bucket:
+            del self._lists[pos]
+            del self._maxes[pos]
+            self._rebuild_tree()
+        else:
+            self._maxes[pos] = bucket[-1]
+            self._tree_add(pos, -1)
+
+    def rank(self, key: Any) -> int:
+        """
+        Get the 1-based position a key holds (or would hold) in the list
+
+        Args:
+            key: Comparable key to look up
+
+        Returns:
+            Number of keys sorting strictly before `key`, plus one
+        """
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            return self._len + 1
+        return self._tree_prefix(pos) + bisect_left(self._lists[pos], key) + 1
+
+    def __contains__(self, key: Any) -> bool:
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            return False
+        bucket = self._lists[pos]
+        idx = bisect_left(bucket, key)
+        return idx < len(bucket) and bucket[idx] == key
+
+    # ==================== Internals ====================
+
+    def _split(self, pos: int) -> None:
+        """Split an oversized bucket in two and rebuild the Fenwick tree"""
+        bucket = self._lists[pos]
+        half = len(bucket) // 2
+        self._lists[pos:pos + 1] = [bucket[:half], bucket[half:]]
+        self._maxes[pos:pos + 1] = [bucket[half - 1], bucket[-1]]
+        self._rebuild_tree()
+
+    def _rebuild_tree(self) -> None:
+        """Rebuild the Fenwick tree over bucket lengths in O(buckets)"""
+        tree = [len(bucket) for bucket in self._lists]
+        for i in range(len(tree)):
+            parent = i | (i + 1)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, pos: int, delta: int) -> None:
+        tree = self._tree
+        while pos < len(tree):
+            tree[pos] += delta
+            pos |= pos + 1
+
+    def _tree_prefix(self, pos: int) -> int:
+        """Sum of bucket lengths for buckets [0, pos)"""
+        total = 0
+        tree = self._tree
+        pos -= 1
+        while pos >= 0:
+            total += tree[pos]
+            pos = (pos & (pos + 1)) - 1
+        return total
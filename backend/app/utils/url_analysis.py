@@ -0,0 +1,127 @@
+"""
+URL Analysis
+Extracts what hints are built from (domain parts, keywords, TLD, category)
+and the hint text for every level, once when a URL is created
+"""
+import re
+from typing import Any, Dict, List
+from urllib.parse import unquote, urlparse
+
+from app.utils.difficulty import generate_hint_for_difficulty, get_difficulty
+from app.utils.url_canonical import answer_keys_for
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Host labels that say nothing about the site
+IGNORED_HOST_LABELS = {'www', 'm'}
+
+# Labels registrations happen under in many country TLDs (example.co.uk)
+SECOND_LEVEL_LABELS = {'co', 'com', 'org', 'net', 'gov', 'ac', 'edu'}
+
+# Path words that are file or routing noise rather than content
+IGNORED_PATH_WORDS = {'html', 'htm', 'php', 'asp', 'aspx', 'index', 'www', 'en', 'us'}
+
+CATEGORY_TLDS = {'edu': 'education', 'gov': 'government', 'mil': 'government'}
+
+# First category with a keyword among the domain parts and path words wins
+CATEGORY_KEYWORDS = {
+    'developer tools': {'github', 'gitlab', 'bitbucket', 'stackoverflow', 'npmjs', 'pypi', 'docs', 'developer', 'developers', 'api', 'dev', 'readthedocs'},
+    'search engine': {'google', 'bing', 'duckduckgo', 'yahoo', 'baidu', 'yandex'},
+    'video': {'youtube', 'youtu', 'vimeo', 'twitch', 'netflix', 'video', 'videos', 'watch'},
+    'social media': {'facebook', 'twitter', 'x', 'instagram', 'reddit', 'linkedin', 'tiktok', 'pinterest', 'mastodon'},
+    'shopping': {'amazon', 'ebay', 'etsy', 'aliexpress', 'walmart', 'shop', 'store', 'product', 'products', 'cart'},
+    'news': {'news', 'bbc', 'cnn', 'nytimes', 'reuters', 'guardian', 'theguardian', 'apnews', 'article'},
+    'reference': {'wikipedia', 'wiki', 'wiktionary', 'britannica', 'dictionary', 'encyclopedia'},
+    'education': {'coursera', 'khanacademy', 'edx', 'udemy', 'course', 'courses', 'learn', 'tutorial', 'university'},
+    'music': {'spotify', 'soundcloud', 'bandcamp', 'music'},
+    'maps': {'maps', 'openstreetmap'},
+}
+
+DEFAULT_CATEGORY = 'unknown'
+
+
+def _host_keywords(labels: List[str]) -> List[str]:
+    """Meaningful host labels: no www/m, TLD or registration label"""
+    labels = [label for label in labels if label not in IGNORED_HOST_LABELS]
+    if len(labels) > 1:
+        labels = labels[:-1]
+        if len(labels) > 1 and labels[-1] in SECOND_LEVEL_LABELS:
+            labels = labels[:-1]
+    return labels
+
+
+def categorize(words: List[str], tld: str) -> str:
+    """Best-guess site category from its keywords and TLD"""
+    if tld in CATEGORY_TLDS:
+        return CATEGORY_TLDS[tld]
+    found = set(words)
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        if found & keywords:
+            return category
+    return DEFAULT_CATEGORY
+
+
+def analyze_url(long_url: str) -> Dict[str, Any]:
+    """
+    Break a challenge URL into the parts hints are built from
+
+    Args:
+        long_url: The challenge's answer URL
+
+    Returns:
+        dict with domain, path, url, domain_parts, tld, keywords (host
+        words first, then path words, without duplicates),
+        search_operators and category
+    """
+    parsed = urlparse(long_url)
+    host = (parsed.hostname or '').lower()
+    labels = [label for label in host.split('.') if label]
+    tld = labels[-1] if len(labels) > 1 else ''
+
+    host_words = [word for label in _host_keywords(labels) for word in WORD_PATTERN.findall(label)]
+    path_words = [
+        word for word in WORD_PATTERN.findall(unquote(parsed.path).lower())
+        if word not in IGNORED_PATH_WORDS
+    ]
+    keywords = list(dict.fromkeys(host_words + path_words))
+
+    return {
+        'domain': parsed.netloc,
+        'path': parsed.path,
+        'url': long_url,
+        'domain_parts': labels,
+        'tld': tld,
+        'keywords': keywords,
+        'search_operators': [],
+        'category': categorize(keywords, tld)
+    }
+
+
+def build_hint_ladder(difficulty_id: str, analysis: Dict[str, Any]) -> List[str]:
+    """
+    Hint text for every level the difficulty allows
+
+    Args:
+        difficulty_id: Difficulty level
+        analysis: Result of analyze_url
+
+    Returns:
+        Hints for levels 1..max_hints (index 0 is level 1)
+    """
+    max_hints = get_difficulty(difficulty_id).max_hints
+    return [generate_hint_for_difficulty(difficulty_id, analysis, level) for level in range(1, max_hints + 1)]
+
+
+def precomputed_fields(long_url: str, difficulty_id: str) -> Dict[str, Any]:
+    """
+    ShortURL column values computed at creation
+
+    Returns:
+        {'url_analysis', 'hint_ladder', 'correct_answers'}
+    """
+    analysis = analyze_url(long_url)
+    return {
+        'url_analysis': analysis,
+        'hint_ladder': build_hint_ladder(difficulty_id, analysis),
+        'correct_answers': answer_keys_for(long_url)
+    }
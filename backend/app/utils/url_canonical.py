@@ -0,0 +1,149 @@
+"""
+URL Canonicalization
+Reduces a URL to the key answers are matched on: the IDNA (punycode)
+host, lower-cased and without a trailing dot or www./m. prefixes, plus
+the port when it is not the scheme's default. Prefixes are only dropped
+above the registrable domain (public suffix list), so www.co.uk stays
+intact - as does www.gov.uk, gov.uk being a public suffix itself. Keys
+for a challenge's URL are stored in correct_answers at creation, so
+checking an answer is a set lookup.
+"""
+import ipaddress
+import re
+from functools import lru_cache
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+import idna
+from publicsuffixlist import PublicSuffixList
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+SCHEME_PATTERN = re.compile(r'([A-Za-z][A-Za-z0-9+.-]*)://')
+
+# The host part ends at the path, query or fragment (browsers read \ as /)
+AUTHORITY_END = re.compile(r'[/?#\\]')
+
+# Leading labels that name the same site (www.example.com, m.example.com)
+ALIAS_LABELS = {'www', 'm', 'mobile'}
+
+# Distinct hosts kept canonicalized (players and search results repeat
+# the same sites); entries are a few short strings
+HOST_CACHE_SIZE = 32768
+
+_suffix_list = PublicSuffixList()
+
+
+def _ascii_host(host: str) -> Optional[str]:
+    """Lower-case ASCII form of a host (Unicode labels become punycode)"""
+    host = host.rstrip('.')
+    if host.isascii():
+        return host.lower() or None
+    try:
+        return idna.encode(host, uts46=True).decode('ascii')
+    except idna.IDNAError:
+        pass
+    try:
+        # IDNA 2003 is laxer (e.g. symbols some registries still allow)
+        return host.encode('idna').decode('ascii').lower()
+    except UnicodeError:
+        return None
+
+
+def registrable_domain(host: str) -> Optional[str]:
+    """
+    Domain registered under a public suffix (docs.python.org -> python.org)
+
+    Args:
+        host: ASCII host name
+
+    Returns:
+        Registrable domain, or None for public suffixes and single labels
+    """
+    return _suffix_list.privatesuffix(host)
+
+
+@lru_cache(maxsize=HOST_CACHE_SIZE)
+def canonical_host(host: str) -> Optional[str]:
+    """
+    Canonical form of a host name
+
+    Args:
+        host: Host as found in a URL (any case, Unicode or punycode)
+
+    Returns:
+        Canonical host, or None if it is not a valid host name
+    """
+    try:
+        address = ipaddress.ip_address(host)
+        return f"[{address.compressed}]" if address.version == 6 else address.compressed
+    except ValueError:
+        pass
+
+    host = _ascii_host(host)
+    if host is None:
+        return None
+
+    labels = host.split('.')
+    registrable = registrable_domain(host)
+    keep = len(registrable.split('.')) if registrable else len(labels)
+    while len(labels) > keep and labels[0] in ALIAS_LABELS:
+        labels.pop(0)
+    return '.'.join(labels)
+
+
+def canonical_key(url: str) -> Optional[str]:
+    """
+    Answer key of a URL
+
+    Args:
+        url: Absolute URL, or a bare host/path as players type it
+            ("example.com/page")
+
+    Returns:
+        Canonical host with the port if non-default ("example.com",
+        "example.com:8080"), or None if the URL has no usable host
+    """
+    url = url.strip()
+    match = SCHEME_PATTERN.match(url)
+    if match:
+        scheme, rest = match.group(1).lower(), url[match.end():]
+    else:
+        scheme, rest = 'http', url.lstrip('/')
+    return _authority_key(scheme, AUTHORITY_END.split(rest, 1)[0])
+
+
+@lru_cache(maxsize=HOST_CACHE_SIZE)
+def _authority_key(scheme: str, authority: str) -> Optional[str]:
+    """Key of a URL's user:password@host:port part (the rest of a URL does not matter)"""
+    try:
+        parts = urlsplit(f"//{authority}")
+        port = parts.port
+    except ValueError:
+        return None
+    if not parts.hostname:
+        return None
+
+    host = canonical_host(parts.hostname)
+    if host is None:
+        return None
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        return f"{host}:{port}"
+    return host
+
+
+def answer_keys_for(long_url: str) -> List[str]:
+    """
+    Accepted answer keys for a challenge URL (stored in correct_answers)
+
+    Returns:
+        Keys any matching URL canonicalizes to (empty if the URL has no host)
+    """
+    key = canonical_key(long_url)
+    return [key] if key else []
+
+
+def clear_caches() -> None:
+    """Forget canonicalized hosts (benchmarks)"""
+    canonical_host.cache_clear()
+    _authority_key.cache_clear()
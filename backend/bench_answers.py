@@ -0,0 +1,91 @@
+"""
+Benchmark for answer matching
+Run with: python backend/bench_answers.py [urls]   (default 200,000)
+
+Matches a mixed corpus of submitted URLs (same-site variants with www./m.
+prefixes, default and other ports, upper case, Unicode and punycode hosts,
+multi-label public suffixes, plus unrelated sites) against challenge
+answers, with the old raw netloc comparison and with canonical keys, and
+reports URLs/s and how many same-site variants each accepts. Variants of
+gov.uk with a www./m. prefix stay misses: gov.uk is a public suffix, so
+www.gov.uk is a registrable domain of its own.
+"""
+import random
+import sys
+import time
+from urllib.parse import urlparse
+
+from app.utils.url_canonical import answer_keys_for, canonical_key, clear_caches
+
+DEFAULT_URLS = 200_000
+
+SITES = [
+    'example.com', 'python.org', 'bbc.co.uk', 'bücher.de', 'foo.github.io', 'news.ycombinator.com',
+    'wikipedia.org', 'gov.uk', 'example.com.au', 'münchen.de',
+]
+PREFIXES = ['', 'www.', 'm.', 'WWW.', 'www.m.']
+SUFFIXES = ['', '/', '/page?x=1', '/a/b#frag']
+
+
+def variant(site: str, rng: random.Random) -> str:
+    """A URL on the same site as https://site/"""
+    host = rng.choice(PREFIXES) + rng.choice((site, site.upper(), site.encode('idna').decode()))
+    scheme = rng.choice(('http', 'https'))
+    port = rng.choice(('', '', '', f":{80 if scheme == 'http' else 443}"))
+    if rng.random() < 0.1:
+        host += '.'
+    return f"{scheme}://{host}{port}{rng.choice(SUFFIXES)}"
+
+
+def corpus(count: int):
+    """(answer URL, submitted URL, same site) triples"""
+    rng = random.Random(3)
+    cases = []
+    for i in range(count):
+        site = rng.choice(SITES)
+        if rng.random() < 0.6:
+            cases.append((f"https://{site}/", variant(site, rng), True))
+        else:
+            cases.append((f"https://{site}/", f"https://site{i % 20_000}.example/{i}", False))
+    return cases
+
+
+def old_match(answer: str, submitted: str) -> bool:
+    return urlparse(submitted).netloc.lower() == urlparse(answer).netloc.lower()
+
+
+def rate(label: str, function, cases) -> None:
+    start = time.perf_counter()
+    results = [function(answer, submitted) for answer, submitted, _ in cases]
+    elapsed = time.perf_counter() - start
+    variants = [result for result, (_, _, same_site) in zip(results, cases) if same_site]
+    false_positives = sum(result for result, (_, _, same_site) in zip(results, cases) if not same_site)
+    print(
+        f"  {label:<24} | {len(cases) / elapsed:>10,.0f} | {elapsed / len(cases) * 1e6:>7.2f} |"
+        f" {sum(variants) / len(variants):>8.1%} | {false_positives:>3}"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_URLS
+    cases = corpus(count)
+
+    # Keys are computed once per challenge at creation
+    keys = {answer: frozenset(answer_keys_for(answer)) for answer, _, _ in cases}
+
+    def canonical_match(answer: str, submitted: str) -> bool:
+        return canonical_key(submitted) in keys[answer]
+
+    print("=" * 60)
+    print(f"ANSWER MATCHING BENCHMARK ({count:,} URLs)")
+    print("=" * 60)
+    print(f"  {'':<24} | {'URLs/s':>10} | {'us/URL':>7} | {'variants':>8} | {'fp':>3}")
+    rate("netloc comparison", old_match, cases)
+    clear_caches()
+    rate("canonical key (cold)", canonical_match, cases)
+    rate("canonical key (warm)", canonical_match, cases)
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark for bulk URL creation
+Run with: python backend/bench_bulk_urls.py [rows]   (default 50,000)
+
+Creates `rows` URLs with hints and challenge text in a fresh migrated
+SQLite database through the bulk path (chunked allocation, one
+filtering pass, executemany INSERTs), and compares the rate with creating
+URLs one by one as POST /urls/ does (allocate, filter, INSERT, commit).
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.migrations import run_migrations
+from app.models.url import ShortURL
+from app.services.bulk_urls import create_urls, parse_json_array
+from app.services.short_code_allocator import ShortCodeAllocator
+from app.utils.profanity_filter import clean_list, clean_text
+
+DEFAULT_ROWS = 50_000
+SINGLE_ROWS = 1_000
+
+
+def campaign(rows: int):
+    return [
+        {
+            'long_url': f"https://campaign.example/products/{i}",
+            'difficulty': 'medium',
+            'challenge_text': f"Find product page number {i % 50}",
+            'hints': ['Check the catalogue', f"It is in aisle {i % 20}", 'Look at the footer']
+        }
+        for i in range(rows)
+    ]
+
+
+async def bench_bulk(sessions, rows: int) -> float:
+    body = json.dumps(campaign(rows)).encode()
+    allocator = ShortCodeAllocator(session_factory=sessions)
+
+    start = time.perf_counter()
+    results = [r async for r in create_urls(
+        parse_json_array(body), '10.0.0.1', 'bench', allocator=allocator, session_factory=sessions
+    )]
+    elapsed = time.perf_counter() - start
+
+    assert sum('short_code' in r for r in results) == rows
+    return elapsed
+
+
+async def bench_single(sessions, rows: int) -> float:
+    allocator = ShortCodeAllocator(session_factory=sessions)
+
+    start = time.perf_counter()
+    async with sessions() as db:
+        for item in campaign(rows):
+            db.add(ShortURL(
+                short_code=await allocator.next_code(), long_url=item['long_url'], difficulty=item['difficulty'],
+                challenge_text=clean_text(item['challenge_text']), hints=clean_list(item['hints']),
+                creator_ip='10.0.0.1', creator_user_agent='bench'
+            ))
+            await db.commit()
+    return time.perf_counter() - start
+
+
+async def bench(path: str, rows: int) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    single = await bench_single(sessions, SINGLE_ROWS)
+    bulk = await bench_bulk(sessions, rows)
+
+    print(f"  {'path':>10} | {'rows':>8} | {'seconds':>8} | {'rows/s':>8}")
+    print(f"  {'one by one':>10} | {SINGLE_ROWS:>8,} | {single:>8.2f} | {SINGLE_ROWS / single:>8.0f}")
+    print(f"  {'bulk':>10} | {rows:>8,} | {bulk:>8.2f} | {rows / bulk:>8.0f}")
+    await engine.dispose()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+
+    print("=" * 60)
+    print(f"BULK URL CREATION BENCHMARK ({rows:,} rows)")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bulk.db")
+        engine = create_engine(f"sqlite:///{path}")
+        run_migrations(engine)
+        engine.dispose()
+        asyncio.run(bench(path, rows))
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
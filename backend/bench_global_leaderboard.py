@@ -0,0 +1,119 @@
+"""
+Benchmark for the global leaderboard top-K boards
+Run with: python backend/bench_global_leaderboard.py [rows]   (default 10,000,000)
+
+Builds a migrated SQLite database with `rows` leaderboard entries spread
+over the last 60 days, then compares, per window, the indexed database
+query the endpoint used to run on every request with a read from the
+top-K board, and reports the cost of offering a new entry to the boards.
+The database is kept in /tmp between runs with the same row count.
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.migrations import run_migrations
+from app.models.leaderboard import LeaderboardEntry
+from app.services.global_leaderboard import TIME_FILTERS, GlobalLeaderboard, query_window
+from app.services.leaderboard_ranking import TopKBoards
+from app.services.shared_state import MemoryBackend
+
+DEFAULT_ROWS = 10_000_000
+CHUNK = 100_000
+READS = 200
+OFFERS = 10_000
+
+
+def build_database(path: str, rows: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    run_migrations(engine)
+    engine.dispose()
+
+    now = datetime.utcnow()
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=OFF")
+    connection.execute("PRAGMA synchronous=OFF")
+    for start in range(0, rows, CHUNK):
+        connection.executemany(
+            "INSERT INTO leaderboard (id, short_code, player_nickname, completion_time_seconds,"
+            " hints_used, score, difficulty, completed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    str(uuid.uuid4()), f"c{random.randrange(50_000)}", f"p{i}",
+                    round(random.uniform(5, 600), 2), random.randint(0, 3), random.randint(0, 5000), 'medium',
+                    (now - timedelta(seconds=random.uniform(0, 60 * 86400))).strftime("%Y-%m-%d %H:%M:%S.%f")
+                )
+                for i in range(start, min(start + CHUNK, rows))
+            ]
+        )
+        connection.commit()
+        print(f"  inserted {min(start + CHUNK, rows):,} rows", end="\r")
+    connection.execute("ANALYZE")
+    connection.close()
+    print()
+
+
+async def bench(path: str) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    board = GlobalLeaderboard(capacity=100, backend=MemoryBackend(top=TopKBoards()))
+
+    async with sessions() as db:
+        start = time.perf_counter()
+        await board.rebuild(db)
+        print(f"  rebuild all windows: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        print(f"  {'window':>8} | {'db query (ms)':>14} | {'board read (ms)':>16}")
+        for time_filter in TIME_FILTERS:
+            start = time.perf_counter()
+            for _ in range(5):
+                await query_window(time_filter, 100, db)
+            query_ms = (time.perf_counter() - start) / 5 * 1000
+
+            start = time.perf_counter()
+            for _ in range(READS):
+                await board.get(time_filter, 100, db)
+            read_ms = (time.perf_counter() - start) / READS * 1000
+
+            print(f"  {time_filter:>8} | {query_ms:>14.2f} | {read_ms:>16.4f}")
+
+    now = datetime.utcnow()
+    entries = [
+        LeaderboardEntry(
+            id=str(uuid.uuid4()), short_code='bench', player_nickname='p', completion_time_seconds=random.uniform(5, 600),
+            hints_used=0, score=random.randint(0, 5000), difficulty='medium', completed_at=now
+        )
+        for _ in range(OFFERS)
+    ]
+    start = time.perf_counter()
+    for entry in entries:
+        await board.record(entry, relay=False)
+    offer_us = (time.perf_counter() - start) / OFFERS * 1e6
+    print(f"  offer new entry to all windows: {offer_us:.2f} us")
+
+    await engine.dispose()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    path = f"/tmp/jfgi_bench_global_{rows}.db"
+
+    print("=" * 60)
+    print(f"GLOBAL LEADERBOARD BENCHMARK ({rows:,} rows)")
+    print("=" * 60)
+    if not os.path.exists(path):
+        build_database(path, rows)
+    asyncio.run(bench(path))
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
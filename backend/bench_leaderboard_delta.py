@@ -0,0 +1,120 @@
+"""
+Benchmark for leaderboard delta encoding
+Run with: python backend/bench_leaderboard_delta.py
+
+Simulates a busy room where new scores keep landing on a top-10 board and
+compares the bytes sent per update for full leaderboard_update messages
+against leaderboard_delta messages, with every client acknowledging each
+version and with clients that only ack every few versions.
+"""
+import asyncio
+import json
+import random
+import uuid
+from datetime import datetime, timezone
+
+from app.services.leaderboard_stream import LeaderboardStream
+from app.services.websocket_manager import manager
+
+CLIENTS = 1_000
+UPDATES = 500
+TOP_N = 10
+SHORT_CODE = "bench1"
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.bytes_received = 0
+        self.messages = 0
+        self.last_version = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.bytes_received += len(text)
+        self.messages += 1
+        if '"version"' in text:
+            self.last_version = json.loads(text)['version']
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def new_entry() -> dict:
+    return {
+        'id': str(uuid.uuid4()),
+        'player_nickname': f"player{random.randint(1, 99999)}",
+        'player_country': random.choice(['US', 'DE', 'IN', 'BR', None]),
+        'completion_time': round(random.uniform(5, 120), 2),
+        'hints_used': random.randint(0, 3),
+        'score': random.randint(100, 1000),
+        'difficulty': 'medium',
+        'rank': None,
+        'percentile': None,
+        'created_at': datetime.now(timezone.utc).isoformat()
+    }
+
+
+def top_n(board: list, total: int) -> list:
+    entries = sorted(board, key=lambda e: (-e['score'], e['completion_time']))[:TOP_N]
+    return [dict(e, rank=i + 1, percentile=(i + 1) / total * 100) for i, e in enumerate(entries)]
+
+
+async def run(ack_every: int, delta_clients: bool) -> tuple:
+    stream = LeaderboardStream(top_n=TOP_N, history_size=16, max_unacked=8)
+
+    sockets = [FakeWebSocket() for _ in range(CLIENTS)]
+    for ws in sockets:
+        await manager.connect(ws, SHORT_CODE)
+
+    random.seed(1)
+    board = [new_entry() for _ in range(50)]
+    await stream.publish(SHORT_CODE, top_n(board, len(board)), len(board))
+    if delta_clients:
+        for ws in sockets:
+            await stream.handle_ack(ws, SHORT_CODE, None)
+    await manager.flush()
+    for ws in sockets:
+        ws.bytes_received = ws.messages = 0
+
+    for i in range(UPDATES):
+        board.append(new_entry())
+        await stream.publish(SHORT_CODE, top_n(board, len(board)), len(board))
+        await manager.flush()
+        if delta_clients and (i + 1) % ack_every == 0:
+            for ws in sockets:
+                await stream.handle_ack(ws, SHORT_CODE, ws.last_version)
+            await manager.flush()
+
+    for ws in sockets:
+        manager.disconnect(ws)
+
+    sent = sum(ws.bytes_received for ws in sockets)
+    messages = sum(ws.messages for ws in sockets)
+    return sent / CLIENTS / UPDATES, messages / CLIENTS, stream.get_stats()
+
+
+async def main():
+    print("=" * 60)
+    print("LEADERBOARD DELTA BENCHMARK")
+    print("=" * 60)
+    print(f"  {CLIENTS:,} clients, {UPDATES} new scores on a top-{TOP_N} board")
+
+    legacy_bytes, legacy_messages, _ = await run(1, delta_clients=False)
+    acked_bytes, acked_messages, acked_stats = await run(1, delta_clients=True)
+    lagging_bytes, lagging_messages, lagging_stats = await run(10, delta_clients=True)
+
+    print(f"  {'':<26} | {'bytes/update/client':>19} | {'messages/client':>15}")
+    print(f"  {'full leaderboard_update':<26} | {legacy_bytes:>19.0f} | {legacy_messages:>15.0f}")
+    print(f"  {'deltas, ack every update':<26} | {acked_bytes:>19.0f} | {acked_messages:>15.0f}")
+    print(f"  {'deltas, ack every 10':<26} | {lagging_bytes:>19.0f} | {lagging_messages:>15.0f}")
+    print(f"  reduction: {legacy_bytes / acked_bytes:.1f}x (acked), {legacy_bytes / lagging_bytes:.1f}x (lagging)")
+    print(f"  avg delta {acked_stats['avg_delta_bytes']} bytes, "
+          f"avg snapshot {lagging_stats['avg_snapshot_bytes']} bytes, "
+          f"{lagging_stats['clients_paused']:,} pauses while lagging")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
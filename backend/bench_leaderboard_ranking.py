@@ -0,0 +1,60 @@
+"""
+Benchmark for the incremental leaderboard rank index
+Run with: python backend/bench_leaderboard_ranking.py
+
+Inserts a fixed batch of new scores into boards of increasing size and
+reports the average cost per insert and per rank lookup. With the rank
+index both should stay flat as the board grows.
+"""
+import random
+import time
+import uuid
+
+from app.services.leaderboard_ranking import LeaderboardRankIndex
+
+BOARD_SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+INSERTS_PER_SIZE = 10_000
+
+
+def random_row():
+    return (
+        random.randint(0, 5000),
+        round(random.uniform(5, 600), 2),
+        str(uuid.uuid4())
+    )
+
+
+def bench_board(size: int):
+    index = LeaderboardRankIndex()
+    index.load("bench", (random_row() for _ in range(size)))
+
+    new_rows = [random_row() for _ in range(INSERTS_PER_SIZE)]
+
+    start = time.perf_counter()
+    for score, completion_time, entry_id in new_rows:
+        index.insert("bench", score, completion_time, entry_id)
+    insert_us = (time.perf_counter() - start) / INSERTS_PER_SIZE * 1e6
+
+    start = time.perf_counter()
+    for score, completion_time, entry_id in new_rows:
+        index.rank("bench", score, completion_time, entry_id)
+    rank_us = (time.perf_counter() - start) / INSERTS_PER_SIZE * 1e6
+
+    return insert_us, rank_us
+
+
+def main():
+    print("=" * 60)
+    print("LEADERBOARD RANK INDEX BENCHMARK")
+    print("=" * 60)
+    print(f"  {'entries':>10} | {'insert (us)':>12} | {'rank (us)':>10}")
+
+    for size in BOARD_SIZES:
+        insert_us, rank_us = bench_board(size)
+        print(f"  {size:>10,} | {insert_us:>12.2f} | {rank_us:>10.2f}")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
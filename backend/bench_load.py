@@ -0,0 +1,113 @@
+"""
+Load test for concurrent initialize/end traffic
+Run with: python backend/bench_load.py [--base-url http://localhost:8000] [--workers 50] [--games 20]
+
+Without --base-url the app is driven in-process against a throwaway SQLite
+database. Pass --base-url to hit a running server instead, e.g. one started
+from an older revision for a before/after comparison. Reports p50/p99
+request latency and event-loop lag (how long a 10 ms sleep overshoots
+while the load runs), which is where blocking DB calls show up.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import httpx
+
+SHORT_CODE = "load01"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def play(client: httpx.AsyncClient, latencies: list, games: int) -> None:
+    for _ in range(games):
+        start = time.perf_counter()
+        r = await client.get(f"/api/v1/game/{SHORT_CODE}/initialize")
+        latencies.append(time.perf_counter() - start)
+        session_id = r.json()["difficulty_config"]["session_id"]
+
+        start = time.perf_counter()
+        await client.post(f"/api/v1/game/{SHORT_CODE}/end", json={
+            "outcome": random.choice(["completed", "failed", "timeout"]),
+            "score": random.randint(0, 2000),
+            "time_remaining": random.randint(0, 60),
+            "completion_time": random.randint(5, 120),
+            "submit_to_leaderboard": random.random() < 0.3,
+            "nickname": "LoadTester",
+            "session_id": session_id
+        })
+        latencies.append(time.perf_counter() - start)
+
+
+async def probe_loop_lag(lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+async def run(client: httpx.AsyncClient, workers: int, games: int) -> None:
+    latencies, lags = [], []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop_lag(lags, stop))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(play(client, latencies, games) for _ in range(workers)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+
+    print(f"  requests:       {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.0f} req/s)")
+    print(f"  latency p50:    {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"  latency p99:    {percentile(latencies, 99) * 1000:.1f} ms")
+    if lags:
+        print(f"  loop lag p99:   {percentile(lags, 99) * 1000:.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url")
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--games", type=int, default=20)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("INITIALIZE/END LOAD TEST")
+    print("=" * 60)
+    print(f"  {args.workers} concurrent players x {args.games} games")
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=30) as client:
+            await run(client, args.workers, args.games)
+    else:
+        db_path = os.path.join(tempfile.mkdtemp(), "load.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+        os.environ["ENVIRONMENT"] = "loadtest"
+
+        from app.core.database import SessionLocal
+        from app.main import app
+        from app.models import ShortURL
+
+        db = SessionLocal()
+        db.add(ShortURL(short_code=SHORT_CODE, long_url="https://example.com/load", difficulty="medium"))
+        db.commit()
+        db.close()
+
+        transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 12345))
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=30) as client:
+                await run(client, args.workers, args.games)
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""
+Benchmark for the local search index
+Run with: python backend/bench_search.py [sizes]   (default 10000,100000)
+
+Indexes the bundled corpus, then synthetic corpora of the given sizes
+(titles and snippets drawn from a Zipf-like vocabulary, so common words
+have long posting lists), and reports build time and lookup latency
+percentiles for 2- and 3-word queries.
+"""
+import random
+import statistics
+import sys
+import time
+
+from app.services.search_provider import DEFAULT_CORPUS_PATH, LocalSearchIndex, load_corpus
+
+DEFAULT_SIZES = (10_000, 100_000)
+QUERIES = 2_000
+VOCABULARY = [f"word{i}" for i in range(20_000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def synthetic_corpus(size: int, rng: random.Random):
+    for i in range(size):
+        yield {
+            'title': ' '.join(rng.choices(VOCABULARY, WEIGHTS, k=6)),
+            'link': f"https://site{i % 5000}.example/page/{i}",
+            'snippet': ' '.join(rng.choices(VOCABULARY, WEIGHTS, k=25))
+        }
+
+
+def bench(label: str, documents) -> None:
+    rng = random.Random(2)
+    index = LocalSearchIndex()
+    start = time.perf_counter()
+    index.build(documents)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    vocabulary = list(index._postings)
+    latencies = []
+    for _ in range(QUERIES):
+        query = ' '.join(rng.choices(vocabulary, k=rng.choice((2, 3))))
+        start = time.perf_counter()
+        index.lookup(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    print(
+        f"  {label:>10} | {len(index.documents):>9,} | {build_ms:>10.0f} | {statistics.median(latencies):>8.3f} |"
+        f" {latencies[int(len(latencies) * 0.99)]:>8.3f}"
+    )
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1].split(',')] if len(sys.argv) > 1 else DEFAULT_SIZES
+    print("=" * 60)
+    print(f"LOCAL SEARCH BENCHMARK ({QUERIES:,} queries per corpus)")
+    print("=" * 60)
+    print(f"  {'corpus':>10} | {'documents':>9} | {'build ms':>10} | {'p50 ms':>8} | {'p99 ms':>8}")
+    bench('bundled', load_corpus(DEFAULT_CORPUS_PATH))
+    rng = random.Random(1)
+    for size in sizes:
+        bench('synthetic', list(synthetic_corpus(size, rng)))
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark for short code allocation
+Run with: python backend/bench_short_codes.py [sizes]   (default 1000000,10000000,50000000)
+
+For each size, builds a migrated SQLite database holding that many
+existing short URLs (scattered 6-character codes, like the old random
+ones), then creates URLs the way the endpoint does, committing each one:
+first with the previous generator (random code + SELECT per attempt),
+then with the block allocator (no existence check, retry on the unique
+index). Databases are kept in /tmp between runs with the same size.
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import time
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.migrations import run_migrations
+from app.models.sequence import CodeSequence
+from app.models.url import ShortURL
+from app.services.short_code_allocator import ShortCodeAllocator
+from app.utils.short_code import ALPHABET, BASE, encode_base62
+
+DEFAULT_SIZES = (1_000_000, 10_000_000, 50_000_000)
+CHUNK = 200_000
+CREATES = 2_000
+
+# Affine bijection mod 62^6 spreads the existing codes over the keyspace
+SPACE = BASE ** 6
+MULTIPLIER = 40_503_119_467
+
+
+def build_database(path: str, rows: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    run_migrations(engine)
+    engine.dispose()
+
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=OFF")
+    connection.execute("PRAGMA synchronous=OFF")
+    # Rebuilding the unique index once is much faster than scattered inserts
+    connection.execute("DROP INDEX ix_short_urls_short_code")
+    for start in range(0, rows, CHUNK):
+        connection.executemany(
+            "INSERT INTO short_urls (id, short_code, long_url) VALUES (?, ?, ?)",
+            [
+                (f"{i:036d}", encode_base62(i * MULTIPLIER % SPACE, 6), "https://example.com")
+                for i in range(start, min(start + CHUNK, rows))
+            ]
+        )
+        connection.commit()
+        print(f"  inserted {min(start + CHUNK, rows):,} rows", end="\r")
+    print()
+    connection.execute("CREATE UNIQUE INDEX ix_short_urls_short_code ON short_urls (short_code)")
+    connection.execute("ANALYZE")
+    connection.close()
+
+
+def random_code() -> str:
+    """The previous generator"""
+    return ''.join(random.choice(ALPHABET) for _ in range(6))
+
+
+async def create_checked(sessions) -> dict:
+    """Random code, SELECT to check it is free, INSERT (up to 10 attempts)"""
+    selects = 0
+    async with sessions() as db:
+        for i in range(CREATES):
+            for _ in range(10):
+                code = random_code()
+                selects += 1
+                if not await db.scalar(select(ShortURL.id).where(ShortURL.short_code == code)):
+                    break
+            db.add(ShortURL(short_code=code, long_url="https://bench.example"))
+            await db.commit()
+    return {'selects': selects, 'collisions': selects - CREATES}
+
+
+async def create_allocated(sessions) -> dict:
+    """Allocated code, INSERT, retry on IntegrityError"""
+    allocator = ShortCodeAllocator(session_factory=sessions)
+    async with sessions() as db:
+        for i in range(CREATES):
+            while True:
+                code = await allocator.next_code()
+                db.add(ShortURL(short_code=code, long_url="https://bench.example"))
+                try:
+                    await db.commit()
+                    break
+                except IntegrityError:
+                    await db.rollback()
+                    allocator.collisions += 1
+    return {'selects': 0, 'collisions': allocator.collisions, 'blocks': allocator.blocks_allocated}
+
+
+async def bench(path: str) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    print(f"  {'generator':>10} | {'creates/s':>10} | {'ms/create':>10} | {'SELECTs':>8} | {'collisions':>10}")
+    for name, create in (('random', create_checked), ('allocator', create_allocated)):
+        start = time.perf_counter()
+        result = await create(sessions)
+        elapsed = time.perf_counter() - start
+        print(
+            f"  {name:>10} | {CREATES / elapsed:>10.0f} | {elapsed / CREATES * 1000:>10.3f} |"
+            f" {result['selects']:>8} | {result['collisions']:>10}"
+        )
+
+    # Leave the database as built for the next run
+    async with engine.begin() as conn:
+        await conn.execute(ShortURL.__table__.delete().where(ShortURL.long_url == "https://bench.example"))
+        await conn.execute(CodeSequence.__table__.delete())
+    await engine.dispose()
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1].split(',')] if len(sys.argv) > 1 else DEFAULT_SIZES
+
+    for rows in sizes:
+        path = f"/tmp/jfgi_bench_codes_{rows}.db"
+        print("=" * 60)
+        print(f"SHORT CODE BENCHMARK ({rows:,} existing codes, {CREATES:,} creates)")
+        print("=" * 60)
+        if not os.path.exists(path):
+            build_database(path, rows)
+        asyncio.run(bench(path))
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
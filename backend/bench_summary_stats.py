@@ -0,0 +1,96 @@
+"""
+Benchmark for per-event summary stat updates
+Run with: python backend/bench_summary_stats.py
+
+Seeds a short code with a growing session history and times the
+track_completion/track_failure path, which updates the URL's summary
+counters. Per-event latency should stay constant as history grows.
+"""
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models import Base, ShortURL, URLAnalytics
+from app.services.analytics_service import AnalyticsService
+
+HISTORY_SIZES = [1_000, 10_000, 100_000, 500_000]
+EVENTS_PER_SIZE = 500
+SHORT_CODE = "bench1"
+
+
+async def seed(db, count: int) -> None:
+    outcomes = ['completed', 'failed', 'timeout', 'abandoned', None]
+    batch = []
+    for _ in range(count):
+        outcome = random.choice(outcomes)
+        batch.append({
+            'id': str(uuid.uuid4()),
+            'short_code': SHORT_CODE,
+            'session_start': datetime.utcnow(),
+            'outcome': outcome,
+            'completion_time_seconds': random.uniform(5, 300) if outcome == 'completed' else None,
+        })
+        if len(batch) == 10_000:
+            await db.execute(insert(URLAnalytics), batch)
+            batch = []
+    if batch:
+        await db.execute(insert(URLAnalytics), batch)
+    await db.commit()
+
+
+async def bench_events(db) -> float:
+    session_ids = [str(uuid.uuid4()) for _ in range(EVENTS_PER_SIZE)]
+    await db.execute(insert(URLAnalytics), [
+        {'id': sid, 'short_code': SHORT_CODE, 'session_start': datetime.utcnow()}
+        for sid in session_ids
+    ])
+    await db.commit()
+
+    start = time.perf_counter()
+    for i, session_id in enumerate(session_ids):
+        if i % 2:
+            await AnalyticsService.track_completion(session_id, random.randint(5, 300), 0, 1, 500, db)
+        else:
+            await AnalyticsService.track_failure(session_id, 1, 0, 0, db)
+    return (time.perf_counter() - start) / EVENTS_PER_SIZE * 1000
+
+
+async def main():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    db = async_sessionmaker(engine, expire_on_commit=False)()
+    db.add(ShortURL(short_code=SHORT_CODE, long_url="https://example.com"))
+    await db.commit()
+
+    print("=" * 60)
+    print("SUMMARY STATS BENCHMARK")
+    print("=" * 60)
+    print(f"  {'sessions':>10} | {'per event (ms)':>14} | {'reconcile (s)':>13}")
+
+    seeded = 0
+    for size in HISTORY_SIZES:
+        await seed(db, size - seeded)
+        seeded = size
+
+        per_event_ms = await bench_events(db)
+        seeded += EVENTS_PER_SIZE
+
+        start = time.perf_counter()
+        await AnalyticsService.reconcile_summary_stats(db, SHORT_CODE)
+        reconcile_s = time.perf_counter() - start
+
+        print(f"  {size:>10,} | {per_event_ms:>14.3f} | {reconcile_s:>13.2f}")
+
+    await db.close()
+    await engine.dispose()
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
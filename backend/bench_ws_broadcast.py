@@ -0,0 +1,145 @@
+"""
+Benchmark for WebSocket room broadcasts
+Run with: python backend/bench_ws_broadcast.py
+
+Connects 10k simulated sockets to one room and times leaderboard
+broadcasts until every socket has received them, comparing the old
+sequential send_json loop with the queued fan-out in ConnectionManager.
+A second round makes a few sockets slow to show that they no longer
+hold up the rest of the room.
+"""
+import asyncio
+import json
+import time
+import tracemalloc
+
+from app.services.websocket_manager import ConnectionManager
+
+CONNECTIONS = 10_000
+BROADCASTS = 20
+SLOW_SOCKETS = 10
+SLOW_SEND_SECONDS = 0.2
+SHORT_CODE = "bench1"
+
+
+class FakeWebSocket:
+    """Stands in for a Starlette WebSocket; sends yield to the loop like a real write"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received = 0
+        self.last_received_at = 0.0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        await asyncio.sleep(self.delay)
+        self.received += 1
+        self.last_received_at = time.perf_counter()
+
+    async def send_json(self, message: dict):
+        await self.send_text(json.dumps(message, separators=(",", ":")))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def leaderboard_message(i: int) -> dict:
+    return {
+        'type': 'leaderboard_update',
+        'data': {'entries': [
+            {'id': f"entry-{i}-{n}", 'player_nickname': f"player{n}", 'score': 1000 - n,
+             'completion_time': 30.5 + n, 'hints_used': n % 3, 'rank': n + 1}
+            for n in range(10)
+        ]}
+    }
+
+
+async def sequential_broadcast(sockets, message: dict) -> None:
+    """The previous broadcast_to_room: serialize and await each socket in turn"""
+    for ws in sockets:
+        await ws.send_json(message)
+
+
+async def bench_sequential(sockets) -> float:
+    start = time.perf_counter()
+    for i in range(BROADCASTS):
+        await sequential_broadcast(sockets, leaderboard_message(i))
+    return (time.perf_counter() - start) / BROADCASTS * 1000
+
+
+async def bench_queued(manager: ConnectionManager) -> float:
+    start = time.perf_counter()
+    for i in range(BROADCASTS):
+        await manager.broadcast_to_room(SHORT_CODE, leaderboard_message(i))
+        await manager.flush()
+    return (time.perf_counter() - start) / BROADCASTS * 1000
+
+
+async def connect_all(manager: ConnectionManager, sockets) -> None:
+    for ws in sockets:
+        await manager.connect(ws, SHORT_CODE)
+    await manager.flush()
+
+
+async def main():
+    print("=" * 60)
+    print("WEBSOCKET BROADCAST BENCHMARK")
+    print("=" * 60)
+    print(f"  {CONNECTIONS:,} sockets in one room, {BROADCASTS} broadcasts")
+
+    # Fast clients only
+    sockets = [FakeWebSocket() for _ in range(CONNECTIONS)]
+    sequential_ms = await bench_sequential(sockets)
+
+    manager = ConnectionManager(send_queue_size=64, send_timeout_seconds=1.0)
+    await connect_all(manager, [FakeWebSocket() for _ in range(CONNECTIONS)])
+    queued_ms = await bench_queued(manager)
+
+    # Memory is measured in a separate run; tracemalloc slows everything down
+    tracemalloc.start()
+    memory_manager = ConnectionManager(send_queue_size=64, send_timeout_seconds=1.0)
+    await connect_all(memory_manager, [FakeWebSocket() for _ in range(CONNECTIONS)])
+    connected_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    await memory_manager.broadcast_to_room(SHORT_CODE, leaderboard_message(0))
+    await memory_manager.flush()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"  {'':<26} | {'per broadcast (ms)':>18}")
+    print(f"  {'sequential send_json':<26} | {sequential_ms:>18.1f}")
+    print(f"  {'queued fan-out':<26} | {queued_ms:>18.1f}")
+    print(f"  enqueue only (last)        | {manager.last_broadcast_ms:>18.1f}")
+    print(f"  memory: {connected_bytes / 1024 / 1024:.1f} MB for {CONNECTIONS:,} connections, "
+          f"{peak_bytes / 1024 / 1024:.1f} MB peak while broadcasting")
+
+    # A few slow clients
+    print("-" * 60)
+    print(f"  {SLOW_SOCKETS} slow sockets ({SLOW_SEND_SECONDS}s per send)")
+
+    sockets = [FakeWebSocket(SLOW_SEND_SECONDS if i < SLOW_SOCKETS else 0.0) for i in range(CONNECTIONS)]
+    start = time.perf_counter()
+    await sequential_broadcast(sockets, leaderboard_message(0))
+    sequential_slow_ms = (max(ws.last_received_at for ws in sockets[SLOW_SOCKETS:]) - start) * 1000
+
+    manager = ConnectionManager(send_queue_size=64, send_timeout_seconds=SLOW_SEND_SECONDS / 2)
+    sockets = [FakeWebSocket() for _ in range(CONNECTIONS)]
+    await connect_all(manager, sockets)
+    for ws in sockets[:SLOW_SOCKETS]:
+        ws.delay = SLOW_SEND_SECONDS
+
+    start = time.perf_counter()
+    await manager.broadcast_to_room(SHORT_CODE, leaderboard_message(0))
+    await manager.flush()
+    queued_slow_ms = (max(ws.last_received_at for ws in sockets[SLOW_SOCKETS:]) - start) * 1000
+
+    print(f"  sequential: last fast socket served after {sequential_slow_ms:,.0f} ms")
+    print(f"  queued:     last fast socket served after {queued_slow_ms:,.0f} ms")
+    print(f"  slow consumers dropped: {manager.slow_consumers_dropped}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
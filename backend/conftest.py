@@ -0,0 +1,49 @@
+"""
+Shared test fixtures
+Async tests run on asyncio through anyio's pytest plugin (mark a module
+with `pytestmark = pytest.mark.anyio`); database tests get a fresh
+SQLite database with the models' schema
+"""
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+@pytest.fixture
+async def make_engine():
+    """Factory for SQLite engines with the schema created: in memory, or a file shared between engines"""
+    engines = []
+
+    async def make(path: str = ""):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        await engine.dispose()
+
+
+@pytest.fixture
+async def engine(make_engine):
+    """In-memory database"""
+    return await make_engine()
+
+
+@pytest.fixture
+def sessions(engine):
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest.fixture
+async def db(sessions):
+    async with sessions() as session:
+        yield session
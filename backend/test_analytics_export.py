@@ -0,0 +1,153 @@
+"""
+Test the streaming analytics export: NDJSON/CSV encoding, filters, and
+that streaming 1M sessions stays under a fixed memory ceiling
+
+The 1M-row run takes most of a minute; it only runs with RUN_SLOW=1 set.
+"""
+import csv
+import io
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.v1.endpoints.analytics import export_sessions
+from app.core.database import Base
+from app.models.analytics import URLAnalytics
+from app.services.analytics_export import EXPORT_FIELDS, csv_chunks, ndjson_chunks, stream_sessions
+
+pytestmark = pytest.mark.anyio
+
+BIG_EXPORT_ROWS = 1_000_000
+SMALL_EXPORT_ROWS = 20_000
+# Allowed RSS growth while streaming; loading 1M rows at once takes gigabytes
+RSS_CEILING_MB = 64
+
+START = datetime(2026, 1, 1)
+OUTCOMES = ['completed', 'failed', 'timeout', 'abandoned']
+
+
+def rss_mb() -> float:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+async def collect(chunks) -> bytes:
+    return b''.join([chunk async for chunk in chunks])
+
+
+async def test_formats_and_filters(sessions):
+    async with sessions() as db:
+        for i in range(25):
+            db.add(URLAnalytics(
+                short_code='exp1', session_start=START + timedelta(hours=i), outcome=OUTCOMES[i % 4],
+                referrer='https://a.example/?q="x",y', score=i
+            ))
+        db.add(URLAnalytics(short_code='other', session_start=START))
+        await db.commit()
+
+    body = await collect(ndjson_chunks(stream_sessions('exp1', chunk_size=4, session_factory=sessions)))
+    rows = [json.loads(line) for line in body.decode().splitlines()]
+    assert len(rows) == 25 and list(rows[0]) == EXPORT_FIELDS
+    assert [r['score'] for r in rows] == list(range(25))
+    assert rows[0]['session_start'] == START.isoformat()
+
+    body = await collect(csv_chunks(stream_sessions(
+        'exp1', start=START + timedelta(hours=4), end=START + timedelta(hours=20), outcome='failed',
+        chunk_size=3, session_factory=sessions
+    )))
+    rows = list(csv.reader(io.StringIO(body.decode())))
+    assert rows[0] == EXPORT_FIELDS
+    assert [int(r[EXPORT_FIELDS.index('score')]) for r in rows[1:]] == [5, 9, 13, 17]
+    assert rows[1][EXPORT_FIELDS.index('referrer')] == 'https://a.example/?q="x",y'
+
+    body = await collect(csv_chunks(stream_sessions('missing', session_factory=sessions)))
+    assert body.decode().strip() == ','.join(EXPORT_FIELDS)
+
+
+async def test_endpoint_validation():
+    response = await export_sessions('exp1', format='csv')
+    assert response.media_type == 'text/csv'
+    assert 'exp1-sessions.csv' in response.headers['content-disposition']
+
+    for kwargs in ({'format': 'xml'}, {'outcome': 'won'}):
+        try:
+            await export_sessions('exp1', **kwargs)
+            assert False, f"accepted {kwargs}"
+        except HTTPException as e:
+            assert e.status_code == 400
+
+
+def _fill_database(path: str, rows: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=OFF")
+    connection.execute("PRAGMA synchronous=OFF")
+    connection.executemany(
+        "INSERT INTO url_analytics (id, short_code, visitor_ip, visitor_user_agent, session_start,"
+        " outcome, attempts, hints_used, score) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (
+                str(uuid.uuid4()), 'big1', '10.0.0.1', 'Mozilla/5.0 (export test)',
+                (START + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S.%f"), OUTCOMES[i % 4], 1, 0, i % 1000
+            )
+            for i in range(rows)
+        )
+    )
+    connection.commit()
+    connection.close()
+
+
+async def _stream_export(path: str, **kwargs):
+    """Stream the file database's export; returns (lines, chunks, RSS growth in MB)"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        lines = chunks = 0
+        baseline = peak = None
+        async for chunk in ndjson_chunks(stream_sessions('big1', session_factory=sessions, **kwargs)):
+            lines += chunk.count(b'\n')
+            chunks += 1
+            current = rss_mb()
+            # Measure from the first chunk, once the connection and cursor exist
+            baseline = current if baseline is None else baseline
+            peak = max(peak or current, current)
+        return lines, chunks, peak - baseline
+    finally:
+        await engine.dispose()
+
+
+async def test_file_export_streams_in_chunks(tmp_path):
+    path = str(tmp_path / "export.db")
+    _fill_database(path, SMALL_EXPORT_ROWS)
+
+    lines, chunks, growth = await _stream_export(path, chunk_size=1000)
+
+    assert lines == SMALL_EXPORT_ROWS
+    assert chunks >= SMALL_EXPORT_ROWS // 1000
+    assert growth < RSS_CEILING_MB
+
+
+@pytest.mark.skipif(not os.environ.get('RUN_SLOW'), reason="slow (1M rows); set RUN_SLOW=1 to run")
+async def test_million_row_export_memory_is_flat(tmp_path):
+    path = str(tmp_path / "export.db")
+    _fill_database(path, BIG_EXPORT_ROWS)
+
+    lines, _, growth = await _stream_export(path)
+
+    assert lines == BIG_EXPORT_ROWS
+    assert growth < RSS_CEILING_MB, f"RSS grew {growth:.1f} MB while streaming"
+    print(f"Streamed {lines:,} rows, RSS growth {growth:.1f} MB")
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
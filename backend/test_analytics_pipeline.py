@@ -0,0 +1,68 @@
+"""
+Test the write-behind analytics pipeline's failure handling: a batch that
+fails once is retried, and one that keeps failing is split so only the
+events that cannot be written are dropped
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models.analytics import URLAnalytics
+from app.services.analytics_pipeline import AnalyticsPipeline
+from app.services.analytics_service import AnalyticsEvent
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2026, 3, 1, 12, 0)
+
+
+def start(session_id: str) -> AnalyticsEvent:
+    return AnalyticsEvent('session_start', session_id, START, short_code='pipe1')
+
+
+async def count_sessions(sessions) -> int:
+    async with sessions() as db:
+        return await db.scalar(select(func.count()).select_from(URLAnalytics))
+
+
+async def test_failed_batch_is_retried(sessions):
+    # The first transaction goes to a database without the schema
+    broken = create_async_engine("sqlite+aiosqlite://")
+    calls = []
+
+    def session_factory():
+        calls.append(1)
+        return async_sessionmaker(broken)() if len(calls) == 1 else sessions()
+
+    pipeline = AnalyticsPipeline(session_factory=session_factory)
+    try:
+        await pipeline.enqueue_many([start('r1'), start('r2')])
+    finally:
+        await broken.dispose()
+
+    assert await count_sessions(sessions) == 2
+    stats = pipeline.get_stats()
+    assert stats['flush_retries'] == 1 and stats['flush_errors'] == 0
+    assert stats['events_written'] == 2 and stats['events_dropped'] == 0
+
+
+async def test_poison_event_is_isolated(sessions):
+    pipeline = AnalyticsPipeline(session_factory=sessions)
+    await pipeline.enqueue(start('s1'))
+
+    # A second start for s1 breaks the primary key, and with it any batch it is in
+    batch = [start('s2'), start('s1'), AnalyticsEvent('completed', 's2', START, completion_time=12.0), start('s3')]
+    await pipeline.enqueue_many(batch)
+
+    assert await count_sessions(sessions) == 3
+    async with sessions() as db:
+        assert await db.scalar(select(URLAnalytics.outcome).where(URLAnalytics.id == 's2')) == 'completed'
+    stats = pipeline.get_stats()
+    assert stats['flush_retries'] == 1 and stats['flush_errors'] == 1 and stats['batches_split'] == 2
+    assert stats['events_written'] == 4 and stats['events_dropped'] == 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
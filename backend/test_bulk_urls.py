@@ -0,0 +1,151 @@
+"""
+Test bulk URL creation: token scopes, JSON array and NDJSON bodies,
+per-row results in input order, profanity filtering and code collisions
+"""
+import json
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import func, select
+from starlette.requests import Request
+
+from app.api.v1.endpoints.urls import _read_body, bulk_create_urls
+from app.core.config import settings
+from app.core.security import BULK_CREATE_SCOPE, create_access_token, require_scope
+from app.models.url import ShortURL
+from app.services.bulk_urls import create_urls, parse_json_array, parse_ndjson
+from app.services.short_code_allocator import ShortCodeAllocator
+from app.utils.short_code import code_for_index
+
+pytestmark = pytest.mark.anyio
+
+
+def make_request(body: bytes, content_type: str = 'application/json', headers=(), chunk_size: int = 0) -> Request:
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] if chunk_size else [body]
+    received = []
+
+    async def receive():
+        received.append(chunks[len(received)])
+        return {'type': 'http.request', 'body': received[-1], 'more_body': len(received) < len(chunks)}
+
+    request = Request({
+        'type': 'http', 'method': 'POST', 'client': ('10.3.3.3', 1234),
+        'headers': [(b'content-type', content_type.encode()), *headers]
+    }, receive)
+    request.chunks_received = received
+    return request
+
+
+async def collect(results):
+    return [result async for result in results]
+
+
+async def test_token_scopes():
+    check = require_scope(BULK_CREATE_SCOPE)
+
+    claims = await check(HTTPAuthorizationCredentials(
+        scheme='Bearer', credentials=create_access_token('spring-campaign', [BULK_CREATE_SCOPE])
+    ))
+    assert claims['sub'] == 'spring-campaign'
+
+    for credentials, status in (
+        (None, 401),
+        (HTTPAuthorizationCredentials(scheme='Bearer', credentials='not-a-token'), 401),
+        (HTTPAuthorizationCredentials(scheme='Bearer', credentials=create_access_token('x', [], expires_minutes=-1)), 401),
+        (HTTPAuthorizationCredentials(scheme='Bearer', credentials=create_access_token('x', ['other'])), 403),
+    ):
+        try:
+            await check(credentials)
+            assert False, "token accepted"
+        except HTTPException as e:
+            assert e.status_code == status
+
+
+async def test_bulk_create(sessions):
+    allocator = ShortCodeAllocator(block_size=50, session_factory=sessions)
+
+    # A code the allocator will hand out is already taken by an old URL
+    async with sessions() as db:
+        db.add(ShortURL(short_code=code_for_index(3, allocator.key), long_url="https://old.example"))
+        await db.commit()
+
+    items = [
+        {'long_url': f"https://example.com/{i}", 'difficulty': 'easy' if i == 7 else 'hard',
+         'hints': ['Check the damn homepage', 'Look at the footer'], 'challenge_text': 'Find the shit'}
+        for i in range(120)
+    ]
+    items[42] = {'long_url': 'not a url'}
+    results = await collect(create_urls(
+        parse_json_array(json.dumps(items).encode()), '10.3.3.3', 'bulk:test',
+        chunk_size=25, allocator=allocator, session_factory=sessions
+    ))
+
+    assert [r['index'] for r in results] == list(range(120))
+    errors = {r['index'] for r in results if 'error' in r}
+    assert errors == {7, 42}
+    codes = [r['short_code'] for r in results if 'short_code' in r]
+    assert len(set(codes)) == 118 and code_for_index(3, allocator.key) not in codes
+    assert allocator.collisions == 1
+
+    async with sessions() as db:
+        assert await db.scalar(select(func.count(ShortURL.id))) == 119
+        url = await db.scalar(select(ShortURL).where(ShortURL.short_code == codes[0]))
+        assert url.hints == ['Check the **** homepage', 'Look at the footer']
+        assert url.challenge_text == 'Find the ****'
+        assert url.creator_ip == '10.3.3.3' and url.total_views == 0
+
+    body = b'{"long_url": "https://a.example"}\n\n{oops\n{"long_url": "https://b.example"}\n'
+    results = await collect(create_urls(
+        parse_ndjson(body), '10.3.3.3', 'bulk:test', allocator=allocator, session_factory=sessions
+    ))
+    assert [('error' in r) for r in results] == [False, True, False]
+
+
+async def test_endpoint_validation():
+    claims = {'sub': 'test', 'scopes': [BULK_CREATE_SCOPE]}
+    for body, status in ((b'{"long_url": "https://a.example"}', 400), (b'[1, 2', 400)):
+        try:
+            await bulk_create_urls(make_request(body), claims)
+            assert False, "accepted"
+        except HTTPException as e:
+            assert e.status_code == status
+
+    too_many = b'{}\n' * (settings.BULK_CREATE_MAX_ROWS + 1)
+    try:
+        await bulk_create_urls(make_request(too_many, 'application/x-ndjson'), claims)
+        assert False, "accepted"
+    except HTTPException as e:
+        assert e.status_code == 413
+
+    response = await bulk_create_urls(make_request(b'[]'), claims)
+    assert response.media_type == 'application/x-ndjson'
+
+
+async def test_body_size_limit():
+    claims = {'sub': 'test', 'scopes': [BULK_CREATE_SCOPE]}
+    limit = settings.BULK_CREATE_MAX_ROWS * settings.BULK_CREATE_MAX_ROW_BYTES
+
+    # Refused on the declared length, before any of the body is read
+    request = make_request(b'[]', headers=[(b'content-length', str(limit + 1).encode())])
+    try:
+        await bulk_create_urls(request, claims)
+        assert False, "accepted"
+    except HTTPException as e:
+        assert e.status_code == 413
+    assert request.chunks_received == []
+
+    # Without a length (chunked), reading stops once the limit is passed
+    request = make_request(b'x' * 1000, chunk_size=100)
+    try:
+        await _read_body(request, 250)
+        assert False, "accepted"
+    except HTTPException as e:
+        assert e.status_code == 413
+    assert len(request.chunks_received) == 3
+
+    assert await _read_body(make_request(b'[1, 2]', chunk_size=2), 6) == b'[1, 2]'
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
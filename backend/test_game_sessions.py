@@ -0,0 +1,183 @@
+"""
+Test the server-side game session store: clock, expiry sweep, memory bound,
+and games moving between workers through a shared backend
+"""
+import time
+import tracemalloc
+import uuid
+
+import fakeredis.aioredis
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+import app.api.v1.endpoints.analytics as analytics_endpoints
+import app.api.v1.endpoints.game as game_endpoints
+from app.api.v1.endpoints.game import CheckAnswerRequest, EndGameRequest, check_answer, end_game
+from app.models.leaderboard import LeaderboardEntry
+from app.models.url import ShortURL
+from app.services.analytics_pipeline import AnalyticsPipeline
+from app.services.game_sessions import GameSessionStore
+from app.services.shared_state import RedisBackend
+from app.services.url_cache import URLCache
+
+pytestmark = pytest.mark.anyio
+
+
+def test_session_clock_and_hint_penalty():
+    store = GameSessionStore(max_sessions=10, grace_seconds=5)
+    session = store.create('s1', 'abc123', 'easy', time_limit=120)
+
+    now = session.started_at + 30
+    session.hints_used = 2
+    assert session.time_remaining(hint_penalty_seconds=10, now=now) == 70
+    assert session.time_remaining(hint_penalty_seconds=10, now=now + 500) == 0
+
+    assert store.get('s1', 'abc123') is session
+    assert store.get('s1', 'other1') is None
+    assert store.get(None, 'abc123') is None
+
+
+def test_expiry_sweep_reports_unfinished_sessions():
+    store = GameSessionStore(max_sessions=10, grace_seconds=5)
+    done = store.create('done', 'abc123', 'easy', time_limit=60)
+    store.create('left', 'abc123', 'easy', time_limit=60)
+    store.create('long', 'abc123', 'easy', time_limit=600)
+    store.end('done')
+
+    expired = store.collect_expired(now=done.started_at + 66)
+    assert [s.session_id for s in expired] == ['left']
+    assert len(store) == 1
+
+    # Restarting the clock pushes expiry out; the old heap entry is ignored
+    session = store.get('long', 'abc123')
+    store.restart_clock(session)
+    assert store.collect_expired(now=session.started_at + 600) == []
+    assert len(store.collect_expired(now=session.started_at + 606)) == 1
+
+
+def test_capacity_evicts_closest_to_expiry():
+    store = GameSessionStore(max_sessions=2, grace_seconds=0)
+    store.create('a', 'abc123', 'easy', time_limit=10)
+    store.create('b', 'abc123', 'easy', time_limit=500)
+    store.create('c', 'abc123', 'easy', time_limit=500)
+
+    assert len(store) == 2
+    assert store.get('a', 'abc123') is None
+    assert [s.session_id for s in store.collect_expired(now=time.monotonic())] == ['a']
+
+
+def test_memory_bound_for_100k_sessions():
+    tracemalloc.start()
+    store = GameSessionStore(max_sessions=100_000)
+    for _ in range(100_000):
+        store.create(str(uuid.uuid4()), 'abc123', 'medium', time_limit=180)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"100k sessions: {current / 1024 / 1024:.1f} MB")
+    assert len(store) == 100_000
+    assert current < 64 * 1024 * 1024
+
+
+async def test_sessions_shared_between_workers():
+    backend = RedisBackend(client=fakeredis.aioredis.FakeRedis(decode_responses=True))
+    worker_a = GameSessionStore(grace_seconds=5, backend=backend)
+    worker_b = GameSessionStore(grace_seconds=5, backend=backend)
+
+    session = worker_a.create('s1', 'abc123', 'easy', time_limit=60)
+    session.hints_used = 1
+    await worker_a.save(session)
+
+    # Worker B picks the game up with A's clock; its changes reach A
+    remote = await worker_b.load('s1', 'abc123')
+    assert remote.hints_used == 1 and not remote.owned
+    assert abs(remote.elapsed() - session.elapsed()) < 0.1
+    remote.solved, remote.score = True, 900
+    worker_b.end('s1')
+    await worker_b.save(remote)
+    assert await worker_b.load('s1', 'other1') is None
+
+    assert (await worker_a.load('s1', 'abc123')).solved
+
+    # The owner does not record a timeout for a game another worker ended,
+    # and the other worker never records one
+    ended = worker_a.get('s1', 'abc123')
+    ended.ended = False  # Stale local copy
+    assert worker_a.collect_expired(now=ended.started_at + 66) == [ended]
+    assert not await worker_a._refresh_expired(ended)
+    assert worker_b.collect_expired(now=time.monotonic() + 66) == []
+
+
+async def test_end_game_on_another_worker(sessions):
+    backend = RedisBackend(client=fakeredis.aioredis.FakeRedis(decode_responses=True))
+    worker_a = GameSessionStore(backend=backend)
+    worker_b = GameSessionStore(backend=backend)
+    originals = (game_endpoints.url_cache, game_endpoints.game_sessions, game_endpoints.analytics_pipeline)
+    game_endpoints.url_cache = URLCache()
+    game_endpoints.analytics_pipeline = AnalyticsPipeline(session_factory=sessions)
+    try:
+        async with sessions() as db:
+            db.add(ShortURL(short_code='wrk01', long_url='https://example.com/', difficulty='easy'))
+            await db.commit()
+
+            game_endpoints.game_sessions = worker_a
+            await worker_a.save(worker_a.create('game1', 'wrk01', 'easy', time_limit=120))
+            response = await check_answer('wrk01', CheckAnswerRequest(submitted_url='example.com', session_id='game1'), db)
+            assert response.correct and response.session_found
+
+            # Submitted through another worker; a retry gets the same entry
+            game_endpoints.game_sessions = worker_b
+            request = EndGameRequest(
+                outcome='completed', score=99999, time_remaining=0, submit_to_leaderboard=True,
+                nickname='player', session_id='game1'
+            )
+            first = await end_game('wrk01', request, db)
+            assert first['session_found'] and first['leaderboard_id'] is not None
+            assert first['final_score'] == response.score
+            game_endpoints.game_sessions = worker_a
+            retry = await end_game('wrk01', request, db)
+            assert retry['leaderboard_id'] == first['leaderboard_id']
+            assert await db.scalar(select(func.count()).select_from(LeaderboardEntry)) == 1
+
+            # Unknown session: flat values, flagged, no leaderboard entry, and
+            # not counted again (an expired one was recorded as a timeout)
+            counted = select(ShortURL.total_completions).where(ShortURL.short_code == 'wrk01')
+            before = await db.scalar(counted.execution_options(populate_existing=True))
+            response = await check_answer('wrk01', CheckAnswerRequest(submitted_url='example.com', session_id='gone'), db)
+            assert response.correct and not response.session_found
+            assert await db.scalar(counted.execution_options(populate_existing=True)) == before
+            result = await end_game('wrk01', request.model_copy(update={'session_id': 'gone'}), db)
+            assert not result['session_found'] and result['leaderboard_id'] is None
+            assert await db.scalar(select(func.count()).select_from(LeaderboardEntry)) == 1
+    finally:
+        game_endpoints.url_cache, game_endpoints.game_sessions, game_endpoints.analytics_pipeline = originals
+
+
+async def test_abandonment_on_another_worker(sessions):
+    backend = RedisBackend(client=fakeredis.aioredis.FakeRedis(decode_responses=True))
+    worker_a = GameSessionStore(backend=backend)
+    worker_b = GameSessionStore(backend=backend)
+    originals = (analytics_endpoints.game_sessions, analytics_endpoints.analytics_pipeline)
+    analytics_endpoints.game_sessions = worker_b
+    analytics_endpoints.analytics_pipeline = AnalyticsPipeline(session_factory=sessions)
+    try:
+        session = worker_a.create('left1', 'abn01', 'easy', time_limit=60)
+        await worker_a.save(session)
+
+        # Another URL's code does not end the game
+        with pytest.raises(HTTPException) as excinfo:
+            await analytics_endpoints.track_abandonment('other1', 'left1')
+        assert excinfo.value.status_code == 404
+        assert not (await worker_b.load('left1', 'abn01')).ended
+
+        # Abandoned through worker B: the owner does not record a timeout over it
+        assert (await analytics_endpoints.track_abandonment('abn01', 'left1'))['success']
+        assert worker_a.collect_expired(now=session.expires_at + 1) == [session]
+        assert not await worker_a._refresh_expired(session)
+    finally:
+        analytics_endpoints.game_sessions, analytics_endpoints.analytics_pipeline = originals
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
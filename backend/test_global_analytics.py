@@ -0,0 +1,101 @@
+"""
+Test the global analytics snapshot: served from memory between refreshes,
+kept current by analytics batches, and revalidated with ETag/Last-Modified
+"""
+import asyncio
+
+import pytest
+from fastapi import Response
+from starlette.requests import Request
+
+from app.api.v1.endpoints.analytics import get_global_analytics
+from app.models.url import ShortURL
+from app.services.analytics_service import AnalyticsEvent, AnalyticsService
+from app.services.global_analytics import GlobalAnalytics, compute_global_analytics, global_analytics
+
+pytestmark = pytest.mark.anyio
+
+
+def make_request(**headers) -> Request:
+    return Request({
+        'type': 'http',
+        'headers': [(name.replace('_', '-').encode(), value.encode()) for name, value in headers.items()]
+    })
+
+
+@pytest.fixture
+async def sessions(sessions):
+    """The shared database with three URLs"""
+    async with sessions() as db:
+        for i in range(3):
+            db.add(ShortURL(short_code=f"ga{i}", long_url="https://example.com", total_views=10, total_completions=4))
+        await db.commit()
+    return sessions
+
+
+async def test_refresher_serves_snapshots(sessions):
+    snapshots = GlobalAnalytics(interval_seconds=0.05, session_factory=sessions)
+    try:
+        await snapshots.start()
+        await asyncio.sleep(0.01)
+        first = await snapshots.get()
+        assert first.data['total_urls'] == 3 and first.data['total_views'] == 30
+        assert first.version == 1
+
+        async with sessions() as db:
+            db.add(ShortURL(short_code='ga9', long_url="https://example.com", total_views=5))
+            await db.commit()
+
+        # Reads never scan; the refresher picks the new URL up
+        reads = [await snapshots.get() for _ in range(100)]
+        assert all(r.etag == first.etag for r in reads)
+        await asyncio.sleep(0.15)
+        latest = await snapshots.get()
+        assert latest.data['total_urls'] == 4 and latest.version == 2
+
+        # Unchanged data keeps its version and ETag
+        refreshes = snapshots.refreshes
+        await asyncio.sleep(0.15)
+        assert snapshots.refreshes > refreshes and (await snapshots.get()).version == 2
+
+        stats = snapshots.get_stats()
+        assert stats['running'] and stats['age_seconds'] < 1 and stats['last_refresh_ms'] > 0
+    finally:
+        await snapshots.stop()
+
+
+async def test_endpoint_conditional_requests(db):
+    response = Response()
+    body = await get_global_analytics(make_request(), response, db)
+    etag, modified = response.headers['etag'], response.headers['last-modified']
+    assert body['total_views'] == 30
+
+    cached = await get_global_analytics(make_request(if_none_match=etag), Response(), db)
+    assert cached.status_code == 304 and cached.headers['etag'] == etag
+    cached = await get_global_analytics(make_request(if_modified_since=modified), Response(), db)
+    assert cached.status_code == 304
+
+    # A committed batch updates the snapshot (and its ETag) without a refresh
+    refreshes = global_analytics.refreshes
+    assert await AnalyticsService.record_events([
+        AnalyticsEvent('session_start', 's1', short_code='ga0'),
+        AnalyticsEvent('completed', 's1', completion_time=12.0),
+        AnalyticsEvent('ad_click', 's1', estimated_revenue=0.5),
+    ], db)
+    response = Response()
+    body = await get_global_analytics(make_request(if_none_match=etag), response, db)
+    assert isinstance(body, dict) and response.headers['etag'] != etag
+    assert body['total_views'] == 31 and body['total_completions'] == 13
+    assert body['total_revenue'] == 0.5
+    global_analytics.count_new_url()
+    assert (await get_global_analytics(make_request(), Response(), db))['total_urls'] == 4
+    assert global_analytics.refreshes == refreshes
+
+    # ...and agrees with a full recompute
+    fresh = await compute_global_analytics(db)
+    for field in ('total_views', 'total_completions', 'total_revenue', 'completion_rate'):
+        assert body[field] == fresh[field], field
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,108 @@
+"""
+Test the global leaderboard top-K boards against the database query they
+replace, for every window, on both state backends, across day rollover,
+the sliding week and a second worker fed over the backplane
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import fakeredis.aioredis
+import pytest
+
+from app.models.leaderboard import LeaderboardEntry
+from app.services.global_leaderboard import TIME_FILTERS, GlobalLeaderboard, query_window
+from app.services.leaderboard_ranking import TopKBoards
+from app.services.shared_state import MemoryBackend, RedisBackend
+from app.services.ws_backplane import MemoryBackplane
+
+pytestmark = pytest.mark.anyio
+
+CAPACITY = 5
+
+
+async def add_entry(board: GlobalLeaderboard, db, score: int, completed_at: datetime, **fields):
+    entry = LeaderboardEntry(
+        short_code=fields.get('short_code', 'glob1'), player_nickname=f"p{score}",
+        completion_time_seconds=fields.get('completion_time', 30.0), hints_used=0,
+        score=score, difficulty='easy', completed_at=completed_at
+    )
+    db.add(entry)
+    await db.commit()
+    await db.refresh(entry)
+    await board.record(entry)
+    return entry
+
+
+async def assert_matches_database(board: GlobalLeaderboard, db, now: datetime):
+    for time_filter in TIME_FILTERS:
+        served = await board.get(time_filter, CAPACITY, db, now=now)
+        expected = await query_window(time_filter, CAPACITY, db, now)
+        assert [e['id'] for e in served] == [e['id'] for e in expected], time_filter
+        assert [e['rank'] for e in served] == list(range(1, len(expected) + 1))
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def backend(request):
+    if request.param == 'redis':
+        return RedisBackend(client=fakeredis.aioredis.FakeRedis(decode_responses=True))
+    return MemoryBackend(top=TopKBoards())
+
+
+async def test_windows_match_database(backend, db):
+    board = GlobalLeaderboard(capacity=CAPACITY, backend=backend)
+    now = datetime.utcnow()
+
+    # Old high scores, recent mid scores, today's low scores
+    for score in (900, 800, 700):
+        await add_entry(board, db, score, now - timedelta(days=10))
+    for score in (600, 500, 400, 300):
+        await add_entry(board, db, score, now - timedelta(days=3))
+    for score in (200, 100):
+        await add_entry(board, db, score, now - timedelta(minutes=1))
+
+    await assert_matches_database(board, db, now)
+    loads = board.board_loads
+
+    # New entries update the loaded boards without another query
+    await add_entry(board, db, 650, now)
+    await add_entry(board, db, 150, now)
+    await add_entry(board, db, 650, now, completion_time=10.0)
+    await assert_matches_database(board, db, now)
+    assert board.board_loads == loads
+
+    # Five days on: the 3-day-old entries leave the full week board,
+    # which reloads; yesterday's 'today' board is replaced
+    later = now + timedelta(days=5)
+    await assert_matches_database(board, db, later)
+    assert board.board_loads == loads + 2
+
+    # Deeper pages than the boards hold come from the database
+    deep = await board.get('all', CAPACITY + 5, db, now=later)
+    assert len(deep) == CAPACITY + 5 and board.db_fallbacks == 1
+
+
+async def test_new_entries_reach_other_workers(db):
+    hub = []
+    backplane_a, backplane_b = MemoryBackplane(hub=hub), MemoryBackplane(hub=hub)
+    worker_a = GlobalLeaderboard(CAPACITY, MemoryBackend(top=TopKBoards()), backplane_a)
+    worker_b = GlobalLeaderboard(CAPACITY, MemoryBackend(top=TopKBoards()), backplane_b)
+    await backplane_a.start()
+    await backplane_b.start()
+    now = datetime.utcnow()
+    try:
+        await worker_a.get('all', CAPACITY, db)
+        await worker_b.get('all', CAPACITY, db)
+
+        entry = await add_entry(worker_a, db, 999, now)
+        await asyncio.sleep(0.05)
+
+        top = await worker_b.get('all', CAPACITY, db)
+        assert top[0]['id'] == entry.id
+        assert worker_b.board_loads == 1
+    finally:
+        await backplane_a.stop()
+        await backplane_b.stop()
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
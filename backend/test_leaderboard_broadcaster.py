@@ -0,0 +1,69 @@
+"""
+Test that a burst of leaderboard submissions is coalesced into one broadcast
+"""
+import asyncio
+import json
+
+import pytest
+
+from app.models.leaderboard import LeaderboardEntry
+from app.services.leaderboard_broadcaster import LeaderboardBroadcaster
+from app.services.leaderboard_stream import leaderboard_stream
+from app.services.websocket_manager import manager
+
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.messages = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.messages.append(json.loads(text))
+
+
+async def test_burst_is_coalesced(sessions):
+    broadcaster = LeaderboardBroadcaster(window_ms=50, top_n=10, session_factory=sessions)
+    ws = FakeWebSocket()
+    await manager.connect(ws, 'burst1')
+    try:
+        async with sessions() as db:
+            for i in range(50):
+                db.add(LeaderboardEntry(
+                    short_code='burst1', player_nickname=f"p{i}", completion_time_seconds=30 + i,
+                    hints_used=0, score=100 + i, difficulty='easy'
+                ))
+            await db.commit()
+
+        for i in range(50):
+            broadcaster.record_score('burst1', {'nickname': f"p{i}", 'score': 100 + i})
+        # Nobody is watching this room: no query, no broadcast, but its
+        # top-N is reloaded for the next player to join
+        leaderboard_stream._get_room('empty1')
+        broadcaster.record_score('empty1', {'nickname': 'x', 'score': 1})
+
+        await asyncio.sleep(0.15)
+        await manager.flush()
+
+        updates = [m for m in ws.messages if m['type'] == 'leaderboard_update']
+        new_scores = [m for m in ws.messages if m['type'] == 'new_score']
+        assert len(updates) == 1 and len(new_scores) == 1
+        assert len(updates[0]['data']['entries']) == 10
+        assert updates[0]['data']['entries'][0]['score'] == 149
+        assert new_scores[0]['data'] == {'nickname': 'p49', 'score': 149, 'count': 50}
+
+        stats = broadcaster.get_stats()
+        assert stats['db_reads'] == 1
+        assert stats['rooms_skipped'] == 1
+        assert stats['coalescing_ratio'] == 25.5  # 51 changes over 2 flushes
+        assert leaderboard_stream._rooms['empty1'].stale
+    finally:
+        manager.disconnect(ws)
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,92 @@
+"""
+Test the leaderboard rank index: the sorted rank list against a plain
+sorted list through bucket splits and removals, and ranks, ties and
+percentiles per board
+"""
+import random
+from bisect import bisect_left
+
+import pytest
+
+from app.services.leaderboard_ranking import LeaderboardRankIndex
+from app.utils.sorted_rank_list import SortedRankList
+
+
+def check(ranked: SortedRankList, expected: list, probes) -> None:
+    assert len(ranked) == len(expected)
+    for key in probes:
+        assert ranked.rank(key) == bisect_left(expected, key) + 1, key
+        assert (key in ranked) == (key in expected), key
+
+
+def test_sorted_rank_list_matches_sorted_list():
+    rng = random.Random(7)
+    keys = rng.sample(range(10_000), 600)
+    probes = range(-1, 10_001, 7)
+
+    # Small buckets: the inserts split them many times over
+    ranked = SortedRankList(keys[:50], load=4)
+    expected = sorted(keys[:50])
+    for key in keys[50:]:
+        ranked.add(key)
+        expected.insert(bisect_left(expected, key), key)
+    assert len(ranked._lists) > 50
+    check(ranked, expected, probes)
+
+    # Removals empty whole buckets, including the first and the last
+    for key in [expected[0], expected[-1]] + rng.sample(expected[1:-1], 400):
+        ranked.remove(key)
+        expected.remove(key)
+    check(ranked, expected, probes)
+
+    with pytest.raises(ValueError):
+        ranked.remove(10_001)
+    with pytest.raises(ValueError):
+        ranked.remove(-1)
+
+    for key in list(expected):
+        ranked.remove(key)
+    assert len(ranked) == 0 and ranked.rank(5) == 1
+    ranked.add(5)
+    assert ranked.rank(5) == 1 and ranked.rank(6) == 2
+
+
+def test_ranks_ties_and_percentiles():
+    index = LeaderboardRankIndex()
+    index.load('abc', [(900, 40.0, 'a'), (900, 35.0, 'b'), (700, 10.0, 'c'), (900, 35.0, 'd')])
+
+    # Highest score first, then fastest; the entry id breaks exact ties
+    ordered = [(900, 35.0, 'b'), (900, 35.0, 'd'), (900, 40.0, 'a'), (700, 10.0, 'c')]
+    assert [index.rank('abc', *row) for row in ordered] == [1, 2, 3, 4]
+    assert index.total('abc') == 4
+    assert index.percentile('abc', 1) == 25 and index.percentile('abc', 4) == 100
+
+    # Inserts shift the entries they beat; a repeated insert is ignored
+    index.insert('abc', 950, 50.0, 'e')
+    index.insert('abc', 950, 50.0, 'e')
+    assert index.rank('abc', 950, 50.0, 'e') == 1 and index.rank('abc', 700, 10.0, 'c') == 5
+    assert index.total('abc') == 5
+
+    # Entries not on the board get the rank they would hold
+    assert index.rank('abc', 800, 1.0, 'z') == 5
+
+    # Unloaded boards are left for the database to rebuild
+    index.insert('other', 100, 1.0, 'x')
+    assert not index.is_loaded('other') and index.rank('other', 100, 1.0, 'x') is None
+    assert index.total('other') == 0 and index.percentile('other', 1) == 0
+
+
+def test_least_recently_used_boards_are_dropped():
+    index = LeaderboardRankIndex(max_boards=2)
+    index.load('a', [(1, 1.0, 'x')])
+    index.load('b', [(1, 1.0, 'x')])
+    index.rank('a', 1, 1.0, 'x')
+    index.load('c', [(1, 1.0, 'x')])
+    assert index.is_loaded('a') and not index.is_loaded('b') and index.is_loaded('c')
+
+    index.invalidate('a')
+    assert not index.is_loaded('a')
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
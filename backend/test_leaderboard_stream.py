@@ -0,0 +1,166 @@
+"""
+Test versioned leaderboard deltas: snapshot on join, deltas that rebuild
+the same top-N as the full list, pausing unacknowledged clients and
+resyncing from a snapshot once the history no longer reaches back, and
+reloading a room whose scores landed while nobody on this worker watched
+"""
+import asyncio
+import json
+
+import pytest
+
+from app.services.analytics_service import AnalyticsService
+from app.services.leaderboard_stream import LeaderboardStream
+from app.services.shared_state import state_backend
+from app.services.websocket_manager import manager
+
+pytestmark = pytest.mark.anyio
+
+ROOM = 'delta1'
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.messages = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.messages.append(json.loads(text))
+
+    def take(self, message_type: str):
+        taken = [m for m in self.messages if m['type'] == message_type]
+        self.messages = []
+        return taken
+
+
+def apply_delta(entries, delta):
+    """Same steps as applyLeaderboardDelta in the frontend hook"""
+    assert delta['base'] is not None
+    removed = set(delta['removed'])
+    merged = [e for e in entries if e['id'] not in removed] + delta['added']
+    merged.sort(key=lambda e: (-e['score'], e['completion_time'], e['id']))
+    return [dict(e, rank=i + 1) for i, e in enumerate(merged)]
+
+
+async def test_leaderboard_deltas(sessions):
+    stream = LeaderboardStream(top_n=5, history_size=4, max_unacked=2, session_factory=sessions)
+    legacy, delta = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(legacy, ROOM)
+    await manager.connect(delta, ROOM)
+
+    next_score = [100]
+
+    async def add_score_and_publish():
+        async with sessions() as db:
+            await AnalyticsService.add_to_leaderboard(
+                ROOM, f"p{next_score[0]}", 30.0, 0, next_score[0], 'easy', None, db
+            )
+            entries = await AnalyticsService.get_leaderboard(ROOM, 5, db)
+        next_score[0] += 1
+        await stream.publish(ROOM, entries, await state_backend.board_size(ROOM))
+        await manager.flush()
+        return entries
+
+    try:
+        for _ in range(3):
+            await add_score_and_publish()
+        legacy.messages, delta.messages = [], []
+
+        # Join: snapshot of the current top-N
+        await stream.handle_ack(delta, ROOM, None)
+        await manager.flush()
+        [snapshot] = delta.take('leaderboard_snapshot')
+        view, version = snapshot['entries'], snapshot['version']
+        assert [e['score'] for e in view] == [102, 101, 100]
+
+        # One change: legacy gets the full list, the delta client a diff that rebuilds it
+        full = await add_score_and_publish()
+        assert legacy.take('leaderboard_update')[0]['data']['entries'] == full
+        [message] = delta.take('leaderboard_delta')
+        assert message['base'] == version and message['version'] == version + 1
+        assert len(message['added']) == 1 and 'rank' not in message['added'][0]
+        view, version = apply_delta(view, message), message['version']
+        assert [(e['id'], e['rank']) for e in view] == [(e['id'], e['rank']) for e in full]
+        assert len(json.dumps(message)) < len(json.dumps({'type': 'leaderboard_update', 'data': {'entries': full}}))
+        await stream.handle_ack(delta, ROOM, version)
+
+        # Board is full (5): the next change adds one entry and removes one
+        for _ in range(2):
+            full = await add_score_and_publish()
+            [message] = delta.take('leaderboard_delta')
+            view, version = apply_delta(view, message), message['version']
+        assert len(message['added']) == 1 and len(message['removed']) == 1
+        assert [e['id'] for e in view] == [e['id'] for e in full]
+
+        # Two versions past its last ack the client is paused ...
+        for _ in range(2):
+            full = await add_score_and_publish()
+        assert delta.take('leaderboard_delta') == []
+        assert stream.clients_paused == 2
+
+        # ... and catches up with the missed deltas once it acks
+        await stream.handle_ack(delta, ROOM, version)
+        await manager.flush()
+        for message in delta.take('leaderboard_delta'):
+            assert message['base'] == version
+            view, version = apply_delta(view, message), message['version']
+        assert [e['id'] for e in view] == [e['id'] for e in full]
+
+        # A paused client whose position fell out of the history resyncs with a snapshot
+        await stream.handle_ack(delta, ROOM, version)
+        for _ in range(8):
+            full = await add_score_and_publish()
+        version = delta.take('leaderboard_delta')[-1]['version']
+        await stream.handle_ack(delta, ROOM, version)
+        await manager.flush()
+        [snapshot] = delta.take('leaderboard_snapshot')
+        assert snapshot['entries'] == full
+        client = manager.get_client(delta)
+        assert client.lb_version == client.lb_acked == snapshot['version']
+    finally:
+        manager.disconnect(legacy)
+        manager.disconnect(delta)
+        await state_backend.board_invalidate(ROOM)
+
+
+async def test_stale_room_reloaded_on_join(sessions):
+    stream = LeaderboardStream(top_n=5, session_factory=sessions)
+    first, late = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(first, ROOM)
+    try:
+        async with sessions() as db:
+            await AnalyticsService.add_to_leaderboard(ROOM, 'early', 30.0, 0, 100, 'easy', None, db)
+        await stream.handle_ack(first, ROOM, None)
+        await manager.flush()
+        [old] = first.take('leaderboard_snapshot')
+        manager.disconnect(first)
+
+        # A score lands while the room is empty here: no publish, only invalidation
+        async with sessions() as db:
+            await AnalyticsService.add_to_leaderboard(ROOM, 'late', 20.0, 0, 200, 'easy', None, db)
+        stream.invalidate(ROOM)
+
+        await manager.connect(late, ROOM)
+        await stream.handle_ack(late, ROOM, None)
+        await manager.flush()
+        [snapshot] = late.take('leaderboard_snapshot')
+        assert [e['score'] for e in snapshot['entries']] == [200, 100]
+        assert snapshot['version'] == old['version'] + 1 and snapshot['total'] == 2
+
+        # A client still on the old version gets the reload as a delta
+        client = manager.get_client(late)
+        client.lb_version = client.lb_acked = old['version']
+        await stream.handle_ack(late, ROOM, old['version'])
+        await manager.flush()
+        [message] = late.take('leaderboard_delta')
+        assert message['base'] == old['version'] and [e['score'] for e in message['added']] == [200]
+    finally:
+        manager.disconnect(first)
+        manager.disconnect(late)
+        await state_backend.board_invalidate(ROOM)
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
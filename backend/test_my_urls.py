@@ -3,8 +3,8 @@ Test My URLs endpoint to see actual error
 """
 import sys
 import traceback
-from fastapi import Request
-from app.core.database import SessionLocal
+from fastapi import Request, Response
+from app.core.database import AsyncSessionLocal
 from app.api.v1.endpoints.urls import get_my_urls
 
 
@@ -14,18 +14,16 @@ class MockRequest:
 
 
 async def test_my_urls():
-    db = SessionLocal()
     request = MockRequest()
 
-    try:
-        result = await get_my_urls(request, limit=5, db=db)
-        print(f"Success! Got {len(result)} URLs")
-        print(result)
-    except Exception as e:
-        print(f"Error: {e}")
-        traceback.print_exc()
-    finally:
-        db.close()
+    async with AsyncSessionLocal() as db:
+        try:
+            result = await get_my_urls(request, Response(), limit=5, db=db)
+            print(f"Success! Got {len(result)} URLs")
+            print(result)
+        except Exception as e:
+            print(f"Error: {e}")
+            traceback.print_exc()
 
 
 if __name__ == "__main__":
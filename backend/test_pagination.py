@@ -0,0 +1,119 @@
+"""
+Test keyset pagination: walking every page returns each row exactly once,
+in order, including ties, and bad cursors or huge limits are handled
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app.api.v1.endpoints.analytics import get_detailed_analytics
+from app.api.v1.endpoints.game import get_leaderboard
+from app.api.v1.endpoints.urls import get_my_urls
+from app.core.config import settings
+from app.models import LeaderboardEntry, ShortURL, URLAnalytics
+from app.services.global_leaderboard import GlobalLeaderboard, query_window
+from app.services.leaderboard_ranking import TopKBoards
+from app.services.shared_state import MemoryBackend
+from app.utils.pagination import encode_cursor
+
+pytestmark = pytest.mark.anyio
+
+ROWS = 57
+
+
+@pytest.fixture
+async def db(db):
+    """The shared database with ROWS leaderboard entries, sessions and URLs"""
+    now = datetime.utcnow()
+    for i in range(ROWS):
+        # Few distinct scores/times/timestamps, so pages split ties
+        db.add(LeaderboardEntry(
+            short_code='page1', player_nickname=f"p{i}", completion_time_seconds=10.0 + i % 3,
+            hints_used=0, score=100 * (i % 4), difficulty='easy', completed_at=now
+        ))
+        db.add(URLAnalytics(short_code='page1', session_start=now - timedelta(seconds=i // 5)))
+        db.add(ShortURL(
+            short_code=f"pg{i}", long_url="https://example.com", creator_ip='10.1.1.1',
+            created_at=now - timedelta(seconds=i // 5)
+        ))
+    await db.commit()
+    return db
+
+
+async def walk(fetch, page_size: int):
+    """Follow cursors until the last page; returns all rows and the page count"""
+    rows, cursor, pages = [], None, 0
+    while True:
+        page, cursor = await fetch(page_size, cursor)
+        rows.extend(page)
+        pages += 1
+        assert len(page) <= page_size
+        if cursor is None:
+            return rows, pages
+
+
+async def test_pages_cover_every_row_once(db):
+    async def leaderboard_page(limit, cursor):
+        body = await get_leaderboard('page1', limit, cursor, db)
+        return body['entries'], body['next_cursor']
+
+    async def analytics_page(limit, cursor):
+        response = Response()
+        page = await get_detailed_analytics('page1', response, limit, cursor, db)
+        return page, response.headers.get('X-Next-Cursor')
+
+    async def my_urls_page(limit, cursor):
+        response = Response()
+        request = SimpleNamespace(client=SimpleNamespace(host='10.1.1.1'))
+        page = await get_my_urls(request, response, limit, cursor, db)
+        return page, response.headers.get('X-Next-Cursor')
+
+    full, _ = await leaderboard_page(ROWS + 1, None)
+    rows, pages = await walk(leaderboard_page, 10)
+    assert [e['id'] for e in rows] == [e['id'] for e in full]
+    assert [e['rank'] for e in rows] == list(range(1, ROWS + 1))
+    assert pages == 6
+
+    full, _ = await analytics_page(ROWS + 1, None)
+    rows, _ = await walk(analytics_page, 7)
+    assert [s['id'] for s in rows] == [s['id'] for s in full] and len(rows) == ROWS
+
+    full, _ = await my_urls_page(ROWS + 1, None)
+    rows, _ = await walk(my_urls_page, 8)
+    assert [u['short_code'] for u in rows] == [u['short_code'] for u in full] and len(rows) == ROWS
+
+    # Limits are clamped to MAX_PAGE_SIZE
+    body = await get_leaderboard('page1', 10**6, None, db)
+    assert len(body['entries']) == min(ROWS, settings.MAX_PAGE_SIZE)
+
+    # Malformed cursors and cursors of another listing are rejected
+    for bad in ('not-a-cursor', encode_cursor('x', 1)):
+        try:
+            await get_leaderboard('page1', 10, bad, db)
+            assert False, "bad cursor accepted"
+        except HTTPException as e:
+            assert e.status_code == 400
+
+
+async def test_global_pages_continue_past_the_board(db):
+    board = GlobalLeaderboard(capacity=20, backend=MemoryBackend(top=TopKBoards()))
+
+    async def global_page(limit, cursor):
+        entries = await board.get('all', limit, db, after=cursor)
+        last = entries[-1] if len(entries) == limit else None
+        next_cursor = (last['score'], last['completion_time'], last['id'], last['rank']) if last else None
+        return entries, next_cursor
+
+    expected = await query_window('all', ROWS, db)
+    rows, _ = await walk(global_page, 9)
+    assert [e['id'] for e in rows] == [e['id'] for e in expected]
+    assert [e['rank'] for e in rows] == list(range(1, ROWS + 1))
+
+    # The first pages come from the board, the rest from the database
+    assert board.board_hits >= 2 and board.db_fallbacks >= 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
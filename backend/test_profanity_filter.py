@@ -2,12 +2,45 @@
 Test script for profanity filter
 Run with: python backend/test_profanity_filter.py
 """
+import random
+
+from better_profanity import Profanity
+
 from app.utils.profanity_filter import (
+    clean_batch,
     clean_text,
     is_profane,
+    is_profane_batch,
     clean_list,
+    matcher,
     sanitize_nickname
 )
+from app.utils.profanity_matcher import LEET_VARIANTS, load_wordlist
+
+TEXTS = [
+    "This is a normal message",
+    "What the hell is this",
+    "Damn this is cool",
+    "You're an asshole",
+    "Fuck this shit",
+]
+
+HINTS = [
+    "Check the homepage",
+    "Look for fucking documentation",
+    "Search in the damn GitHub repo"
+]
+
+NICKNAMES = [
+    "PlayerOne",
+    "DamnGoodPlayer",
+    "FuckingPro123",
+    "Asshole_Gamer",
+    "",
+    None,
+    "ThisIsAVeryLongNicknameWithMoreThan50CharactersJustToTestTheLimitFunctionality",
+]
+
 
 def test_profanity_filter():
     print("=" * 60)
@@ -16,15 +49,7 @@ def test_profanity_filter():
 
     # Test 1: Clean text
     print("\n1. Testing clean_text():")
-    test_cases = [
-        "This is a normal message",
-        "What the hell is this",
-        "Damn this is cool",
-        "You're an asshole",
-        "Fuck this shit",
-    ]
-
-    for text in test_cases:
+    for text in TEXTS:
         cleaned = clean_text(text)
         profane = is_profane(text)
         status = "[PROFANE]" if profane else "[CLEAN]"
@@ -34,29 +59,14 @@ def test_profanity_filter():
 
     # Test 2: Clean list
     print("\n2. Testing clean_list():")
-    hints = [
-        "Check the homepage",
-        "Look for fucking documentation",
-        "Search in the damn GitHub repo"
-    ]
-    cleaned_hints = clean_list(hints)
-    print(f"  Original hints: {hints}")
+    cleaned_hints = clean_list(HINTS)
+    print(f"  Original hints: {HINTS}")
     print(f"  Cleaned hints:  {cleaned_hints}")
     print()
 
     # Test 3: Sanitize nickname
     print("\n3. Testing sanitize_nickname():")
-    nicknames = [
-        "PlayerOne",
-        "DamnGoodPlayer",
-        "FuckingPro123",
-        "Asshole_Gamer",
-        "",
-        None,
-        "ThisIsAVeryLongNicknameWithMoreThan50CharactersJustToTestTheLimitFunctionality",
-    ]
-
-    for nick in nicknames:
+    for nick in NICKNAMES:
         cleaned_nick = sanitize_nickname(nick)
         print(f"  Original: '{nick}' -> Cleaned: '{cleaned_nick}'")
 
@@ -64,5 +74,50 @@ def test_profanity_filter():
     print("TEST COMPLETE")
     print("=" * 60)
 
+
+def generated_texts(count: int, seed: int = 20):
+    """Sentences mixing wordlist entries (some in leetspeak, upper case or
+    truncated), phrases, ordinary and unicode words, and odd separators"""
+    rng = random.Random(seed)
+    wordlist = load_wordlist()
+    ordinary = ["the", "check", "a", "x", "GitHub", "straße", "İstanbul", "it's", "**", "@", "$$", '"hi"', "1", "hand", "job", "2"]
+    separators = [" ", " ", "  ", "-", "_", ".", ", ", "!", "\n", "/", " - "]
+
+    def word():
+        roll = rng.random()
+        if roll < 0.4:
+            word = rng.choice(wordlist)
+            if rng.random() < 0.5:
+                word = ''.join(rng.choice(LEET_VARIANTS.get(c, c)) if rng.random() < 0.3 else c for c in word)
+            return word.upper() if rng.random() < 0.2 else word
+        if roll < 0.5:
+            return rng.choice(wordlist)[:-1] or "a"
+        return rng.choice(ordinary)
+
+    for _ in range(count):
+        parts = [rng.choice(separators) if rng.random() < 0.2 else ""]
+        for _ in range(rng.randint(0, 6)):
+            parts += [word(), rng.choice(separators)]
+        if rng.random() < 0.5:
+            parts.pop()
+        yield ''.join(parts)
+
+
+def test_matches_better_profanity():
+    reference = Profanity()
+    texts = TEXTS + HINTS + [nick for nick in NICKNAMES if nick] + list(generated_texts(300))
+    for text in texts:
+        assert matcher.censor(text) == reference.censor(text), text
+        assert matcher.contains_profanity(text) == reference.contains_profanity(text), text
+        assert clean_text(text, "#") == reference.censor(text, "#"), text
+
+    assert clean_list(HINTS) == ["Check the homepage", "Look for **** documentation", "Search in the **** GitHub repo"]
+    assert clean_batch(HINTS + [None, HINTS[1]]) == clean_list(HINTS) + [None, clean_list(HINTS)[1]]
+    assert is_profane_batch(TEXTS + [None]) == [False, True, True, True, True, False]
+    assert [sanitize_nickname(nick) for nick in NICKNAMES[:4]] == ["PlayerOne", "DamnGoodPlayer", "FuckingPro123", "****_Gamer"]
+
+
 if __name__ == "__main__":
     test_profanity_filter()
+    test_matches_better_profanity()
+    print("Matches better_profanity on every case")
@@ -0,0 +1,188 @@
+"""
+Test the Alembic migrations and the query plans of the hot queries
+
+Migrates a fresh SQLite database, checks the result matches the models,
+then runs the real service queries and fails if SQLite's EXPLAIN QUERY
+PLAN shows a full table scan (or, where an index should give the order,
+a sort of the whole match).
+"""
+import asyncio
+import os
+import re
+import tempfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from alembic import command
+from alembic.script import ScriptDirectory
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from fastapi import Response
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.v1.endpoints.urls import get_my_urls
+from app.core.migrations import alembic_config, run_migrations
+from app.models import Base, LeaderboardEntry, ShortURL, URLAnalytics
+from app.services.analytics_service import AnalyticsService
+from app.services.global_leaderboard import query_window
+
+FULL_SCAN = re.compile(r"\bSCAN (leaderboard|url_analytics|short_urls)\b(?! USING)")
+SORT = "USE TEMP B-TREE"
+HEAD = ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def explain(connection, statement: str, parameters) -> str:
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def capture_selects(sync_engine, run) -> list:
+    """Run a coroutine and return the SELECTs it sent to the database"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(sync_engine, "before_cursor_execute", record)
+    try:
+        asyncio.run(run())
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", record)
+    return statements
+
+
+async def seed(sessions) -> None:
+    now = datetime.utcnow()
+    async with sessions() as db:
+        for u in range(20):
+            db.add(ShortURL(
+                short_code=f"code{u}", long_url=f"https://example.com/{u}",
+                creator_ip=f"10.0.0.{u % 5}", created_at=now - timedelta(hours=u)
+            ))
+            for i in range(50):
+                db.add(LeaderboardEntry(
+                    short_code=f"code{u}", player_nickname=f"p{i}", completion_time_seconds=10.0 + i,
+                    score=(i * 37) % 1000, completed_at=now - timedelta(days=i % 14)
+                ))
+                db.add(URLAnalytics(short_code=f"code{u}", session_start=now - timedelta(minutes=i)))
+        await db.commit()
+
+
+def test_migrations_match_models():
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/migrated.db")
+        run_migrations(engine)
+
+        with engine.connect() as connection:
+            diff = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+        assert diff == [], f"models and migrations differ: {diff}"
+        engine.dispose()
+
+
+def test_existing_database_is_stamped():
+    """A database built by the old create_all gets the baseline stamp, then the new indexes"""
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/legacy.db")
+        config = alembic_config()
+        with engine.begin() as connection:
+            config.attributes['connection'] = connection
+            command.upgrade(config, "0001")
+            connection.execute(text("DROP TABLE alembic_version"))
+
+        run_migrations(engine)
+
+        indexes = {index['name'] for index in inspect(engine).get_indexes('leaderboard')}
+        assert 'ix_leaderboard_short_code_score' in indexes
+        assert 'ix_leaderboard_short_code' not in indexes
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT version_num FROM alembic_version")).scalar() == HEAD
+        engine.dispose()
+
+
+def test_current_schema_is_stamped_at_head():
+    """A database built by create_all from today's models is not migrated again"""
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/current.db")
+        Base.metadata.create_all(engine)
+
+        run_migrations(engine)
+
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT version_num FROM alembic_version")).scalar() == HEAD
+        engine.dispose()
+
+
+def test_hot_queries_use_indexes():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "plans.db")
+        sync_engine = create_engine(f"sqlite:///{path}")
+        run_migrations(sync_engine)
+
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+        asyncio.run(seed(sessions))
+
+        async def hot_queries():
+            request = SimpleNamespace(client=SimpleNamespace(host='10.0.0.2'))
+            async with sessions() as db:
+                await AnalyticsService.calculate_leaderboard_ranks('code3', db)
+                page = await AnalyticsService.get_leaderboard('code3', 10, db)
+                last = page[-1]
+                await AnalyticsService.get_leaderboard(
+                    'code3', 10, db, after=(last['score'], last['completion_time'], last['id'])
+                )
+                sessions_page = await AnalyticsService.get_detailed_analytics('code3', 20, db)
+                await AnalyticsService.get_detailed_analytics(
+                    'code3', 20, db, after=(sessions_page[-1].session_start, sessions_page[-1].id)
+                )
+                page = await query_window('all', 10, db)
+                await query_window('all', 10, db, after=(page[-1]['score'], page[-1]['completion_time'], page[-1]['id']))
+                await query_window('week', 10, db)
+                response = Response()
+                await get_my_urls(request, response, 2, None, db)
+                await get_my_urls(request, Response(), 2, response.headers['X-Next-Cursor'], db)
+            await async_engine.dispose()
+
+        # (query shape, must the filter seek an index?, must the index also provide the order?)
+        # The week window may either seek completed_at and sort, or walk the
+        # score index until LIMIT rows match; both avoid a table scan.
+        expected = [
+            ("FROM leaderboard WHERE leaderboard.short_code = ?", True, False),
+            ("FROM leaderboard WHERE leaderboard.short_code = ? ORDER BY", True, True),
+            ("FROM url_analytics WHERE url_analytics.short_code = ? ORDER BY", True, True),
+            ("FROM leaderboard ORDER BY", False, True),
+            ("FROM leaderboard WHERE leaderboard.completed_at >= ? ORDER BY", False, False),
+            ("FROM short_urls WHERE short_urls.creator_ip = ? ORDER BY", True, True),
+            # Keyset pages seek to the cursor and keep the index order
+            ("FROM leaderboard WHERE leaderboard.short_code = ? AND leaderboard.score <= ?", True, True),
+            ("FROM url_analytics WHERE url_analytics.short_code = ? AND url_analytics.session_start <= ?", True, True),
+            ("FROM leaderboard WHERE leaderboard.score <= ?", True, True),
+            ("FROM short_urls WHERE short_urls.creator_ip = ? AND short_urls.created_at <= ?", True, True),
+        ]
+
+        statements = capture_selects(async_engine.sync_engine, hot_queries)
+        with sync_engine.connect() as connection:
+            for shape, seek, ordered in expected:
+                matches = [(s, p) for s, p in statements if shape in " ".join(s.split())]
+                assert matches, f"query not issued: {shape}"
+                for statement, parameters in matches:
+                    plan = explain(connection, statement, parameters)
+                    assert not FULL_SCAN.search(plan), f"full scan for {shape}:\n{plan}"
+                    if seek:
+                        assert "SEARCH" in plan, f"filter does not use an index for {shape}:\n{plan}"
+                    if ordered:
+                        assert SORT not in plan, f"sort instead of index order for {shape}:\n{plan}"
+        sync_engine.dispose()
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("MIGRATIONS AND QUERY PLAN TEST")
+    print("=" * 60)
+    test_migrations_match_models()
+    test_existing_database_is_stamped()
+    test_current_schema_is_stamped_at_head()
+    test_hot_queries_use_indexes()
+    print("All migration and query plan checks passed")
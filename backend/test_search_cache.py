@@ -0,0 +1,134 @@
+"""
+Test the search cache: query normalization, TTL expiry, single-flight
+coalescing of identical queries, error propagation and per-challenge
+answer checks on shared results
+"""
+import asyncio
+
+import httpx
+import pytest
+
+import app.api.v1.endpoints.game as game_endpoints
+from app.api.v1.endpoints.game import SearchRequest, search_for_answer
+from app.models.url import ShortURL
+from app.services.search_cache import SearchCache, normalize_query
+from app.services.search_client import SearchClient
+from app.services.search_provider import SearchUnavailable
+
+pytestmark = pytest.mark.anyio
+
+ITEMS = {'items': [
+    {'title': 'Docs', 'link': 'https://docs.example.com/start', 'snippet': 'Getting started'},
+    {'title': 'Blog', 'link': 'https://blog.example.org/post', 'snippet': 'A post'},
+]}
+
+
+class Upstream:
+    """Mock transport handler counting calls, optionally slow or failing"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.failing = False
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append(request.url.params['q'])
+        await asyncio.sleep(self.delay)
+        if self.failing:
+            return httpx.Response(500)
+        return httpx.Response(200, json=ITEMS)
+
+
+def make_cache(upstream: Upstream, **kwargs) -> SearchCache:
+    client = SearchClient(
+        api_key='key', cx='cx', failure_threshold=100, transport=httpx.MockTransport(upstream)
+    )
+    return SearchCache(provider=client, **kwargs)
+
+
+def test_normalize_query():
+    assert normalize_query("  Python   DOCS\t") == "python docs"
+    assert normalize_query("ＰＹＴＨＯＮ") == "python"
+    assert normalize_query("Straße") == normalize_query("STRASSE")
+
+
+async def test_cache_hits_and_expiry():
+    upstream = Upstream()
+    cache = make_cache(upstream, ttl_seconds=0.05)
+    try:
+        first = await cache.search("Python docs")
+        second = await cache.search("  python   DOCS ")
+        assert first is second and upstream.calls == ["python docs"]
+
+        await asyncio.sleep(0.06)
+        await cache.search("python docs")
+        assert len(upstream.calls) == 2
+
+        stats = cache.get_stats()
+        assert stats['hits'] == 1 and stats['upstream_calls'] == 2
+        assert stats['saved_upstream_calls'] == 1 and stats['expirations'] == 1
+        assert stats['avg_latency_ms']['upstream'] > stats['avg_latency_ms']['hit']
+    finally:
+        await cache.provider.stop()
+
+
+async def test_identical_queries_share_one_call():
+    upstream = Upstream(delay=0.05)
+    cache = make_cache(upstream)
+    try:
+        results = await asyncio.gather(*(cache.search("same query") for _ in range(10)))
+        assert len(upstream.calls) == 1
+        assert all(result is results[0] for result in results)
+        assert cache.coalesced == 9 and cache.get_stats()['in_flight'] == 0
+
+        # A failure reaches every waiter and is not cached
+        upstream.failing = True
+        outcomes = await asyncio.gather(*(cache.search("failing") for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(outcome, SearchUnavailable) for outcome in outcomes)
+        assert len(upstream.calls) == 2 and cache.upstream_errors == 1
+
+        upstream.failing = False
+        assert len(await cache.search("failing")) == 2
+        assert len(upstream.calls) == 3
+
+        # A waiter going away does not cancel the shared call
+        leader = asyncio.create_task(cache.search("cancelled"))
+        follower = asyncio.create_task(cache.search("cancelled"))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        assert len(await leader) == 2
+
+        # Nor does the first caller going away: the others still get results
+        leader = asyncio.create_task(cache.search("leader left"))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(cache.search("leader left")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        assert all(len(result) == 2 for result in results)
+        assert upstream.calls.count("leader left") == 1 and cache.upstream_errors == 1
+        assert cache.get_stats()['in_flight'] == 0
+    finally:
+        await cache.provider.stop()
+
+
+async def test_answer_checked_per_challenge(db):
+    upstream = Upstream()
+    original = game_endpoints.search_cache
+    game_endpoints.search_cache = make_cache(upstream)
+    try:
+        db.add(ShortURL(short_code='docs01', long_url='https://docs.example.com/', difficulty='easy'))
+        db.add(ShortURL(short_code='else01', long_url='https://elsewhere.example/', difficulty='easy'))
+        await db.commit()
+
+        docs = await search_for_answer('docs01', SearchRequest(query='example'), db)
+        other = await search_for_answer('else01', SearchRequest(query='Example'), db)
+        assert docs.has_correct_answer and not other.has_correct_answer
+        assert docs.results == other.results and len(upstream.calls) == 1
+    finally:
+        await game_endpoints.search_cache.provider.stop()
+        game_endpoints.search_cache = original
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
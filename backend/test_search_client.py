@@ -0,0 +1,206 @@
+"""
+Test the Google search client against a local mock transport: result
+parsing, bounded concurrency, timeouts and the circuit breaker fallback
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import app.api.v1.endpoints.game as game_endpoints
+from app.api.v1.endpoints.game import SearchRequest, search_for_answer
+from app.models.url import ShortURL
+from app.services.search_cache import SearchCache
+from app.services.search_client import SearchClient
+from app.services.search_provider import SearchUnavailable
+
+pytestmark = pytest.mark.anyio
+
+ITEMS = {'items': [
+    {'title': 'Other', 'link': 'https://other.example/page', 'snippet': '...'},
+    {'title': 'Docs', 'link': 'https://docs.example.com/start', 'snippet': 'Getting started'},
+]}
+
+
+def make_client(handler, **kwargs) -> SearchClient:
+    options = dict(api_key='key', cx='cx', failure_threshold=3, reset_seconds=60)
+    options.update(kwargs)
+    return SearchClient(transport=httpx.MockTransport(handler), **options)
+
+
+async def test_search_endpoint_and_fallback(db):
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if request.url.params['q'] == 'broken':
+            return httpx.Response(503)
+        return httpx.Response(200, json=ITEMS)
+
+    client = make_client(handler)
+    original = game_endpoints.search_cache
+    game_endpoints.search_cache = SearchCache(provider=client)
+    try:
+        db.add(ShortURL(short_code='srch01', long_url='https://docs.example.com/', difficulty='easy'))
+        await db.commit()
+
+        response = await search_for_answer('srch01', SearchRequest(query='docs example'), db)
+        assert response.has_correct_answer and not response.fallback_mode
+        assert [r.url for r in response.results] == [item['link'] for item in ITEMS['items']]
+        assert seen[0].url.params['q'] == 'docs example' and seen[0].url.params['num'] == '10'
+
+        # Failing upstream: fallback results, then the circuit opens and
+        # later searches do not reach it at all
+        for _ in range(3):
+            response = await search_for_answer('srch01', SearchRequest(query='broken'), db)
+            assert response.fallback_mode and not response.has_correct_answer
+        assert client.breaker.state == 'open'
+        requests_sent = len(seen)
+        response = await search_for_answer('srch01', SearchRequest(query='new query'), db)
+        assert response.fallback_mode and len(seen) == requests_sent
+        assert client.get_stats()['circuit']['rejected'] == 1
+
+        # Not configured: fallback link without calling out
+        game_endpoints.search_cache = SearchCache(provider=SearchClient(api_key='', cx=''))
+        response = await search_for_answer('srch01', SearchRequest(query='a b'), db)
+        assert response.fallback_mode and response.results[0].url.endswith('q=a+b')
+    finally:
+        game_endpoints.search_cache = original
+        await client.stop()
+
+
+async def test_circuit_recovery():
+    healthy = False
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if not healthy:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={})
+
+    client = make_client(handler, failure_threshold=2, reset_seconds=0.05)
+    try:
+        for _ in range(2):
+            try:
+                await client.search('q')
+                assert False, "search succeeded"
+            except SearchUnavailable:
+                pass
+        assert client.breaker.state == 'open'
+
+        # Half-open trial fails: open again for another reset period
+        await asyncio.sleep(0.06)
+        assert client.breaker.state == 'half_open'
+        try:
+            await client.search('q')
+            assert False, "search succeeded"
+        except SearchUnavailable:
+            pass
+        assert client.breaker.state == 'open'
+
+        # Half-open trial succeeds: closed
+        healthy = True
+        await asyncio.sleep(0.06)
+        assert await client.search('q') == []
+        assert client.breaker.state == 'closed' and client.breaker.failures == 0
+        assert client.breaker.times_opened == 1
+    finally:
+        await client.stop()
+
+
+async def test_concurrency_and_timeouts():
+    active = 0
+    peak = 0
+
+    async def slow(request: httpx.Request) -> httpx.Response:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        return httpx.Response(200, content=json.dumps(ITEMS).encode())
+
+    client = make_client(slow, max_concurrency=2, pool_timeout=1.0)
+    try:
+        results = await asyncio.gather(*(client.search(f"q{i}") for i in range(6)))
+        assert len(results) == 6 and peak == 2
+        assert client.get_stats()['in_flight'] == 0
+    finally:
+        await client.stop()
+
+    # No slot within the pool timeout: fail fast
+    client = make_client(slow, max_concurrency=1, pool_timeout=0.01)
+    try:
+        outcomes = await asyncio.gather(client.search('a'), client.search('b'), return_exceptions=True)
+        assert isinstance(outcomes[1], SearchUnavailable) and client.slot_timeouts == 1
+    finally:
+        await client.stop()
+
+    # Read timeouts are counted and reported as unavailable
+    def timing_out(request: httpx.Request) -> httpx.Response:
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    client = make_client(timing_out)
+    try:
+        try:
+            await client.search('q')
+            assert False, "search succeeded"
+        except SearchUnavailable:
+            pass
+        assert client.timeouts == 1 and client.failures == 1
+    finally:
+        await client.stop()
+
+
+async def test_cancelled_trial_releases_circuit():
+    release = asyncio.Event()
+    healthy = False
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if not healthy:
+            return httpx.Response(500)
+        await release.wait()
+        return httpx.Response(200, json={})
+
+    client = make_client(handler, failure_threshold=1, reset_seconds=0.05, max_concurrency=1, pool_timeout=5.0)
+    try:
+        try:
+            await client.search('q')
+            assert False, "search succeeded"
+        except SearchUnavailable:
+            pass
+        assert client.breaker.state == 'open'
+
+        # The trial is cancelled mid-request: the next call may try again
+        healthy = True
+        await asyncio.sleep(0.06)
+        trial = asyncio.create_task(client.search('q'))
+        await asyncio.sleep(0.01)
+        assert client.breaker.trial_in_flight and client.in_flight == 1
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert not client.breaker.trial_in_flight and client.breaker.state == 'half_open'
+        assert client.get_stats()['in_flight'] == 0
+
+        # Cancelled while waiting for a slot (all held): same
+        await client._slots.acquire()
+        trial = asyncio.create_task(client.search('q'))
+        await asyncio.sleep(0.01)
+        assert client.breaker.trial_in_flight
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        client._slots.release()
+        assert not client.breaker.trial_in_flight
+
+        # A trial that completes closes the circuit
+        release.set()
+        assert await client.search('q') == []
+        assert client.breaker.state == 'closed'
+    finally:
+        await client.stop()
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,87 @@
+"""
+Test the search providers: the local BM25 index (ranking, tokenization,
+deterministic results, bundled corpus) and provider selection, and the
+search endpoint answering from the local index without an API key
+"""
+import pytest
+
+import app.api.v1.endpoints.game as game_endpoints
+from app.api.v1.endpoints.game import SearchRequest, search_for_answer
+from app.models.url import ShortURL
+from app.services.search_cache import SearchCache, create_search_provider
+from app.services.search_client import SearchClient
+from app.services.search_provider import LocalSearchIndex, SearchProvider, link_tokens, tokenize
+
+pytestmark = pytest.mark.anyio
+
+PAGES = [
+    {'title': 'Cooking pasta at home', 'link': 'https://recipes.example/pasta', 'snippet': 'Boil water, add salt and pasta.'},
+    {'title': 'Pasta', 'link': 'https://en.wiki.example/wiki/Pasta', 'snippet': 'Pasta is a type of food made from wheat and water.'},
+    {'title': 'Water polo rules', 'link': 'https://sports.example/water-polo', 'snippet': 'A team water sport.'},
+    {'title': 'Garden tools', 'link': 'https://shop.example/garden', 'snippet': 'Spades, rakes and hoses for watering.'},
+]
+
+
+def test_tokenize():
+    assert tokenize("Hello, WORLD! snake_case Ｆｕｌｌ") == ['hello', 'world', 'snake', 'case', 'full']
+    assert link_tokens("https://www.docs.python.org/3/tutorial/index.html") == [
+        'docs', 'python', '3', 'tutorial', 'index', 'html'
+    ]
+
+
+async def test_local_index():
+    index = LocalSearchIndex()
+    index.build(PAGES)
+
+    results = await index.search("pasta")
+    # Both pages score the same and keep corpus order; pages without the term are left out
+    assert [r['link'] for r in results] == [PAGES[0]['link'], PAGES[1]['link']]
+    assert await index.search("PASTA!") == results
+
+    assert [r['link'] for r in await index.search("water sport")][0] == PAGES[2]['link']
+    assert len(await index.search("water", limit=2)) == 2
+    assert await index.search("watering can") == [PAGES[3]]
+    assert await index.search("nothing like this") == []
+    # Host words are searchable
+    assert (await index.search("recipes"))[0] == PAGES[0]
+
+    stats = index.get_stats()
+    assert stats['provider'] == 'local' and stats['documents'] == 4 and stats['searches'] == 7
+
+    # The bundled corpus loads on first use
+    bundled = LocalSearchIndex()
+    results = await bundled.search("python tutorial")
+    assert bundled.loaded and results[0]['link'] == 'https://docs.python.org/3/tutorial/'
+
+
+async def test_endpoint_serves_local_results(db):
+    index = LocalSearchIndex()
+    index.build(PAGES)
+    original = game_endpoints.search_cache
+    game_endpoints.search_cache = SearchCache(provider=index)
+    try:
+        db.add(ShortURL(short_code='pasta1', long_url='https://en.wiki.example/', difficulty='easy'))
+        await db.commit()
+
+        response = await search_for_answer('pasta1', SearchRequest(query='pasta'), db)
+        assert not response.fallback_mode and response.has_correct_answer
+        assert [r.url for r in response.results] == [PAGES[0]['link'], PAGES[1]['link']]
+
+        response = await search_for_answer('pasta1', SearchRequest(query='garden'), db)
+        assert not response.fallback_mode and not response.has_correct_answer
+    finally:
+        game_endpoints.search_cache = original
+
+
+def test_provider_selection():
+    assert isinstance(create_search_provider("local"), LocalSearchIndex)
+    assert isinstance(create_search_provider("google"), SearchClient)
+    disabled = create_search_provider("none")
+    assert type(disabled) is SearchProvider and not disabled.configured
+    assert type(create_search_provider("bogus")) is SearchProvider
+    # Without GOOGLE_SEARCH_API_KEY / CX, auto picks the local index
+    assert isinstance(create_search_provider("auto"), LocalSearchIndex)
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,105 @@
+"""
+Test the shared state backends against a local fake Redis (no live server needed)
+"""
+import random
+
+import fakeredis.aioredis
+import pytest
+from sqlalchemy import select
+
+from app.models.url import ShortURL
+from app.services import analytics_service
+from app.services.analytics_service import AnalyticsEvent, AnalyticsService
+from app.services.leaderboard_ranking import LeaderboardRankIndex
+from app.services.shared_state import MemoryBackend, RedisBackend, new_counter_delta
+
+pytestmark = pytest.mark.anyio
+
+
+def _redis_backend() -> RedisBackend:
+    return RedisBackend(client=fakeredis.aioredis.FakeRedis(decode_responses=True))
+
+
+async def test_shared_counters():
+    for backend in (MemoryBackend(boards=LeaderboardRankIndex()), _redis_backend()):
+        first = new_counter_delta()
+        first.update(views=3, completions=1, timed=1, time_sum=12.5)
+        second = new_counter_delta()
+        second.update(views=2, failures=1)
+
+        await backend.incr_counters({'abc123': first})
+        await backend.incr_counters({'abc123': second, 'xyz789': second})
+
+        drained = await backend.drain_counters()
+        assert drained['abc123']['views'] == 5
+        assert drained['abc123']['failures'] == 1
+        assert drained['abc123']['time_sum'] == 12.5
+        assert drained['xyz789']['views'] == 2
+        assert await backend.drain_counters() == {}
+
+
+async def test_shared_leaderboards():
+    rng = random.Random(7)
+    rows = [(rng.randrange(0, 2000), rng.randrange(5, 600) + 0.25, f"e{i:04d}") for i in range(300)]
+    # Exact (score, time) ties, inserted out of id order
+    rows[10:13] = [(2500, 30.0, 'tie-b'), (2500, 30.0, 'tie-c'), (2500, 30.0, 'tie-a')]
+    rows[250:252] = [(2500, 30.0, 'tie-e'), (2500, 30.0, 'tie-d')]
+
+    memory = MemoryBackend(boards=LeaderboardRankIndex())
+    redis = _redis_backend()
+    for backend in (memory, redis):
+        assert not await backend.board_loaded('abc123')
+        await backend.board_load('abc123', rows[:200])
+        for row in rows[200:]:
+            await backend.board_insert('abc123', *row)
+        assert await backend.board_size('abc123') == 300
+
+    # Exact ties rank by entry id, as in the database
+    ranks = await redis.board_ranks('abc123', rows)
+    assert ranks == await memory.board_ranks('abc123', rows)
+    tied = await redis.board_ranks('abc123', [(2500, 30.0, f"tie-{c}") for c in 'abcde'])
+    assert tied == [1, 2, 3, 4, 5]
+    assert await redis.board_ranks('abc123', [(2500, 30.0, 'missing')]) == [None]
+
+    # Empty boards still count as loaded
+    await redis.board_load('empty', [])
+    assert await redis.board_loaded('empty')
+
+
+async def test_topk_ties_in_id_order():
+    entries = [{'id': entry_id, 'score': 900, 'completion_time': 12.5} for entry_id in ('b', 'c', 'a')]
+    entries.append({'id': 'z', 'score': 950, 'completion_time': 40.0})
+
+    for backend in (MemoryBackend(boards=LeaderboardRankIndex()), _redis_backend()):
+        await backend.topk_load('all', entries, capacity=10)
+        assert [entry['id'] for entry in await backend.topk_get('all')] == ['z', 'a', 'b', 'c']
+
+
+async def test_shared_counter_folding(db):
+    backend = _redis_backend()
+    original = analytics_service.state_backend
+    analytics_service.state_backend = backend
+    try:
+        db.add(ShortURL(short_code='abc123', long_url='https://example.com/', difficulty='easy'))
+        await db.commit()
+
+        events = [AnalyticsEvent(kind='session_start', session_id=f"s{i}", short_code='abc123') for i in range(4)]
+        events.append(AnalyticsEvent(kind='completed', session_id='s0', completion_time=30))
+        events.append(AnalyticsEvent(kind='completed', session_id='s1', completion_time=50))
+        assert await AnalyticsService.record_events(events, db)
+
+        # Buffered in Redis, not yet in the table
+        url = await db.scalar(select(ShortURL).where(ShortURL.short_code == 'abc123'))
+        assert url.total_views == 0
+
+        assert await AnalyticsService.fold_shared_counters(db) == 1
+        await db.refresh(url)
+        assert url.total_views == 4
+        assert url.total_completions == 2
+        assert url.avg_completion_time_seconds == 40
+    finally:
+        analytics_service.state_backend = original
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,81 @@
+"""
+Test the short code allocator: the permutation is a bijection, concurrent
+workers never get the same code, and codes taken by older URLs are skipped
+"""
+import asyncio
+import re
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.requests import Request
+
+from app.api.v1.endpoints.urls import create_short_url
+from app.models import CodeSequence, ShortURL
+from app.schemas.url import URLCreateRequest
+from app.services.short_code_allocator import ShortCodeAllocator, short_code_allocator
+from app.utils.short_code import BASE, code_for_index, permute
+
+pytestmark = pytest.mark.anyio
+
+CODE_PATTERN = re.compile(r'^[A-Za-z0-9]{6}$')
+
+
+def test_permutation_is_a_bijection():
+    for domain in (BASE ** 2, 10007, 2 ** 12):
+        assert sorted(permute(i, domain) for i in range(domain)) == list(range(domain))
+
+    codes = [code_for_index(i) for i in range(20000)]
+    assert len(set(codes)) == len(codes)
+    assert all(CODE_PATTERN.match(code) for code in codes)
+
+    # Consecutive numbers do not give guessable neighbours
+    assert sum(a[:4] == b[:4] for a, b in zip(codes, codes[1:])) < 10
+
+    # Past every 6-character code, codes grow to 7 characters
+    assert len(code_for_index(BASE ** 6)) == 7
+    assert code_for_index(0, key=b'other') != code_for_index(0)
+
+
+async def test_workers_never_share_codes(make_engine, tmp_path):
+    # A file database: each worker's block allocations use their own connection
+    sessions = async_sessionmaker(await make_engine(str(tmp_path / "codes.db")), expire_on_commit=False)
+
+    # Three "workers" sharing one database, with small blocks
+    workers = [ShortCodeAllocator(block_size=7, session_factory=sessions) for _ in range(3)]
+    codes = await asyncio.gather(*(
+        worker.next_code() for _ in range(100) for worker in workers
+    ))
+    assert len(set(codes)) == 300
+
+    async with sessions() as db:
+        sequence = await db.get(CodeSequence, 'short_urls')
+    blocks = sum(worker.blocks_allocated for worker in workers)
+    assert sequence.next_value == blocks * 7
+    assert all(worker.get_stats()['remaining_in_block'] < 7 for worker in workers)
+
+
+async def test_taken_codes_are_skipped(sessions):
+    original = short_code_allocator.session_factory
+    short_code_allocator.session_factory = sessions
+    try:
+        # Older random codes that happen to be the next allocated ones
+        async with sessions() as db:
+            for i in range(2):
+                db.add(ShortURL(short_code=code_for_index(i, short_code_allocator.key), long_url="https://old.example"))
+            await db.commit()
+
+        request = Request({'type': 'http', 'headers': [], 'client': ('10.2.2.2', 1234)})
+        async with sessions() as db:
+            created = await create_short_url.__wrapped__(
+                request, URLCreateRequest(long_url="https://new.example"), db
+            )
+            assert created.short_code == code_for_index(2, short_code_allocator.key)
+            assert await db.scalar(select(func.count(ShortURL.id))) == 3
+        assert short_code_allocator.collisions == 2
+    finally:
+        short_code_allocator.session_factory = original
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
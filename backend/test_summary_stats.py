@@ -0,0 +1,65 @@
+"""
+Test the incremental URL summary counters against reconcile_summary_stats:
+completions with and without a completion time, sessions that change
+outcome or complete twice, spread over several batches
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models.url import ShortURL
+from app.services.analytics_service import AnalyticsEvent, AnalyticsService
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2026, 3, 1, 12, 0)
+FIELDS = ('total_views', 'total_completions', 'total_failures', 'total_timeouts', 'timed_completions')
+
+
+def session_events(index: int):
+    sid = f"s{index}"
+    ended = START + timedelta(minutes=index)
+    events = [AnalyticsEvent('session_start', sid, START, short_code='sum01')]
+    if index % 5 == 0:
+        events.append(AnalyticsEvent('completed', sid, ended, completion_time=20.0 + index))
+    elif index % 5 == 1:
+        # Completed without a time (older clients): counted, not averaged
+        events.append(AnalyticsEvent('completed', sid, ended))
+    elif index % 5 == 2:
+        # Completed, then reported again with a corrected time
+        events.append(AnalyticsEvent('completed', sid, ended, completion_time=500.0))
+        events.append(AnalyticsEvent('completed', sid, ended, completion_time=30.0 + index))
+    elif index % 5 == 3:
+        # Completed with a time, then marked as a timeout
+        events.append(AnalyticsEvent('completed', sid, ended, completion_time=700.0))
+        events.append(AnalyticsEvent('timeout', sid, ended))
+    else:
+        events.append(AnalyticsEvent('failed', sid, ended))
+    return events
+
+
+async def summary(db):
+    url = await db.scalar(select(ShortURL).where(ShortURL.short_code == 'sum01').execution_options(populate_existing=True))
+    return {field: getattr(url, field) for field in FIELDS}, url.avg_completion_time_seconds
+
+
+async def test_running_average_matches_reconcile(db):
+    db.add(ShortURL(short_code='sum01', long_url='https://example.com/'))
+    await db.commit()
+
+    events = [e for i in range(40) for e in session_events(i)]
+    for start in range(0, len(events), 17):
+        assert await AnalyticsService.record_events(events[start:start + 17], db)
+    incremental, average = await summary(db)
+
+    assert await AnalyticsService.reconcile_summary_stats(db, 'sum01') == 1
+    reconciled, expected = await summary(db)
+
+    assert incremental == reconciled
+    assert incremental['timed_completions'] == 16
+    assert average == pytest.approx(expected)
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,111 @@
+"""
+Test the URL analysis and hint ladder computed at creation: analysis of
+typical URLs, hints served from the ladder, the on-demand fallback for
+rows without one, and the migration backfill of existing rows
+"""
+import json
+import tempfile
+
+import pytest
+from alembic import command
+from sqlalchemy import create_engine, text
+
+import app.api.v1.endpoints.game as game_endpoints
+from app.api.v1.endpoints.game import HintRequest, get_hint
+from app.core.migrations import alembic_config
+from app.models.url import ShortURL
+from app.services.url_cache import URLCache
+from app.utils.difficulty import generate_hint_for_difficulty, get_difficulty
+from app.utils.url_analysis import analyze_url, build_hint_ladder, precomputed_fields
+
+pytestmark = pytest.mark.anyio
+
+
+def test_analyze_url():
+    analysis = analyze_url('https://docs.python.org/3/tutorial/index.html')
+    assert analysis['domain'] == 'docs.python.org'
+    assert analysis['domain_parts'] == ['docs', 'python', 'org'] and analysis['tld'] == 'org'
+    assert analysis['keywords'] == ['docs', 'python', '3', 'tutorial']
+    assert analysis['category'] == 'developer tools'
+
+    # www/m and second-level registration labels are not keywords
+    assert analyze_url('https://www.bbc.co.uk/news/world')['keywords'] == ['bbc', 'news', 'world']
+    assert analyze_url('https://m.youtube.com/watch?v=abc')['category'] == 'video'
+    assert analyze_url('https://mit.edu/')['category'] == 'education'
+    assert analyze_url('https://example.com')['category'] == 'unknown'
+
+    # Stored in a JSON column
+    assert json.loads(json.dumps(analysis)) == analysis
+
+
+def test_hint_ladder_matches_generated_hints():
+    url = 'https://en.wikipedia.org/wiki/Search_engine'
+    analysis = analyze_url(url)
+    for difficulty in ('simple', 'medium', 'hard', 'expert'):
+        ladder = build_hint_ladder(difficulty, analysis)
+        assert len(ladder) == get_difficulty(difficulty).max_hints
+        assert ladder == [
+            generate_hint_for_difficulty(difficulty, analysis, level) for level in range(1, len(ladder) + 1)
+        ]
+    assert precomputed_fields(url, 'hard') == {
+        'url_analysis': analysis,
+        'hint_ladder': build_hint_ladder('hard', analysis),
+        'correct_answers': ['en.wikipedia.org']
+    }
+
+
+async def test_hints_served_from_ladder(db):
+    original = game_endpoints.url_cache
+    game_endpoints.url_cache = URLCache()
+    try:
+        db.add(ShortURL(
+            short_code='lad01', long_url='https://github.com/python/cpython', difficulty='medium',
+            hint_ladder=['first', 'second', 'third']
+        ))
+        # Created before the ladder existed
+        db.add(ShortURL(short_code='lad02', long_url='https://github.com/python/cpython', difficulty='medium'))
+        await db.commit()
+
+        response = await get_hint('lad01', HintRequest(hint_level=2), db)
+        assert response.hint == 'second' and response.hints_used == 2
+
+        response = await get_hint('lad02', HintRequest(hint_level=2), db)
+        assert response.hint == generate_hint_for_difficulty(
+            'medium', analyze_url('https://github.com/python/cpython'), 2
+        )
+    finally:
+        game_endpoints.url_cache = original
+
+
+def test_migration_backfills_existing_rows():
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/backfill.db")
+        config = alembic_config()
+        with engine.begin() as connection:
+            config.attributes['connection'] = connection
+            command.upgrade(config, "0005")
+            urls = (
+                'https://example0.com/page', 'https://www.bbc.co.uk/news/world', 'https://docs.python.org/3/',
+                'https://mit.edu/', 'https://m.youtube.com/watch?v=abc', 'not a url'
+            )
+            difficulties = ('simple', 'expert', None, 'hard', 'medium', 'unknown')
+            for i, (url, difficulty) in enumerate(zip(urls, difficulties)):
+                connection.execute(text(
+                    "INSERT INTO short_urls (id, short_code, long_url, difficulty) VALUES (:id, :code, :url, :difficulty)"
+                ), {'id': f"id{i}", 'code': f"old{i}", 'url': url, 'difficulty': difficulty})
+            command.upgrade(config, "head")
+
+            rows = connection.execute(text(
+                "SELECT long_url, difficulty, url_analysis, hint_ladder FROM short_urls ORDER BY id"
+            )).all()
+        engine.dispose()
+
+    assert len(rows) == 6
+    for long_url, difficulty, url_analysis, hint_ladder in rows:
+        expected = precomputed_fields(long_url, difficulty or 'medium')
+        assert json.loads(url_analysis) == expected['url_analysis']
+        assert json.loads(hint_ladder) == expected['hint_ladder']
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,58 @@
+"""
+Test the short URL cache: LRU/TTL expiry, negative caching and ban invalidation
+"""
+import time
+
+import pytest
+
+from app.models.url import ShortURL
+from app.services.url_cache import URLCache, url_cache
+from app.utils.ttl_cache import MISSING, TTLCache
+
+pytestmark = pytest.mark.anyio
+
+
+def test_ttl_cache_lru_and_expiry():
+    cache = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'b' is now least recently used
+    cache.set('c', 3)
+    assert cache.get('b') is MISSING
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.evictions == 1
+
+    cache.set('d', 4, ttl_seconds=0.01)
+    time.sleep(0.02)
+    assert cache.get('d') is MISSING
+    assert cache.expirations == 1
+
+
+async def test_url_cache_read_through(sessions):
+    cache = URLCache(max_size=10, ttl_seconds=60, negative_ttl_seconds=60)
+    async with sessions() as db:
+        # Unknown codes are cached negatively
+        assert await cache.get('nope01', db) is None
+        assert await cache.get('nope01', db) is None
+        assert cache.db_loads == 1 and cache.negative_hits == 1
+
+        url = ShortURL(short_code='abc123', long_url='https://example.com/', difficulty='easy')
+        db.add(url)
+        await db.commit()
+
+        first = await cache.get('abc123', db)
+        second = await cache.get('abc123', db)
+        assert first is second and first.long_url == 'https://example.com/'
+        assert cache.db_loads == 2
+
+    # Banning through the ORM drops the global cache entry
+    async with sessions() as db:
+        assert not (await url_cache.get('abc123', db)).is_banned
+        url = await db.get(ShortURL, url.id)
+        url.is_banned = True
+        await db.commit()
+        assert (await url_cache.get('abc123', db)).is_banned
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
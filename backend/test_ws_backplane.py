@@ -0,0 +1,184 @@
+"""
+Test the WebSocket backplane: room broadcasts, relayed scores and
+cluster-wide player counts, between managers in one process (memory and
+fakeredis) and between real worker processes (Unix datagram sockets)
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+
+import fakeredis.aioredis
+import pytest
+
+from app.services.websocket_manager import ConnectionManager
+from app.services.ws_backplane import MemoryBackplane, RedisBackplane, UnixSocketBackplane
+
+pytestmark = pytest.mark.anyio
+
+ROOM = 'bp1'
+WORKERS = 3
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.messages = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.messages.append(json.loads(text))
+
+    def of_type(self, message_type: str):
+        return [m for m in self.messages if m['type'] == message_type]
+
+
+async def wait_for(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out waiting for the backplane"
+        await asyncio.sleep(0.01)
+
+
+async def _exercise_two_nodes(backplane_a, backplane_b):
+    """Shared checks: relayed broadcasts and counts, and cleanup on stop"""
+    node_a = ConnectionManager(backplane=backplane_a)
+    node_b = ConnectionManager(backplane=backplane_b)
+    await backplane_a.start()
+    await backplane_b.start()
+    try:
+        ws_a, ws_b1, ws_b2 = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await node_a.connect(ws_a, ROOM)
+        await node_b.connect(ws_b1, ROOM)
+        await node_b.connect(ws_b2, ROOM)
+
+        await wait_for(lambda: node_a.get_active_players(ROOM) == 3 and node_b.get_active_players(ROOM) == 3)
+        assert node_a.get_local_players(ROOM) == 1
+        await node_a.flush()
+        assert ws_a.of_type('player_count')[-1]['count'] == 3
+
+        # A broadcast on one node reaches sockets on the other exactly once
+        await node_a.broadcast_game_complete(ROOM, {'nickname': 'p1'})
+        await wait_for(lambda: ws_b2.of_type('game_complete'))
+        await node_a.flush()
+        await node_b.flush()
+        assert len(ws_a.of_type('game_complete')) == 1
+        assert len(ws_b1.of_type('game_complete')) == 1
+
+        # Local-only messages stay local
+        await node_b.broadcast_new_score(ROOM, {'score': 1}, relay=False)
+        await node_b.flush()
+        await asyncio.sleep(0.05)
+        assert ws_a.of_type('new_score') == [] and len(ws_b1.of_type('new_score')) == 1
+
+        # A node leaving takes its players with it
+        node_b.disconnect(ws_b1)
+        await wait_for(lambda: node_a.get_active_players(ROOM) == 2)
+        await backplane_b.stop()
+        await wait_for(lambda: node_a.get_active_players(ROOM) == 1)
+        await node_a.flush()
+        assert ws_a.of_type('player_count')[-1]['count'] == 1
+    finally:
+        await backplane_a.stop()
+        await backplane_b.stop()
+
+
+async def test_memory_backplane():
+    hub = []
+    await _exercise_two_nodes(MemoryBackplane(hub=hub), MemoryBackplane(hub=hub))
+
+
+async def test_redis_backplane():
+    server = fakeredis.FakeServer()
+    await _exercise_two_nodes(
+        RedisBackplane(client=fakeredis.aioredis.FakeRedis(server=server)),
+        RedisBackplane(client=fakeredis.aioredis.FakeRedis(server=server))
+    )
+
+
+async def test_silent_node_expires():
+    hub = []
+    node_a = MemoryBackplane(hub=hub, presence_interval_seconds=0.05)
+    node_b = MemoryBackplane(hub=hub, presence_interval_seconds=0.05)
+    await node_a.start()
+    await node_b.start()
+    node_b.report_players(ROOM, 4)
+    await wait_for(lambda: node_a.remote_players(ROOM) == 4)
+
+    # Simulate a crash: node_b vanishes without saying goodbye
+    for task in node_b._tasks:
+        task.cancel()
+    hub.remove(node_b)
+    await wait_for(lambda: node_a.remote_players(ROOM) == 0, timeout=1.0)
+    await node_a.stop()
+
+
+# ==================== Multi-process (Unix sockets) ====================
+
+def _worker(directory: str, index: int, ready, results) -> None:
+    """One worker process: a socket in ROOM, reports what reaches it"""
+    async def run():
+        backplane = UnixSocketBackplane(directory=directory, node_id=f"worker{index}", presence_interval_seconds=0.2)
+        node = ConnectionManager(backplane=backplane)
+        await backplane.start()
+        ws = FakeWebSocket()
+        await node.connect(ws, ROOM)
+        ready.put(index)
+
+        await wait_for(lambda: ws.of_type('game_complete'), timeout=20.0)
+        await wait_for(lambda: node.get_active_players(ROOM) == WORKERS + 1, timeout=20.0)
+        results.put((index, ws.of_type('game_complete')[0]['data'], node.get_active_players(ROOM)))
+
+        # Stay up until the parent is done counting
+        await wait_for(lambda: os.path.exists(os.path.join(directory, 'done')), timeout=20.0)
+        await backplane.stop()
+
+    asyncio.run(run())
+
+
+def test_unix_backplane_across_processes():
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directory:
+        ready, results = context.Queue(), context.Queue()
+        workers = [context.Process(target=_worker, args=(directory, i, ready, results)) for i in range(WORKERS)]
+        for process in workers:
+            process.start()
+
+        async def run():
+            backplane = UnixSocketBackplane(directory=directory, node_id="parent", presence_interval_seconds=0.2)
+            node = ConnectionManager(backplane=backplane)
+            await backplane.start()
+            try:
+                ws = FakeWebSocket()
+                await node.connect(ws, ROOM)
+                for _ in range(WORKERS):
+                    await asyncio.to_thread(ready.get, True, 30)
+
+                await wait_for(lambda: node.get_active_players(ROOM) == WORKERS + 1, timeout=20.0)
+                await node.broadcast_game_complete(ROOM, {'nickname': 'from-parent'})
+
+                received = [await asyncio.to_thread(results.get, True, 30) for _ in range(WORKERS)]
+                assert sorted(index for index, _, _ in received) == list(range(WORKERS))
+                for _, data, players in received:
+                    assert data == {'nickname': 'from-parent'}
+                    assert players == WORKERS + 1
+
+                open(os.path.join(directory, 'done'), 'w').close()
+                await wait_for(lambda: node.get_active_players(ROOM) == 1, timeout=20.0)
+            finally:
+                await backplane.stop()
+
+        try:
+            asyncio.run(run())
+        finally:
+            for process in workers:
+                process.join(timeout=10)
+                if process.is_alive():
+                    process.terminate()
+        assert all(process.exitcode == 0 for process in workers)
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
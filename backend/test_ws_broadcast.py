@@ -0,0 +1,70 @@
+"""
+Test WebSocket broadcast fan-out: coalescing, queue overflow and send timeouts
+"""
+import asyncio
+import json
+
+import pytest
+
+from app.services.websocket_manager import ConnectionManager
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.messages = []
+        self.closed_with = None
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        await self.gate.wait()
+        self.messages.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+async def test_broadcast_fan_out():
+    manager = ConnectionManager(send_queue_size=4, send_timeout_seconds=0.05)
+    fast, stuck = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(fast, 'abc123')
+    await manager.connect(stuck, 'abc123')
+    await manager.flush()
+    fast.messages.clear()
+
+    # Snapshots queued behind a blocked send collapse into the newest one
+    fast.gate.clear()
+    for count in range(10):
+        await manager.broadcast_to_room('abc123', {'type': 'player_count', 'count': count})
+        await asyncio.sleep(0)  # First message is now in flight
+    await manager.broadcast_to_room('abc123', {'type': 'new_score', 'data': {'score': 1}})
+    fast.gate.set()
+    await manager.flush()
+    assert [m.get('count') for m in fast.messages if m['type'] == 'player_count'] == [0, 9]
+    assert fast.messages[-1]['type'] == 'new_score'
+    assert manager.messages_coalesced > 0
+
+    # A socket that never finishes a send is dropped without delaying the room
+    stuck.gate.clear()
+    await manager.broadcast_to_room('abc123', {'type': 'new_score', 'data': {'score': 2}})
+    await manager.flush()
+    await asyncio.sleep(0)
+    assert manager.get_active_players('abc123') == 1
+    assert stuck.closed_with == 1013
+    assert fast.messages[-1]['data']['score'] == 2
+
+    # Overflowing the queue with non-coalesced messages drops the client too
+    fast.gate.clear()
+    for score in range(6):
+        await manager.broadcast_to_room('abc123', {'type': 'new_score', 'data': {'score': score}})
+    assert manager.get_active_players('abc123') == 0
+    assert manager.slow_consumers_dropped == 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
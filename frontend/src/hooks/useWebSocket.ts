@@ -10,6 +10,12 @@ interface WebSocketMessage {
   message?: string;
   count?: number;
   timestamp?: number;
+  version?: number;
+  base?: number;
+  total?: number;
+  entries?: any[];
+  added?: any[];
+  removed?: string[];
 }
 
 interface UseWebSocketOptions {
@@ -190,6 +196,31 @@ export const useWebSocket = (
   };
 };
 
+/**
+ * Apply a leaderboard_delta to the current top-N.
+ * Entries are immutable, so a delta only adds and removes ids; order,
+ * rank and percentile are recomputed from score, time and the board total.
+ */
+const applyLeaderboardDelta = (entries: any[], message: WebSocketMessage): any[] => {
+  const removed = new Set(message.removed || []);
+  const merged = entries
+    .filter((entry) => !removed.has(entry.id))
+    .concat(message.added || []);
+
+  merged.sort((a, b) =>
+    b.score - a.score ||
+    a.completion_time - b.completion_time ||
+    (a.id < b.id ? -1 : a.id > b.id ? 1 : 0)
+  );
+
+  const total = message.total || merged.length;
+  return merged.map((entry, index) => ({
+    ...entry,
+    rank: index + 1,
+    percentile: ((index + 1) / total) * 100
+  }));
+};
+
 /**
  * Custom hook specifically for leaderboard WebSocket updates
  */
@@ -208,11 +239,48 @@ export const useLeaderboardWebSocket = (
   const [activePlayers, setActivePlayers] = useState(0);
   const [leaderboardData, setLeaderboardData] = useState<any[]>([]);
 
+  // Leaderboard stream position; null until the first snapshot arrives
+  const versionRef = useRef<number | null>(null);
+  const entriesRef = useRef<any[]>([]);
+
   const { isConnected, sendMessage, lastMessage } = useWebSocket(shortCode, undefined, {
     onMessage: (message) => {
       switch (message.type) {
         case 'connected':
           setActivePlayers(message.data?.active_players || 0);
+          // Opt into delta updates; the server answers with a snapshot
+          versionRef.current = null;
+          sendMessage({ type: 'leaderboard_ack', version: null });
+          break;
+
+        case 'leaderboard_snapshot':
+          entriesRef.current = message.entries || [];
+          versionRef.current = message.version ?? null;
+          setLeaderboardData(entriesRef.current);
+          sendMessage({ type: 'leaderboard_ack', version: versionRef.current });
+          if (onLeaderboardUpdate) {
+            onLeaderboardUpdate({ entries: entriesRef.current });
+          }
+          break;
+
+        case 'leaderboard_delta':
+          if (versionRef.current === null) {
+            // Snapshot requested and still on its way
+            break;
+          }
+          if (message.base !== versionRef.current) {
+            // Missed a version; ask for a fresh snapshot
+            versionRef.current = null;
+            sendMessage({ type: 'leaderboard_ack', version: null });
+            break;
+          }
+          entriesRef.current = applyLeaderboardDelta(entriesRef.current, message);
+          versionRef.current = message.version ?? null;
+          setLeaderboardData(entriesRef.current);
+          sendMessage({ type: 'leaderboard_ack', version: versionRef.current });
+          if (onLeaderboardUpdate) {
+            onLeaderboardUpdate({ entries: entriesRef.current });
+          }
           break;
 
         case 'player_count':
@@ -31,7 +31,7 @@ export const Game: React.FC = () => {
   const [gameStarted, setGameStarted] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
-  const [sessionId, setSessionId] = useState<number | null>(null);
+  const [sessionId, setSessionId] = useState<string | null>(null);
   const [showEndModal, setShowEndModal] = useState(false);
   const [finalScore, setFinalScore] = useState(0);
   const [endMessage, setEndMessage] = useState('');
@@ -108,6 +108,11 @@ export const Game: React.FC = () => {
 
   const startGame = () => {
     setGameStarted(true);
+
+    // Start the server-side clock (scores are timed from here)
+    if (shortCode && sessionId) {
+      api.game.start(shortCode, sessionId).catch((err) => console.error('Failed to start session:', err));
+    }
   };
 
   const handleTimeout = async () => {
@@ -191,7 +196,7 @@ export const Game: React.FC = () => {
 
     try {
       const hintLevel = hintsUsed + 1;
-      const response = await api.game.getHint(shortCode, hintLevel);
+      const response = await api.game.getHint(shortCode, hintLevel, sessionId || undefined);
 
       setCurrentHint(response.hint);
       setCurrentHintRoast(response.roast);
@@ -233,7 +238,7 @@ export const Game: React.FC = () => {
     if (!shortCode) return;
 
     try {
-      const response = await api.game.checkAnswer(shortCode, selectedUrl);
+      const response = await api.game.checkAnswer(shortCode, selectedUrl, sessionId || undefined);
 
       if (response.correct) {
         setGameStarted(false);
@@ -74,10 +74,12 @@ export const api = {
     initialize: (shortCode: string) => apiClient.get(`/api/v1/game/${shortCode}/initialize`),
     search: (shortCode: string, query: string) =>
       apiClient.post(`/api/v1/game/${shortCode}/search`, { query }),
-    checkAnswer: (shortCode: string, submitted_url: string) =>
-      apiClient.post(`/api/v1/game/${shortCode}/check-answer`, { submitted_url }),
-    getHint: (shortCode: string, hint_level: number) =>
-      apiClient.post(`/api/v1/game/${shortCode}/hint`, { hint_level }),
+    start: (shortCode: string, session_id: string) =>
+      apiClient.post(`/api/v1/game/${shortCode}/start`, { session_id }),
+    checkAnswer: (shortCode: string, submitted_url: string, session_id?: string) =>
+      apiClient.post(`/api/v1/game/${shortCode}/check-answer`, { submitted_url, session_id }),
+    getHint: (shortCode: string, hint_level: number, session_id?: string) =>
+      apiClient.post(`/api/v1/game/${shortCode}/hint`, { hint_level, session_id }),
     end: (shortCode: string, data: {
       outcome: string;
       score: number;